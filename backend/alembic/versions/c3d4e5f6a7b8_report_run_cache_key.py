@@ -0,0 +1,26 @@
+"""report_run cache_key
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c3d4e5f6a7b8'
+down_revision = 'b2c3d4e5f6a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 报告改为异步任务：相同 (模板, 参数, 数据版本) 复用已生成产物 / 进行中的任务
+    op.add_column('report_run', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_report_run_cache_key', 'report_run', ['cache_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_run_cache_key', table_name='report_run')
+    op.drop_column('report_run', 'cache_key')
@@ -1,5 +1,6 @@
 """数据新鲜度 API（hogprice_v3）
-查询各 fact 表的最新数据日期、行数以及 import_batch 的最近导入时间。
+从 fact_table_stats 目录（导入时维护）读取各 fact 表的最新数据日期、行数，
+以及 import_batch 的最近导入时间；不扫描事实表。
 """
 from typing import List, Optional
 from datetime import date
@@ -12,6 +13,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
+from import_tool.table_stats import load_table_stats
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/data-freshness", tags=["data-freshness"])
 
@@ -72,48 +74,37 @@ async def get_data_freshness(
     tables: List[TableFreshnessItem] = []
     total_rows = 0
 
+    stats_by_table: dict = {}
+    for row in load_table_stats(db.connection()):
+        stats_by_table.setdefault(row["table_name"], []).append(row)
+
     for table_name, date_col, source_col, label in FACT_TABLE_REGISTRY:
+        rows = stats_by_table.get(table_name, [])
         if source_col:
             # 按 source 分组
-            sql = f"""
-                SELECT {source_col} AS src,
-                       MAX(`{date_col}`) AS latest,
-                       COUNT(*) AS cnt
-                FROM `{table_name}`
-                GROUP BY {source_col}
-            """
-            rows = db.execute(text(sql)).fetchall()
             for r in rows:
-                src = r[0] or "UNKNOWN"
-                latest = r[1]
-                cnt = r[2]
-                total_rows += cnt
-                days = (today - latest).days if latest else None
+                src = r["source"] or "UNKNOWN"
+                latest = r["max_date"]
+                total_rows += r["row_count"]
                 tables.append(TableFreshnessItem(
                     table=table_name,
                     label=label,
                     source=src,
                     source_name=SOURCE_NAMES.get(src, src),
                     latest_date=latest.isoformat() if latest else None,
-                    row_count=cnt,
-                    days_ago=days,
+                    row_count=r["row_count"],
+                    days_ago=(today - latest).days if latest else None,
                 ))
         else:
-            sql = f"""
-                SELECT MAX(`{date_col}`) AS latest, COUNT(*) AS cnt
-                FROM `{table_name}`
-            """
-            row = db.execute(text(sql)).fetchone()
-            latest = row[0] if row else None
-            cnt = row[1] if row else 0
+            latest = max((r["max_date"] for r in rows if r["max_date"]), default=None)
+            cnt = sum(r["row_count"] for r in rows)
             total_rows += cnt
-            days = (today - latest).days if latest else None
             tables.append(TableFreshnessItem(
                 table=table_name,
                 label=label,
                 latest_date=latest.isoformat() if latest else None,
                 row_count=cnt,
-                days_ago=days,
+                days_ago=(today - latest).days if latest else None,
             ))
 
     # 最近导入批次
@@ -1,19 +1,22 @@
-"""导出 API（hogprice_v3 精简版）
-原 export_service 已废弃。保留端点定义避免前端 404。
+"""导出 API（hogprice_v3）
+直接从 v3 fact 表流式导出：服务端游标单遍读取 → 透视 → xlsx（constant_memory）或 CSV。
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict
 from pydantic import BaseModel
-from datetime import date
+from datetime import date, datetime
 
-from app.core.database import get_db
+from app.core.database import engine
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/export", tags=["export"])
 
+_XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
 class ExportRequest(BaseModel):
     date_range: Optional[Dict[str, date]] = None
@@ -24,6 +27,7 @@ class ExportRequest(BaseModel):
     tags_filter: Optional[Dict] = None
     group_by: Optional[List[str]] = None
     time_dimension: str = "daily"
+    format: str = "xlsx"  # xlsx | csv
     include_detail: bool = True
     include_summary: bool = True
     include_chart: bool = True
@@ -33,11 +37,36 @@ class ExportRequest(BaseModel):
 @router.post("/excel")
 async def export_excel_file(
     request: ExportRequest,
-    db: Session = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
-    """导出Excel文件（暂未迁移到 hogprice_v3）"""
-    raise HTTPException(
-        status_code=501,
-        detail="导出功能暂未迁移到 hogprice_v3，敬请期待"
+    """导出数据文件（xlsx / csv），流式返回"""
+    from app.services import export_service  # xlsxwriter 依赖，首次请求时加载
+
+    if request.format not in ("xlsx", "csv"):
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {request.format}")
+    try:
+        plan = await run_in_threadpool(
+            export_service.build_export_plan,
+            engine, request.metric_ids, request.geo_ids, request.date_range, request.time_dimension,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"hogprice_export_{datetime.now().strftime('%Y%m%d%H%M%S')}.{request.format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if request.format == "csv":
+        return StreamingResponse(
+            export_service.iter_csv(engine, plan),
+            media_type="text/csv; charset=utf-8",
+            headers=headers,
+        )
+
+    path = await run_in_threadpool(
+        export_service.write_xlsx,
+        engine, plan, request.include_cover, request.include_detail, request.include_summary, request.include_chart,
+    )
+    return StreamingResponse(
+        export_service.iter_file_and_delete(path),
+        media_type=_XLSX_MEDIA_TYPE,
+        headers=headers,
     )
@@ -18,6 +18,11 @@ from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
 from app.models.fact_futures_daily import FactFuturesDaily
+from app.services.chart_repository import get_chart_repository
+from import_tool.series_registry import fetch_series
+from import_tool.warehouse_receipts import (
+    fetch_receipt_matrix, latest_receipt_date, load_receipt_warehouses,
+)
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/futures", tags=["futures"])
 
@@ -201,35 +206,23 @@ async def get_futures_daily(
     db: Session = Depends(get_db),
 ):
     """期货日线行情查询"""
-    sql = """
-        SELECT trade_date, `open` as open_price, `high` as high_price,
-               `low` as low_price, `close` as close_price,
-               settle as settle_price, volume, open_interest
-        FROM fact_futures_daily
-        WHERE contract_code = :contract
-    """
-    params: dict = {"contract": contract}
-    if from_date:
-        sql += " AND trade_date >= :from_date"
-        params["from_date"] = from_date
-    if to_date:
-        sql += " AND trade_date <= :to_date"
-        params["to_date"] = to_date
-    sql += " ORDER BY trade_date"
-
-    rows = db.execute(text(sql), params).fetchall()
+    rows = get_chart_repository(db).series(
+        "fact_futures_daily", {"contract_code": contract},
+        columns=("open", "high", "low", "close", "settle", "volume", "open_interest"),
+        start=from_date, end=to_date,
+    )
     series = [
         {
-            "date": r.trade_date.isoformat(),
-            "open": _safe_float(r.open_price),
-            "high": _safe_float(r.high_price),
-            "low": _safe_float(r.low_price),
-            "close": _safe_float(r.close_price),
-            "settle": _safe_float(r.settle_price),
-            "volume": _safe_int(r.volume),
-            "open_interest": _safe_int(r.open_interest),
+            "date": trade_date.isoformat(),
+            "open": _safe_float(open_price),
+            "high": _safe_float(high_price),
+            "low": _safe_float(low_price),
+            "close": _safe_float(close_price),
+            "settle": _safe_float(settle_price),
+            "volume": _safe_int(volume),
+            "open_interest": _safe_int(open_interest),
         }
-        for r in rows
+        for trade_date, open_price, high_price, low_price, close_price, settle_price, volume, open_interest in rows
     ]
     return FuturesDailyResponse(contract_code=contract, series=series)
 
@@ -704,34 +697,9 @@ def _premium_valid_months(contract_month: int) -> set:
 
 
 def _get_national_spot_map(db: Session) -> Dict[date, float]:
-    """获取全国现货均价（元/公斤）。与旧版一致：优先钢联分省区猪价中国；缺日用涌益填补以保障整年覆盖。
-    优先级：hog_avg_price(GANGLIAN)=钢联中国 > 全国均价(YONGYI)=涌益日度汇总。"""
-    result: Dict[date, float] = {}
-    # 1. 钢联分省区猪价中国（与旧版 fact_observation 分省区猪价 中国列一致）
-    rows = db.execute(text("""
-        SELECT trade_date, value FROM fact_price_daily
-        WHERE price_type = 'hog_avg_price' AND region_code = 'NATION' AND source = 'GANGLIAN' AND value IS NOT NULL
-        ORDER BY trade_date
-    """)).fetchall()
-    for r in rows:
-        result[r[0]] = float(r[1])
-    # 2. 涌益全国均价填补钢联缺失的日期（确保 2022 等整年有数据）
-    for pt, src in [("全国均价", "YONGYI"), ("标猪均价", "YONGYI")]:
-        rows = db.execute(text("""
-            SELECT trade_date, value FROM fact_price_daily
-            WHERE price_type = :pt AND region_code = 'NATION' AND source = :src AND value IS NOT NULL
-            ORDER BY trade_date
-        """), {"pt": pt, "src": src}).fetchall()
-        for r in rows:
-            if r[0] not in result:
-                result[r[0]] = float(r[1])
-    if result:
-        return result
-    rows = db.execute(text("""
-        SELECT trade_date, value FROM fact_price_daily
-        WHERE region_code = 'NATION' AND value IS NOT NULL ORDER BY trade_date
-    """)).fetchall()
-    return {r[0]: float(r[1]) for r in rows} if rows else {}
+    """获取全国现货均价（元/公斤）：物化序列 national_spot，
+    即逐日 coalesce(GANGLIAN.hog_avg_price, YONGYI.全国均价, YONGYI.标猪均价)，见 import_tool/series_registry.py。"""
+    return dict(fetch_series(db, "national_spot"))
 
 
 @router.get("/premium/v2", response_model=PremiumResponseV2)
@@ -1081,18 +1049,6 @@ async def get_calendar_spread(
 # 11. /warehouse-receipt/*  -- warehouse receipt data
 # ---------------------------------------------------------------------------
 
-# 注册仓单图例显示名：原始仓库名 -> 前端图例显示名
-WAREHOUSE_LEGEND_DISPLAY = {
-    "粮肉食库": "中粮",
-    "中粮肉食库": "中粮",
-    "德康农牧库": "德康",
-}
-
-
-def _warehouse_display_name(raw_name: str) -> str:
-    return WAREHOUSE_LEGEND_DISPLAY.get(raw_name, raw_name)
-
-
 class WarehouseReceiptChartPoint(BaseModel):
     date: str
     total: Optional[float] = None
@@ -1112,66 +1068,34 @@ async def get_warehouse_receipt_chart(
     current_user: SysUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """仓单数据图表"""
-    sql = """
-        SELECT trade_date, indicator_code, value FROM fact_futures_basis
-        WHERE indicator_code LIKE 'warehouse_receipt%%'
-        ORDER BY trade_date
-    """
-    params: dict = {}
-    conditions = []
-    if start_date:
-        conditions.append("trade_date >= :sd")
-        params["sd"] = start_date
-    if end_date:
-        conditions.append("trade_date <= :ed")
-        params["ed"] = end_date
-
-    if conditions:
-        sql = f"""
-            SELECT trade_date, indicator_code, value FROM fact_futures_basis
-            WHERE indicator_code LIKE 'warehouse_receipt%%' AND {' AND '.join(conditions)}
-            ORDER BY trade_date
-        """
-
-    rows = db.execute(text(sql), params).fetchall()
-
-    # Build date -> {indicator: value} map
-    date_map: Dict[date, Dict[str, float]] = {}
-    enterprise_totals: Dict[str, float] = {}
-    for r in rows:
-        d = r[0]
-        ind = r[1]
-        val = float(r[2]) if r[2] is not None else None
-        if val is None:
-            continue
-        if d not in date_map:
-            date_map[d] = {}
-        date_map[d][ind] = val
-
-        # Track cumulative for top enterprises (by raw name)
-        if ind != "warehouse_receipt_total":
-            name = ind.replace("warehouse_receipt_", "")
-            enterprise_totals[name] = enterprise_totals.get(name, 0) + val
-
-    # Find top 2 enterprises, 返回图例显示名（粮肉食库->中粮, 德康农牧库->德康）
-    sorted_ent = sorted(enterprise_totals.items(), key=lambda x: -x[1])
-    top2 = [_warehouse_display_name(e[0]) for e in sorted_ent[:2]]
-
-    # Build response：enterprises 使用显示名作为 key，便于图例一致
+    """仓单数据图表：仓库维度 + fact_warehouse_receipt_daily 单次区间读取（库内透视）"""
+    warehouses = load_receipt_warehouses(db)
+    matrix = fetch_receipt_matrix(db, warehouses, start_date, end_date)
+
+    # 区间累计值前 2 的仓库，返回图例显示名（粮肉食库->中粮, 德康农牧库->德康）
+    cumulative = []
+    for i, w in enumerate(warehouses):
+        present = [vals[i] for _, vals in matrix if vals[i] is not None]
+        if present and not w.is_total:
+            cumulative.append((sum(present), w.display_name))
+    top2 = [name for _, name in sorted(cumulative, key=lambda x: -x[0])[:2]]
+
+    # enterprises 使用显示名作为 key，便于图例一致
     data = []
-    sorted_dates = sorted(date_map.keys())
-    for d in sorted_dates:
-        entries = date_map[d]
-        total = entries.get("warehouse_receipt_total")
+    for d, vals in matrix:
+        total = None
         enterprises = {}
-        for k, v in entries.items():
-            if k != "warehouse_receipt_total":
-                raw_name = k.replace("warehouse_receipt_", "")
-                enterprises[_warehouse_display_name(raw_name)] = v
+        for w, v in zip(warehouses, vals):
+            if v is None:
+                continue
+            if w.is_total:
+                total = v
+            else:
+                enterprises[w.display_name] = v
         data.append(WarehouseReceiptChartPoint(
             date=d.isoformat(), total=total, enterprises=enterprises,
         ))
+    sorted_dates = [d for d, _ in matrix]
 
     return WarehouseReceiptChartResponse(
         data=data,
@@ -1200,22 +1124,15 @@ async def get_warehouse_receipt_table(
     current_user: SysUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """仓单数据表格"""
-    # Get latest date's warehouse data
-    sql = """
-        SELECT indicator_code, value FROM fact_futures_basis
-        WHERE indicator_code LIKE 'warehouse_receipt%%'
-          AND indicator_code != 'warehouse_receipt_total'
-          AND trade_date = (SELECT MAX(trade_date) FROM fact_futures_basis WHERE indicator_code LIKE 'warehouse_receipt%%')
-        ORDER BY value DESC
-    """
-    rows = db.execute(text(sql)).fetchall()
+    """仓单数据表格：最新交易日各仓库仓单量，按数量降序"""
+    warehouses = [w for w in load_receipt_warehouses(db) if not w.is_total]
+    latest = latest_receipt_date(db)
+    matrix = fetch_receipt_matrix(db, warehouses, latest, latest) if latest else []
+    latest_values = [(w.warehouse_name, v) for w, v in zip(warehouses, matrix[0][1])] if matrix else []
 
     data = []
     ent_names = []
-    for r in rows:
-        name = r[0].replace("warehouse_receipt_", "")
-        val = float(r[1]) if r[1] is not None else None
+    for name, val in sorted((x for x in latest_values if x[1] is not None), key=lambda x: -x[1]):
         data.append(WarehouseReceiptTableRow(
             enterprise=name, total=val, warehouses=[{"name": name, "quantity": val}],
         ))
@@ -1278,30 +1195,12 @@ async def get_warehouse_receipt_raw(
     """仓单原始数据 - 按企业名模糊匹配，列顺序：总仓单量、企业名(集团汇总)、子仓库简称(常熟/江安/泸州等)"""
     # 德康：匹配 德康农牧库、常熟德康库 等；中粮：匹配 粮肉食库、中粮肉食库
     like_search = "德康" if enterprise == "德康" else ("粮肉食" if enterprise == "中粮" else (ENTERPRISE_GROUP_WAREHOUSE.get(enterprise) or enterprise))
-    like_pattern = f"warehouse_receipt_%{like_search}%"
-    sql = "SELECT trade_date, indicator_code, value FROM fact_futures_basis WHERE indicator_code LIKE :pat"
-    params: dict = {"pat": like_pattern}
-    if start_date:
-        sql += " AND trade_date >= :sd"
-        params["sd"] = start_date
-    if end_date:
-        sql += " AND trade_date <= :ed"
-        params["ed"] = end_date
-    sql += " ORDER BY trade_date, indicator_code"
-
-    rows = db.execute(text(sql), params).fetchall()
-
-    date_map: Dict[str, Dict[str, Optional[float]]] = {}
-    warehouse_names: list = []
-    for r in rows:
-        d = r[0].isoformat()
-        wh_name = r[1].replace("warehouse_receipt_", "")
-        val = float(r[2]) if r[2] is not None else None
-        if wh_name not in warehouse_names:
-            warehouse_names.append(wh_name)
-        if d not in date_map:
-            date_map[d] = {}
-        date_map[d][wh_name] = val
+    matched = [w for w in load_receipt_warehouses(db) if not w.is_total and like_search in w.warehouse_name]
+    matrix = fetch_receipt_matrix(db, matched, start_date, end_date, descending=True)
+    # 只保留区间内有数据的仓库（列与数据保持一致）
+    warehouse_names = [
+        w.warehouse_name for i, w in enumerate(matched) if any(vals[i] is not None for _, vals in matrix)
+    ]
 
     # 区分集团汇总仓与子仓库；子仓库按简称排序。中粮优先取「中粮肉食库」为集团仓
     group_wh = None
@@ -1322,14 +1221,14 @@ async def get_warehouse_receipt_raw(
     columns = ["总仓单量", enterprise] + [s[1] for s in sub_list]
 
     data = []
-    for d in sorted(date_map.keys(), reverse=True):
-        row_vals = date_map[d]
-        total = sum(v for v in row_vals.values() if v is not None)
+    for d, vals in matrix:
+        row_vals = {w.warehouse_name: v for w, v in zip(matched, vals)}
+        total = sum(v for v in vals if v is not None)
         values: Dict[str, Optional[float]] = {"总仓单量": round(total, 2) if total else None}
         values[enterprise] = float(row_vals[group_wh]) if group_wh and row_vals.get(group_wh) is not None else None
         for full_wh, short_wh in sub_list:
             values[short_wh] = row_vals.get(full_wh)
-        data.append(WarehouseReceiptRawRow(date=d, values=values))
+        data.append(WarehouseReceiptRawRow(date=d.isoformat(), values=values))
 
     return WarehouseReceiptRawResponse(
         enterprise=enterprise, columns=columns, rows=data,
@@ -2,7 +2,6 @@
 简化版：调用 import_tool 的 reader 进行 Excel 导入。
 保留前端 DataIngest.vue 所需的上传、执行、批次查询端点。
 """
-import asyncio
 import hashlib
 import json
 import logging
@@ -21,6 +20,7 @@ from app.core.database import get_db, SessionLocal
 from app.core.security import get_current_user, get_current_user_from_request
 from app.core.config import settings
 from app.models.sys_user import SysUser
+from app.services.ingest_task_progress import progress_bus
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/ingest", tags=["ingest"])
 
@@ -40,6 +40,17 @@ def _refresh_quick_chart_cache_after_ingest() -> dict:
     finally:
         db.close()
 
+
+def _rebuild_ranking_index_after_ingest() -> None:
+    """导入后重建 TopN 省份截面索引"""
+    try:
+        from app.core.database import engine
+        from app.services.topn_service import rebuild_ranking_index
+
+        rebuild_ranking_index(engine)
+    except Exception as e:
+        logger.exception("导入后重建排名索引失败: %s", e)
+
 # ---------- 文件名 → reader 映射 ----------
 TEMPLATE_MAP = {
     "GANGLIAN_DAILY": "r01_ganglian_daily",
@@ -70,10 +81,6 @@ FILENAME_HINTS = [
     ("涌益", "YONGYI_DAILY"),  # 默认日度
 ]
 
-# 简化的任务进度存储（内存中）
-_progress_store: dict = {}
-
-
 def _detect_template(filename: str) -> str:
     """根据文件名推断模板类型"""
     for keyword, ttype in FILENAME_HINTS:
@@ -121,6 +128,23 @@ async def upload_file(
     }
 
 
+@router.post("/preview")
+async def preview_import(
+    file: UploadFile = File(...),
+    template_type: Optional[str] = Form(None),
+    current_user: SysUser = Depends(get_current_user),
+):
+    """预览上传文件（不入库）：模板类型、各 sheet 表头与前几行样本"""
+    from fastapi.concurrency import run_in_threadpool
+
+    from app.services.ingest_preview_service import preview_excel
+
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="仅支持 Excel 文件 (.xlsx, .xls)")
+    file_content = await file.read()
+    return await run_in_threadpool(preview_excel, file_content, template_type or None, file.filename)
+
+
 @router.post("/execute")
 async def execute_import(
     background_tasks: BackgroundTasks,
@@ -134,8 +158,9 @@ async def execute_import(
     import time
 
     from import_tool.replace_scope import (
-        apply_replace_strategy,
+        build_replace_scope,
         get_replace_support_hint,
+        summarize_replace,
         supports_replace_tables,
     )
 
@@ -164,6 +189,7 @@ async def execute_import(
     tmp.write_bytes(file_content)
 
     batch_id = None
+    reader = None
     try:
         engine = db.get_bind()
         # 页面导入默认按 bulk 记录，增量模式后续再优化
@@ -174,17 +200,20 @@ async def execute_import(
         db.commit()
         batch_id = int(result_batch.lastrowid)
 
-        replace_summary = None
-        if replace_tables:
-            replace_summary = apply_replace_strategy(engine, template_type)
-            logger.info("ingest execute replace_tables: %s", replace_summary)
+        # 覆盖范围在写入事务内替换（见 import_tool/replace_scope.py），导入期间不会出现空表
+        replace_scope = build_replace_scope(template_type) if replace_tables else None
 
         reader = ReaderClass(engine, batch_id)
         result = reader.read_file(str(tmp))
 
-        counts = reader.insert_all(result, mode="bulk")
+        counts = reader.insert_all(result, mode="bulk", replace_scope=replace_scope)
         total_rows = sum(counts.values())
 
+        replace_summary = None
+        if replace_scope:
+            replace_summary = summarize_replace(template_type, replace_scope, reader.replaced_rows)
+            logger.info("ingest execute replace_tables: %s", replace_summary)
+
         duration_ms = int((time.time() - start_ms) * 1000)
 
         db.execute(text("""
@@ -195,6 +224,7 @@ async def execute_import(
         db.commit()
 
         background_tasks.add_task(_refresh_quick_chart_cache_after_ingest)
+        background_tasks.add_task(_rebuild_ranking_index_after_ingest)
 
         replace_msg = ""
         if replace_summary:
@@ -214,6 +244,8 @@ async def execute_import(
         raise
     except Exception as e:
         db.rollback()
+        if reader is not None:
+            reader.save_stages()
         if batch_id:
             try:
                 db.execute(text("""
@@ -257,12 +289,12 @@ async def submit_import(
         raise HTTPException(status_code=400, detail="仅支持 .xlsx, .xls, .zip 格式")
 
     task_id = str(uuid.uuid4())[:8]
-    _progress_store[task_id] = {
+    progress_bus.publish(task_id, {
         "status": "processing",
         "total_files": len(valid_files),
         "current_file": 0,
         "message": "准备中...",
-    }
+    })
 
     # 保存文件到临时目录；zip 自动解压并导入其中 Excel
     tmp_dir = Path(tempfile.mkdtemp(prefix="ingest_"))
@@ -311,13 +343,35 @@ async def submit_import(
     }
 
 
+def _make_stage_progress(task_id: str, file_no: int, total_files: int, fname: str):
+    """reader.on_stage 回调：每个 sheet / 写入阶段结束时刷新任务进度"""
+    state = {"sheets": 0}
+
+    def _on_stage(stage):
+        if stage.kind == "sheet":
+            state["sheets"] += 1
+            message = f"正在导入 {fname}：已解析 {stage.name}（{stage.row_count} 行，{stage.duration_ms}ms）"
+        else:
+            message = f"正在导入 {fname}：已写入 {stage.table_name}（{stage.row_count} 行，{stage.duration_ms}ms）"
+        progress_bus.publish(task_id, {
+            "status": "processing",
+            "total_files": total_files,
+            "current_file": file_no,
+            "current_sheet": state["sheets"],
+            "message": message,
+        })
+
+    return _on_stage
+
+
 def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables: bool = False):
     """后台执行导入（单个文件失败不影响其余文件，最终始终刷新缓存）"""
     import time, shutil
 
     from import_tool.replace_scope import (
-        apply_replace_strategy,
+        build_replace_scope,
         get_replace_support_hint,
+        summarize_replace,
         supports_replace_tables,
     )
 
@@ -326,12 +380,13 @@ def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables
     success_count = 0
     try:
         for i, (fpath, fname) in enumerate(file_paths):
-            _progress_store[task_id] = {
+            progress_bus.publish(task_id, {
                 "status": "processing",
                 "total_files": len(file_paths),
                 "current_file": i + 1,
                 "message": f"正在导入 {fname}",
-            }
+            })
+            reader = None
             try:
                 batch_id = None
                 ttype = _detect_template(fname)
@@ -350,25 +405,23 @@ def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables
                 db.commit()
                 batch_id = int(result_batch.lastrowid)
 
+                replace_scope = None
                 if replace_tables and supports_replace_tables(ttype):
-                    replace_summary = apply_replace_strategy(engine, ttype)
-                    if replace_summary.mode == "truncate_tables":
-                        clear_msg = f"覆盖清空: {','.join(replace_summary.truncated_tables)}"
-                    else:
-                        parts = [f"{k}:{v}" for k, v in replace_summary.deleted_rows_by_table.items()]
-                        clear_msg = f"按source清理: {', '.join(parts)}"
-                    _progress_store[task_id] = {
+                    replace_scope = build_replace_scope(ttype)
+                    progress_bus.publish(task_id, {
                         "status": "processing",
                         "total_files": len(file_paths),
                         "current_file": i + 1,
-                        "message": f"正在导入 {fname}（{clear_msg}）",
-                    }
-                    logger.info("ingest submit replace_tables: file=%s template=%s summary=%s", fname, ttype, replace_summary)
+                        "message": f"正在导入 {fname}（覆盖: {','.join(replace_scope)}）",
+                    })
 
-                reader = ReaderClass(engine, batch_id)
+                reader = ReaderClass(engine, batch_id, on_stage=_make_stage_progress(task_id, i + 1, len(file_paths), fname))
                 result = reader.read_file(fpath)
-                counts = reader.insert_all(result, mode="bulk")
+                counts = reader.insert_all(result, mode="bulk", replace_scope=replace_scope)
                 total_rows = sum(counts.values())
+                if replace_scope:
+                    replace_summary = summarize_replace(ttype, replace_scope, reader.replaced_rows)
+                    logger.info("ingest submit replace_tables: file=%s template=%s summary=%s", fname, ttype, replace_summary)
                 duration_ms = int((time.time() - start_ms) * 1000)
 
                 db.execute(text("""
@@ -380,6 +433,8 @@ def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables
                 success_count += 1
             except Exception as e:
                 logger.exception("导入文件失败: %s", fname)
+                if reader is not None:
+                    reader.save_stages()
                 try:
                     if batch_id:
                         db.execute(text("""
@@ -394,13 +449,14 @@ def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables
                 # 继续处理下一个文件，不提前返回
 
         # 无论是否有文件失败，始终刷新缓存
-        _progress_store[task_id] = {
+        progress_bus.publish(task_id, {
             "status": "processing",
             "total_files": len(file_paths),
             "current_file": len(file_paths),
             "message": "正在清除并预热图表缓存...",
-        }
+        })
         cache_result = _refresh_quick_chart_cache_after_ingest()
+        _rebuild_ranking_index_after_ingest()
         err_list = cache_result.get("errors") or []
         err_n = len(err_list)
         computed = cache_result.get("computed", 0)
@@ -411,21 +467,21 @@ def _run_bg_import(task_id: str, file_paths: list, tmp_dir: Path, replace_tables
 
         if failed_files:
             fail_detail = "；".join(failed_files)
-            _progress_store[task_id] = {
+            progress_bus.publish(task_id, {
                 "status": "done",
                 "success": False,
                 "total_files": len(file_paths),
                 "current_file": len(file_paths),
                 "message": f"导入完成（成功 {success_count}/{len(file_paths)} 个）。失败：{fail_detail}。{cache_msg}",
-            }
+            })
         else:
-            _progress_store[task_id] = {
+            progress_bus.publish(task_id, {
                 "status": "done",
                 "success": True,
                 "total_files": len(file_paths),
                 "current_file": len(file_paths),
                 "message": f"全部导入完成。{cache_msg}",
-            }
+            })
     finally:
         db.close()
         shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -437,24 +493,16 @@ async def sse_progress(
     request: Request,
     current_user: SysUser = Depends(get_current_user_from_request),
 ):
-    """SSE 流：推送导入进度"""
-    if task_id not in _progress_store:
+    """SSE 流：推送导入进度（等待进度总线通知，无变化时按间隔发送心跳注释行）"""
+    if progress_bus.get(task_id) is None:
         raise HTTPException(status_code=404, detail="任务不存在或已过期")
 
     async def event_generator():
-        last_sent = None
-        while True:
-            p = _progress_store.get(task_id)
-            if not p:
-                break
-            key = json.dumps(p, ensure_ascii=False)
-            if key != last_sent:
-                last_sent = key
-                yield f"data: {key}\n\n"
-            if p.get("status") == "done":
-                _progress_store.pop(task_id, None)
-                break
-            await asyncio.sleep(0.5)
+        async for p in progress_bus.subscribe(task_id, settings.INGEST_SSE_HEARTBEAT_SEC):
+            if p is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(p, ensure_ascii=False)}\n\n"
 
     return StreamingResponse(
         event_generator(),
@@ -506,8 +554,32 @@ async def get_batch_detail(
         "id": row[0], "filename": row[1], "source_code": row[3],
         "status": row[4], "total_rows": row[5] or 0,
         "success_rows": row[5] or 0, "failed_rows": 0,
+        "duration_ms": row[6],
         "date_range": None,
         "created_at": row[8].isoformat() if row[8] else "",
         "errors": [],
         "mapping": None,
+        "stages": _get_batch_stages(db, batch_id),
     }
+
+
+def _get_batch_stages(db: Session, batch_id: int) -> list[dict]:
+    """批次分段计时（sheet 解析 / 单表写入），按执行顺序返回"""
+    try:
+        rows = db.execute(text("""
+            SELECT kind, name, table_name, row_count, duration_ms, load_ms, upsert_ms, status, error_msg
+            FROM import_batch_stage WHERE batch_id = :bid ORDER BY seq
+        """), {"bid": batch_id}).fetchall()
+    except Exception as e:
+        # 旧库尚未执行 init-db 创建 import_batch_stage 时不影响批次详情
+        logger.warning("查询 import_batch_stage 失败: %s", e)
+        db.rollback()
+        return []
+    return [
+        {
+            "kind": r[0], "name": r[1], "table_name": r[2], "row_count": r[3] or 0,
+            "duration_ms": r[4], "load_ms": r[5], "upsert_ms": r[6],
+            "status": r[7], "error_msg": r[8],
+        }
+        for r in rows
+    ]
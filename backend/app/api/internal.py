@@ -2,11 +2,16 @@
 内部接口：供脚本 / cron 调用，不通过 Web 使用。
 使用 X-Quick-Chart-Secret 校验，无需登录。
 """
-from fastapi import APIRouter, Depends, Header, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.profiling import collapsed_text, continuous_sampler, hot_functions, profile_store
+from app.core.sql_instrumentation import slow_query_log
 from app.services.quick_chart_service import regenerate_cache_sync
 
 router = APIRouter(prefix="/api/internal", tags=["internal"])
@@ -50,3 +55,85 @@ def refresh_chart_cache(
             "computed": 0,
             "errors": [{"error": str(e)}],
         }
+
+
+@router.get("/slow-queries")
+def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    _: bool = Depends(_verify_internal_secret),
+):
+    """
+    本进程最近的慢 SQL（耗时 >= SQL_SLOW_QUERY_MS），最新的在前。
+    每条含请求路径、耗时、返回行数、语句、参数与 EXPLAIN（仅 SELECT）。
+    多 worker 部署时每个进程各自一份。
+    """
+    return {
+        "threshold_ms": settings.SQL_SLOW_QUERY_MS,
+        "capacity": settings.SQL_SLOW_QUERY_RING_SIZE,
+        "items": slow_query_log.snapshot(limit),
+    }
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries(_: bool = Depends(_verify_internal_secret)):
+    """清空本进程的慢 SQL 记录"""
+    return {"ok": True, "cleared": slow_query_log.clear()}
+
+
+@router.get("/profiles")
+def list_profiles(_: bool = Depends(_verify_internal_secret)):
+    """本进程最近的按需剖析结果（请求带 ?__profile=1 或 X-Profile: 1 及本密钥头时生成），最新的在前"""
+    return {"items": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    top: int = Query(30, ge=1, le=500),
+    _: bool = Depends(_verify_internal_secret),
+):
+    """
+    单次剖析结果。format=collapsed 返回 collapsed stack 文本
+    （flamegraph.pl 或 https://www.speedscope.app 直接打开），json 返回热点函数。
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="profile not found (不存在或已被淘汰，多 worker 时需命中同一进程)")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_text(profile["stacks"]))
+    meta = {k: v for k, v in profile.items() if k != "stacks"}
+    return {**meta, "hot_functions": hot_functions(profile["stacks"], top)}
+
+
+@router.get("/profile-report")
+def profile_report(
+    top: int = Query(20, ge=1, le=200),
+    _: bool = Depends(_verify_internal_secret),
+):
+    """持续剖析（PROFILE_SAMPLE_INTERVAL_MS > 0）按路由累计的热点函数，按样本数降序"""
+    sampler = continuous_sampler()
+    if sampler is None:
+        return {"enabled": False, "routes": []}
+    stacks = sampler.stacks()
+    routes = sorted(
+        ({"route": route, "samples": sum(c.values()), "hot_functions": hot_functions(c, top)}
+         for route, c in stacks.items()),
+        key=lambda r: r["samples"], reverse=True,
+    )
+    return {
+        "enabled": True,
+        "interval_ms": settings.PROFILE_SAMPLE_INTERVAL_MS,
+        "since": datetime.fromtimestamp(sampler.started_at).isoformat(timespec="seconds"),
+        "ticks": sampler.samples,
+        "routes": routes,
+    }
+
+
+@router.delete("/profile-report")
+def reset_profile_report(_: bool = Depends(_verify_internal_secret)):
+    """清零持续剖析累计"""
+    sampler = continuous_sampler()
+    if sampler is not None:
+        sampler.reset()
+    return {"ok": True}
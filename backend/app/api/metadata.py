@@ -9,52 +9,12 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
+from app.core.metric_catalog import METRIC_CATALOG
+from app.services.region_mapping_service import get_dim_region_maps
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/dim", tags=["metadata"])
 
 
-# ── 指标目录（Python dict 维护） ──
-METRIC_CATALOG = [
-    # 日度价格
-    {"metric_group": "price", "metric_name": "全国标猪均价", "code": "标猪均价", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "price", "metric_name": "散户标猪价", "code": "散户标猪价", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "price", "metric_name": "省份均价", "code": "省份均价", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "price", "metric_name": "钢联猪价", "code": "hog_price", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "price", "metric_name": "白条价格", "code": "white_strip_price", "unit": "元/公斤", "freq": "D"},
-    # 日度价差
-    {"metric_group": "spread", "metric_name": "标肥价差", "code": "std_fat_spread", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "spread", "metric_name": "毛白价差", "code": "mao_bai_spread", "unit": "元/公斤", "freq": "D"},
-    {"metric_group": "spread", "metric_name": "区域价差", "code": "region_spread", "unit": "元/公斤", "freq": "D"},
-    # 日度屠宰
-    {"metric_group": "slaughter", "metric_name": "屠宰量", "code": "slaughter_volume", "unit": "头", "freq": "D"},
-    # 周度指标
-    {"metric_group": "weekly", "metric_name": "商品猪出栏价", "code": "hog_price_out", "unit": "元/公斤", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "出栏均重", "code": "weight_avg", "unit": "公斤", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "冻品库容率", "code": "frozen_rate", "unit": "%", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "仔猪价格", "code": "piglet_price_15kg", "unit": "元/公斤", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "母猪价格", "code": "sow_price_50kg", "unit": "元/头", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "养殖利润(万头)", "code": "profit_breeding_10000", "unit": "元/头", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "全价料价格", "code": "feed_price_complete", "unit": "元/吨", "freq": "W"},
-    {"metric_group": "weekly", "metric_name": "鲜销率", "code": "fresh_sale_rate", "unit": "%", "freq": "W"},
-    # 月度指标
-    {"metric_group": "monthly", "metric_name": "能繁母猪存栏", "code": "breeding_sow_inventory", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "仔猪存栏", "code": "piglet_inventory", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "大猪存栏", "code": "hog_inventory", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "商品猪出栏量", "code": "hog_output_volume", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "淘汰母猪屠宰", "code": "cull_slaughter", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "PSY", "code": "prod_psy", "unit": "头", "freq": "M"},
-    {"metric_group": "monthly", "metric_name": "MSY", "code": "prod_msy", "unit": "头", "freq": "M"},
-    # 季度指标
-    {"metric_group": "quarterly", "metric_name": "统计局生猪存栏", "code": "nbs_hog_inventory", "unit": "万头", "freq": "Q"},
-    {"metric_group": "quarterly", "metric_name": "统计局能繁存栏", "code": "nbs_sow_inventory", "unit": "万头", "freq": "Q"},
-    {"metric_group": "quarterly", "metric_name": "统计局生猪出栏", "code": "nbs_hog_output", "unit": "万头", "freq": "Q"},
-    {"metric_group": "quarterly", "metric_name": "统计局猪肉产量", "code": "nbs_pork_output", "unit": "万吨", "freq": "Q"},
-    # 期货
-    {"metric_group": "futures", "metric_name": "期货收盘价", "code": "futures_close", "unit": "元/吨", "freq": "D"},
-    {"metric_group": "futures", "metric_name": "期货结算价", "code": "futures_settle", "unit": "元/吨", "freq": "D"},
-]
-
-
 class MetricInfo(BaseModel):
     id: int
     metric_group: str
@@ -108,10 +68,8 @@ async def get_geo(
     current_user: SysUser = Depends(get_current_user)
 ):
     """获取地区列表"""
-    rows = db.execute(text(
-        "SELECT region_code, region_name, parent_code FROM dim_region WHERE region_level = 2 ORDER BY region_code"
-    )).fetchall()
-    return [{"id": i, "province": r[1], "region": r[2]} for i, r in enumerate(rows, 1)]
+    provinces = get_dim_region_maps(db)["provinces"]
+    return [{"id": i, "province": name, "region": parent} for i, (_, name, parent) in enumerate(provinces, 1)]
 
 
 @router.get("/company", response_model=List[CompanyInfo])
@@ -147,30 +105,40 @@ async def get_metrics_completeness_api(
     db: Session = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
-    """获取各表数据完整度"""
+    """获取各表数据完整度（读 fact_table_stats 覆盖位图与 fact_table_stats_daily 按天行数）"""
     from datetime import datetime, timedelta
+    from import_tool.table_stats import load_table_stats, window_coverage
 
     as_of_date = datetime.strptime(as_of, "%Y-%m-%d").date() if as_of else datetime.now().date()
     start = as_of_date - timedelta(days=window)
 
     tables = [
-        ("fact_price_daily", "trade_date"),
-        ("fact_spread_daily", "trade_date"),
-        ("fact_slaughter_daily", "trade_date"),
-        ("fact_weekly_indicator", "week_end"),
-        ("fact_monthly_indicator", "month_date"),
-        ("fact_enterprise_daily", "trade_date"),
+        "fact_price_daily",
+        "fact_spread_daily",
+        "fact_slaughter_daily",
+        "fact_weekly_indicator",
+        "fact_monthly_indicator",
+        "fact_enterprise_daily",
     ]
 
+    stats_by_table: dict = {}
+    for row in load_table_stats(db.connection()):
+        stats_by_table.setdefault(row["table_name"], []).append(row)
+    counts = dict(db.execute(text(
+        "SELECT table_name, SUM(row_count) FROM fact_table_stats_daily "
+        "WHERE stat_date BETWEEN :s AND :e GROUP BY table_name"
+    ), {"s": start, "e": as_of_date}).fetchall())
+
     results = []
-    for tbl, dcol in tables:
-        row = db.execute(text(
-            f"SELECT COUNT(*), MAX(`{dcol}`) FROM `{tbl}` WHERE `{dcol}` BETWEEN :s AND :e"
-        ), {"s": start, "e": as_of_date}).fetchone()
+    for tbl in tables:
+        cov = window_coverage(stats_by_table.get(tbl, []), start, as_of_date)
         results.append({
             "table": tbl,
-            "count_in_window": row[0],
-            "latest_date": row[1].isoformat() if row[1] else None,
+            "count_in_window": int(counts.get(tbl) or 0),
+            "days_covered": cov["days_covered"],
+            "missing_days": cov["missing_days"],
+            "coverage_ratio": cov["coverage_ratio"],
+            "latest_date": cov["latest_date"].isoformat() if cov["latest_date"] else None,
             "window_start": start.isoformat(),
             "window_end": as_of_date.isoformat()
         })
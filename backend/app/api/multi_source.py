@@ -10,11 +10,14 @@ E2. 多渠道汇总 API
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from pydantic import BaseModel
 
 from app.core.database import get_db
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 router = APIRouter(prefix="/api/v1/multi-source", tags=["multi-source"])
 
 
@@ -70,8 +73,8 @@ class MultiSourceResponse(BaseModel):
 #
 # All values queried from fact_monthly_indicator for this API use
 # value_type IN ('mom_pct', 'mom') (month-over-month percentage).
-# sub_category and region_code use NULL / 'NATION' as defaults; we
-# normalise NULLs via COALESCE in the SQL query.
+# sub_category ('' default) and region_code ('NATION' default) are NOT NULL
+# columns, so they are matched directly.
 # ---------------------------------------------------------------------------
 INDICATOR_FIELD_MAP: dict[tuple[str, str, str, str], str] = {
     # --- 淘汰母猪屠宰环比 ---
@@ -128,15 +131,10 @@ INDICATOR_FIELD_MAP: dict[tuple[str, str, str, str], str] = {
     ("fattening_feed", "ASSOCIATION", "", "NATION"): "hog_feed_association",
 }
 
-# Build the set of indicator_codes and sources we need so the SQL query
-# can filter early and avoid scanning unrelated rows.
-_NEEDED_INDICATORS = sorted({k[0] for k in INDICATOR_FIELD_MAP})
-_NEEDED_SOURCES = sorted({k[1] for k in INDICATOR_FIELD_MAP})
-
 # ---------------------------------------------------------------------------
 # Abs-based MoM computations for fields where mom_pct is absent in the DB.
 # Format: (indicator_code, source, sub_category, region_code, response_field)
-# Only fills the field if not already populated by the mom_pct query above.
+# Only fills the field if not already populated by mom_pct rows.
 # ---------------------------------------------------------------------------
 ABS_COMPUTED_FIELDS: list = [
     # 淘汰母猪屠宰环比 — YONGYI/钢联 abs only
@@ -160,37 +158,90 @@ ABS_COMPUTED_FIELDS: list = [
 ]
 
 
-def _compute_abs_mom_fields(db: Session, abs_fields: list) -> dict:
+_ABS_FIELD_MAP: dict[tuple[str, str, str, str], str] = {
+    (ind, src, sub, rgn): field for ind, src, sub, rgn, field in ABS_COMPUTED_FIELDS
+}
+_QUERY_INDICATORS = sorted({k[0] for k in INDICATOR_FIELD_MAP} | {k[0] for k in _ABS_FIELD_MAP})
+_QUERY_SOURCES = sorted({k[1] for k in INDICATOR_FIELD_MAP} | {k[1] for k in _ABS_FIELD_MAP})
+_QUERY_REGIONS = sorted({k[3] for k in INDICATOR_FIELD_MAP} | {k[3] for k in _ABS_FIELD_MAP})
+
+
+def _fetch_monthly_rows(db: Session) -> "pd.DataFrame":
     """
-    For each abs-field spec, query abs values ordered by month and compute
-    month-over-month % change.  Returns {field_name: {month: mom_pct}}.
+    一次查询取出所有映射需要的行（mom_pct/mom 与 abs）。
+    sub_category / region_code 均为 NOT NULL 列，直接按原列过滤，可走 idx_indicator_date。
     """
-    result: dict = {}
-    for ind, src, sub, rgn, field_name in abs_fields:
-        sql = text("""
-            SELECT LEFT(month_date, 7) AS month, value
-            FROM fact_monthly_indicator
-            WHERE indicator_code = :ind
-              AND source          = :src
-              AND value_type      = 'abs'
-              AND COALESCE(sub_category,  '') = :sub
-              AND COALESCE(region_code, 'NATION') = :rgn
-              AND value IS NOT NULL
-            ORDER BY month_date
-        """)
-        rows = db.execute(sql, {"ind": ind, "src": src, "sub": sub, "rgn": rgn}).fetchall()
-        month_vals = {r[0]: float(r[1]) for r in rows}
-        sorted_months = sorted(month_vals.keys())
-
-        field_moms: dict = {}
-        prev_val = None
-        for month in sorted_months:
-            curr_val = month_vals[month]
-            if prev_val is not None and prev_val != 0:
-                field_moms[month] = round((curr_val - prev_val) / prev_val * 100, 2)
-            prev_val = curr_val
-        result[field_name] = field_moms
-    return result
+    def _in(prefix: str, values: list) -> tuple[str, dict]:
+        names = [f"{prefix}_{i}" for i in range(len(values))]
+        return ", ".join(f":{n}" for n in names), dict(zip(names, values))
+
+    ind_sql, params = _in("ind", _QUERY_INDICATORS)
+    src_sql, src_params = _in("src", _QUERY_SOURCES)
+    rgn_sql, rgn_params = _in("rgn", _QUERY_REGIONS)
+    params.update(src_params)
+    params.update(rgn_params)
+    import pandas as pd
+
+    rows = db.execute(text(f"""
+        SELECT LEFT(month_date, 7) AS month, indicator_code, source, sub_category,
+               region_code, value_type, value
+        FROM fact_monthly_indicator
+        WHERE indicator_code IN ({ind_sql})
+          AND source         IN ({src_sql})
+          AND region_code    IN ({rgn_sql})
+          AND value_type     IN ('mom_pct', 'mom', 'abs')
+          AND value IS NOT NULL
+        ORDER BY month_date, id
+    """), params).fetchall()
+    return pd.DataFrame(
+        rows, columns=["month", "indicator_code", "source", "sub_category", "region_code", "value_type", "value"]
+    )
+
+
+def _build_month_field_matrix(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    行 → 「月份 × 响应字段」矩阵（值为环比 %，保留两位小数）。
+
+    1. mom_pct/mom 行按 INDICATOR_FIELD_MAP 映射（先精确匹配 sub_category，再回退到 ''），
+       同一 (月份, 字段) 先出现者优先
+    2. abs 行按 ABS_COMPUTED_FIELDS 映射后透视，环比 = 当月 / 该字段上一个有值月份 - 1（向量化 shift）
+    3. 仅填补第 1 步缺失的单元格
+    """
+    import numpy as np
+    import pandas as pd
+
+    if df.empty:
+        return pd.DataFrame()
+    df = df.assign(sub_category=df["sub_category"].fillna(""), value=df["value"].astype(float))
+    key_cols = ["indicator_code", "source", "sub_category", "region_code"]
+
+    mom = df[df["value_type"].isin(["mom_pct", "mom"])]
+    keys = list(zip(*(mom[c] for c in key_cols)))
+    exact = pd.Series([INDICATOR_FIELD_MAP.get(k) for k in keys], index=mom.index, dtype=object)
+    fallback = pd.Series(
+        [INDICATOR_FIELD_MAP.get((k[0], k[1], "", k[3])) if k[2] else None for k in keys],
+        index=mom.index, dtype=object,
+    )
+    mom = mom.assign(field=exact.fillna(fallback)).dropna(subset=["field"])
+    mom = mom.drop_duplicates(subset=["month", "field"], keep="first")
+    direct = mom.pivot(index="month", columns="field", values="value").round(2)
+
+    abs_rows = df[df["value_type"] == "abs"]
+    abs_fields = pd.Series(
+        [_ABS_FIELD_MAP.get(k) for k in zip(*(abs_rows[c] for c in key_cols))],
+        index=abs_rows.index, dtype=object,
+    )
+    abs_rows = abs_rows.assign(field=abs_fields).dropna(subset=["field"])
+    abs_rows = abs_rows.drop_duplicates(subset=["month", "field"], keep="first")
+    if abs_rows.empty:
+        return direct
+    level = abs_rows.pivot(index="month", columns="field", values="value").sort_index()
+    prev = level.ffill().shift(1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = ((level - prev) / prev * 100).where((prev != 0) & level.notna()).round(2)
+    derived = derived.replace([np.inf, -np.inf], np.nan)
+    matrix = direct.combine_first(derived) if not direct.empty else derived
+    return matrix.dropna(how="all")
 
 
 @router.get("/data", response_model=MultiSourceResponse)
@@ -203,82 +254,14 @@ async def get_multi_source_data(
     数据来源：fact_monthly_indicator (hogprice_v3)
     """
     # ------------------------------------------------------------------
-    # 1. Query all relevant mom_pct rows in one shot
-    # ------------------------------------------------------------------
-    indicator_placeholders = ", ".join(
-        f":ind_{i}" for i in range(len(_NEEDED_INDICATORS))
-    )
-    source_placeholders = ", ".join(
-        f":src_{i}" for i in range(len(_NEEDED_SOURCES))
-    )
-
-    sql = f"""
-        SELECT
-            LEFT(month_date, 7)                        AS month,
-            indicator_code,
-            source,
-            COALESCE(sub_category, '')                 AS sub_cat,
-            COALESCE(region_code, 'NATION')            AS region,
-            ROUND(value, 2)                            AS val
-        FROM fact_monthly_indicator
-        WHERE value_type IN ('mom_pct', 'mom')
-          AND indicator_code IN ({indicator_placeholders})
-          AND source            IN ({source_placeholders})
-        ORDER BY month_date
-    """
-
-    params: dict = {}
-    for i, ind in enumerate(_NEEDED_INDICATORS):
-        params[f"ind_{i}"] = ind
-    for i, src in enumerate(_NEEDED_SOURCES):
-        params[f"src_{i}"] = src
-
-    rows = db.execute(text(sql), params).fetchall()
-
-    # ------------------------------------------------------------------
-    # 2. Pivot rows into {month: {field: value}} using the mapping
-    # ------------------------------------------------------------------
-    month_data: dict[str, dict[str, float]] = {}
-
-    for row in rows:
-        month = row[0]       # YYYY-MM
-        ind   = row[1]       # indicator_code
-        src   = row[2]       # source
-        sub   = row[3]       # sub_category (empty string if NULL)
-        rgn   = row[4]       # region_code
-        val   = row[5]       # value (already rounded)
-
-        if val is None:
-            continue
-
-        val = float(val)
-
-        # Lookup with the exact (ind, src, sub_cat, region) key
-        field = INDICATOR_FIELD_MAP.get((ind, src, sub, rgn))
-        # Fallback: try with empty sub_category
-        if field is None and sub:
-            field = INDICATOR_FIELD_MAP.get((ind, src, "", rgn))
-        if field is None:
-            continue
-
-        if month not in month_data:
-            month_data[month] = {}
-
-        # First-writer wins per (month, field) to avoid duplicates
-        if field not in month_data[month]:
-            month_data[month][field] = val
-
-    # ------------------------------------------------------------------
-    # 2.5 Supplement with abs-derived MoM for fields without mom_pct data
+    # 1-2. One query for every mapped (indicator, source, sub_category,
+    #      value_type), pivoted to a month x field matrix
     # ------------------------------------------------------------------
-    abs_mom = _compute_abs_mom_fields(db, ABS_COMPUTED_FIELDS)
-    for field_name, field_moms in abs_mom.items():
-        for month, mom_val in field_moms.items():
-            if month not in month_data:
-                month_data[month] = {}
-            # Only fill if not already populated from mom_pct query
-            if field_name not in month_data[month]:
-                month_data[month][field_name] = mom_val
+    matrix = _build_month_field_matrix(_fetch_monthly_rows(db))
+    month_data: dict[str, dict[str, float]] = {
+        month: {k: float(v) for k, v in row.items() if v == v}  # 跳过 NaN
+        for month, row in matrix.iterrows()
+    }
 
     # ------------------------------------------------------------------
     # 3. Populate NYB compat fields (*_nyb = copy of *_nyb_nation)
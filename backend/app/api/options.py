@@ -62,3 +62,30 @@ async def get_options_daily(
         option_code=results[0].option_code if results else "",
         series=series
     )
+
+
+class OptionsSurfaceResponse(BaseModel):
+    trade_dates: List[str]
+    points: List[dict]
+    skew: List[dict]
+
+
+@router.get("/surface", response_model=OptionsSurfaceResponse)
+async def get_options_surface(
+    underlying: Optional[str] = Query(None, description="标的合约，如 lh2603；不传为全部标的"),
+    from_date: Optional[date] = Query(None, description="开始日期；与结束日期都不传时取最新交易日"),
+    to_date: Optional[date] = Query(None, description="结束日期"),
+    rate: Optional[float] = Query(None, description="无风险利率，默认 OPTIONS_RISK_FREE_RATE"),
+    current_user: SysUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """期权波动率曲面：逐合约 IV/delta/gamma/vega，及每日每标的 ATM IV 与 25Δ skew"""
+    from app.services.options_analytics_service import build_surface
+
+    return OptionsSurfaceResponse(**build_surface(
+        db,
+        rate=settings.OPTIONS_RISK_FREE_RATE if rate is None else rate,
+        underlying=underlying,
+        from_date=from_date,
+        to_date=to_date,
+    ))
@@ -31,6 +31,9 @@ from app.services.lunar_alignment_service import (
     get_leap_month_info,
     get_lunar_year_date_range_la_ba,
 )
+from app.services.chart_repository import get_chart_repository
+from app.services.region_mapping_service import get_dim_region_maps
+from import_tool.series_registry import fetch_series
 
 router = APIRouter(prefix="/api/v1/price-display", tags=["price-display"])
 logger = logging.getLogger(__name__)
@@ -171,6 +174,15 @@ class ProvinceIndicatorsResponse(BaseModel):
 # 通用辅助函数
 # ---------------------------------------------------------------------------
 
+def _row_pair(row, date_col: str, value_col: str):
+    """(日期, 值)：兼容 SQLAlchemy Row、dict 与图表仓储返回的 (date, value) 元组"""
+    if hasattr(row, '_mapping'):
+        return row._mapping[date_col], row._mapping[value_col]
+    if isinstance(row, tuple):
+        return row[0], row[1]
+    return row[date_col], row[value_col]
+
+
 def _rows_to_daily_seasonality(
     rows,
     *,
@@ -182,8 +194,7 @@ def _rows_to_daily_seasonality(
     """将 (trade_date, value) 行列表转为按年分组的 SeasonalitySeries 列表。"""
     year_data: Dict[int, List[Dict]] = {}
     for row in rows:
-        d = row._mapping[date_col] if hasattr(row, '_mapping') else row[date_col]
-        v = row._mapping[value_col] if hasattr(row, '_mapping') else row[value_col]
+        d, v = _row_pair(row, date_col, value_col)
         if d is None:
             continue
         year = d.year
@@ -210,7 +221,7 @@ def _rows_to_daily_seasonality(
     latest_date: Optional[str] = None
     if rows:
         last_row = rows[-1]
-        d = last_row._mapping[date_col] if hasattr(last_row, '_mapping') else last_row[date_col]
+        d = _row_pair(last_row, date_col, value_col)[0]
         if d:
             latest_date = d.isoformat()
     return series, latest_date
@@ -225,8 +236,7 @@ def _rows_to_weekly_seasonality(
     """将周度 (trade_date, value) 行列表按 ISO 周号分组为季节性曲线。"""
     year_data: Dict[int, Dict[int, List[float]]] = {}
     for row in rows:
-        d = row._mapping[date_col] if hasattr(row, '_mapping') else row[date_col]
-        v = row._mapping[value_col] if hasattr(row, '_mapping') else row[value_col]
+        d, v = _row_pair(row, date_col, value_col)
         if d is None:
             continue
         year = d.year
@@ -254,14 +264,25 @@ def _rows_to_weekly_seasonality(
     latest_date: Optional[str] = None
     if rows:
         last_row = rows[-1]
-        d = last_row._mapping[date_col] if hasattr(last_row, '_mapping') else last_row[date_col]
+        d = _row_pair(last_row, date_col, value_col)[0]
         if d:
             latest_date = d.isoformat()
     return series, latest_date
 
 
+def _year_bounds(start_year: Optional[int], end_year: Optional[int]) -> Tuple[Optional[date], Optional[date]]:
+    """年份筛选 → 日期范围（按日期列范围过滤可走索引 / 分区裁剪，等价于 YEAR(col) 比较）"""
+    return (
+        date(start_year, 1, 1) if start_year else None,
+        date(end_year, 12, 31) if end_year else None,
+    )
+
+
 def _resolve_region_code(db: Session, province_name: str) -> Optional[str]:
-    """根据省份名称在 dim_region 中查找 region_code。"""
+    """根据省份名称在 dim_region 中查找 region_code（先查进程内查找表）。"""
+    code = get_dim_region_maps(db)["name_to_code"].get(province_name)
+    if code:
+        return code
     row = db.execute(
         text("SELECT region_code FROM dim_region WHERE region_name = :name LIMIT 1"),
         {"name": province_name},
@@ -367,35 +388,8 @@ async def get_slaughter_price_trend_lunar_year(
         {"s": all_start, "e": all_end},
     ).fetchall()
 
-    price_rows = db.execute(
-        text("""
-            SELECT trade_date, value FROM fact_price_daily
-            WHERE price_type = '标猪均价' AND region_code = 'NATION' AND source = 'YONGYI'
-              AND trade_date BETWEEN :s AND :e
-            ORDER BY trade_date
-        """),
-        {"s": all_start, "e": all_end},
-    ).fetchall()
-    if not price_rows:
-        price_rows = db.execute(
-            text("""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = '全国均价' AND region_code = 'NATION' AND source = 'YONGYI'
-                  AND trade_date BETWEEN :s AND :e
-                ORDER BY trade_date
-            """),
-            {"s": all_start, "e": all_end},
-        ).fetchall()
-    if not price_rows:
-        price_rows = db.execute(
-            text("""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = 'hog_avg_price' AND region_code = 'NATION' AND source = 'GANGLIAN'
-                  AND trade_date BETWEEN :s AND :e
-                ORDER BY trade_date
-            """),
-            {"s": all_start, "e": all_end},
-        ).fetchall()
+    # 价格：物化序列 national_std_hog（逐日 YONGYI 标猪均价 > YONGYI 全国均价 > GANGLIAN hog_avg_price）
+    price_rows = fetch_series(db, "national_std_hog", all_start, all_end)
 
     slaughter_data: List[Dict[str, Any]] = []
     price_data: List[Dict[str, Any]] = []
@@ -468,17 +462,10 @@ async def get_fat_std_spread_province_seasonality(
     if not rc:
         raise HTTPException(status_code=404, detail=f"未找到省份：{province_name}")
 
-    params: Dict[str, Any] = {"rc": rc, "st": "fat_std_spread"}
-    sql = "SELECT trade_date, value FROM fact_spread_daily WHERE spread_type = :st AND region_code = :rc"
-    if start_year:
-        sql += " AND YEAR(trade_date) >= :sy"
-        params["sy"] = start_year
-    if end_year:
-        sql += " AND YEAR(trade_date) <= :ey"
-        params["ey"] = end_year
-    sql += " ORDER BY trade_date"
-
-    rows = db.execute(text(sql), params).fetchall()
+    start, end = _year_bounds(start_year, end_year)
+    rows = get_chart_repository(db).series(
+        "fact_spread_daily", {"spread_type": "fat_std_spread", "region_code": rc}, start=start, end=end,
+    )
     series, latest = _rows_to_daily_seasonality(rows, start_year=start_year, end_year=end_year)
 
     return SeasonalityResponse(
@@ -568,18 +555,8 @@ async def get_region_spread_seasonality(
     if not st_row:
         raise HTTPException(status_code=404, detail=f"未找到区域价差指标：{region_pair}")
 
-    spread_type = st_row[0]
-    sql_params: Dict[str, Any] = {"st": spread_type}
-    sql = "SELECT trade_date, value FROM fact_spread_daily WHERE spread_type = :st"
-    if start_year:
-        sql += " AND YEAR(trade_date) >= :sy"
-        sql_params["sy"] = start_year
-    if end_year:
-        sql += " AND YEAR(trade_date) <= :ey"
-        sql_params["ey"] = end_year
-    sql += " ORDER BY trade_date"
-
-    rows = db.execute(text(sql), sql_params).fetchall()
+    start, end = _year_bounds(start_year, end_year)
+    rows = get_chart_repository(db).series("fact_spread_daily", {"spread_type": st_row[0]}, start=start, end=end)
     series, latest = _rows_to_daily_seasonality(rows, start_year=start_year, end_year=end_year)
 
     return SeasonalityResponse(
@@ -773,15 +750,11 @@ async def get_frozen_inventory_province_seasonality(
     _end = end_year if end_year is not None else date.today().year
     _start = start_year if start_year is not None else (_end - 5)
 
-    rows = db.execute(
-        text("""
-            SELECT week_end AS trade_date, value FROM fact_weekly_indicator
-            WHERE indicator_code = 'frozen_rate' AND region_code = :rc
-              AND YEAR(week_end) BETWEEN :sy AND :ey
-            ORDER BY week_end
-        """),
-        {"rc": rc, "sy": _start, "ey": _end},
-    ).fetchall()
+    start, end = _year_bounds(_start, _end)
+    rows = get_chart_repository(db).series(
+        "fact_weekly_indicator", {"indicator_code": "frozen_rate", "region_code": rc},
+        date_column="week_end", start=start, end=end,
+    )
 
     series, latest = _rows_to_weekly_seasonality(rows)
     return FrozenInventorySeasonalityResponse(
@@ -843,28 +816,21 @@ async def get_industry_chain_seasonality(
     ratio_def = INDUSTRY_CHAIN_RATIO_MAP.get(metric_name)
     if ratio_def:
         num_code, den_code = ratio_def
-        num_rows = db.execute(
-            text("""
-                SELECT week_end AS trade_date, value FROM fact_weekly_indicator
-                WHERE indicator_code = :ic AND region_code = 'NATION'
-                  AND YEAR(week_end) BETWEEN :sy AND :ey
-                ORDER BY week_end
-            """), {"ic": num_code, "sy": _start, "ey": _end},
-        ).fetchall()
-        den_rows = db.execute(
-            text("""
-                SELECT week_end AS trade_date, value FROM fact_weekly_indicator
-                WHERE indicator_code = :ic AND region_code = 'NATION'
-                  AND YEAR(week_end) BETWEEN :sy AND :ey
-                ORDER BY week_end
-            """), {"ic": den_code, "sy": _start, "ey": _end},
-        ).fetchall()
-        den_map = {r.trade_date: float(r.value) for r in den_rows if r.value}
+        repo = get_chart_repository(db)
+        start, end = _year_bounds(_start, _end)
+        num_rows, den_rows = [
+            repo.series(
+                "fact_weekly_indicator", {"indicator_code": code, "region_code": "NATION"},
+                date_column="week_end", start=start, end=end,
+            )
+            for code in (num_code, den_code)
+        ]
+        den_map = {week_end: value for week_end, value in den_rows if value}
         rows = []
-        for r in num_rows:
-            d = den_map.get(r.trade_date)
-            if r.value and d and d != 0:
-                rows.append({"trade_date": r.trade_date, "value": round(float(r.value) / d, 4)})
+        for week_end, value in num_rows:
+            d = den_map.get(week_end)
+            if value and d and d != 0:
+                rows.append({"trade_date": week_end, "value": round(value / d, 4)})
         series, latest = _rows_to_weekly_seasonality(rows)
         return IndustryChainSeasonalityResponse(
             metric_name=metric_name, unit="", series=series,
@@ -881,16 +847,11 @@ async def get_industry_chain_seasonality(
 
     indicator_code, unit = mapping
 
-    rows = db.execute(
-        text("""
-            SELECT week_end AS trade_date, value
-            FROM fact_weekly_indicator
-            WHERE indicator_code = :ic AND region_code = 'NATION'
-              AND YEAR(week_end) BETWEEN :sy AND :ey
-            ORDER BY week_end
-        """),
-        {"ic": indicator_code, "sy": _start, "ey": _end},
-    ).fetchall()
+    start, end = _year_bounds(_start, _end)
+    rows = get_chart_repository(db).series(
+        "fact_weekly_indicator", {"indicator_code": indicator_code, "region_code": "NATION"},
+        date_column="week_end", start=start, end=end,
+    )
 
     series, latest = _rows_to_weekly_seasonality(rows)
     return IndustryChainSeasonalityResponse(
@@ -921,156 +882,36 @@ async def get_province_indicators_seasonality(
     """
     indicators_data: Dict[str, SeasonalityResponse] = {}
     rc = _resolve_region_code(db, province_name)
-
-    # 1. 日度 均价 (fact_price_daily, price_type='省份均价')
-    if rc:
-        try:
-            params: Dict[str, Any] = {"rc": rc, "pt": "省份均价"}
-            sql = "SELECT trade_date, value FROM fact_price_daily WHERE price_type = :pt AND region_code = :rc"
-            if start_year:
-                sql += " AND YEAR(trade_date) >= :sy"
-                params["sy"] = start_year
-            if end_year:
-                sql += " AND YEAR(trade_date) <= :ey"
-                params["ey"] = end_year
-            sql += " ORDER BY trade_date"
-            rows = db.execute(text(sql), params).fetchall()
-            if rows:
-                series, latest = _rows_to_daily_seasonality(rows)
-                indicators_data["日度 均价"] = SeasonalityResponse(
-                    metric_name=f"{province_name}均价",
-                    unit="元/公斤",
-                    series=series,
-                    update_time=latest,
-                    latest_date=latest,
-                )
-        except Exception as e:
-            print(f"获取日度均价失败: {e}")
-
-    # 2. 日度 散户标肥价差 (fact_spread_daily, spread_type='fat_std_spread')
-    if rc:
-        try:
-            params2: Dict[str, Any] = {"rc": rc, "st": "fat_std_spread"}
-            sql2 = "SELECT trade_date, value FROM fact_spread_daily WHERE spread_type = :st AND region_code = :rc"
-            if start_year:
-                sql2 += " AND YEAR(trade_date) >= :sy"
-                params2["sy"] = start_year
-            if end_year:
-                sql2 += " AND YEAR(trade_date) <= :ey"
-                params2["ey"] = end_year
-            sql2 += " ORDER BY trade_date"
-            rows2 = db.execute(text(sql2), params2).fetchall()
-            if rows2:
-                series2, latest2 = _rows_to_daily_seasonality(rows2)
-                indicators_data["日度 散户标肥价差"] = SeasonalityResponse(
-                    metric_name=f"{province_name}散户标肥价差",
-                    unit="元/公斤",
-                    series=series2,
-                    update_time=latest2,
-                    latest_date=latest2,
-                )
-        except Exception as e:
-            print(f"获取日度散户标肥价差失败: {e}")
-
-    # 3. 周度 出栏均重 (fact_weekly_indicator, indicator_code='weight_avg')
-    if rc:
-        try:
-            params3: Dict[str, Any] = {"rc": rc, "ic": "weight_avg"}
-            sql3 = "SELECT week_end AS trade_date, value FROM fact_weekly_indicator WHERE indicator_code = :ic AND region_code = :rc"
-            if start_year:
-                sql3 += " AND YEAR(week_end) >= :sy"
-                params3["sy"] = start_year
-            if end_year:
-                sql3 += " AND YEAR(week_end) <= :ey"
-                params3["ey"] = end_year
-            sql3 += " ORDER BY week_end"
-            rows3 = db.execute(text(sql3), params3).fetchall()
-            if rows3:
-                series3, latest3 = _rows_to_weekly_seasonality(rows3)
-                indicators_data["周度 出栏均重"] = SeasonalityResponse(
-                    metric_name=f"{province_name}出栏均重",
-                    unit="公斤",
-                    series=series3,
-                    update_time=latest3,
-                    latest_date=latest3,
-                )
-        except Exception as e:
-            print(f"获取周度出栏均重失败: {e}")
-
-    # 4. 周度 宰后均重
-    if rc:
-        try:
-            params4: Dict[str, Any] = {"rc": rc, "ic": "post_slaughter_weight"}
-            sql4 = "SELECT week_end AS trade_date, value FROM fact_weekly_indicator WHERE indicator_code = :ic AND region_code = :rc"
-            if start_year:
-                sql4 += " AND YEAR(week_end) >= :sy"
-                params4["sy"] = start_year
-            if end_year:
-                sql4 += " AND YEAR(week_end) <= :ey"
-                params4["ey"] = end_year
-            sql4 += " ORDER BY week_end"
-            rows4 = db.execute(text(sql4), params4).fetchall()
-            if rows4:
-                series4, latest4 = _rows_to_weekly_seasonality(rows4)
-                indicators_data["周度 宰后均重"] = SeasonalityResponse(
-                    metric_name=f"{province_name}宰后均重",
-                    unit="公斤",
-                    series=series4,
-                    update_time=latest4,
-                    latest_date=latest4,
-                )
-        except Exception as e:
-            print(f"获取周度宰后均重失败: {e}")
-
-    # 5. 周度 90KG占比 (fact_weekly_indicator, indicator_code='weight_pct_under90')
-    if rc:
-        try:
-            params5: Dict[str, Any] = {"rc": rc, "ic": "weight_pct_under90"}
-            sql5 = "SELECT week_end AS trade_date, value FROM fact_weekly_indicator WHERE indicator_code = :ic AND region_code = :rc"
-            if start_year:
-                sql5 += " AND YEAR(week_end) >= :sy"
-                params5["sy"] = start_year
-            if end_year:
-                sql5 += " AND YEAR(week_end) <= :ey"
-                params5["ey"] = end_year
-            sql5 += " ORDER BY week_end"
-            rows5 = db.execute(text(sql5), params5).fetchall()
-            if rows5:
-                series5, latest5 = _rows_to_weekly_seasonality(rows5)
-                indicators_data["周度 90KG占比"] = SeasonalityResponse(
-                    metric_name=f"{province_name}90KG占比",
-                    unit="%",
-                    series=series5,
-                    update_time=latest5,
-                    latest_date=latest5,
-                )
-        except Exception as e:
-            print(f"获取周度90KG占比失败: {e}")
-
-    # 6. 周度 冻品库容 (fact_weekly_indicator, indicator_code='frozen_rate')
-    if rc:
+    if not rc:
+        return ProvinceIndicatorsResponse(province_name=province_name, indicators=indicators_data)
+
+    repo = get_chart_repository(db)
+    start, end = _year_bounds(start_year, end_year)
+    # (面板 key, 指标名后缀, 单位, 表, 等值条件, 日期列)
+    panels = [
+        ("日度 均价", "均价", "元/公斤", "fact_price_daily", {"price_type": "省份均价"}, "trade_date"),
+        ("日度 散户标肥价差", "散户标肥价差", "元/公斤", "fact_spread_daily", {"spread_type": "fat_std_spread"}, "trade_date"),
+        ("周度 出栏均重", "出栏均重", "公斤", "fact_weekly_indicator", {"indicator_code": "weight_avg"}, "week_end"),
+        ("周度 宰后均重", "宰后均重", "公斤", "fact_weekly_indicator", {"indicator_code": "post_slaughter_weight"}, "week_end"),
+        ("周度 90KG占比", "90KG占比", "%", "fact_weekly_indicator", {"indicator_code": "weight_pct_under90"}, "week_end"),
+        ("周度 冻品库容", "冻品库容", "%", "fact_weekly_indicator", {"indicator_code": "frozen_rate"}, "week_end"),
+    ]
+    for key, suffix, unit, table, filters, date_column in panels:
         try:
-            params6: Dict[str, Any] = {"rc": rc, "ic": "frozen_rate"}
-            sql6 = "SELECT week_end AS trade_date, value FROM fact_weekly_indicator WHERE indicator_code = :ic AND region_code = :rc"
-            if start_year:
-                sql6 += " AND YEAR(week_end) >= :sy"
-                params6["sy"] = start_year
-            if end_year:
-                sql6 += " AND YEAR(week_end) <= :ey"
-                params6["ey"] = end_year
-            sql6 += " ORDER BY week_end"
-            rows6 = db.execute(text(sql6), params6).fetchall()
-            if rows6:
-                series6, latest6 = _rows_to_weekly_seasonality(rows6)
-                indicators_data["周度 冻品库容"] = SeasonalityResponse(
-                    metric_name=f"{province_name}冻品库容",
-                    unit="%",
-                    series=series6,
-                    update_time=latest6,
-                    latest_date=latest6,
-                )
+            rows = repo.series(table, {**filters, "region_code": rc}, date_column=date_column, start=start, end=end)
+            if not rows:
+                continue
+            to_seasonality = _rows_to_weekly_seasonality if date_column == "week_end" else _rows_to_daily_seasonality
+            series, latest = to_seasonality(rows)
+            indicators_data[key] = SeasonalityResponse(
+                metric_name=f"{province_name}{suffix}",
+                unit=unit,
+                series=series,
+                update_time=latest,
+                latest_date=latest,
+            )
         except Exception as e:
-            print(f"获取周度冻品库容失败: {e}")
+            print(f"获取{key}失败: {e}")
 
     return ProvinceIndicatorsResponse(province_name=province_name, indicators=indicators_data)
 
@@ -1086,57 +927,14 @@ async def get_national_price_seasonality(
     current_user: SysUser = Depends(get_current_user),
 ):
     """全国猪价季节性（按年对齐）
-    优先级：标猪均价 > 全国均价 > hog_avg_price(GANGLIAN)。
-    标猪均价仅有 2024-2026，缺少年份用全国均价补充以覆盖 2022-2026。
+    物化序列 national_seasonal：逐年择一，标猪均价 > 全国均价 > hog_avg_price(GANGLIAN)。
+    标猪均价仅有 2024-2026，缺少年份整年用全国均价补充以覆盖 2022-2026。
     """
     _end = end_year if end_year is not None else date.today().year
     _start = start_year if start_year is not None else (_end - 5)
 
-    params = {"sy": _start, "ey": _end}
-
-    # 1. 标猪均价（优先，但仅 2024-2026 有数据）
-    rows = db.execute(
-        text("""
-            SELECT trade_date, value FROM fact_price_daily
-            WHERE price_type = '标猪均价' AND region_code = 'NATION' AND source = 'YONGYI'
-              AND YEAR(trade_date) BETWEEN :sy AND :ey
-            ORDER BY trade_date
-        """),
-        params,
-    ).fetchall()
-
-    have_years = {r[0].year for r in rows} if rows else set()
-    wanted_years = set(range(_start, _end + 1))
-    missing_years = wanted_years - have_years
-
-    # 2. 缺少年份用全国均价补充（有 2015-2026 完整数据）
-    if missing_years:
-        fill_rows = []
-        for year in sorted(missing_years):
-            fill = db.execute(
-                text("""
-                    SELECT trade_date, value FROM fact_price_daily
-                    WHERE price_type = '全国均价' AND region_code = 'NATION' AND source = 'YONGYI'
-                      AND YEAR(trade_date) = :y
-                    ORDER BY trade_date
-                """),
-                {"y": year},
-            ).fetchall()
-            fill_rows.extend(fill)
-        rows = list(rows) + fill_rows
-        rows = sorted(rows, key=lambda r: r[0])
-
-    # 3. 若仍无数据，用钢联 hog_avg_price
-    if not rows:
-        rows = db.execute(
-            text("""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = 'hog_avg_price' AND region_code = 'NATION' AND source = 'GANGLIAN'
-                  AND YEAR(trade_date) BETWEEN :sy AND :ey
-                ORDER BY trade_date
-            """),
-            params,
-        ).fetchall()
+    start, end = _year_bounds(_start, _end)
+    rows = fetch_series(db, "national_seasonal", start, end)
 
     series, latest = _rows_to_daily_seasonality(rows)
     return SeasonalityResponse(
@@ -1160,17 +958,12 @@ async def get_fat_std_spread_seasonality(
     _end = end_year if end_year is not None else date.today().year
     _start = start_year if start_year is not None else (_end - 5)
     rc = region_code or "NATION"
-    source_filter = " AND source = 'GANGLIAN'" if rc == "NATION" else ""
+    filters: Dict[str, Any] = {"spread_type": "fat_std_spread", "region_code": rc}
+    if rc == "NATION":
+        filters["source"] = "GANGLIAN"
 
-    rows = db.execute(
-        text(f"""
-            SELECT trade_date, value FROM fact_spread_daily
-            WHERE spread_type = 'fat_std_spread' AND region_code = :rc {source_filter}
-              AND YEAR(trade_date) BETWEEN :sy AND :ey
-            ORDER BY trade_date
-        """),
-        {"rc": rc, "sy": _start, "ey": _end},
-    ).fetchall()
+    start, end = _year_bounds(_start, _end)
+    rows = get_chart_repository(db).series("fact_spread_daily", filters, start=start, end=end)
 
     series, latest = _rows_to_daily_seasonality(rows)
     return SeasonalityResponse(
@@ -1196,46 +989,20 @@ async def get_price_and_spread(
         _end = date.today().year
         year_list = list(range(_end - 5, _end + 1))
 
-    # 将年份列表转为逗号字符串用于 IN
-    year_str = ",".join(str(y) for y in year_list)
-
-    price_rows = db.execute(
-        text(f"""
-            SELECT trade_date, value FROM fact_price_daily
-            WHERE price_type = '标猪均价' AND region_code = 'NATION' AND source = 'YONGYI'
-              AND YEAR(trade_date) IN ({year_str})
-            ORDER BY trade_date
-        """),
-    ).fetchall()
-
-    if not price_rows:
-        price_rows = db.execute(
-            text(f"""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = '全国均价' AND region_code = 'NATION' AND source = 'YONGYI'
-                  AND YEAR(trade_date) IN ({year_str})
-                ORDER BY trade_date
-            """),
-        ).fetchall()
-
-    if not price_rows:
-        price_rows = db.execute(
-            text(f"""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = 'hog_avg_price' AND region_code = 'NATION' AND source = 'GANGLIAN'
-                  AND YEAR(trade_date) IN ({year_str})
-                ORDER BY trade_date
-            """),
-        ).fetchall()
+    price_rows = [
+        r for r in fetch_series(
+            db, "national_std_hog", date(min(year_list), 1, 1), date(max(year_list), 12, 31)
+        )
+        if r[0].year in year_list
+    ]
 
-    spread_rows = db.execute(
-        text(f"""
-            SELECT trade_date, value FROM fact_spread_daily
-            WHERE spread_type = 'fat_std_spread' AND region_code = 'NATION' AND source = 'GANGLIAN'
-              AND YEAR(trade_date) IN ({year_str})
-            ORDER BY trade_date
-        """),
-    ).fetchall()
+    spread_rows = [
+        r for r in get_chart_repository(db).series(
+            "fact_spread_daily", {"spread_type": "fat_std_spread", "region_code": "NATION", "source": "GANGLIAN"},
+            start=date(min(year_list), 1, 1), end=date(max(year_list), 12, 31),
+        )
+        if r[0].year in year_list
+    ]
 
     price_data = [
         {"date": r[0].isoformat(), "year": r[0].year, "value": float(r[1]) if r[1] is not None else None}
@@ -1542,35 +1309,7 @@ async def get_slaughter_price_trend_solar(
         {"s": sd, "e": ed},
     ).fetchall()
 
-    price_rows = db.execute(
-        text("""
-            SELECT trade_date, value FROM fact_price_daily
-            WHERE price_type = '标猪均价' AND region_code = 'NATION' AND source = 'YONGYI'
-              AND trade_date BETWEEN :s AND :e
-            ORDER BY trade_date
-        """),
-        {"s": sd, "e": ed},
-    ).fetchall()
-    if not price_rows:
-        price_rows = db.execute(
-            text("""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = '全国均价' AND region_code = 'NATION' AND source = 'YONGYI'
-                  AND trade_date BETWEEN :s AND :e
-                ORDER BY trade_date
-            """),
-            {"s": sd, "e": ed},
-        ).fetchall()
-    if not price_rows:
-        price_rows = db.execute(
-            text("""
-                SELECT trade_date, value FROM fact_price_daily
-                WHERE price_type = 'hog_avg_price' AND region_code = 'NATION' AND source = 'GANGLIAN'
-                  AND trade_date BETWEEN :s AND :e
-                ORDER BY trade_date
-            """),
-            {"s": sd, "e": ed},
-        ).fetchall()
+    price_rows = fetch_series(db, "national_std_hog", sd, ed)
 
     slaughter_data = [
         {"date": r[0].isoformat(), "value": float(r[1]) if r[1] is not None else None}
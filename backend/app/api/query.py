@@ -1,14 +1,15 @@
 """通用查询 API（hogprice_v3 精简版）
-原 query_service / seasonality_service / topn_service 已废弃。
-保留端点定义避免前端 404。
+原 query_service / seasonality_service 已废弃，保留端点定义避免前端 404。
+/topn 基于 topn_service 的省份截面索引。
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 from datetime import date
 
-from app.core.database import get_db
+from app.core.database import get_db, engine
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
@@ -76,11 +77,21 @@ async def query_seasonality_data(
 @router.post("/topn")
 async def query_topn_data(
     request: TopNRequest,
-    db: Session = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
-    """TopN排名查询（暂未迁移）"""
-    raise HTTPException(
-        status_code=501,
-        detail="此接口暂未迁移到 hogprice_v3"
-    )
+    """TopN 省份排名（按窗口变化 / 涨跌幅 / 历史同期分位 / 连续涨跌天数）"""
+    from app.services import topn_service  # numpy 依赖，首次请求时加载
+
+    try:
+        return await run_in_threadpool(
+            topn_service.query_topn,
+            engine,
+            request.metric_id,
+            request.dimension,
+            request.window_days,
+            request.rank_by,
+            request.filters,
+            request.topk,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,35 +1,34 @@
-"""数据对账API - 查询 hogprice_v3 fact 表"""
+"""数据对账API - 读取导入后的数据质量扫描结果（data_quality_findings）；/anomalies 的值阈值直接查 fact 表"""
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import Optional, List
-from datetime import date, timedelta
+from datetime import date
 from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
+from import_tool.data_quality import QUALITY_TABLES, Z_THRESHOLD
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/reconciliation", tags=["reconciliation"])
 
-# 表 → (日期列, 主键维度列) 映射
-TABLE_META = {
-    "fact_price_daily": ("trade_date", ["region_code", "price_type", "source"]),
-    "fact_spread_daily": ("trade_date", ["region_code", "spread_type", "source"]),
-    "fact_slaughter_daily": ("trade_date", ["region_code", "source"]),
-    "fact_weekly_indicator": ("week_end", ["region_code", "indicator_code", "source"]),
-    "fact_monthly_indicator": ("month_date", ["region_code", "indicator_code", "source"]),
-    "fact_enterprise_daily": ("trade_date", ["company_code", "region_code", "metric_type"]),
-    "fact_futures_daily": ("trade_date", ["contract_code"]),
-}
+
+class FindingsQuery(BaseModel):
+    """/missing 与 /anomalies 共用的筛选条件（回显）"""
+    indicator_code: Optional[str] = None
+    region_code: Optional[str] = None
+    freq: Optional[str] = None
+    source: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
 
 
 class MissingDatesResponse(BaseModel):
-    indicator_code: str
-    region_code: Optional[str]
-    freq: str
-    missing_dates: List[str]
+    query: FindingsQuery
+    gaps: List[dict]
+    total: int
     total_missing: int
 
 
@@ -39,89 +38,141 @@ class DuplicatesResponse(BaseModel):
 
 
 class AnomaliesResponse(BaseModel):
-    indicator_code: str
+    query: FindingsQuery
     anomalies: List[dict]
+    total: int
     threshold_config: dict
 
 
-def _guess_table(indicator_code: str, freq: str) -> str:
-    """根据 indicator_code 和 freq 猜测所在表"""
-    if freq == "W":
-        return "fact_weekly_indicator"
-    if freq == "M":
-        return "fact_monthly_indicator"
-    # 日度：按指标名猜
-    if "price" in indicator_code or "hog_price" in indicator_code:
-        return "fact_price_daily"
-    if "spread" in indicator_code:
-        return "fact_spread_daily"
-    if "slaughter" in indicator_code:
-        return "fact_slaughter_daily"
-    return "fact_price_daily"
+# 频率 → 扫描的 fact 表（见 import_tool/data_quality.py QUALITY_TABLES）
+FREQ_TABLES = {
+    "D": ["fact_price_daily", "fact_spread_daily", "fact_slaughter_daily"],
+    "W": ["fact_weekly_indicator"],
+    "M": ["fact_monthly_indicator"],
+}
+
+
+def _findings_where(
+    finding_type: str,
+    indicator_code: Optional[str],
+    region_code: Optional[str],
+    freq: Optional[str],
+    source: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> tuple[str, dict]:
+    """data_quality_findings 筛选条件 → (WHERE 子句, 参数)"""
+    where = ["finding_type = :ft"]
+    params: dict = {"ft": finding_type}
+    if indicator_code:
+        # 月度指标的 type_code 为 indicator_code[:sub_category]
+        where.append("(type_code = :code OR type_code LIKE :code_prefix)")
+        params.update({"code": indicator_code, "code_prefix": f"{indicator_code}:%"})
+    if region_code:
+        where.append("region_code = :region")
+        params["region"] = region_code
+    if freq in FREQ_TABLES:
+        names = [f"t{i}" for i in range(len(FREQ_TABLES[freq]))]
+        where.append(f"table_name IN ({', '.join(':' + n for n in names)})")
+        params.update(dict(zip(names, FREQ_TABLES[freq])))
+    if source:
+        where.append("source = :src")
+        params["src"] = source
+    if start_date:
+        where.append("end_date >= :s")
+        params["s"] = start_date
+    if end_date:
+        where.append("start_date <= :e")
+        params["e"] = end_date
+    return " AND ".join(where), params
+
+
+def _out_of_band_sql(
+    table: str,
+    indicator_code: Optional[str],
+    region_code: Optional[str],
+    source: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> str:
+    """
+    一张 fact 表中超出 [:vmin, :vmax] 的观测（未给出的一侧用 NULL 绑定，比较恒不成立），
+    已作为 z-score 异常（|z| >= :k）记录的观测不重复返回。列与 data_quality_findings 的查询对齐。
+    """
+    date_col, type_expr, val_col, _, extra_where = QUALITY_TABLES[table]
+    where = [f"f.`{val_col}` IS NOT NULL", f"(f.`{val_col}` < :vmin OR f.`{val_col}` > :vmax)"]
+    if extra_where:
+        where.append(extra_where)
+    if indicator_code:
+        where.append(f"(({type_expr}) = :code OR ({type_expr}) LIKE :code_prefix)")
+    if region_code:
+        where.append("f.region_code = :region")
+    if source:
+        where.append("f.source = :src")
+    if start_date:
+        where.append(f"f.`{date_col}` >= :s")
+    if end_date:
+        where.append(f"f.`{date_col}` <= :e")
+    return f"""
+        SELECT '{table}' AS table_name, {type_expr} AS type_code, f.region_code, f.source,
+               f.`{date_col}` AS start_date, f.`{val_col}` AS value,
+               NULL AS change_value, NULL AS mean_value, NULL AS std_value, NULL AS zscore
+        FROM `{table}` f
+        WHERE {' AND '.join(where)}
+          AND NOT EXISTS (
+              SELECT 1 FROM data_quality_findings q
+              WHERE q.finding_type = 'anomaly' AND q.table_name = '{table}' AND q.type_code = {type_expr}
+                AND q.region_code = f.region_code AND q.source = f.source
+                AND q.start_date = f.`{date_col}` AND ABS(q.zscore) >= :k
+          )
+    """
+
+
+def _num(v) -> Optional[float]:
+    return None if v is None else float(v)
+
+
+def _query_echo(**kwargs) -> FindingsQuery:
+    return FindingsQuery(**{k: (v.isoformat() if isinstance(v, date) else v) for k, v in kwargs.items()})
 
 
 @router.get("/missing", response_model=MissingDatesResponse)
 async def get_missing_dates(
-    indicator_code: str = Query(..., description="指标代码"),
+    indicator_code: Optional[str] = Query(None, description="指标代码（不传则全部指标）"),
     region_code: Optional[str] = Query(None, description="区域代码"),
-    freq: str = Query("D", description="频率（D/W/M）"),
+    freq: Optional[str] = Query(None, description="频率（D/W/M）"),
+    source: Optional[str] = Query(None, description="数据源"),
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
+    limit: int = Query(100, ge=1, le=1000, description="返回数量限制"),
+    offset: int = Query(0, ge=0, description="偏移量"),
     current_user: SysUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """获取缺失日期列表"""
-    table = _guess_table(indicator_code, freq)
-    date_col = TABLE_META[table][0]
-    region = region_code or "NATION"
-    end_d = end_date or date.today()
-    start_d = start_date or (end_d - timedelta(days=90))
-
-    # 查询已有日期
-    sql = f"SELECT DISTINCT `{date_col}` FROM `{table}` WHERE `{date_col}` BETWEEN :s AND :e"
-    params: dict = {"s": start_d, "e": end_d}
-
-    if "indicator_code" in [c for c in TABLE_META[table][1]]:
-        sql += " AND indicator_code = :code"
-        params["code"] = indicator_code
-    if "region_code" in [c for c in TABLE_META[table][1]]:
-        sql += " AND region_code = :region"
-        params["region"] = region
-
-    rows = db.execute(text(sql), params).fetchall()
-    existing = {r[0] for r in rows}
-
-    # 生成预期日期序列
-    expected: list[date] = []
-    if freq == "D":
-        d = start_d
-        while d <= end_d:
-            if d.weekday() < 5:  # 工作日
-                expected.append(d)
-            d += timedelta(days=1)
-    elif freq == "W":
-        d = start_d
-        while d <= end_d:
-            expected.append(d)
-            d += timedelta(weeks=1)
-    elif freq == "M":
-        from datetime import date as dt
-        y, m = start_d.year, start_d.month
-        while dt(y, m, 1) <= end_d:
-            expected.append(dt(y, m, 1))
-            m += 1
-            if m > 12:
-                m = 1
-                y += 1
-
-    missing = sorted(set(expected) - existing)
-
+    """获取缺失区间（分页读取导入后扫描结果 data_quality_findings）"""
+    where, params = _findings_where("gap", indicator_code, region_code, freq, source, start_date, end_date)
+    total, total_missing = db.execute(
+        text(f"SELECT COUNT(*), COALESCE(SUM(missing_periods), 0) FROM data_quality_findings WHERE {where}"),
+        params,
+    ).fetchone()
+    rows = db.execute(text(f"""
+        SELECT table_name, type_code, region_code, source, start_date, end_date, missing_periods
+        FROM data_quality_findings WHERE {where}
+        ORDER BY start_date DESC, id LIMIT :limit OFFSET :offset
+    """), {**params, "limit": limit, "offset": offset}).fetchall()
+    gaps = [
+        {
+            "table_name": r[0], "indicator_code": r[1], "region_code": r[2], "source": r[3],
+            "start_date": r[4].isoformat(), "end_date": r[5].isoformat(), "missing_periods": r[6],
+        }
+        for r in rows
+    ]
     return MissingDatesResponse(
-        indicator_code=indicator_code,
-        region_code=region_code,
-        freq=freq,
-        missing_dates=[d.isoformat() for d in missing],
-        total_missing=len(missing)
+        query=_query_echo(indicator_code=indicator_code, region_code=region_code, freq=freq,
+                          source=source, start_date=start_date, end_date=end_date),
+        gaps=gaps,
+        total=total or 0,
+        total_missing=int(total_missing or 0),
     )
 
 
@@ -144,45 +195,62 @@ async def get_duplicates(
 
 @router.get("/anomalies", response_model=AnomaliesResponse)
 async def get_anomalies(
-    indicator_code: str = Query(..., description="指标代码"),
+    indicator_code: Optional[str] = Query(None, description="指标代码（不传则全部指标）"),
     region_code: Optional[str] = Query(None, description="区域代码"),
-    min_value: Optional[float] = Query(None, description="最小值阈值"),
-    max_value: Optional[float] = Query(None, description="最大值阈值"),
-    std_multiplier: float = Query(3.0, description="标准差倍数"),
+    freq: Optional[str] = Query(None, description="频率（D/W/M）"),
+    source: Optional[str] = Query(None, description="数据源"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期"),
+    min_value: Optional[float] = Query(None, description="最小值阈值（未达标准差倍数但低于该值的异常也返回）"),
+    max_value: Optional[float] = Query(None, description="最大值阈值（未达标准差倍数但高于该值的异常也返回）"),
+    std_multiplier: float = Query(3.0, ge=Z_THRESHOLD, description="标准差倍数（不低于扫描阈值）"),
+    limit: int = Query(100, ge=1, le=1000, description="返回数量限制"),
+    offset: int = Query(0, ge=0, description="偏移量"),
     current_user: SysUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """获取异常值（3σ 法则）"""
-    threshold_config = {"std_multiplier": std_multiplier}
-    if min_value is not None:
-        threshold_config["min"] = min_value
-    if max_value is not None:
-        threshold_config["max"] = max_value
-
-    # 在周度/月度表中查
-    for tbl, dcol in [("fact_weekly_indicator", "week_end"), ("fact_monthly_indicator", "month_date")]:
-        stat = db.execute(text(
-            f"SELECT AVG(value), STDDEV(value), COUNT(*) FROM `{tbl}` "
-            f"WHERE indicator_code = :code AND region_code = :region AND value IS NOT NULL"
-        ), {"code": indicator_code, "region": region_code or "NATION"}).fetchone()
-        if stat and stat[2] and stat[2] > 10:
-            avg_val, std_val = float(stat[0]), float(stat[1]) if stat[1] else 0
-            lo = avg_val - std_multiplier * std_val
-            hi = avg_val + std_multiplier * std_val
-            rows = db.execute(text(
-                f"SELECT `{dcol}`, value FROM `{tbl}` "
-                f"WHERE indicator_code = :code AND region_code = :region "
-                f"AND value IS NOT NULL AND (value < :lo OR value > :hi) "
-                f"ORDER BY `{dcol}` DESC LIMIT 50"
-            ), {"code": indicator_code, "region": region_code or "NATION", "lo": lo, "hi": hi}).fetchall()
-            anomalies = [{"date": r[0].isoformat(), "value": float(r[1]),
-                          "avg": round(avg_val, 4), "std": round(std_val, 4)} for r in rows]
-            return AnomaliesResponse(
-                indicator_code=indicator_code,
-                anomalies=anomalies,
-                threshold_config=threshold_config
-            )
+    """
+    获取异常值：变动的滚动 z-score（分页读取导入后扫描结果 data_quality_findings）；
+    给出 min_value / max_value 时另按值阈值直接查询 fact 表，合并分页（阈值异常的变动/偏差字段为空）
+    """
+    threshold_config = {"std_multiplier": std_multiplier, "scan_threshold": Z_THRESHOLD}
+    where, params = _findings_where("anomaly", indicator_code, region_code, freq, source, start_date, end_date)
+    params["k"] = std_multiplier
+    sql = f"""
+        SELECT table_name, type_code, region_code, source, start_date, value, change_value,
+               mean_value, std_value, zscore
+        FROM data_quality_findings WHERE {where} AND ABS(zscore) >= :k
+    """
+    if min_value is not None or max_value is not None:
+        if min_value is not None:
+            threshold_config["min"] = min_value
+        if max_value is not None:
+            threshold_config["max"] = max_value
+        params.update(vmin=min_value, vmax=max_value)
+        tables = FREQ_TABLES.get(freq) or list(QUALITY_TABLES)
+        sql = " UNION ALL ".join([sql] + [
+            _out_of_band_sql(t, indicator_code, region_code, source, start_date, end_date) for t in tables
+        ])
 
+    total = db.execute(text(f"SELECT COUNT(*) FROM ({sql}) u"), params).scalar()
+    rows = db.execute(text(f"""
+        SELECT table_name, type_code, region_code, source, start_date, value, change_value,
+               mean_value, std_value, zscore
+        FROM ({sql}) u
+        ORDER BY start_date DESC, table_name, type_code, region_code, source LIMIT :limit OFFSET :offset
+    """), {**params, "limit": limit, "offset": offset}).fetchall()
+    anomalies = [
+        {
+            "table_name": r[0], "indicator_code": r[1], "region_code": r[2], "source": r[3],
+            "date": r[4].isoformat(), "value": float(r[5]),
+            "change": _num(r[6]), "mean": _num(r[7]), "std": _num(r[8]), "deviation": _num(r[9]),
+        }
+        for r in rows
+    ]
     return AnomaliesResponse(
-        indicator_code=indicator_code, anomalies=[], threshold_config=threshold_config
+        query=_query_echo(indicator_code=indicator_code, region_code=region_code, freq=freq,
+                          source=source, start_date=start_date, end_date=end_date),
+        anomalies=anomalies,
+        total=total or 0,
+        threshold_config=threshold_config,
     )
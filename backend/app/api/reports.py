@@ -11,7 +11,7 @@ from app.core.config import settings
 from app.models.sys_user import SysUser
 from app.models.report_template import ReportTemplate
 from app.models.report_run import ReportRun
-from app.services.report_service import generate_report
+from app.services.report_job_service import submit_report
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
 
@@ -34,6 +34,7 @@ class ReportRunInfo(BaseModel):
     output_path: Optional[str]
     created_at: str
     finished_at: Optional[str]
+    cached: bool = False  # 是否直接复用已生成的报告文件
     
     class Config:
         from_attributes = True
@@ -66,13 +67,13 @@ async def get_report_templates(
     ]
 
 
-@router.post("/run", response_model=ReportRunInfo)
+@router.post("/run", response_model=ReportRunInfo, status_code=status.HTTP_202_ACCEPTED)
 async def create_report_run(
     request: ReportRunRequest,
     db: Session = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
-    """生成报告"""
+    """提交报告生成任务，立即返回运行记录；通过 /run/{run_id} 查询状态，完成后 /run/{run_id}/download 下载"""
     # 验证模板存在
     template = db.query(ReportTemplate).filter(ReportTemplate.id == request.template_id).first()
     if not template:
@@ -88,33 +89,18 @@ async def create_report_run(
             detail="Access denied"
         )
     
-    try:
-        # 生成报告（异步执行，实际应该使用后台任务）
-        output_path = generate_report(
-            db=db,
-            template_id=request.template_id,
-            params=request.params
-        )
-        
-        # 查询运行记录
-        report_run = db.query(ReportRun).filter(
-            ReportRun.template_id == request.template_id
-        ).order_by(ReportRun.created_at.desc()).first()
-        
-        return {
-            "id": report_run.id,
-            "template_id": report_run.template_id,
-            "status": report_run.status,
-            "output_path": report_run.output_path,
-            "created_at": report_run.created_at.isoformat(),
-            "finished_at": report_run.finished_at.isoformat() if report_run.finished_at else None
-        }
+    # 提交异步任务：相同 (模板, 参数, 数据版本) 复用已生成的文件或进行中的任务
+    report_run, cached = submit_report(db, template, request.params)
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Report generation failed: {str(e)}"
-        )
+    return {
+        "id": report_run.id,
+        "template_id": report_run.template_id,
+        "status": report_run.status,
+        "output_path": report_run.output_path,
+        "created_at": report_run.created_at.isoformat(),
+        "finished_at": report_run.finished_at.isoformat() if report_run.finished_at else None,
+        "cached": cached
+    }
 
 
 @router.get("/run/{run_id}", response_model=ReportRunInfo)
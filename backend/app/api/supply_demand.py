@@ -7,7 +7,7 @@ E3. 供需曲线 API  (hogprice_v3 版)
 
 数据源：hogprice_v3 数据库
   - fact_monthly_indicator  (NYB 环比、定点屠宰)
-  - fact_price_daily        (钢联/涌益 全国猪价)
+  - fact_series_monthly     (规范序列 supply_demand_price 的月均值)
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
@@ -18,6 +18,8 @@ from pydantic import BaseModel
 import math
 
 from app.core.database import get_db
+from app.services.chart_repository import get_chart_repository
+from import_tool.series_registry import fetch_series_monthly
 
 router = APIRouter(prefix="/api/v1/supply-demand", tags=["supply-demand"])
 
@@ -55,70 +57,11 @@ class InventoryPriceResponse(BaseModel):
 
 def _get_national_monthly_price(db: Session) -> Dict[str, float]:
     """
-    从 fact_price_daily 获取全国猪价，按月聚合为均值。
-    优先级：GANGLIAN hog_avg_price > YONGYI 标猪均价
+    全国猪价月均值：物化序列 supply_demand_price 的月度汇总（fact_series_monthly），
+    GANGLIAN hog_avg_price > YONGYI 标猪均价 > YONGYI 全国均价，整条序列择一（见 series_registry）
     返回 {YYYY-MM: avg_price}
     """
-    # 尝试钢联全国猪价
-    sql = text("""
-        SELECT DATE_FORMAT(trade_date, '%Y-%m') AS ym,
-               AVG(value) AS avg_price
-        FROM fact_price_daily
-        WHERE region_code = 'NATION'
-          AND price_type = 'hog_avg_price'
-          AND source = 'GANGLIAN'
-          AND value IS NOT NULL
-        GROUP BY ym
-        ORDER BY ym
-    """)
-    rows = db.execute(sql).fetchall()
-
-    price_by_month: Dict[str, float] = {}
-    for r in rows:
-        if r.avg_price is not None:
-            price_by_month[r.ym] = float(r.avg_price)
-
-    if price_by_month:
-        return price_by_month
-
-    # 备选：涌益标猪均价
-    sql2 = text("""
-        SELECT DATE_FORMAT(trade_date, '%Y-%m') AS ym,
-               AVG(value) AS avg_price
-        FROM fact_price_daily
-        WHERE region_code = 'NATION'
-          AND price_type = '标猪均价'
-          AND source = 'YONGYI'
-          AND value IS NOT NULL
-        GROUP BY ym
-        ORDER BY ym
-    """)
-    rows2 = db.execute(sql2).fetchall()
-    for r in rows2:
-        if r.avg_price is not None:
-            price_by_month[r.ym] = float(r.avg_price)
-
-    if price_by_month:
-        return price_by_month
-
-    # 第三备选：涌益全国均价
-    sql3 = text("""
-        SELECT DATE_FORMAT(trade_date, '%Y-%m') AS ym,
-               AVG(value) AS avg_price
-        FROM fact_price_daily
-        WHERE region_code = 'NATION'
-          AND price_type = '全国均价'
-          AND source = 'YONGYI'
-          AND value IS NOT NULL
-        GROUP BY ym
-        ORDER BY ym
-    """)
-    rows3 = db.execute(sql3).fetchall()
-    for r in rows3:
-        if r.avg_price is not None:
-            price_by_month[r.ym] = float(r.avg_price)
-
-    return price_by_month
+    return {d.strftime("%Y-%m"): v for d, v in fetch_series_monthly(db, "supply_demand_price")}
 
 
 # ── Helper: 定点屠宰月度数据 ─────────────────────────────────
@@ -129,26 +72,30 @@ def _get_designated_slaughter_monthly(db: Session) -> Dict[str, float]:
     indicator_code = 'designated_slaughter', value_type = 'abs'
     返回 {YYYY-MM: value}
     """
-    sql = text("""
-        SELECT DATE_FORMAT(month_date, '%Y-%m') AS ym,
-               value
-        FROM fact_monthly_indicator
-        WHERE indicator_code = 'designated_slaughter'
-          AND value_type = 'abs'
-          AND region_code = 'NATION'
-          AND value IS NOT NULL
-          AND value > 0
-        ORDER BY ym
-    """)
-    rows = db.execute(sql).fetchall()
+    rows = get_chart_repository(db).series(
+        "fact_monthly_indicator",
+        {"indicator_code": "designated_slaughter", "value_type": "abs", "region_code": "NATION"},
+        date_column="month_date",
+    )
 
     result: Dict[str, float] = {}
-    for r in rows:
-        result[r.ym] = float(r.value)
+    for month_date, value in rows:
+        if value is not None and value > 0:
+            result[month_date.strftime("%Y-%m")] = value
 
     return result
 
 
+def _get_nyb_mom_by_month(db: Session, indicator_code: str) -> Dict[str, float]:
+    """NYB 全国环比序列（fact_monthly_indicator, sub_category='nation', value_type='mom_pct'）→ {YYYY-MM: value}"""
+    rows = get_chart_repository(db).series(
+        "fact_monthly_indicator",
+        {"indicator_code": indicator_code, "sub_category": "nation", "source": "NYB", "value_type": "mom_pct"},
+        date_column="month_date",
+    )
+    return {month_date.strftime("%Y-%m"): value for month_date, value in rows if value is not None}
+
+
 # ── Helper: 存栏环比 → 指数 ──────────────────────────────────
 
 def _build_inventory_index(
@@ -298,26 +245,10 @@ async def get_breeding_inventory_price(
               sub_category='nation', source='NYB', value_type='mom_pct'
     """
     # 1. 获取 NYB 能繁母猪环比数据
-    sql = text("""
-        SELECT DATE_FORMAT(month_date, '%Y-%m') AS ym,
-               value
-        FROM fact_monthly_indicator
-        WHERE indicator_code = 'breeding_sow_inventory'
-          AND sub_category = 'nation'
-          AND source = 'NYB'
-          AND value_type = 'mom_pct'
-          AND value IS NOT NULL
-        ORDER BY month_date
-    """)
-    rows = db.execute(sql).fetchall()
-
-    if not rows:
+    mom_by_month = _get_nyb_mom_by_month(db, "breeding_sow_inventory")
+    if not mom_by_month:
         return InventoryPriceResponse(data=[], latest_month=None)
 
-    mom_by_month: Dict[str, float] = {}
-    for r in rows:
-        mom_by_month[r.ym] = float(r.value)
-
     # 2. 计算存栏指数（以2020年1月为80）
     index_data = _build_inventory_index(mom_by_month)
 
@@ -364,26 +295,10 @@ async def get_piglet_price(
               sub_category='nation', source='NYB', value_type='mom_pct'
     """
     # 1. 获取 NYB 新生仔猪环比数据
-    sql = text("""
-        SELECT DATE_FORMAT(month_date, '%Y-%m') AS ym,
-               value
-        FROM fact_monthly_indicator
-        WHERE indicator_code = 'piglet_inventory'
-          AND sub_category = 'nation'
-          AND source = 'NYB'
-          AND value_type = 'mom_pct'
-          AND value IS NOT NULL
-        ORDER BY month_date
-    """)
-    rows = db.execute(sql).fetchall()
-
-    if not rows:
+    mom_by_month = _get_nyb_mom_by_month(db, "piglet_inventory")
+    if not mom_by_month:
         return InventoryPriceResponse(data=[], latest_month=None)
 
-    mom_by_month: Dict[str, float] = {}
-    for r in rows:
-        mom_by_month[r.ym] = float(r.value)
-
     # 2. 计算存栏指数（以2020年1月为80）
     index_data = _build_inventory_index(mom_by_month)
 
@@ -10,6 +10,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.sys_user import SysUser
+from import_tool.rollups import ROLLUP_SPECS, period_start
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/ts", tags=["timeseries"])
 
@@ -54,6 +55,45 @@ MONTHLY_INDICATORS = {
 }
 
 
+_ROLLUP_AGG_COLUMNS = {"avg": "avg_value", "min": "min_value", "max": "max_value", "last": "last_value"}
+
+
+def _query_rollup(
+    db: Session,
+    indicator_code: str,
+    region: str,
+    freq: str,
+    agg: str,
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> tuple[List[dict], Optional[str]]:
+    """日度指标的周/月序列（fact_*_weekly / fact_*_monthly，date 为周期起始日）"""
+    table, _, _, filter_val, default_source = INDICATOR_ROUTING[indicator_code]
+    _, _, weekly, monthly = ROLLUP_SPECS[table]
+    rollup = weekly if freq == "W" else monthly
+    sql = (
+        f"SELECT period_date, {_ROLLUP_AGG_COLUMNS[agg]}, min_value, max_value, last_value, day_count "
+        f"FROM `{rollup}` WHERE region_code = :region AND type_code = :tcode AND source = :src"
+    )
+    params = {"region": region, "tcode": filter_val or "", "src": default_source}
+    if from_date:
+        sql += " AND period_date >= :from_d"
+        params["from_d"] = period_start(from_date, freq)
+    if to_date:
+        sql += " AND period_date <= :to_d"
+        params["to_d"] = to_date
+    rows = db.execute(text(sql + " ORDER BY period_date"), params).fetchall()
+    series = [
+        {
+            "date": r[0].isoformat(), "value": float(r[1]),
+            "min": float(r[2]), "max": float(r[3]), "last": float(r[4]), "count": r[5],
+        }
+        for r in rows if r[1] is not None
+    ]
+    unit = "头" if table == "fact_slaughter_daily" else "元/公斤"
+    return series, unit
+
+
 class TimeSeriesResponse(BaseModel):
     indicator_code: str
     indicator_name: str
@@ -71,6 +111,7 @@ async def get_timeseries(
     from_date: Optional[date] = Query(None, description="开始日期"),
     to_date: Optional[date] = Query(None, description="结束日期"),
     include_metrics: bool = Query(False, description="是否包含预计算metrics"),
+    agg: str = Query("avg", description="日度指标按 W/M 汇总时的取值：avg/min/max/last"),
     current_user: SysUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -79,8 +120,14 @@ async def get_timeseries(
     series = []
     unit = None
 
+    # 1a. 日度指标按周/月查询：读导入时维护的汇总表
+    if indicator_code in INDICATOR_ROUTING and freq in ("W", "M"):
+        if agg not in _ROLLUP_AGG_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"不支持的汇总方式: {agg}")
+        series, unit = _query_rollup(db, indicator_code, region, freq, agg, from_date, to_date)
+
     # 1. 尝试路由表匹配
-    if indicator_code in INDICATOR_ROUTING:
+    elif indicator_code in INDICATOR_ROUTING:
         table, date_col, filter_col, filter_val, default_source = INDICATOR_ROUTING[indicator_code]
         # fact_slaughter_daily 没有 indicator_code/value/unit 列
         if table == "fact_slaughter_daily":
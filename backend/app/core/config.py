@@ -34,7 +34,50 @@ class Settings(BaseSettings):
     DISABLE_CHART_CACHE: bool = False
     # 预计算请求的 base URL（默认本机）
     BACKEND_BASE_URL: str = "http://127.0.0.1:8000"
-    
+
+    # 多进程部署（gunicorn.conf.py / serve.py）：监听地址、worker 数与超时（秒）
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_WORKERS: int = 1
+    WEB_TIMEOUT: int = 900  # 农历等图表首次计算较久，与 QUICK_CHART_PRECOMPUTE_TIMEOUT 一致
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    WEB_KEEPALIVE: int = 5
+    # 图表缓存 key 索引的重载间隔（秒）：其它 worker 写入的缓存最多延迟该时长被本进程看到
+    CHART_CACHE_INDEX_TTL_SEC: float = 60.0
+
+    # SQL 埋点：每个请求统计语句数/行数/DB 耗时，写入 Server-Timing 与访问日志
+    SERVER_TIMING_ENABLED: bool = True
+    # 超过该耗时（毫秒）的语句记入慢查询环形缓冲（/api/internal/slow-queries），<=0 关闭
+    SQL_SLOW_QUERY_MS: float = 500.0
+    SQL_SLOW_QUERY_RING_SIZE: int = 200
+    # 慢 SELECT 是否附带 EXPLAIN（在同一连接上额外执行一次）
+    SQL_SLOW_QUERY_EXPLAIN: bool = True
+
+    # 采样剖析（app/core/profiling.py）：按需剖析的采样间隔（毫秒）与保留份数
+    PROFILE_ON_DEMAND_INTERVAL_MS: float = 2.0
+    PROFILE_STORE_SIZE: int = 20
+    # 持续剖析采样间隔（毫秒），<=0 关闭；开启时建议 >= 10，按路由累计热点函数
+    PROFILE_SAMPLE_INTERVAL_MS: float = 0.0
+
+    # 报告异步任务（app/services/report_job_service.py）：产物目录、并发数、产物保留天数
+    REPORT_ARTIFACT_DIR: str = "reports/artifacts"
+    REPORT_JOB_WORKERS: int = 2
+    REPORT_ARTIFACT_MAX_AGE_DAYS: int = 30
+    # pending/running 超过该时长（秒）视为进程已退出，不再复用
+    REPORT_JOB_STALE_SEC: int = 1800
+    # 模板执行（template_executor）：相互独立的 block 并发数，每个 block 独立 DB 会话
+    TEMPLATE_BLOCK_WORKERS: int = 4
+
+    # 导入进度 SSE（app/services/ingest_task_progress.py）：无进度变化时的心跳间隔（秒），防止代理断开空闲连接
+    INGEST_SSE_HEARTBEAT_SEC: float = 15.0
+
+    # 图表只读副本（app/services/chart_repository.py）：fact 表按年分区导出的 Parquet 目录。
+    # 配置且安装 duckdb/pyarrow 时季节性等图表查询走 DuckDB，失败回退 MySQL；为空关闭。
+    # 导入侧（import_tool/parquet_replica.py）从同一个 .env / 环境变量读取（不导入本模块），导入后刷新触达的年份分区
+    CHART_REPLICA_DIR: Optional[str] = None
+
+    # 期权分析（app/services/options_analytics_service.py）：Black-76 无风险利率（年化，连续复利）
+    OPTIONS_RISK_FREE_RATE: float = 0.015
+
     class Config:
         env_file = ".env"
         case_sensitive = True
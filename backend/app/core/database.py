@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.sql_instrumentation import instrument_engine
 
 # 创建引擎
 engine = create_engine(
@@ -17,6 +18,9 @@ engine = create_engine(
     }
 )
 
+# 请求级 SQL 统计与慢查询记录（Server-Timing / /api/internal/slow-queries）
+instrument_engine(engine)
+
 # 创建SessionLocal类
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
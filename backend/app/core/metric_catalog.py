@@ -0,0 +1,62 @@
+"""
+指标目录（Python dict 维护）：/dim/metrics 的 id 即列表序号（从 1 开始），导出与 TopN 排名按序号引用，
+并共用同一张 code → fact 表路由（EXPORT_ROUTING）。
+"""
+from typing import Dict, Optional, Tuple
+
+METRIC_CATALOG = [
+    # 日度价格
+    {"metric_group": "price", "metric_name": "全国标猪均价", "code": "标猪均价", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "price", "metric_name": "散户标猪价", "code": "散户标猪价", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "price", "metric_name": "省份均价", "code": "省份均价", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "price", "metric_name": "钢联猪价", "code": "hog_price", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "price", "metric_name": "白条价格", "code": "white_strip_price", "unit": "元/公斤", "freq": "D"},
+    # 日度价差
+    {"metric_group": "spread", "metric_name": "标肥价差", "code": "std_fat_spread", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "spread", "metric_name": "毛白价差", "code": "mao_bai_spread", "unit": "元/公斤", "freq": "D"},
+    {"metric_group": "spread", "metric_name": "区域价差", "code": "region_spread", "unit": "元/公斤", "freq": "D"},
+    # 日度屠宰
+    {"metric_group": "slaughter", "metric_name": "屠宰量", "code": "slaughter_volume", "unit": "头", "freq": "D"},
+    # 周度指标
+    {"metric_group": "weekly", "metric_name": "商品猪出栏价", "code": "hog_price_out", "unit": "元/公斤", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "出栏均重", "code": "weight_avg", "unit": "公斤", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "冻品库容率", "code": "frozen_rate", "unit": "%", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "仔猪价格", "code": "piglet_price_15kg", "unit": "元/公斤", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "母猪价格", "code": "sow_price_50kg", "unit": "元/头", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "养殖利润(万头)", "code": "profit_breeding_10000", "unit": "元/头", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "全价料价格", "code": "feed_price_complete", "unit": "元/吨", "freq": "W"},
+    {"metric_group": "weekly", "metric_name": "鲜销率", "code": "fresh_sale_rate", "unit": "%", "freq": "W"},
+    # 月度指标
+    {"metric_group": "monthly", "metric_name": "能繁母猪存栏", "code": "breeding_sow_inventory", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "仔猪存栏", "code": "piglet_inventory", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "大猪存栏", "code": "hog_inventory", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "商品猪出栏量", "code": "hog_output_volume", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "淘汰母猪屠宰", "code": "cull_slaughter", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "PSY", "code": "prod_psy", "unit": "头", "freq": "M"},
+    {"metric_group": "monthly", "metric_name": "MSY", "code": "prod_msy", "unit": "头", "freq": "M"},
+    # 季度指标
+    {"metric_group": "quarterly", "metric_name": "统计局生猪存栏", "code": "nbs_hog_inventory", "unit": "万头", "freq": "Q"},
+    {"metric_group": "quarterly", "metric_name": "统计局能繁存栏", "code": "nbs_sow_inventory", "unit": "万头", "freq": "Q"},
+    {"metric_group": "quarterly", "metric_name": "统计局生猪出栏", "code": "nbs_hog_output", "unit": "万头", "freq": "Q"},
+    {"metric_group": "quarterly", "metric_name": "统计局猪肉产量", "code": "nbs_pork_output", "unit": "万吨", "freq": "Q"},
+    # 期货
+    {"metric_group": "futures", "metric_name": "期货收盘价", "code": "futures_close", "unit": "元/吨", "freq": "D"},
+    {"metric_group": "futures", "metric_name": "期货结算价", "code": "futures_settle", "unit": "元/吨", "freq": "D"},
+]
+
+# ── 指标目录 code → fact 表路由 ──
+# (表名, 日期列, 值列, 过滤列, 过滤值, 子维度表达式)
+# 子维度用于区分同一指标下的多条序列（数据源 / 合约 / 价差类型），拼在列名中
+EXPORT_ROUTING: Dict[str, Tuple[str, str, str, Optional[str], Optional[str], str]] = {
+    "标猪均价": ("fact_price_daily", "trade_date", "value", "price_type", "标猪均价", "source"),
+    "散户标猪价": ("fact_price_daily", "trade_date", "value", "price_type", "散户标猪价", "source"),
+    "省份均价": ("fact_price_daily", "trade_date", "value", "price_type", "省份均价", "source"),
+    "hog_price": ("fact_price_daily", "trade_date", "value", "price_type", "hog_avg_price", "source"),
+    "white_strip_price": ("fact_carcass_market", "trade_date", "value", "metric_type", "carcass_price", "source"),
+    "std_fat_spread": ("fact_spread_daily", "trade_date", "value", "spread_type", "fat_std_spread", "source"),
+    "mao_bai_spread": ("fact_spread_daily", "trade_date", "value", "spread_type", "mao_bai_spread", "source"),
+    "region_spread": ("fact_spread_daily", "trade_date", "value", "spread_type", "region_spread_%", "spread_type"),
+    "slaughter_volume": ("fact_slaughter_daily", "trade_date", "volume", None, None, "source"),
+    "futures_close": ("fact_futures_daily", "trade_date", "close", None, None, "contract_code"),
+    "futures_settle": ("fact_futures_daily", "trade_date", "settle", None, None, "contract_code"),
+}
@@ -0,0 +1,81 @@
+"""
+多进程部署的共享状态预加载。
+
+gunicorn 以 preload_app 方式在 master 进程导入 main:app，并在 fork worker 之前调用 preload_shared_state()。
+这里加载的是只读、构建较贵的状态，fork 后各 worker 以写时复制方式共享：
+  - 农历查找表（lunar_alignment_service.get_lunar_table）
+  - dim_region 查找表（region_mapping_service.get_dim_region_maps）
+  - 图表缓存 key 索引（quick_chart_service.chart_cache_index）
+  - TopN 省份截面索引（topn_service.rebuild_ranking_index）
+单进程 uvicorn 不调用本模块，上述状态在首次使用时按需构建。
+"""
+import logging
+import time
+from typing import Callable, Dict
+
+from app.core.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+def _load_lunar_table() -> None:
+    from app.services.lunar_alignment_service import get_lunar_table
+
+    get_lunar_table()
+
+
+def _load_region_maps() -> None:
+    from app.services.region_mapping_service import get_dim_region_maps
+
+    db = SessionLocal()
+    try:
+        get_dim_region_maps(db)
+    finally:
+        db.close()
+
+
+def _load_chart_cache_index() -> None:
+    from app.services.quick_chart_service import chart_cache_index
+
+    db = SessionLocal()
+    try:
+        chart_cache_index.load(db)
+    finally:
+        db.close()
+
+
+def _load_ranking_index() -> None:
+    from app.services.topn_service import rebuild_ranking_index
+
+    rebuild_ranking_index(engine)
+
+
+PRELOAD_STEPS: Dict[str, Callable[[], None]] = {
+    "lunar_table": _load_lunar_table,
+    "region_maps": _load_region_maps,
+    "chart_cache_index": _load_chart_cache_index,
+    "ranking_index": _load_ranking_index,
+}
+
+
+def preload_shared_state() -> Dict[str, float]:
+    """
+    依次执行 PRELOAD_STEPS；单步失败只记日志（worker 中会按需重建）。
+    结束时释放连接池，避免 fork 出的 worker 共用 master 的数据库连接。
+
+    Returns:
+        {步骤名: 耗时秒}（失败的步骤不在其中）
+    """
+    elapsed: Dict[str, float] = {}
+    try:
+        for name, step in PRELOAD_STEPS.items():
+            t0 = time.perf_counter()
+            try:
+                step()
+                elapsed[name] = round(time.perf_counter() - t0, 3)
+            except Exception as e:
+                logger.warning("preload step failed step=%s error=%s", name, e)
+    finally:
+        engine.dispose()
+    logger.info("preload shared state done elapsed=%s", elapsed)
+    return elapsed
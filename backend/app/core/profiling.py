@@ -0,0 +1,195 @@
+"""
+采样式 Python 性能剖析（纯标准库，基于 sys._current_frames）。
+
+采样线程按固定间隔抓取所有线程的调用栈，只保留经过「锚点」函数的栈，
+并从锚点开始折叠为 collapsed stack（flamegraph.pl / speedscope 可直接读取）：
+  - 锚点为各路由的 endpoint 函数与 FastAPI 的 serialize_response（JSON 序列化），
+    因此同步路由在线程池中的执行也能归属到路由，空闲线程与其它框架代码不会混入
+  - 按需剖析：ProfilingMiddleware 对带 ?__profile=1 或 X-Profile: 1（且携带
+    X-Quick-Chart-Secret）的请求只以该路由为锚点高频采样，结果存入 profile_store
+  - 持续剖析：PROFILE_SAMPLE_INTERVAL_MS > 0 时，每个 worker 常驻一个低频采样线程，
+    按路由累计热点函数（/api/internal/profile-report）
+
+同一路由的并发请求会合并进同一份采样；GIL 切换间隔（默认 5ms）决定了实际采样率上限。
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from types import CodeType
+from typing import Optional
+
+from app.core.config import settings
+
+SERIALIZE_KEY = "(serialize_response)"
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_label_cache: dict[CodeType, str] = {}
+
+
+def _frame_label(code: CodeType) -> str:
+    label = _label_cache.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_BACKEND_DIR):
+            path = os.path.relpath(path, _BACKEND_DIR)
+        elif "site-packages" in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        label = f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ",")
+        _label_cache[code] = label
+    return label
+
+
+class StackSampler:
+    """后台采样线程：{锚点 key: Counter(collapsed stack → 样本数)}"""
+
+    def __init__(self, interval_sec: float, anchors: dict[CodeType, str]):
+        self.interval_sec = max(interval_sec, 0.0005)
+        self.anchors = anchors
+        self.samples = 0
+        self.started_at = time.time()
+        self._stacks: dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self.sample_once()
+
+    def sample_once(self) -> None:
+        me = threading.get_ident()
+        hits: list[tuple[str, str]] = []
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            codes: list[CodeType] = []
+            anchor_at = -1
+            while frame is not None:
+                codes.append(frame.f_code)
+                if frame.f_code in self.anchors:
+                    anchor_at = len(codes) - 1  # 继续向外走，取最外层锚点
+                frame = frame.f_back
+            if anchor_at < 0:
+                continue
+            key = self.anchors[codes[anchor_at]]
+            hits.append((key, ";".join(_frame_label(c) for c in reversed(codes[:anchor_at + 1]))))
+        with self._lock:
+            self.samples += 1
+            for key, stack in hits:
+                self._stacks[key][stack] += 1
+
+    def stacks(self) -> dict[str, Counter]:
+        with self._lock:
+            return {k: Counter(v) for k, v in self._stacks.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples = 0
+            self.started_at = time.time()
+            self._stacks.clear()
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """collapsed stack 文本：每行「f1;f2;f3 样本数」"""
+    return "\n".join(f"{stack} {n}" for stack, n in stacks.most_common()) + "\n"
+
+
+def hot_functions(stacks: Counter, top: int = 20) -> list[dict]:
+    """热点函数：self（栈顶）与 total（出现在栈中，同一栈只计一次）样本数及占比"""
+    total_samples = sum(stacks.values())
+    if not total_samples:
+        return []
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += n
+        for f in set(frames):
+            total_counts[f] += n
+    return [
+        {
+            "function": f,
+            "self": n,
+            "self_pct": round(n * 100 / total_samples, 1),
+            "total": total_counts[f],
+            "total_pct": round(total_counts[f] * 100 / total_samples, 1),
+        }
+        for f, n in self_counts.most_common(top)
+    ]
+
+
+class ProfileStore:
+    """按需剖析结果（进程内，只保留最近 maxlen 份）"""
+
+    def __init__(self, maxlen: int):
+        self._items: deque[dict] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, meta: dict, stacks: Counter) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._items.append({
+                "id": profile_id,
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "samples": sum(stacks.values()),
+                **meta,
+                "stacks": stacks,
+            })
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return next((p for p in self._items if p["id"] == profile_id), None)
+
+    def list(self) -> list[dict]:
+        """最新的在前，不含 stacks"""
+        with self._lock:
+            items = list(self._items)
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in reversed(items)]
+
+
+profile_store = ProfileStore(settings.PROFILE_STORE_SIZE)
+
+_continuous: Optional[StackSampler] = None
+_continuous_lock = threading.Lock()
+
+
+def route_anchors(routes) -> dict[CodeType, str]:
+    """路由表 → {endpoint 代码对象: 路由 path}，另含 serialize_response"""
+    from fastapi.routing import APIRoute, serialize_response
+
+    anchors = {serialize_response.__code__: SERIALIZE_KEY}
+    for route in routes:
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "__code__"):
+            anchors[route.endpoint.__code__] = route.path
+    return anchors
+
+
+def ensure_continuous_sampler(app) -> Optional[StackSampler]:
+    """按配置启动本进程的常驻采样线程（首次请求时调用，fork 之后各 worker 各自启动）"""
+    global _continuous
+    interval_ms = settings.PROFILE_SAMPLE_INTERVAL_MS
+    if interval_ms <= 0 or _continuous is not None:
+        return _continuous
+    with _continuous_lock:
+        if _continuous is None:
+            _continuous = StackSampler(interval_ms / 1000, route_anchors(app.routes)).start()
+    return _continuous
+
+
+def continuous_sampler() -> Optional[StackSampler]:
+    return _continuous
@@ -0,0 +1,173 @@
+"""
+SQL 埋点：在 engine 的 before/after_cursor_execute 上统计每个请求的语句数、返回行数与 DB 耗时，
+并把超过 SQL_SLOW_QUERY_MS 的语句（含参数与 EXPLAIN）记入进程内环形缓冲。
+
+请求范围通过 ContextVar 传递：RequestLoggingMiddleware 在进入请求时 begin_request()，
+同步路由在线程池中执行时会复制上下文，统计对象为同一实例，因此能累加到当前请求。
+请求外执行的语句（预加载、后台线程）不计入请求统计，但仍会进入慢查询缓冲。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_STATEMENT_CHARS = 4000
+_MAX_PARAMS_CHARS = 2000
+
+
+@dataclass
+class RequestSqlStats:
+    path: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    statements: int = 0
+    rows: int = 0
+    db_ms: float = 0.0
+
+    def server_timing(self) -> str:
+        """Server-Timing 头：db（SQL 累计）、app（其余 Python 处理）、total"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        app_ms = max(total_ms - self.db_ms, 0.0)
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.statements} queries, {self.rows} rows", '
+            f"app;dur={app_ms:.1f}, total;dur={total_ms:.1f}"
+        )
+
+
+_current: ContextVar[Optional[RequestSqlStats]] = ContextVar("request_sql_stats", default=None)
+
+
+class SlowQueryLog:
+    """慢查询环形缓冲（线程安全，只保留最近 maxlen 条）"""
+
+    def __init__(self, maxlen: int):
+        self._items: deque[dict] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, item: dict) -> None:
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self, limit: Optional[int] = None) -> list[dict]:
+        """最新的在前"""
+        with self._lock:
+            items = list(self._items)
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def clear(self) -> int:
+        with self._lock:
+            n = len(self._items)
+            self._items.clear()
+        return n
+
+
+slow_query_log = SlowQueryLog(settings.SQL_SLOW_QUERY_RING_SIZE)
+
+
+def begin_request(path: str) -> tuple[RequestSqlStats, object]:
+    """开始统计一个请求，返回 (统计对象, token)；结束时调用 end_request(token)"""
+    stats = RequestSqlStats(path=path)
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestSqlStats]:
+    return _current.get()
+
+
+def _truncate(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit] + "...(truncated)"
+
+
+def _explain(cursor, statement: str, parameters) -> Optional[list[dict]]:
+    """在同一 DBAPI 连接上对 SELECT 执行 EXPLAIN；失败返回 None"""
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("EXPLAIN " + statement, parameters)
+            columns = [d[0] for d in explain_cursor.description or []]
+            return [dict(zip(columns, [str(v) if v is not None else None for v in row]))
+                    for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        logger.debug("slow query explain failed error=%s", e)
+        return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    streaming = context is not None and context.execution_options.get("stream_results")
+    # 服务端游标（pymysql SSCursor）执行后 rowcount 未知，返回 2**64 - 1，不计入行数
+    rowcount = cursor.rowcount
+    rows = rowcount if (
+        cursor.description is not None and not streaming and 0 < rowcount < 2 ** 63
+    ) else 0
+
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.rows += rows
+        stats.db_ms += elapsed_ms
+
+    threshold = settings.SQL_SLOW_QUERY_MS
+    if threshold <= 0 or elapsed_ms < threshold:
+        return
+    explain = None
+    if (
+        settings.SQL_SLOW_QUERY_EXPLAIN and not executemany and not streaming
+        and statement.lstrip()[:6].upper() == "SELECT"
+    ):
+        explain = _explain(cursor, statement, parameters)
+    slow_query_log.add({
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "path": stats.path if stats is not None else None,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "rows": rows,
+        "executemany": executemany,
+        "statement": _truncate(statement, _MAX_STATEMENT_CHARS),
+        "parameters": _truncate(repr(parameters), _MAX_PARAMS_CHARS),
+        "explain": explain,
+    })
+    logger.warning(
+        "sql_slow path=%s elapsed_ms=%.0f rows=%d statement=%s",
+        stats.path if stats is not None else "(none)",
+        elapsed_ms, rows, " ".join(statement.split())[:200],
+    )
+
+
+def _handle_error(exception_context):
+    # 语句失败时不会触发 after_cursor_execute，弹出对应的开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """为 engine 注册埋点（重复调用无副作用）"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
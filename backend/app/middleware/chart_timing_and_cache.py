@@ -13,7 +13,7 @@ from app.core.quick_chart_config import (
     is_chart_api_path,
 )
 from app.core.database import SessionLocal
-from app.services.quick_chart_service import build_cache_key, get_cached, set_cached
+from app.services.quick_chart_service import build_cache_key, chart_cache_index, get_cached, set_cached
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +29,16 @@ class ChartTimingAndCacheMiddleware(BaseHTTPMiddleware):
         # 审计对账模式：禁用缓存，直接透传请求
         if getattr(settings, "DISABLE_CHART_CACHE", False):
             return await call_next(request)
+        # 按需剖析的请求要测真实计算，且结果不写缓存
+        if getattr(request.state, "profile", False):
+            return await call_next(request)
 
         query_string = request.scope.get("query_string", b"").decode("utf-8")
         cache_key = build_cache_key(path, query_string)
         db = SessionLocal()
         try:
-            cached = get_cached(db, cache_key)
+            # 进程内 key 索引未命中时不查 response_body
+            cached = get_cached(db, cache_key) if chart_cache_index.may_contain(db, cache_key) else None
             if cached is not None:
                 if "/price-display/slaughter" in path:
                     logger.info(
@@ -0,0 +1,71 @@
+"""
+按需剖析：带 ?__profile=1 或 X-Profile: 1 且 X-Quick-Chart-Secret 正确的请求，
+在采样剖析下执行（绕过图表缓存），结果存入 profile_store，响应头返回 X-Profile-Id；
+通过 /api/internal/profiles/{id} 获取 collapsed stack / 热点函数。
+同时负责按配置启动本进程的持续剖析采样线程。
+"""
+import logging
+import time
+from collections import Counter
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.core.profiling import (
+    StackSampler,
+    ensure_continuous_sampler,
+    profile_store,
+    route_anchors,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _wants_profile(request: Request) -> bool:
+    flag = request.query_params.get("__profile") or request.headers.get("X-Profile")
+    if flag not in ("1", "true"):
+        return False
+    secret = settings.QUICK_CHART_INTERNAL_SECRET
+    return bool(secret) and request.headers.get("X-Quick-Chart-Secret") == secret
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        ensure_continuous_sampler(request.app)
+        if not _wants_profile(request):
+            return await call_next(request)
+
+        route = next(
+            (r for r in request.app.router.routes if r.matches(request.scope)[0] == Match.FULL),
+            None,
+        )
+        if route is None:
+            return await call_next(request)
+        # 只以本路由 endpoint + 序列化为锚点，其它路由的并发请求不会混入
+        request.state.profile = True
+        sampler = StackSampler(
+            settings.PROFILE_ON_DEMAND_INTERVAL_MS / 1000, route_anchors([route])
+        ).start()
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            sampler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        stacks = sum(sampler.stacks().values(), start=Counter())
+        query = "&".join(f"{k}={v}" for k, v in request.query_params.multi_items() if k != "__profile")
+        profile_id = profile_store.add({
+            "path": request.url.path,
+            "query": query,
+            "status": response.status_code,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "interval_ms": settings.PROFILE_ON_DEMAND_INTERVAL_MS,
+        }, stacks)
+        logger.info(
+            "profile_captured id=%s path=%s elapsed_ms=%.0f samples=%d",
+            profile_id, request.url.path, elapsed_ms, sum(stacks.values()),
+        )
+        response.headers["X-Profile-Id"] = profile_id
+        return response
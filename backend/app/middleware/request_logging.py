@@ -1,11 +1,15 @@
 """
-请求访问日志：记录每条请求的 method、path、query、状态码、耗时。
+请求访问日志：记录每条请求的 method、path、query、状态码、耗时，
+以及本请求执行的 SQL 语句数、返回行数与 DB 耗时（同时写入 Server-Timing 响应头）。
 """
 import logging
 import time
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
+from app.core.config import settings
+from app.core.sql_instrumentation import begin_request, end_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,15 +20,24 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         path = request.url.path
         method = request.method
 
-        response = await call_next(request)
+        stats, token = begin_request(path)
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(token)
         elapsed_ms = (time.perf_counter() - start) * 1000
         status = response.status_code
+        if settings.SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = stats.server_timing()
         logger.info(
-            "request method=%s path=%s query=%s status=%s elapsed_ms=%.0f",
+            "request method=%s path=%s query=%s status=%s elapsed_ms=%.0f sql_count=%d sql_rows=%d db_ms=%.0f",
             method,
             path,
             query_string or "(none)",
             status,
             elapsed_ms,
+            stats.statements,
+            stats.rows,
+            stats.db_ms,
         )
         return response
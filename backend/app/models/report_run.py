@@ -14,6 +14,7 @@ class ReportRun(Base):
     status = Column(String(20), nullable=False, default="pending")  # pending/running/success/failed
     output_path = Column(String(512))  # 输出文件路径
     error_json = Column(JSON)  # 错误信息（如果失败）
+    cache_key = Column(String(64), index=True)  # 产物缓存键：sha256(模板, 参数, 数据版本)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     finished_at = Column(DateTime(timezone=True))  # 完成时间
 
@@ -0,0 +1,155 @@
+"""图表查询仓储：MySQL（默认）/ Parquet 只读副本（DuckDB）
+
+季节性等图表接口的时间序列扫描经 get_chart_repository(db) 读取：
+- 配置 CHART_REPLICA_DIR 且安装 duckdb 时返回 ParquetChartRepository，用 DuckDB 直接查询
+  import_tool/parquet_replica.py 导出的年份分区（按年份裁剪分区），副本缺失或查询失败时回退 MySQL；
+- 否则返回 MySQLChartRepository，与原先的 SQL 等价。
+两种实现返回相同结构：数值统一为 float，日期为 date，按日期升序。
+"""
+import importlib.util
+import logging
+import re
+import threading
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HAS_DUCKDB = importlib.util.find_spec("duckdb") is not None
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class ChartRepository(Protocol):
+    name: str
+
+    def series(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        *,
+        columns: Sequence[str] = ("value",),
+        date_column: str = "trade_date",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Tuple]:
+        """[(date, *columns)]，按日期升序；filters 为 {列: 值} 等值条件"""
+
+
+def _check_identifiers(*names: str) -> None:
+    for name in names:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"非法表名/列名: {name}")
+
+
+def _normalize(row) -> Tuple:
+    return tuple(float(v) if isinstance(v, Decimal) else v for v in row)
+
+
+def _where(
+    filters: Dict[str, Any],
+    date_column: str,
+    start: Optional[date],
+    end: Optional[date],
+    quote: str,
+    placeholder: str,
+) -> Tuple[str, Dict[str, Any]]:
+    """等值条件 + 日期范围 → (WHERE 子句, 参数)；quote 为标识符引号，placeholder 为参数前缀"""
+    parts: List[str] = []
+    params: Dict[str, Any] = {}
+    for i, (col, val) in enumerate(filters.items()):
+        parts.append(f"{quote}{col}{quote} = {placeholder}f{i}")
+        params[f"f{i}"] = val
+    if start:
+        parts.append(f"{quote}{date_column}{quote} >= {placeholder}lo")
+        params["lo"] = start
+    if end:
+        parts.append(f"{quote}{date_column}{quote} <= {placeholder}hi")
+        params["hi"] = end
+    return " AND ".join(parts) or "1 = 1", params
+
+
+class MySQLChartRepository:
+    name = "mysql"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def series(self, table, filters, *, columns=("value",), date_column="trade_date", start=None, end=None):
+        _check_identifiers(table, date_column, *columns, *filters)
+        where, params = _where(filters, date_column, start, end, "`", ":")
+        cols = ", ".join(f"`{c}`" for c in (date_column, *columns))
+        rows = self.db.execute(
+            text(f"SELECT {cols} FROM `{table}` WHERE {where} ORDER BY `{date_column}`"), params
+        ).fetchall()
+        return [_normalize(r) for r in rows]
+
+
+_duck_lock = threading.Lock()
+_duck_conn = None
+
+
+def _duckdb_cursor():
+    """进程内共享一个内存 DuckDB 连接，每次查询取独立 cursor（cursor 可跨线程并发使用）"""
+    global _duck_conn
+    with _duck_lock:
+        if _duck_conn is None:
+            import duckdb
+
+            _duck_conn = duckdb.connect()
+        return _duck_conn.cursor()
+
+
+class ParquetChartRepository:
+    name = "parquet"
+
+    def __init__(self, root: Path, fallback: ChartRepository):
+        self.root = Path(root)
+        self.fallback = fallback
+
+    def series(self, table, filters, *, columns=("value",), date_column="trade_date", start=None, end=None):
+        try:
+            return self._series(table, filters, columns, date_column, start, end)
+        except Exception as e:
+            logger.warning("chart replica fallback table=%s op=series error=%s", table, e)
+            return self.fallback.series(
+                table, filters, columns=columns, date_column=date_column, start=start, end=end,
+            )
+
+    def _source(self, table: str) -> str:
+        table_dir = self.root / table
+        if not table_dir.is_dir():
+            raise FileNotFoundError(f"副本中没有 {table}")
+        glob = str(table_dir / "year=*" / "*.parquet").replace("'", "''")
+        return f"read_parquet('{glob}', hive_partitioning = true)"
+
+    def _series(self, table, filters, columns, date_column, start, end):
+        _check_identifiers(table, date_column, *columns, *filters)
+        where, params = _where(filters, date_column, start, end, '"', "$")
+        # year 为分区列：按日期范围裁剪需要读取的分区文件
+        if start:
+            where += " AND year >= $ylo"
+            params["ylo"] = start.year
+        if end:
+            where += " AND year <= $yhi"
+            params["yhi"] = end.year
+        cols = ", ".join(f'"{c}"' for c in (date_column, *columns))
+        rows = _duckdb_cursor().execute(
+            f'SELECT {cols} FROM {self._source(table)} WHERE {where} ORDER BY "{date_column}"', params
+        ).fetchall()
+        return [_normalize(r) for r in rows]
+
+
+def get_chart_repository(db: Session) -> ChartRepository:
+    """按配置选择图表查询仓储：副本可用时走 DuckDB（失败回退 MySQL），否则直接走 MySQL"""
+    mysql = MySQLChartRepository(db)
+    if settings.CHART_REPLICA_DIR and HAS_DUCKDB:
+        return ParquetChartRepository(Path(settings.CHART_REPLICA_DIR), mysql)
+    return mysql
@@ -1,185 +1,388 @@
+"""数据导出引擎（hogprice_v3）
+
+按 /dim/metrics 的指标目录把请求路由到各 fact 表，拼成一条 UNION ALL ... ORDER BY 日期 的查询，
+通过服务端游标（stream_results）只扫描一遍，按日期透视成「日期 × 系列」宽表：
+  - 扫描时每个日期（周期）只持有一行 {series_key: 值}，逐行暂存到临时文件，同时收集列清单
+  - 扫描结束后列清单确定，先写表头再回放暂存行：xlsx 使用 xlsxwriter constant_memory 模式逐行落盘，
+    CSV 直接逐行生成
+内存占用与「列数」成正比，与导出的时间跨度无关。
+"""
+import csv
 import io
-from typing import Dict, List, Optional
-from datetime import datetime
-from sqlalchemy.orm import Session
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
 import xlsxwriter
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.metric_catalog import EXPORT_ROUTING, METRIC_CATALOG
+
+logger = logging.getLogger(__name__)
+
+_FETCH_SIZE = 5000
+_MAX_CHART_SERIES = 30  # 系列过多时图表不可读，超过则不生成图表
+
+# 按 metric_group 路由的指标表（indicator_code = 目录 code）
+_GROUP_TABLES = {
+    "weekly": ("fact_weekly_indicator", "week_end", "value", "indicator_code", None, "source"),
+    "monthly": ("fact_monthly_indicator", "month_date", "value", "indicator_code", None, "source"),
+    "quarterly": ("fact_quarterly_stats", "quarter_date", "value", "indicator_code", None, "''"),
+}
+
+# 无 region_code 列的表，按全国处理
+_NO_REGION_TABLES = {"fact_futures_daily"}
+
+TIME_DIMENSIONS = ("daily", "weekly", "monthly", "quarterly", "yearly")
+
+
+@dataclass
+class ExportColumn:
+    metric_idx: int
+    region_code: str
+    sub: str
+    header: str
+
+
+@dataclass
+class ExportPlan:
+    sql: str
+    params: dict
+    time_dimension: str = "daily"
+    region_names: Dict[str, str] = field(default_factory=dict)
+    columns: List[ExportColumn] = field(default_factory=list)  # 扫描（spool_pivot）后确定
+
+    @property
+    def headers(self) -> List[str]:
+        return ["日期"] + [c.header for c in self.columns]
 
-from app.services.query_service import query_timeseries
 
+def _route(metric: dict) -> Optional[tuple]:
+    if metric["code"] in EXPORT_ROUTING:
+        return EXPORT_ROUTING[metric["code"]]
+    group_route = _GROUP_TABLES.get(metric["metric_group"])
+    if group_route:
+        table, date_col, val_col, filter_col, _, sub = group_route
+        return table, date_col, val_col, filter_col, metric["code"], sub
+    return None
 
-def export_excel(
-    db: Session,
-    date_range: Optional[Dict] = None,
-    metric_ids: Optional[List[int]] = None,
+
+def _resolve_region_codes(engine: Engine, geo_ids: Optional[List[int]]) -> Optional[List[str]]:
+    """geo_ids（/dim/geo 返回的序号）→ region_code；为空表示不过滤地区"""
+    if not geo_ids:
+        return None
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT region_code FROM dim_region WHERE region_level = 2 ORDER BY region_code"
+        )).fetchall()
+    codes = [r[0] for i, r in enumerate(rows, 1) if i in set(geo_ids)]
+    # 全国序列不在 /dim/geo 中，始终保留
+    return codes + ["NATION"]
+
+
+def build_export_plan(
+    engine: Engine,
+    metric_ids: Optional[List[int]],
     geo_ids: Optional[List[int]] = None,
-    company_ids: Optional[List[int]] = None,
-    warehouse_ids: Optional[List[int]] = None,
-    tags_filter: Optional[Dict] = None,
-    group_by: Optional[List[str]] = None,
+    date_range: Optional[Dict[str, date]] = None,
     time_dimension: str = "daily",
+) -> ExportPlan:
+    """构建导出查询：一条 UNION ALL 查询；列（系列）清单在扫描时确定"""
+    if time_dimension not in TIME_DIMENSIONS:
+        raise ValueError(f"不支持的时间维度: {time_dimension}")
+    metric_ids = metric_ids or list(range(1, len(METRIC_CATALOG) + 1))
+    region_codes = _resolve_region_codes(engine, geo_ids)
+    start = (date_range or {}).get("start")
+    end = (date_range or {}).get("end")
+
+    parts: List[str] = []
+    params: dict = {}
+    for metric_id in metric_ids:
+        if not 1 <= metric_id <= len(METRIC_CATALOG):
+            continue
+        route = _route(METRIC_CATALOG[metric_id - 1])
+        if route is None:
+            continue
+        table, date_col, val_col, filter_col, filter_val, sub_expr = route
+        p = f"m{metric_id}_"
+        region_expr = "'NATION'" if table in _NO_REGION_TABLES else "region_code"
+        where = [f"`{val_col}` IS NOT NULL"]
+        if filter_col:
+            op = "LIKE" if "%" in filter_val else "="
+            where.append(f"`{filter_col}` {op} :{p}f")
+            params[f"{p}f"] = filter_val
+        if region_codes is not None and table not in _NO_REGION_TABLES:
+            names = [f"{p}r{i}" for i in range(len(region_codes))]
+            where.append(f"region_code IN ({', '.join(':' + n for n in names)})")
+            params.update(dict(zip(names, region_codes)))
+        if start:
+            where.append(f"`{date_col}` >= :{p}s")
+            params[f"{p}s"] = start
+        if end:
+            where.append(f"`{date_col}` <= :{p}e")
+            params[f"{p}e"] = end
+        parts.append(
+            f"SELECT `{date_col}` AS d, {metric_id} AS m, {region_expr} AS r, "
+            f"COALESCE({sub_expr}, '') AS s, `{val_col}` AS v FROM `{table}` WHERE {' AND '.join(where)}"
+        )
+
+    if not parts:
+        raise ValueError("没有可导出的指标")
+    union_sql = " UNION ALL ".join(f"({p})" for p in parts)
+    with engine.connect() as conn:
+        region_names = dict(conn.execute(text("SELECT region_code, region_name FROM dim_region")).fetchall())
+    return ExportPlan(
+        sql=f"SELECT d, m, r, s, v FROM ({union_sql}) u ORDER BY d",
+        params=params,
+        time_dimension=time_dimension,
+        region_names=region_names,
+    )
+
+
+def _header(plan: ExportPlan, metric_idx: int, region_code: str, sub: str) -> str:
+    name_parts = [METRIC_CATALOG[metric_idx - 1]["metric_name"], plan.region_names.get(region_code, region_code)]
+    if sub:
+        name_parts.append(sub)
+    return "-".join(name_parts)
+
+
+def _bucket(d: date, time_dimension: str) -> date:
+    """日期 → 所属周期起始日"""
+    if time_dimension == "weekly":
+        return d - timedelta(days=d.weekday())
+    if time_dimension == "monthly":
+        return d.replace(day=1)
+    if time_dimension == "quarterly":
+        return d.replace(month=(d.month - 1) // 3 * 3 + 1, day=1)
+    if time_dimension == "yearly":
+        return d.replace(month=1, day=1)
+    return d
+
+
+def _iter_buckets(engine: Engine, plan: ExportPlan) -> Iterator[Tuple[date, Dict[tuple, float]]]:
+    """
+    服务端游标逐行读取，按日期（或周期）聚合为 (日期, {(m, r, s): 值})。
+    非 daily 维度按周期取均值；内存中只保留当前周期的累加器。
+    """
+    current = None
+    sums: Dict[tuple, float] = {}
+    counts: Dict[tuple, int] = {}
+
+    def flush():
+        return current, {k: sums[k] / counts[k] for k in sums}
+
+    with engine.connect().execution_options(stream_results=True, yield_per=_FETCH_SIZE) as conn:
+        result = conn.execute(text(plan.sql), plan.params)
+        for d, m, r, s, v in result:
+            if isinstance(d, datetime):
+                d = d.date()
+            elif isinstance(d, str):
+                d = date.fromisoformat(d[:10])
+            key = _bucket(d, plan.time_dimension)
+            if key != current:
+                if current is not None:
+                    yield flush()
+                current = key
+                sums = {}
+                counts = {}
+            k = (m, r, s)
+            sums[k] = sums.get(k, 0.0) + float(v)
+            counts[k] = counts.get(k, 0) + 1
+        if current is not None:
+            yield flush()
+
+
+class PivotSpool:
+    """单遍扫描的透视结果：各周期行暂存在临时文件中，按确定后的列清单回放"""
+
+    def __init__(self, path: str, columns: List[ExportColumn]):
+        self.path = path
+        self.columns = columns
+
+    def rows(self) -> Iterator[Tuple[date, List[Optional[float]]]]:
+        col_index = {(c.metric_idx, c.region_code, c.sub): i for i, c in enumerate(self.columns)}
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    d, cells = pickle.load(f)
+                except EOFError:
+                    return
+                values: List[Optional[float]] = [None] * len(self.columns)
+                for k, v in cells.items():
+                    values[col_index[k]] = v
+                yield d, values
+
+    def close(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            logger.warning("删除导出暂存文件失败: %s", self.path)
+
+
+def spool_pivot(engine: Engine, plan: ExportPlan) -> PivotSpool:
+    """扫描一遍导出查询：透视行暂存到临时文件，同时收集出现过的系列，填充 plan.columns"""
+    fd, path = tempfile.mkstemp(prefix="hogprice_export_", suffix=".spool")
+    keys = set()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for d, cells in _iter_buckets(engine, plan):
+                keys.update(cells)
+                pickle.dump((d, cells), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(path)
+        raise
+    plan.columns = [ExportColumn(m, r, s, _header(plan, m, r, s)) for m, r, s in sorted(keys)]
+    return PivotSpool(path, plan.columns)
+
+
+def iter_pivot_rows(engine: Engine, plan: ExportPlan) -> Iterator[Tuple[date, List[Optional[float]]]]:
+    """扫描并按列清单输出 (日期, [各列值]) 行；开始迭代后 plan.columns 即已确定"""
+    spool = spool_pivot(engine, plan)
+    try:
+        yield from spool.rows()
+    finally:
+        spool.close()
+
+
+def iter_csv(engine: Engine, plan: ExportPlan) -> Iterator[bytes]:
+    """CSV 流：逐行编码输出（UTF-8 BOM，Excel 可直接打开）"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def take() -> bytes:
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+    spool = spool_pivot(engine, plan)
+    try:
+        yield "﻿".encode("utf-8")
+        writer.writerow(plan.headers)
+        yield take()
+        for n_rows, (d, values) in enumerate(spool.rows(), 1):
+            writer.writerow([d.isoformat()] + ["" if v is None else round(v, 6) for v in values])
+            if n_rows % 500 == 0:
+                yield take()
+        yield take()
+    finally:
+        spool.close()
+
+
+def write_xlsx(
+    engine: Engine,
+    plan: ExportPlan,
+    include_cover: bool = True,
     include_detail: bool = True,
     include_summary: bool = True,
     include_chart: bool = True,
-    include_cover: bool = True
-) -> io.BytesIO:
+) -> str:
     """
-    导出Excel文件
-    
-    Args:
-        db: 数据库会话
-        date_range: 日期范围
-        metric_ids: 指标ID列表
-        geo_ids: 地区ID列表
-        company_ids: 企业ID列表
-        warehouse_ids: 交割库ID列表
-        tags_filter: tags过滤条件
-        group_by: 分组字段
-        include_detail: 是否包含明细数据
-        include_summary: 是否包含汇总表
-        include_chart: 是否包含图表
-        include_cover: 是否包含封面
-    
-    Returns:
-        BytesIO对象（Excel文件内容）
+    xlsxwriter constant_memory 模式逐行写入临时文件，返回文件路径（调用方负责删除）。
+    汇总表（每列条数/最小/最大/均值/最新值）在回放暂存行时增量统计；
+    不含明细时不生成明细表，图表引用明细表数据，也一并省略。
     """
-    # 查询数据
-    query_result = query_timeseries(
-        db=db,
-        date_range=date_range,
-        metric_ids=metric_ids,
-        geo_ids=geo_ids,
-        company_ids=company_ids,
-        warehouse_ids=warehouse_ids,
-        tags_filter=tags_filter,
-        group_by=group_by,
-        time_dimension=time_dimension
-    )
-    
-    # 创建Excel文件（内存中）
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    
-    # 设置格式
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#366092',
-        'font_color': 'white',
-        'align': 'center',
-        'valign': 'vcenter',
-        'border': 1
-    })
-    
-    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
-    number_format = workbook.add_format({'num_format': '#,##0.00'})
-    
-    sheet_index = 0
-    
-    # 封面
-    if include_cover:
-        cover_sheet = workbook.add_worksheet('封面')
-        cover_sheet.write(0, 0, '猪价智盘数据报表', workbook.add_format({'bold': True, 'font_size': 16}))
-        cover_sheet.write(2, 0, f'生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-        cover_sheet.write(3, 0, f'时间范围: {date_range["start"]} 至 {date_range["end"]}')
-        cover_sheet.write(4, 0, f'指标数量: {len(metric_ids) if metric_ids else "全部"}')
-        sheet_index += 1
-    
-    # 明细数据表
-    if include_detail and query_result["series"]:
-        detail_sheet = workbook.add_worksheet('明细数据')
-        
-        # 写入表头
-        detail_sheet.write(0, 0, '日期', header_format)
-        col = 1
-        for series in query_result["series"]:
-            detail_sheet.write(0, col, series["name"], header_format)
-            col += 1
-        
-        # 写入数据
-        categories = query_result["categories"]
-        for row_idx, date_str in enumerate(categories, start=1):
-            detail_sheet.write(row_idx, 0, date_str, date_format)
-            
-            for col_idx, series in enumerate(query_result["series"], start=1):
-                value = None
-                for point in series["data"]:
-                    if point[0] == date_str:
-                        value = point[1]
-                        break
-                
-                if value is not None:
-                    detail_sheet.write(row_idx, col_idx, value, number_format)
-        
-        # 设置列宽
-        detail_sheet.set_column(0, 0, 12)  # 日期列
-        for i in range(1, len(query_result["series"]) + 1):
-            detail_sheet.set_column(i, i, 15)
-        
-        sheet_index += 1
-    
-    # 汇总表（如果有group_by）
-    if include_summary and group_by:
-        summary_sheet = workbook.add_worksheet('汇总数据')
-        
-        # 写入表头
-        summary_sheet.write(0, 0, '日期', header_format)
-        col = 1
-        for series in query_result["series"]:
-            summary_sheet.write(0, col, series["name"], header_format)
-            col += 1
-        
-        # 写入数据
-        categories = query_result["categories"]
-        for row_idx, date_str in enumerate(categories, start=1):
-            summary_sheet.write(row_idx, 0, date_str, date_format)
-            
-            for col_idx, series in enumerate(query_result["series"], start=1):
-                value = None
-                for point in series["data"]:
-                    if point[0] == date_str:
-                        value = point[1]
-                        break
-                
-                if value is not None:
-                    summary_sheet.write(row_idx, col_idx, value, number_format)
-        
-        # 设置列宽
-        summary_sheet.set_column(0, 0, 12)
-        for i in range(1, len(query_result["series"]) + 1):
-            summary_sheet.set_column(i, i, 15)
-        
-        sheet_index += 1
-    
-    # 图表
-    if include_chart and query_result["series"]:
-        chart_sheet = workbook.add_worksheet('图表')
-        
-        # 创建折线图
-        chart = workbook.add_chart({'type': 'line'})
-        
-        # 添加数据系列
-        categories_range = f'明细数据!$A$2:$A${len(query_result["categories"]) + 1}'
-        
-        for idx, series in enumerate(query_result["series"]):
-            col_letter = chr(ord('B') + idx)
-            values_range = f'明细数据!${col_letter}$2:${col_letter}${len(query_result["categories"]) + 1}'
-            
-            chart.add_series({
-                'name': series["name"],
-                'categories': categories_range,
-                'values': values_range,
-            })
-        
-        # 设置图表属性
-        chart.set_title({'name': '时间序列图表'})
-        chart.set_x_axis({'name': '日期'})
-        chart.set_y_axis({'name': '数值'})
-        chart.set_legend({'position': 'bottom'})
-        chart.set_size({'width': 720, 'height': 480})
-        
-        # 插入图表
-        chart_sheet.insert_chart('B2', chart)
-    
-    workbook.close()
-    output.seek(0)
-    
-    return output
+    spool = spool_pivot(engine, plan)
+    fd, path = tempfile.mkstemp(prefix="hogprice_export_", suffix=".xlsx")
+    os.close(fd)
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "tmpdir": tempfile.gettempdir()})
+    try:
+        header_format = workbook.add_format({
+            "bold": True, "bg_color": "#366092", "font_color": "white",
+            "align": "center", "valign": "vcenter", "border": 1,
+        })
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        number_format = workbook.add_format({"num_format": "#,##0.00"})
+
+        if include_cover:
+            cover = workbook.add_worksheet("封面")
+            cover.write(0, 0, "猪价智盘数据报表", workbook.add_format({"bold": True, "font_size": 16}))
+            cover.write(2, 0, f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            cover.write(3, 0, f"时间维度: {plan.time_dimension}")
+            cover.write(4, 0, f"系列数量: {len(plan.columns)}")
+
+        detail = None
+        if include_detail:
+            detail = workbook.add_worksheet("明细数据")
+            detail.set_column(0, 0, 12)
+            detail.set_column(1, max(len(plan.columns), 1), 15)
+            for col, title in enumerate(plan.headers):
+                detail.write(0, col, title, header_format)
+
+        n = len(plan.columns)
+        stat_count = [0] * n
+        stat_min = [None] * n
+        stat_max = [None] * n
+        stat_sum = [0.0] * n
+        stat_last = [None] * n
+        row_idx = 0
+        for row_idx, (d, values) in enumerate(spool.rows(), 1):
+            if detail is not None:
+                detail.write_datetime(row_idx, 0, datetime(d.year, d.month, d.day), date_format)
+            for i, v in enumerate(values):
+                if v is None:
+                    continue
+                if detail is not None:
+                    detail.write_number(row_idx, i + 1, v, number_format)
+                stat_count[i] += 1
+                stat_sum[i] += v
+                stat_min[i] = v if stat_min[i] is None else min(stat_min[i], v)
+                stat_max[i] = v if stat_max[i] is None else max(stat_max[i], v)
+                stat_last[i] = v
+
+        if include_summary and n:
+            summary = workbook.add_worksheet("汇总数据")
+            summary.set_column(0, 0, 30)
+            for col, title in enumerate(["系列", "条数", "最小值", "最大值", "均值", "最新值"]):
+                summary.write(0, col, title, header_format)
+            for i, c in enumerate(plan.columns, 1):
+                k = i - 1
+                summary.write(i, 0, c.header)
+                summary.write_number(i, 1, stat_count[k])
+                for col, v in ((2, stat_min[k]), (3, stat_max[k]), (5, stat_last[k])):
+                    if v is not None:
+                        summary.write_number(i, col, v, number_format)
+                if stat_count[k]:
+                    summary.write_number(i, 4, stat_sum[k] / stat_count[k], number_format)
+
+        if include_chart and detail is not None and row_idx and 0 < n <= _MAX_CHART_SERIES:
+            chart_sheet = workbook.add_worksheet("图表")
+            chart = workbook.add_chart({"type": "line"})
+            for i, c in enumerate(plan.columns, 1):
+                chart.add_series({
+                    "name": c.header,
+                    "categories": ["明细数据", 1, 0, row_idx, 0],
+                    "values": ["明细数据", 1, i, row_idx, i],
+                })
+            chart.set_title({"name": "时间序列图表"})
+            chart.set_x_axis({"name": "日期"})
+            chart.set_y_axis({"name": "数值"})
+            chart.set_legend({"position": "bottom"})
+            chart.set_size({"width": 720, "height": 480})
+            chart_sheet.insert_chart("B2", chart)
+    finally:
+        workbook.close()
+        spool.close()
+    logger.info("export xlsx rows=%d columns=%d path=%s", row_idx, len(plan.columns), path)
+    return path
+
+
+def iter_file_and_delete(path: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """分块读取文件后删除（用于 StreamingResponse）"""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.warning("删除导出临时文件失败: %s", path)
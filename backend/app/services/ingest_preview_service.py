@@ -1,12 +1,12 @@
 """导入预览服务"""
 from typing import Dict, List, Optional
-from io import BytesIO
+from datetime import date, datetime
 import pandas as pd
 import numpy as np
 import warnings
-from openpyxl import load_workbook
 
 from app.services.ingest_template_detector import detect_template
+from app.utils.workbook_peek import WorkbookPeek
 
 # 抑制 openpyxl 的默认样式警告
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl.styles.stylesheet')
@@ -32,12 +32,23 @@ def preview_excel(file_content: bytes, template_type: Optional[str] = None, file
             "field_mappings": Dict
         }
     """
-    if template_type is None:
-        template_type = detect_template(file_content, filename)
-    
     try:
-        excel_file = pd.ExcelFile(BytesIO(file_content), engine='openpyxl')
-        sheet_names = excel_file.sheet_names
+        peek = WorkbookPeek(file_content)
+    except Exception as e:
+        return {
+            "template_type": template_type or detect_template(file_content, filename),
+            "error": f"预览失败: {str(e)}",
+            "sheets": [],
+            "date_range": None,
+            "sample_rows": [],
+            "field_mappings": {}
+        }
+
+    try:
+        # 模板识别与预览共用同一个只读工作簿，每个 sheet 只流式解析前 PEEK_MAX_ROWS 行
+        if template_type is None:
+            template_type = detect_template(file_content, filename, peek=peek)
+        sheet_names = peek.sheet_names
         
         sheets_info = []
         all_dates = []
@@ -45,8 +56,9 @@ def preview_excel(file_content: bytes, template_type: Optional[str] = None, file
         
         for sheet_name in sheet_names:
             try:
-                # 读取前几行作为预览
-                df_sample = pd.read_excel(excel_file, sheet_name=sheet_name, nrows=10, engine='openpyxl')
+                # 读取前几行作为预览（首行为表头）
+                df_sample = _head_frame(peek.head(sheet_name))
+                total_rows, total_columns = peek.dimensions(sheet_name)
                 
                 # 转换sample_data，确保数值类型正确
                 sample_data = df_sample.head(5).to_dict('records')
@@ -59,7 +71,7 @@ def preview_excel(file_content: bytes, template_type: Optional[str] = None, file
                             # 处理pandas/numpy类型
                             if pd.isna(value):
                                 cleaned_row[str(key)] = None
-                            elif isinstance(value, pd.Timestamp):
+                            elif isinstance(value, (pd.Timestamp, datetime, date)):
                                 cleaned_row[str(key)] = value.strftime("%Y-%m-%d")
                             elif isinstance(value, np.integer):
                                 cleaned_row[str(key)] = int(value)
@@ -89,7 +101,10 @@ def preview_excel(file_content: bytes, template_type: Optional[str] = None, file
                     "name": sheet_name,
                     "rows": int(len(df_sample)),
                     "columns": [str(col) for col in df_sample.columns.tolist()],
-                    "sample_data": cleaned_sample_data
+                    "sample_data": cleaned_sample_data,
+                    # sheet 声明的总行列数（dimension 标记，含表头），不扫描数据
+                    "total_rows": total_rows,
+                    "total_columns": total_columns,
                 }
                 sheets_info.append(sheet_info)
                 
@@ -164,3 +179,23 @@ def preview_excel(file_content: bytes, template_type: Optional[str] = None, file
             "sample_rows": [],
             "field_mappings": {}
         }
+    finally:
+        peek.close()
+
+
+def _head_frame(rows: List[tuple]) -> pd.DataFrame:
+    """首行作表头的 DataFrame，列名规则同 pd.read_excel（空表头 Unnamed: i，重名追加 .1/.2）"""
+    if not rows:
+        return pd.DataFrame()
+    columns: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, col in enumerate(rows[0]):
+        name = f"Unnamed: {i}" if col is None or str(col).strip() == "" else col
+        key = str(name)
+        if key in seen:
+            seen[key] += 1
+            name = f"{key}.{seen[key]}"
+        else:
+            seen[key] = 0
+        columns.append(name)
+    return pd.DataFrame(list(rows[1:]), columns=columns)
@@ -1,15 +1,126 @@
-"""任务进度存储 - 用于 SSE 推送导入进度（单进程内存，多 worker 时需改用 Redis）"""
-from typing import Dict, Any, Optional
+"""任务进度存储 - 用于 SSE 推送导入进度（单进程内存，多 worker 时需改用 Redis）
+
+后台导入线程 publish 进度快照，SSE 协程 await 变更通知（ProgressBus.subscribe），
+不再按固定间隔轮询：没有变化时连接只在心跳超时醒来一次，sheet 解析完成即刻推送。
+"""
+import asyncio
+import threading
+import time
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+# 已完成任务保留时长（秒）：期间新连接的 SSE 仍能拿到最终状态
+DONE_TASK_TTL_SEC = 300.0
+
+
+@dataclass
+class _TaskState:
+    progress: dict
+    version: int = 0
+    done_at: Optional[float] = None
+    waiters: set = field(default_factory=set)  # {(event_loop, asyncio.Event)}
+
+
+class ProgressBus:
+    """进度发布/订阅：publish 可在任意线程调用，订阅方在各自事件循环中被唤醒"""
+
+    def __init__(self, done_ttl_sec: float = DONE_TASK_TTL_SEC):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, _TaskState] = {}
+        self._done_ttl_sec = done_ttl_sec
+
+    def publish(self, task_id: str, progress: dict) -> None:
+        """整体替换任务进度并唤醒订阅方"""
+        self._commit(task_id, dict(progress), create=True)
 
-TASK_PROGRESS: Dict[str, dict] = {}
+    def update(self, task_id: str, **changes: Any) -> None:
+        """合并更新已存在任务的进度字段；任务不存在时忽略"""
+        self._commit(task_id, changes, create=False)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            self._prune()
+            state = self._tasks.get(task_id)
+            return dict(state.progress) if state else None
+
+    async def subscribe(self, task_id: str, heartbeat_sec: float) -> AsyncIterator[Optional[dict]]:
+        """
+        逐个产出进度快照（多次更新间只取最新一份）；heartbeat_sec 内无变化时产出 None 供调用方发心跳。
+        任务完成（status=done）或过期后结束。
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            state = self._tasks.get(task_id)
+            if state is None:
+                return
+            state.waiters.add(waiter)
+        seen = 0
+        try:
+            while True:
+                with self._lock:
+                    state = self._tasks.get(task_id)
+                    if state is None:
+                        return
+                    # 先清再读：读之后的 publish 一定会再次 set
+                    waiter[1].clear()
+                    version, progress = state.version, dict(state.progress)
+                if version != seen:
+                    seen = version
+                    yield progress
+                    if progress.get("status") == "done":
+                        return
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), heartbeat_sec)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                state = self._tasks.get(task_id)
+                if state is not None:
+                    state.waiters.discard(waiter)
+
+    def _commit(self, task_id: str, progress: dict, create: bool) -> None:
+        with self._lock:
+            self._prune()
+            state = self._tasks.get(task_id)
+            if state is None:
+                if not create:
+                    return
+                state = self._tasks[task_id] = _TaskState(progress)
+            elif create:
+                state.progress = progress
+            else:
+                state.progress.update(progress)
+            state.version += 1
+            if state.progress.get("status") == "done":
+                state.done_at = time.monotonic()
+            waiters = list(state.waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # 订阅方事件循环已关闭
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [
+            k for k, s in self._tasks.items()
+            if s.done_at is not None and now - s.done_at > self._done_ttl_sec
+        ]
+        for k in expired:
+            del self._tasks[k]
+
+
+progress_bus = ProgressBus()
 
 
 def create_task(total_files: int = 1) -> str:
     """创建任务，返回 task_id"""
     task_id = str(uuid.uuid4())
-    TASK_PROGRESS[task_id] = {
+    progress_bus.publish(task_id, {
         "status": "processing",
         "current_file": 0,
         "total_files": total_files,
@@ -21,7 +132,7 @@ def create_task(total_files: int = 1) -> str:
         "success": None,
         "error": None,
         "created_at": datetime.now().isoformat(),
-    }
+    })
     return task_id
 
 
@@ -36,38 +147,40 @@ def update_progress(
     batch_id: Optional[int] = None,
 ) -> None:
     """更新任务进度"""
-    if task_id not in TASK_PROGRESS:
-        return
-    p = TASK_PROGRESS[task_id]
-    if current_file is not None:
-        p["current_file"] = current_file
-    if total_files is not None:
-        p["total_files"] = total_files
-    if current_sheet is not None:
-        p["current_sheet"] = current_sheet
-    if total_sheets is not None:
-        p["total_sheets"] = total_sheets
-    if message is not None:
-        p["message"] = message
-    if batch_id is not None and batch_id not in p["batches"]:
-        p["batches"].append(batch_id)
+    changes: Dict[str, Any] = {
+        k: v for k, v in (
+            ("current_file", current_file),
+            ("total_files", total_files),
+            ("current_sheet", current_sheet),
+            ("total_sheets", total_sheets),
+            ("message", message),
+        ) if v is not None
+    }
+    if batch_id is not None:
+        p = progress_bus.get(task_id)
+        if p is None:
+            return
+        batches = p.get("batches") or []
+        if batch_id not in batches:
+            changes["batches"] = [*batches, batch_id]
+    progress_bus.update(task_id, **changes)
 
 
 def get_progress(task_id: str) -> Optional[Dict[str, Any]]:
     """获取任务进度"""
-    return TASK_PROGRESS.get(task_id)
+    return progress_bus.get(task_id)
 
 
 def mark_task_done(task_id: str, success: bool = True, error: Optional[str] = None) -> None:
     """标记任务完成"""
-    if task_id not in TASK_PROGRESS:
-        return
-    p = TASK_PROGRESS[task_id]
-    p["status"] = "done"
-    p["success"] = success
-    p["error"] = error
-    p["completed_at"] = datetime.now().isoformat()
-    p["message"] = "导入完成" if success else (error or "导入失败")
+    progress_bus.update(
+        task_id,
+        status="done",
+        success=success,
+        error=error,
+        completed_at=datetime.now().isoformat(),
+        message="导入完成" if success else (error or "导入失败"),
+    )
 
 
 def mark_task_failed(task_id: str, error: str) -> None:
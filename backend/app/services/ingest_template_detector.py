@@ -1,11 +1,10 @@
 """模板识别服务"""
 from typing import Optional
-from io import BytesIO
 import json
 import time
 from pathlib import Path
-import pandas as pd
-from openpyxl import load_workbook
+
+from app.utils.workbook_peek import WorkbookPeek
 
 # #region agent log
 def _debug_log(location: str, message: str, data: dict, hypothesis_id: str = "H1"):
@@ -23,28 +22,38 @@ def _log_and_return(result: str, filename: str, sheet_names: list) -> str:
 # #endregion
 
 
-def detect_template(file_content: bytes, filename: str) -> str:
+def detect_template(file_content: bytes, filename: str, peek: Optional[WorkbookPeek] = None) -> str:
     """
     识别模板类型
     
     Args:
         file_content: Excel文件内容（bytes）
         filename: 文件名
+        peek: 已打开的 WorkbookPeek（与预览共用）；为 None 时内部打开并关闭
     
     Returns:
         模板类型：LH_FTR / LH_OPT / YONGYI_DAILY / YONGYI_WEEKLY / GANGLIAN_DAILY /
                  INDUSTRY_DATA / PREMIUM_DATA / ENTERPRISE_DAILY / ENTERPRISE_MONTHLY /
                  WHITE_STRIP_MARKET / LEGACY
     """
+    own_peek = None
+    if peek is None:
+        try:
+            peek = own_peek = WorkbookPeek(file_content)
+        except Exception:
+            peek = None
+    try:
+        return _detect_template(peek, filename)
+    finally:
+        if own_peek is not None:
+            own_peek.close()
+
+
+def _detect_template(peek: Optional[WorkbookPeek], filename: str) -> str:
     filename_lower = filename.lower()
     filename_no_ext = filename.replace('.xlsx', '').replace('.xls', '')
-    sheet_names_for_log = []
     # #region agent log
-    try:
-        excel_file = pd.ExcelFile(BytesIO(file_content), engine='openpyxl')
-        sheet_names_for_log = excel_file.sheet_names[:15]
-    except Exception:
-        pass
+    sheet_names_for_log = peek.sheet_names[:15] if peek is not None else []
     # #endregion
 
     # 生猪产业数据（2、【生猪产业数据】.xlsx）：协会、NYB、统计局、供需曲线
@@ -80,17 +89,18 @@ def detect_template(file_content: bytes, filename: str) -> str:
     elif '钢联自动更新模板' in filename_no_ext or ('钢联' in filename_no_ext and '价格' in filename_no_ext):
         return _log_and_return("GANGLIAN_DAILY", filename, sheet_names_for_log)
     
-    # 基于sheet名称和内容判断
+    # 基于sheet名称和内容判断（只读各 sheet 的前几行）
+    if peek is None:
+        return _log_and_return("LEGACY", filename, sheet_names_for_log)
     try:
-        excel_file = pd.ExcelFile(BytesIO(file_content), engine='openpyxl')
-        sheet_names = excel_file.sheet_names
+        sheet_names = peek.sheet_names
         
         # 检查是否有"日历史行情"sheet（期货/期权）
         for sheet_name in sheet_names:
             if '日历史' in sheet_name or '历史行情' in sheet_name:
-                # 读取第一行判断字段
-                df_sample = pd.read_excel(excel_file, sheet_name=sheet_name, nrows=2, engine='openpyxl')
-                columns = df_sample.columns.tolist()
+                # 读取第一行（表头）判断字段
+                header = peek.head(sheet_name, 1)
+                columns = [col for col in (header[0] if header else ()) if col is not None]
                 
                 # 检查是否包含期权特有字段
                 if any('delta' in str(col).lower() or 'iv' in str(col).lower() or '行权' in str(col) for col in columns):
@@ -103,12 +113,12 @@ def detect_template(file_content: bytes, filename: str) -> str:
         ganglian_format_found = False
         for sheet_name in sheet_names:
             try:
-                df_sample = pd.read_excel(excel_file, sheet_name=sheet_name, nrows=5, header=None, engine='openpyxl')
+                first_row = peek.head(sheet_name, 1)
                 # 检查第1行第1列是否是"钢联数据"
-                if df_sample.shape[0] >= 1 and str(df_sample.iloc[0, 0]).strip() == '钢联数据':
+                if first_row and first_row[0] and str(first_row[0][0]).strip() == '钢联数据':
                     ganglian_format_found = True
                     break
-            except:
+            except Exception:
                 continue
         
         if ganglian_format_found:
@@ -1,8 +1,9 @@
 """Observation Upserter - 幂等写入fact_observation，同时写入fact_observation_tag"""
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, event, func, insert
 from sqlalchemy.exc import IntegrityError
 
 from app.models.fact_observation import FactObservation
@@ -57,23 +58,46 @@ def get_or_create_metric(
         ).first()
     
     if metric:
-        # 如果metric已存在，确保parse_json中包含metric_key
-        if not metric.parse_json:
-            metric.parse_json = {}
-        # 只有当metric_key不为空时才更新
-        if metric_key and metric.parse_json.get("metric_key") != metric_key:
-            metric.parse_json["metric_key"] = metric_key
-            db.flush()
-        # 如果metric_key为空但parse_json中也没有metric_key，记录警告
-        elif not metric_key and not metric.parse_json.get("metric_key"):
-            print(f"      ⚠️  警告: metric_key为空，无法设置到parse_json！metric_name={metric_name}, sheet_name={sheet_name}", flush=True)
-        # 若有 Excel 更新时间，则覆盖（每次导入用最新 Excel 更新时间）
-        if source_updated_at:
-            metric.source_updated_at = source_updated_at
-            db.flush()
+        _sync_existing_metric(metric, metric_key, metric_name, sheet_name, source_updated_at)
+        db.flush()
         return metric
     
-    # 创建新metric
+    metric = _build_metric(metric_key, metric_name, sheet_name, unit, freq, source_updated_at)
+    db.add(metric)
+    db.flush()
+    
+    return metric
+
+
+def _sync_existing_metric(
+    metric: DimMetric,
+    metric_key: str,
+    metric_name: str,
+    sheet_name: str,
+    source_updated_at: Optional[str],
+) -> None:
+    """已存在的metric：确保parse_json中包含metric_key，并刷新Excel更新时间"""
+    parse_json = metric.parse_json or {}
+    # 只有当metric_key不为空时才更新（整体重新赋值，JSON列的原地修改不会被ORM追踪）
+    if metric_key and parse_json.get("metric_key") != metric_key:
+        metric.parse_json = {**parse_json, "metric_key": metric_key}
+    # 如果metric_key为空但parse_json中也没有metric_key，记录警告
+    elif not metric_key and not parse_json.get("metric_key"):
+        print(f"      ⚠️  警告: metric_key为空，无法设置到parse_json！metric_name={metric_name}, sheet_name={sheet_name}", flush=True)
+    # 若有 Excel 更新时间，则覆盖（每次导入用最新 Excel 更新时间）
+    if source_updated_at:
+        metric.source_updated_at = source_updated_at
+
+
+def _build_metric(
+    metric_key: str,
+    metric_name: str,
+    sheet_name: str,
+    unit: Optional[str],
+    freq: str,
+    source_updated_at: Optional[str],
+) -> DimMetric:
+    """构造新的DimMetric（未add/flush）"""
     # 根据metric_key推断metric_group
     metric_group = "province"  # 默认
     if "SLAUGHTER" in metric_key:
@@ -94,7 +118,7 @@ def get_or_create_metric(
     # 需要确保raw_header正确设置
     raw_header_value = metric_name  # 使用metric_name作为raw_header
     
-    metric = DimMetric(
+    return DimMetric(
         metric_group=metric_group,
         metric_name=metric_name,
         unit=unit,
@@ -104,11 +128,6 @@ def get_or_create_metric(
         parse_json=parse_json if parse_json else None,
         source_updated_at=source_updated_at,
     )
-    
-    db.add(metric)
-    db.flush()
-    
-    return metric
 
 
 def get_or_create_geo(
@@ -138,11 +157,176 @@ def get_or_create_geo(
     return None
 
 
+def _metric_spec(obs: ObservationDict) -> Tuple[str, str, Optional[str], str, Optional[str]]:
+    """观测值 → (metric_key, metric_name, unit, freq, source_updated_at)"""
+    metric_key = obs.get("metric_key", "")
+    metric_name = obs.get("metric_name", metric_key)
+    freq = (obs.get("period_type") or "day")[0].upper()  # D/W
+    tags = obs.get("tags") or {}
+    source_updated_at = (obs.get("meta") or {}).get("update_time_row") or tags.get("updated_at_time") or tags.get("update_time_row")
+    return metric_key, metric_name, obs.get("unit"), freq, source_updated_at
+
+
+# _build_metric 设置的列（批量 INSERT 时每行列集合一致）
+_NEW_METRIC_COLUMNS = (
+    "metric_group", "metric_name", "unit", "freq", "raw_header", "sheet_name", "parse_json", "source_updated_at",
+)
+
+
+class DimensionCache:
+    """
+    单次导入内的维度缓存，替代逐条 get_or_create_metric / get_or_create_geo 查询：
+      - metric：每个 sheet 一次查询预加载（按 raw_header 与 parse_json.metric_key 两种方式匹配，
+        与 get_or_create_metric 的查找顺序一致），缺失的先在内存登记，再一条多行 INSERT 批量创建并 flush
+        （在调用方的事务中，由调用方提交）
+      - geo：首次使用时一次查询预加载全部省份
+    同一个实例可跨 sheet / 多次 upsert_observations 复用；stats 记录命中与未命中次数。
+    调用方事务回滚时新建的metric随之回滚，metric缓存整体失效，之后按需重新解析。
+    回滚监听注册在会话上，用完后须 close()（或 with DimensionCache(db) as cache:）注销，
+    否则长生命周期的会话上监听会不断累积。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._by_header: Dict[str, Dict[str, DimMetric]] = {}  # sheet → raw_header → metric
+        self._by_key: Dict[str, Dict[str, DimMetric]] = {}  # sheet → metric_key → metric
+        self._metric_ids: Dict[Tuple[str, str], Optional[int]] = {}  # (sheet, metric_name) → id，创建失败为 None
+        self._geo_ids: Optional[Dict[str, int]] = None
+        # metric_hits / metric_misses / metric_created / geo_hits / geo_misses
+        self.stats: Counter = Counter()
+        event.listen(db, "after_soft_rollback", self._on_rollback)
+
+    def close(self) -> None:
+        """注销会话上的回滚监听（可重复调用）"""
+        if event.contains(self.db, "after_soft_rollback", self._on_rollback):
+            event.remove(self.db, "after_soft_rollback", self._on_rollback)
+
+    def __enter__(self) -> "DimensionCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _on_rollback(self, session: Session, previous_transaction) -> None:
+        # 只处理外层事务回滚（_create_metrics 中 SAVEPOINT 的回滚不影响已解析的metric）
+        if previous_transaction.parent is None:
+            self._by_header.clear()
+            self._by_key.clear()
+            self._metric_ids.clear()
+
+    def _load_sheet(self, sheet_name: str) -> None:
+        if sheet_name in self._by_header:
+            return
+        by_header: Dict[str, DimMetric] = {}
+        by_key: Dict[str, DimMetric] = {}
+        for metric in self.db.query(DimMetric).filter(DimMetric.sheet_name == sheet_name).order_by(DimMetric.id):
+            by_header.setdefault(metric.raw_header, metric)
+            key = (metric.parse_json or {}).get("metric_key")
+            if key:
+                by_key.setdefault(key, metric)
+        self._by_header[sheet_name] = by_header
+        self._by_key[sheet_name] = by_key
+
+    def resolve_metrics(self, sheet_name: str, observations: List[ObservationDict]) -> None:
+        """解析一批观测值的metric：已有的在内存中命中，缺失的一次性批量创建（flush，不提交）"""
+        self._load_sheet(sheet_name)
+        by_header = self._by_header[sheet_name]
+        by_key = self._by_key[sheet_name]
+        resolved: Dict[Tuple[str, str], DimMetric] = {}
+        pending: List[Tuple[Tuple[str, str], DimMetric]] = []
+
+        for obs in observations:
+            metric_key, metric_name, unit, freq, source_updated_at = _metric_spec(obs)
+            cache_key = (sheet_name, metric_name)
+            if cache_key in self._metric_ids or cache_key in resolved:
+                self.stats["metric_hits"] += 1
+                continue
+            metric = by_header.get(metric_name) or (by_key.get(metric_key) if metric_key else None)
+            if metric is not None:
+                self.stats["metric_hits"] += 1
+                _sync_existing_metric(metric, metric_key, metric_name, sheet_name, source_updated_at)
+            else:
+                self.stats["metric_misses"] += 1
+                metric = _build_metric(metric_key, metric_name, sheet_name, unit, freq, source_updated_at)
+                pending.append((cache_key, metric))
+            # 新建的也登记进内存索引，后续同 metric_key 的列复用同一个metric（与逐条 flush 后再查询一致）
+            by_header.setdefault(metric_name, metric)
+            if metric_key:
+                by_key.setdefault(metric_key, metric)
+            resolved[cache_key] = metric
+
+        replaced = self._create_metrics(sheet_name, pending) if pending else {}
+        for cache_key, metric in resolved.items():
+            metric = replaced.get(id(metric), metric)
+            self._metric_ids[cache_key] = metric.id if metric is not None else None
+        if resolved:
+            self.db.flush()  # 已有metric的 _sync_existing_metric 改动
+
+    def _create_metrics(
+        self, sheet_name: str, pending: List[Tuple[Tuple[str, str], DimMetric]]
+    ) -> Dict[int, Optional[DimMetric]]:
+        """
+        缺失的metric用一条多行 INSERT 批量创建（失败时逐个插入），再一次查询取回持久化对象。
+        返回 {id(内存中登记的对象): 持久化对象}，创建失败的为 None（对应观测值计为错误）
+        """
+        table = DimMetric.__table__
+        stmt = insert(table)
+        rows = [{col: getattr(metric, col) for col in _NEW_METRIC_COLUMNS} for _, metric in pending]
+        try:
+            with self.db.begin_nested():
+                self.db.execute(stmt, rows)
+        except Exception as e:
+            print(f"      ⚠️  批量创建metric失败，改为逐个创建: {type(e).__name__} - {str(e)[:200]}", flush=True)
+            for (cache_key, _), row in zip(pending, rows):
+                try:
+                    with self.db.begin_nested():
+                        self.db.execute(stmt, row)
+                except Exception as e1:
+                    print(f"      ⚠️  创建metric失败: metric_name={cache_key[1]} - {type(e1).__name__}: {str(e1)[:200]}", flush=True)
+
+        headers = [metric.raw_header for _, metric in pending]
+        created = {
+            m.raw_header: m
+            for m in self.db.query(DimMetric).filter(DimMetric.sheet_name == sheet_name, DimMetric.raw_header.in_(headers))
+        }
+        self.stats["metric_created"] += len(created)
+        replaced: Dict[int, Optional[DimMetric]] = {}
+        for _, metric in pending:
+            persisted = created.get(metric.raw_header)
+            replaced[id(metric)] = persisted
+            for index in (self._by_header[sheet_name], self._by_key[sheet_name]):
+                for k, v in list(index.items()):
+                    if v is metric:
+                        if persisted is None:
+                            del index[k]
+                        else:
+                            index[k] = persisted
+        return replaced
+
+    def metric_id(self, sheet_name: str, metric_name: str) -> Optional[int]:
+        """resolve_metrics 之后调用；未解析或创建失败时为 None"""
+        return self._metric_ids.get((sheet_name, metric_name))
+
+    def is_resolved(self, sheet_name: str, metric_name: str) -> bool:
+        return (sheet_name, metric_name) in self._metric_ids
+
+    def geo_id(self, geo_code: Optional[str]) -> Optional[int]:
+        """与 get_or_create_geo 一致：全国/空返回 None，不存在的省份不创建"""
+        if not geo_code or geo_code == "NATION":
+            return None
+        if self._geo_ids is None:
+            self._geo_ids = {province: geo_id for geo_id, province in self.db.query(DimGeo.id, DimGeo.province)}
+        geo_id = self._geo_ids.get(geo_code)
+        self.stats["geo_hits" if geo_id is not None else "geo_misses"] += 1
+        return geo_id
+
+
 def upsert_observations(
     db: Session,
     observations: List[ObservationDict],
     batch_id: int,
-    sheet_name: str = ""
+    sheet_name: str = "",
+    dim_cache: Optional[DimensionCache] = None,
 ) -> Dict[str, int]:
     """
     批量upsert observations到fact_observation，同时写入tags
@@ -152,6 +336,7 @@ def upsert_observations(
         observations: 观测值字典列表
         batch_id: 导入批次ID
         sheet_name: sheet名称（用于创建metric）
+        dim_cache: 维度缓存；同一次导入的多个sheet传入同一个实例可复用预加载结果，缺省时本次调用内新建并在结束时关闭
     
     Returns:
         {
@@ -160,44 +345,41 @@ def upsert_observations(
             "errors": int
         }
     """
+    if dim_cache is None:
+        with DimensionCache(db) as dim_cache:
+            return _upsert_observations(db, observations, batch_id, sheet_name, dim_cache)
+    return _upsert_observations(db, observations, batch_id, sheet_name, dim_cache)
+
+
+def _upsert_observations(
+    db: Session,
+    observations: List[ObservationDict],
+    batch_id: int,
+    sheet_name: str,
+    dim_cache: DimensionCache,
+) -> Dict[str, int]:
     inserted_count = 0
     updated_count = 0
     error_count = 0
     
-    # 批量获取或创建metrics（避免N+1查询）
-    metric_cache = {}
-    geo_cache = {}
+    # 维度在内存中解析（避免N+1查询）：metric 按 (sheet_name, metric_name) 唯一，分省区等每列独立 metric，
+    # 缺失的metric在此一次性批量创建（flush，由调用方提交）
+    dim_cache.resolve_metrics(sheet_name, observations)
     
     for i, obs in enumerate(observations):
         try:
             metric_key = obs.get("metric_key", "")
             metric_name = obs.get("metric_name", metric_key)
+            if not dim_cache.is_resolved(sheet_name, metric_name):
+                # 前面的回滚使metric缓存失效：剩余观测值重新解析（回滚掉的metric会重新创建）
+                dim_cache.resolve_metrics(sheet_name, observations[i:])
+            metric_id = dim_cache.metric_id(sheet_name, metric_name)
+            if metric_id is None:
+                error_count += 1
+                continue
             
-            # 使用 (sheet_name, metric_name) 作为缓存 key：metric 按 raw_header(metric_name)+sheet 唯一，分省区等每列独立 metric
-            cache_key = f"{sheet_name}::{metric_name}"
-            
-            # 获取或创建metric
-            if cache_key not in metric_cache:
-                metric = get_or_create_metric(
-                    db=db,
-                    metric_key=metric_key,
-                    metric_name=metric_name,
-                    sheet_name=sheet_name,
-                    unit=obs.get("unit"),
-                    freq=obs.get("period_type", "day")[0].upper(),  # D/W
-                    source_updated_at=obs.get("meta", {}).get("update_time_row") or obs.get("tags", {}).get("updated_at_time") or obs.get("tags", {}).get("update_time_row"),
-                )
-                metric_cache[cache_key] = metric.id
-            metric_id = metric_cache[cache_key]
-            
-            # 获取geo_id
             geo_code = obs.get("geo_code")
-            geo_id = None
-            if geo_code:
-                if geo_code not in geo_cache:
-                    geo_id_val = get_or_create_geo(db, geo_code)
-                    geo_cache[geo_code] = geo_id_val
-                geo_id = geo_cache[geo_code]
+            geo_id = dim_cache.geo_id(geo_code)
             
             # 查找现有observation（基于dedup_key）
             dedup_key = obs.get("dedup_key")
@@ -299,28 +481,12 @@ def upsert_observations(
             try:
                 metric_key = obs.get("metric_key", "")
                 metric_name = obs.get("metric_name", metric_key)
-                cache_key = f"{sheet_name}::{metric_name}"
-                
-                if cache_key not in metric_cache:
-                    metric = get_or_create_metric(
-                        db=db,
-                        metric_key=metric_key,
-                        metric_name=metric_name,
-                        sheet_name=sheet_name,
-                        unit=obs.get("unit"),
-                        freq=obs.get("period_type", "day")[0].upper(),
-                        source_updated_at=obs.get("meta", {}).get("update_time_row") or obs.get("tags", {}).get("updated_at_time") or obs.get("tags", {}).get("update_time_row"),
-                    )
-                    metric_cache[cache_key] = metric.id
-                metric_id = metric_cache[cache_key]
+                metric_id = dim_cache.metric_id(sheet_name, metric_name)
+                if metric_id is None:
+                    error_count += 1
+                    continue
                 
-                geo_code = obs.get("geo_code")
-                geo_id = None
-                if geo_code:
-                    if geo_code not in geo_cache:
-                        geo_id_val = get_or_create_geo(db, geo_code)
-                        geo_cache[geo_code] = geo_id_val
-                    geo_id = geo_cache[geo_code]
+                geo_id = dim_cache.geo_id(obs.get("geo_code"))
                 
                 dedup_key = obs.get("dedup_key")
                 if not dedup_key:
@@ -389,6 +555,13 @@ def upsert_observations(
         inserted_count = 0
         updated_count = 0
     
+    stats = dim_cache.stats
+    print(
+        f"      维度缓存: metric 命中={stats['metric_hits']} 未命中={stats['metric_misses']} 新建={stats['metric_created']}, "
+        f"geo 命中={stats['geo_hits']} 未命中={stats['geo_misses']}",
+        flush=True,
+    )
+    
     return {
         "inserted": inserted_count,
         "updated": updated_count,
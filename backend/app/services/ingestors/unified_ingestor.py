@@ -28,7 +28,7 @@ from app.services.ingestors.dispatcher import create_dispatcher, Dispatcher
 from app.services.ingestors.error_collector import ErrorCollector
 from app.services.ingestors.parsers import get_parser, PARSER_REGISTRY
 from app.services.ingestors.profile_loader import get_profile_by_dataset_type
-from app.services.ingestors.observation_upserter import upsert_observations
+from app.services.ingestors.observation_upserter import DimensionCache, upsert_observations
 from app.services.ingestors.validator import ObservationValidator
 
 
@@ -76,6 +76,7 @@ def unified_import(
     total_sheets = 0
     parsed_sheets = 0
     batch = None
+    dim_cache = None
     
     try:
         # 1. 创建import_batch
@@ -152,6 +153,8 @@ def unified_import(
         
         dispatcher = Dispatcher(db, profile)
         error_collector = ErrorCollector(db, batch_id)
+        # 本次导入的维度缓存：各 sheet 的 upsert_observations 共用
+        dim_cache = DimensionCache(db)
         
         # 4. 读取workbook并保存所有sheet到raw层
         workbook = load_workbook(BytesIO(file_content), data_only=True)
@@ -404,7 +407,7 @@ def unified_import(
                                 print(f"     └─ 导入后记录数: {count_after}", flush=True)
                                 if count_before is not None and count_before >= 0:
                                     print(f"     └─ 新增记录数: {count_after - count_before}", flush=True)
-                            print(f"     └─ 插入: {inserted}, 更新: {updated}, 错误: {errors}", flush=True)
+                            print(f"     └─ 插入: {inserted}, 重复跳过: {import_result.get('ignored', 0)}, 更新: {updated}, 错误: {errors}", flush=True)
                             print(f"     └─ 完成时间: {datetime.now().strftime('%H:%M:%S')}", flush=True)
                             
                             inserted_count += inserted
@@ -419,7 +422,8 @@ def unified_import(
                                     db=db,
                                     observations=valid_observations,
                                     batch_id=batch_id,
-                                    sheet_name=sheet_name
+                                    sheet_name=sheet_name,
+                                    dim_cache=dim_cache,
                                 )
                                 obs_inserted = upsert_result.get("inserted", 0)
                                 obs_updated = upsert_result.get("updated", 0)
@@ -454,7 +458,8 @@ def unified_import(
                             db=db,
                             observations=valid_observations,
                             batch_id=batch_id,
-                            sheet_name=sheet_name
+                            sheet_name=sheet_name,
+                            dim_cache=dim_cache,
                         )
                         
                         inserted = upsert_result.get("inserted", 0)
@@ -607,3 +612,6 @@ def unified_import(
             "updated": updated_count,
             "errors": [{"reason": f"导入失败: {error_msg}"}]
         }
+    finally:
+        if dim_cache is not None:
+            dim_cache.close()
@@ -1,4 +1,6 @@
 """农历对齐服务"""
+import importlib.util
+import threading
 from typing import Dict, Optional, List, Tuple
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
@@ -6,14 +8,83 @@ from sqlalchemy import and_
 
 from app.models import FactIndicatorTs
 
-# 尝试导入lunar-python库，如果没有则使用简化实现
-try:
-    from lunar_python import Lunar, Solar
-    HAS_LUNAR_LIB = True
-except ImportError:
-    HAS_LUNAR_LIB = False
+# lunar-python 只探测是否安装，首次换算时才导入（加快 API 启动）；没有则使用简化实现
+HAS_LUNAR_LIB = importlib.util.find_spec("lunar_python") is not None
+if not HAS_LUNAR_LIB:
     print("警告: 未安装lunar-python库，农历对齐功能将使用简化实现。建议安装: pip install lunar-python")
 
+# 农历查找表覆盖的公历范围；范围外仍逐日调用 lunar-python（约 2ms/天）
+LUNAR_TABLE_START = date(2005, 1, 1)
+LUNAR_TABLE_END = date(2040, 12, 31)
+
+_lunar_table: Optional[Dict] = None
+_lunar_table_lock = threading.Lock()
+
+
+def build_lunar_table(start: date = LUNAR_TABLE_START, end: date = LUNAR_TABLE_END) -> Optional[Dict]:
+    """
+    按农历月批量生成「公历日 → 农历字段」查找数组（多进程部署时在 fork 前构建，各 worker 共享）。
+
+    Returns:
+        {"start_ordinal", "year", "month", "day", "is_leap", "day_index"}，day_index 为 0 表示 None；
+        未安装 lunar-python 时返回 None
+    """
+    if not HAS_LUNAR_LIB:
+        return None
+    import numpy as np
+    from lunar_python import LunarYear, Solar
+
+    n = (end - start).days + 1
+    years = np.zeros(n, dtype=np.int16)
+    months = np.zeros(n, dtype=np.int8)
+    days = np.zeros(n, dtype=np.int8)
+    leap = np.zeros(n, dtype=bool)
+    day_index = np.zeros(n, dtype=np.int16)
+
+    base = start.toordinal()
+    seen = set()
+    for y in range(start.year - 1, end.year + 1):
+        new_year: Optional[int] = None
+        for m in LunarYear.fromYear(y).getMonths():
+            first_jd = m.getFirstJulianDay()
+            solar = Solar.fromJulianDay(first_jd)
+            first = date(solar.getYear(), solar.getMonth(), solar.getDay()).toordinal()
+            if m.getYear() == y and m.getMonth() == 1:
+                new_year = first
+            # 相邻农历年的月份列表有重叠
+            if first_jd in seen:
+                continue
+            seen.add(first_jd)
+            lo = max(first - base, 0)
+            hi = min(first - base + m.getDayCount(), n)
+            if lo >= hi:
+                continue
+            years[lo:hi] = m.getYear()
+            # 与 Lunar.getMonth() 一致：闰月为负数
+            months[lo:hi] = m.getMonth()
+            days[lo:hi] = np.arange(lo, hi) - (first - base) + 1
+            leap[lo:hi] = m.isLeap()
+        if new_year is None:
+            continue
+        # 以正月初一为基准的索引（与 _calculate_lunar_day_index 相同：days_diff - 7，取 1～400，闰月为 None）
+        offsets = np.arange(n) + base - new_year - 7
+        mask = (years == y) & ~leap & (offsets >= 1) & (offsets <= 400)
+        day_index[mask] = offsets[mask]
+    return {
+        "start_ordinal": base, "year": years, "month": months, "day": days,
+        "is_leap": leap, "day_index": day_index,
+    }
+
+
+def get_lunar_table() -> Optional[Dict]:
+    """查找表（首次调用时构建，进程内复用）"""
+    global _lunar_table
+    if _lunar_table is None and HAS_LUNAR_LIB:
+        with _lunar_table_lock:
+            if _lunar_table is None:
+                _lunar_table = build_lunar_table()
+    return _lunar_table
+
 
 def solar_to_lunar(solar_date: date) -> Dict:
     """
@@ -31,8 +102,21 @@ def solar_to_lunar(solar_date: date) -> Dict:
             "lunar_day_index": int  # 以正月初八为起点，index=1
         }
     """
+    table = get_lunar_table()
+    if table is not None:
+        i = solar_date.toordinal() - table["start_ordinal"]
+        if 0 <= i < len(table["year"]):
+            idx = int(table["day_index"][i])
+            return {
+                "lunar_year": int(table["year"][i]),
+                "lunar_month": int(table["month"][i]),
+                "lunar_day": int(table["day"][i]),
+                "is_leap_month": bool(table["is_leap"][i]),
+                "lunar_day_index": idx or None,
+            }
     if HAS_LUNAR_LIB:
         # 使用lunar-python库
+        from lunar_python import Lunar, Solar
         try:
             # 注意：Lunar.fromYmd() 的参数是农历日期，不是公历日期！
             # 我们需要先创建公历日期（Solar），然后转换为农历（Lunar）
@@ -114,6 +198,7 @@ def _calculate_lunar_day_index(
         return None
     if not HAS_LUNAR_LIB:
         return None
+    from lunar_python import Lunar
 
     from datetime import date as date_class
 
@@ -166,6 +251,7 @@ def get_leap_month_info(lunar_year: int) -> Optional[Dict]:
     """
     if not HAS_LUNAR_LIB:
         return None
+    from lunar_python import Lunar
     
     try:
         # 检查是否有闰月
@@ -337,6 +423,7 @@ def get_lunar_year_date_range(lunar_year: int) -> Optional[Tuple[date, date]]:
     """
     if not HAS_LUNAR_LIB:
         return None
+    from lunar_python import Lunar
     
     try:
         # 获取农历年对应的公历年份范围
@@ -384,6 +471,7 @@ def get_lunar_year_date_range_la_ba(lunar_year: int) -> Optional[Tuple[date, dat
     """
     if not HAS_LUNAR_LIB:
         return None
+    from lunar_python import Lunar
     try:
         from datetime import date as date_class
         # 正月初八
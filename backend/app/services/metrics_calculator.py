@@ -1,216 +1,197 @@
-"""指标预计算服务（同比/环比/5日10日变化）"""
-from typing import Dict, List, Optional
-from datetime import date, timedelta
+"""指标预计算服务（同比/环比/5日10日变化）
+
+按 (indicator_code, region_code) 分组的向量化实现：
+  1. 一次分组查询取出 fact_indicator_ts 中所需的全部序列
+  2. 在 (indicator_code, region_code, date_key) 索引上按日历偏移取对比值，
+     计算 chg_1/5/10/30、同比、环比
+  3. 单次批量 INSERT ... ON DUPLICATE KEY UPDATE 写入 fact_indicator_metrics
+"""
+from typing import Iterable, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 
 from app.models import FactIndicatorTs, FactIndicatorMetrics, DimIndicator
 
+logger = logging.getLogger(__name__)
+
+_KEY_COLS = ["indicator_code", "region_code"]
+_METRIC_COLS = ["value", "chg_1", "chg_5", "chg_10", "chg_30", "mom", "yoy"]
+# 环比/周频同比按最近日期匹配时允许的误差（与旧实现一致：< 7 天）
+_NEAREST_TOLERANCE = pd.Timedelta(days=6)
+_UPSERT_CHUNK = 5000
+
+
+def _load_series(
+    db: Session,
+    freq: str,
+    indicator_codes: Optional[Iterable[str]] = None,
+    region_code: Optional[str] = None,
+) -> pd.DataFrame:
+    """一次查询取出所需的全部 (indicator_code, region_code, date_key, value)"""
+    date_field = FactIndicatorTs.trade_date if freq == "D" else FactIndicatorTs.week_end
+    query = db.query(
+        FactIndicatorTs.indicator_code,
+        FactIndicatorTs.region_code,
+        date_field,
+        FactIndicatorTs.value,
+    ).filter(
+        FactIndicatorTs.freq == freq,
+        FactIndicatorTs.value.isnot(None),
+        date_field.isnot(None),
+    )
+    if indicator_codes is not None:
+        query = query.filter(FactIndicatorTs.indicator_code.in_(list(indicator_codes)))
+    if region_code:
+        query = query.filter(FactIndicatorTs.region_code == region_code)
+
+    df = pd.DataFrame(query.all(), columns=_KEY_COLS + ["date_key", "value"])
+    if df.empty:
+        return df
+    df["date_key"] = pd.to_datetime(df["date_key"])
+    df["value"] = df["value"].astype(float)
+    return df
+
+
+def _nearest_value(df: pd.DataFrame, target: pd.Series) -> np.ndarray:
+    """按分组在 target 日期附近（±6 天）查找最近一期的值，找不到为 NaN"""
+    left = pd.DataFrame({
+        "indicator_code": df["indicator_code"].to_numpy(),
+        "region_code": df["region_code"].to_numpy(),
+        "target": target.astype("datetime64[ns]").to_numpy(),
+        "_pos": np.arange(len(df)),
+    }).dropna(subset=["target"]).sort_values("target")
+    right = df[_KEY_COLS + ["date_key", "value"]].rename(columns={"value": "ref"}).sort_values("date_key")
+    merged = pd.merge_asof(
+        left, right,
+        left_on="target", right_on="date_key",
+        by=_KEY_COLS, direction="nearest", tolerance=_NEAREST_TOLERANCE,
+    )
+    out = np.full(len(df), np.nan)
+    out[merged["_pos"].to_numpy()] = merged["ref"].to_numpy(dtype=float)
+    return out
+
+
+def compute_metrics_frame(df: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """
+    向量化计算 metrics。
+
+    Args:
+        df: 列 indicator_code / region_code / date_key / value，可包含多个指标、多个区域
+        freq: D（日频，偏移按天）/ W（周频，偏移按周）
+
+    Returns:
+        每行一个 (indicator_code, region_code, date_key)，含 value、chg_1/5/10/30、mom、yoy
+    """
+    if df.empty:
+        return pd.DataFrame(columns=_KEY_COLS + ["date_key"] + _METRIC_COLS)
+
+    df = df.dropna(subset=["value"]).copy()
+    df["date_key"] = pd.to_datetime(df["date_key"]).astype("datetime64[ns]")
+    df = df.drop_duplicates(subset=_KEY_COLS + ["date_key"], keep="last")
+    df = df.sort_values(_KEY_COLS + ["date_key"]).reset_index(drop=True)
+
+    lookup = df.set_index(_KEY_COLS + ["date_key"])["value"]
+    codes = df["indicator_code"].to_numpy()
+    regions = df["region_code"].to_numpy()
+    values = df["value"].to_numpy(dtype=float)
+    step = pd.Timedelta(days=1) if freq == "D" else pd.Timedelta(weeks=1)
+
+    def exact(target_dates: pd.Series) -> np.ndarray:
+        idx = pd.MultiIndex.from_arrays([codes, regions, target_dates.astype("datetime64[ns]").to_numpy()])
+        return lookup.reindex(idx).to_numpy(dtype=float)
+
+    out = df[_KEY_COLS + ["date_key", "value"]].copy()
+    # 变化量：日历偏移后精确匹配（日频 1/5/10/30 天，周频 1/5/10/30 周）
+    for n in (1, 5, 10, 30):
+        out[f"chg_{n}"] = values - exact(df["date_key"] - step * n)
+
+    # 同比：日频取去年同月同日（2/29 等不存在的日期无同比），周频取去年同期附近最近一周
+    year_ago = df["date_key"] - pd.DateOffset(years=1)
+    if freq == "D":
+        valid = (year_ago.dt.month == df["date_key"].dt.month) & (year_ago.dt.day == df["date_key"].dt.day)
+        ref = np.where(valid, exact(year_ago), np.nan)
+    else:
+        ref = _nearest_value(df, year_ago)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["yoy"] = np.where(ref != 0, (values - ref) / ref * 100, np.nan)
+
+    # 环比：日频取上月同日（月末自动收敛），周频取 4 周前，均按 ±6 天最近一期匹配
+    month_ago = df["date_key"] - (pd.DateOffset(months=1) if freq == "D" else pd.Timedelta(weeks=4))
+    ref = _nearest_value(df, month_ago)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["mom"] = np.where(ref != 0, (values - ref) / ref * 100, np.nan)
+
+    out["date_key"] = out["date_key"].dt.date
+    return out[_KEY_COLS + ["date_key"] + _METRIC_COLS]
+
+
+def _bulk_upsert_metrics(db: Session, metrics: pd.DataFrame, freq: str) -> int:
+    """INSERT ... ON DUPLICATE KEY UPDATE 批量写入 fact_indicator_metrics"""
+    if metrics.empty:
+        return 0
+    metrics = metrics.assign(freq=freq)
+    rows = metrics.astype(object).where(metrics.notna(), None).to_dict("records")
+    table = FactIndicatorMetrics.__table__
+    for i in range(0, len(rows), _UPSERT_CHUNK):
+        stmt = mysql_insert(table).values(rows[i:i + _UPSERT_CHUNK])
+        stmt = stmt.on_duplicate_key_update(
+            {**{c: stmt.inserted[c] for c in _METRIC_COLS}, "update_time": func.now()}
+        )
+        db.execute(stmt)
+    db.commit()
+    return len(rows)
+
 
 def calculate_metrics(
     db: Session,
     indicator_code: str,
     region_code: Optional[str] = None,
     freq: str = "D"
-) -> None:
+) -> int:
     """
     计算指标的预计算metrics并写入fact_indicator_metrics
-    
+
     Args:
         db: 数据库会话
         indicator_code: 指标代码
         region_code: 区域代码（如果为None，则计算所有区域）
         freq: 频率（D/W）
+
+    Returns:
+        写入（插入或更新）的行数
     """
-    # 构建查询条件
-    query = db.query(FactIndicatorTs).filter(
-        FactIndicatorTs.indicator_code == indicator_code,
-        FactIndicatorTs.freq == freq,
-        FactIndicatorTs.value.isnot(None)
-    )
-    
-    if region_code:
-        query = query.filter(FactIndicatorTs.region_code == region_code)
-    
-    # 按日期排序
-    if freq == "D":
-        query = query.order_by(FactIndicatorTs.trade_date)
-        date_field = FactIndicatorTs.trade_date
-    else:
-        query = query.order_by(FactIndicatorTs.week_end)
-        date_field = FactIndicatorTs.week_end
-    
-    records = query.all()
-    
-    if not records:
-        return
-    
-    # 按日期键分组
-    records_dict = {}
-    for r in records:
-        date_key = r.trade_date if freq == "D" else r.week_end
-        records_dict[date_key] = r
-    
-    # 计算每个日期的metrics
-    metrics_to_insert = []
-    metrics_to_update = []
-    
-    for date_key in sorted(records_dict.keys()):
-        current_record = records_dict[date_key]
-        current_value = float(current_record.value) if current_record.value else None
-        
-        if current_value is None:
-            continue
-        
-        # 计算变化量
-        chg_1 = None
-        chg_5 = None
-        chg_10 = None
-        chg_30 = None
-        
-        if freq == "D":
-            # 日频：计算1日、5日、10日、30日变化
-            date_1 = date_key - timedelta(days=1)
-            date_5 = date_key - timedelta(days=5)
-            date_10 = date_key - timedelta(days=10)
-            date_30 = date_key - timedelta(days=30)
-        else:
-            # 周频：计算1周、5周、10周、30周变化
-            date_1 = date_key - timedelta(weeks=1)
-            date_5 = date_key - timedelta(weeks=5)
-            date_10 = date_key - timedelta(weeks=10)
-            date_30 = date_key - timedelta(weeks=30)
-        
-        if date_1 in records_dict:
-            prev_value = float(records_dict[date_1].value) if records_dict[date_1].value else None
-            if prev_value is not None:
-                chg_1 = current_value - prev_value
-        
-        if date_5 in records_dict:
-            prev_value = float(records_dict[date_5].value) if records_dict[date_5].value else None
-            if prev_value is not None:
-                chg_5 = current_value - prev_value
-        
-        if date_10 in records_dict:
-            prev_value = float(records_dict[date_10].value) if records_dict[date_10].value else None
-            if prev_value is not None:
-                chg_10 = current_value - prev_value
-        
-        if date_30 in records_dict:
-            prev_value = float(records_dict[date_30].value) if records_dict[date_30].value else None
-            if prev_value is not None:
-                chg_30 = current_value - prev_value
-        
-        # 计算同比（Year-over-Year）
-        yoy = None
-        if freq == "D":
-            year_ago_date = date(date_key.year - 1, date_key.month, date_key.day)
-        else:
-            # 周频：查找去年同周
-            year_ago_date = date(date_key.year - 1, date_key.month, date_key.day)
-            # 简化处理：查找最接近的日期
-            for d in sorted(records_dict.keys(), reverse=True):
-                if d.year == year_ago_date.year and abs((d - year_ago_date).days) < 7:
-                    year_ago_date = d
-                    break
-        
-        if year_ago_date in records_dict:
-            year_ago_value = float(records_dict[year_ago_date].value) if records_dict[year_ago_date].value else None
-            if year_ago_value is not None and year_ago_value != 0:
-                yoy = ((current_value - year_ago_value) / year_ago_value) * 100
-        
-        # 计算环比（Month-over-Month）
-        mom = None
-        if freq == "D":
-            # 查找上个月同一天
-            if date_key.month == 1:
-                month_ago_date = date(date_key.year - 1, 12, date_key.day)
-            else:
-                month_ago_date = date(date_key.year, date_key.month - 1, date_key.day)
-        else:
-            # 周频：查找4周前
-            month_ago_date = date_key - timedelta(weeks=4)
-        
-        # 查找最接近的日期
-        closest_date = None
-        min_diff = float('inf')
-        for d in records_dict.keys():
-            diff = abs((d - month_ago_date).days)
-            if diff < min_diff:
-                min_diff = diff
-                closest_date = d
-        
-        if closest_date and min_diff < 7:  # 允许7天误差
-            month_ago_value = float(records_dict[closest_date].value) if records_dict[closest_date].value else None
-            if month_ago_value is not None and month_ago_value != 0:
-                mom = ((current_value - month_ago_value) / month_ago_value) * 100
-        
-        # 检查是否已存在metrics记录
-        existing_metrics = db.query(FactIndicatorMetrics).filter(
-            FactIndicatorMetrics.indicator_code == indicator_code,
-            FactIndicatorMetrics.region_code == current_record.region_code,
-            FactIndicatorMetrics.freq == freq,
-            FactIndicatorMetrics.date_key == date_key
-        ).first()
-        
-        metrics_data = {
-            "indicator_code": indicator_code,
-            "region_code": current_record.region_code,
-            "freq": freq,
-            "date_key": date_key,
-            "value": current_value,
-            "chg_1": chg_1,
-            "chg_5": chg_5,
-            "chg_10": chg_10,
-            "chg_30": chg_30,
-            "mom": mom,
-            "yoy": yoy
-        }
-        
-        if existing_metrics:
-            # 更新现有记录
-            for key, value in metrics_data.items():
-                setattr(existing_metrics, key, value)
-            metrics_to_update.append(existing_metrics)
-        else:
-            # 插入新记录
-            metrics_to_insert.append(FactIndicatorMetrics(**metrics_data))
-    
-    # 批量插入和更新
-    if metrics_to_insert:
-        db.bulk_save_objects(metrics_to_insert)
-    
-    db.commit()
+    df = _load_series(db, freq, [indicator_code], region_code)
+    return _bulk_upsert_metrics(db, compute_metrics_frame(df, freq), freq)
 
 
-def calculate_all_indicators_metrics(db: Session, freq: Optional[str] = None) -> None:
+def calculate_all_indicators_metrics(db: Session, freq: Optional[str] = None) -> int:
     """
-    计算所有指标的metrics
-    
+    计算所有指标的metrics（每个频率一次分组查询 + 一次批量写入）
+
     Args:
         db: 数据库会话
         freq: 频率（D/W），如果为None则计算所有频率
+
+    Returns:
+        写入（插入或更新）的行数
     """
-    # 获取所有指标
-    query = db.query(DimIndicator)
+    query = db.query(DimIndicator.indicator_code, DimIndicator.freq)
     if freq:
         query = query.filter(DimIndicator.freq == freq)
-    
-    indicators = query.all()
-    
-    for indicator in indicators:
-        # 获取该指标的所有区域
-        regions_query = db.query(FactIndicatorTs.region_code).filter(
-            FactIndicatorTs.indicator_code == indicator.indicator_code,
-            FactIndicatorTs.freq == indicator.freq
-        ).distinct()
-        
-        regions = [r[0] for r in regions_query.all()]
-        
-        for region_code in regions:
-            try:
-                calculate_metrics(db, indicator.indicator_code, region_code, indicator.freq)
-            except Exception as e:
-                # 记录错误但继续处理其他指标
-                print(f"计算指标 {indicator.indicator_code} 区域 {region_code} 的metrics失败: {str(e)}")
-                continue
+
+    codes_by_freq: dict[str, list[str]] = {}
+    for code, f in query.all():
+        codes_by_freq.setdefault(f, []).append(code)
+
+    total = 0
+    for f, codes in codes_by_freq.items():
+        df = _load_series(db, f, codes)
+        metrics = compute_metrics_frame(df, f)
+        total += _bulk_upsert_metrics(db, metrics, f)
+        logger.info("metrics 计算完成 freq=%s indicators=%d rows=%d", f, len(codes), len(metrics))
+    return total
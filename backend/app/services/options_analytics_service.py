@@ -0,0 +1,283 @@
+"""期权分析服务（Black-76，numpy 向量化）
+
+对 (trade_date × 行权价 × C/P) 整张网格一次性计算，不逐合约循环：
+  1. 一次查询取期权结算价，并关联 fact_futures_daily 同日标的结算价（缺失时用收盘价）
+  2. 隐含波动率：全部合约同时做 Newton 迭代（vega 步长），越出二分区间或 vega 过小时
+     改为二分，保证收敛；价格违反无套利边界的合约 IV 为 NaN
+  3. delta / gamma / vega（vega 按波动率变动 1 个百分点计）
+  4. 每个 (trade_date, 标的合约) 的 ATM IV 与 25-delta skew（25Δ put IV − 25Δ call IV）
+
+到期日按大商所期权规则近似：标的合约交割月前一个月的第 12 个交易日（按工作日计，不含节假日）。
+IV 与 ATM/skew 均以百分比输出，与 fact_options_daily.iv（交易所公布值）口径一致。
+"""
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# 隐含波动率求解区间与精度
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+IV_PRICE_TOL = 1e-6
+IV_MAX_ITER = 60
+# 大商所期权最后交易日：交割月前一个月的第 N 个交易日
+EXPIRY_TRADING_DAY = 12
+
+_CHAIN_SQL = """
+    SELECT o.trade_date, o.underlying_contract, o.option_code, o.option_type, o.strike,
+           COALESCE(o.settle, o.close) AS price, o.iv AS iv_exchange, o.volume, o.open_interest,
+           COALESCE(f.settle, f.close) AS underlying_price
+    FROM fact_options_daily o
+    LEFT JOIN fact_futures_daily f
+           ON f.contract_code = o.underlying_contract AND f.trade_date = o.trade_date
+    WHERE {where}
+    ORDER BY o.trade_date, o.underlying_contract, o.strike, o.option_type
+"""
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """互补误差函数（Chebyshev 近似，相对误差 < 1.2e-7；numpy 无内置 erf，避免引入 scipy）"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    r = t * np.exp(poly)
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * _erfc(-x / np.sqrt(2.0))
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(F, K, T, sigma):
+    vol_sqrt_t = sigma * np.sqrt(T)
+    d1 = (np.log(F / K) + 0.5 * vol_sqrt_t * vol_sqrt_t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def black76_price(F, K, T, r, sigma, is_call) -> np.ndarray:
+    """期货期权 Black-76 理论价（数组逐元素）"""
+    d1, d2 = _d1_d2(F, K, T, sigma)
+    df = np.exp(-r * T)
+    call = df * (F * norm_cdf(d1) - K * norm_cdf(d2))
+    put = df * (K * norm_cdf(-d2) - F * norm_cdf(-d1))
+    return np.where(is_call, call, put)
+
+
+def implied_vol(price, F, K, T, r, is_call, tol: float = IV_PRICE_TOL, max_iter: int = IV_MAX_ITER) -> np.ndarray:
+    """
+    批量隐含波动率：所有合约同时迭代，每轮只计算尚未收敛的合约。
+    价格不在无套利区间（折现内在价值, 折现 F 或 K）内、或 T/F/K 非正时返回 NaN。
+    """
+    price, F, K, T = (np.asarray(a, dtype=float) for a in (price, F, K, T))
+    is_call = np.asarray(is_call, dtype=bool)
+    price, F, K, T, is_call = np.broadcast_arrays(price, F, K, T, is_call)
+    df = np.exp(-r * T)
+    intrinsic = df * np.maximum(np.where(is_call, F - K, K - F), 0.0)
+    upper_bound = df * np.where(is_call, F, K)
+    with np.errstate(invalid="ignore"):
+        valid = (T > 0) & (F > 0) & (K > 0) & (price > intrinsic) & (price < upper_bound)
+
+    iv = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return iv
+    p, f, k, t, c = price.flat[idx], F.flat[idx], K.flat[idx], T.flat[idx], is_call.flat[idx]
+    rr = np.full(idx.size, r, dtype=float)
+    # 实值合约按平价关系换算成同行权价的虚值合约求解（IV 相同）：虚值价只含时间价值，
+    # 深度实值时 vega 相对价格很小，直接求解对价格误差过于敏感
+    itm = np.where(c, f > k, k > f)
+    forward_diff = np.exp(-rr * t) * (f - k)
+    p = np.where(itm, p - np.where(c, forward_diff, -forward_diff), p)
+    c = np.where(itm, ~c, c)
+    lo = np.full(idx.size, IV_LOWER)
+    hi = np.full(idx.size, IV_UPPER)
+    # 初值：Brenner-Subrahmanyam 平值近似
+    sigma = np.clip(np.sqrt(2.0 * np.pi / t) * p / (f * np.exp(-rr * t)), 0.05, 2.0)
+    active = np.arange(idx.size)
+    for _ in range(max_iter):
+        s, ff, kk, tt, cc, rv = sigma[active], f[active], k[active], t[active], c[active], rr[active]
+        diff = black76_price(ff, kk, tt, rv, s, cc) - p[active]
+        done = np.abs(diff) < tol
+        # 期权价格随波动率单调递增：据此收紧二分区间
+        hi[active] = np.where(diff > 0, s, hi[active])
+        lo[active] = np.where(diff < 0, s, lo[active])
+        d1, _ = _d1_d2(ff, kk, tt, s)
+        vega = ff * np.exp(-rv * tt) * norm_pdf(d1) * np.sqrt(tt)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = s - diff / vega
+        a_lo, a_hi = lo[active], hi[active]
+        inside = (vega > 1e-12) & (newton > a_lo) & (newton < a_hi)
+        sigma[active] = np.where(done, s, np.where(inside, newton, 0.5 * (a_lo + a_hi)))
+        active = active[~done & (a_hi - a_lo > 1e-12)]
+        if active.size == 0:
+            break
+    iv.flat[idx] = sigma
+    return iv
+
+
+def greeks(F, K, T, r, sigma, is_call) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(delta, gamma, vega)：delta/gamma 针对标的期货价格，vega 为波动率变动 1 个百分点的价格变化"""
+    d1, _ = _d1_d2(F, K, T, sigma)
+    df = np.exp(-r * T)
+    delta = np.where(is_call, df * norm_cdf(d1), -df * norm_cdf(-d1))
+    gamma = df * norm_pdf(d1) / (F * sigma * np.sqrt(T))
+    vega = F * df * norm_pdf(d1) * np.sqrt(T) / 100.0
+    return delta, gamma, vega
+
+
+def expiry_dates(underlying_contracts: np.ndarray) -> np.ndarray:
+    """标的合约代码（如 lh2603）→ 期权到期日（datetime64[D]）；无法解析的为 NaT"""
+    codes = pd.Series(underlying_contracts, dtype=object).astype(str).str.lower()
+    parts = codes.str.extract(r"^[a-z]+(\d{2})(\d{2})$")
+    year = pd.to_numeric(parts[0], errors="coerce") + 2000
+    month = pd.to_numeric(parts[1], errors="coerce")
+    ok = (year.notna() & month.between(1, 12)).to_numpy()
+    # 交割月前一个月的 1 日
+    months = (year.fillna(2000).astype(int) - 1970) * 12 + month.fillna(1).astype(int) - 2
+    first_day = months.to_numpy().astype("datetime64[M]").astype("datetime64[D]")
+    expiry = np.busday_offset(first_day, EXPIRY_TRADING_DAY - 1, roll="forward")
+    return np.where(ok, expiry, np.datetime64("NaT"))
+
+
+def compute_surface(chain: pd.DataFrame, rate: float) -> pd.DataFrame:
+    """
+    为期权链追加 expiry、T（年）、iv（%）、delta、gamma、vega 列。
+    chain 需含 trade_date, underlying_contract, option_type, strike, price, underlying_price。
+    """
+    out = chain.copy()
+    trade_dates = pd.to_datetime(out["trade_date"]).to_numpy().astype("datetime64[D]")
+    expiry = expiry_dates(out["underlying_contract"].to_numpy())
+    T = (expiry - trade_dates).astype("timedelta64[D]").astype(float) / 365.0
+    F = pd.to_numeric(out["underlying_price"], errors="coerce").to_numpy(dtype=float)
+    K = pd.to_numeric(out["strike"], errors="coerce").to_numpy(dtype=float)
+    price = pd.to_numeric(out["price"], errors="coerce").to_numpy(dtype=float)
+    is_call = out["option_type"].astype(str).str.upper().eq("C").to_numpy()
+
+    sigma = implied_vol(price, F, K, T, rate, is_call)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta, gamma, vega = greeks(F, K, T, rate, sigma, is_call)
+    out["expiry"] = expiry
+    out["T"] = T
+    out["iv"] = sigma * 100.0
+    out["delta"] = delta
+    out["gamma"] = gamma
+    out["vega"] = vega
+    return out
+
+
+def _interp_at(x: np.ndarray, y: np.ndarray, target: float) -> Optional[float]:
+    """在 (x, y) 上线性插值 target 处的 y；target 超出 x 范围时为 None（不外推）"""
+    mask = np.isfinite(x) & np.isfinite(y)
+    if mask.sum() == 0:
+        return None
+    x, y = x[mask], y[mask]
+    order = np.argsort(x)
+    x, y = x[order], y[order]
+    if target < x[0] or target > x[-1]:
+        return None
+    return float(np.interp(target, x, y))
+
+
+def skew_table(surface: pd.DataFrame) -> pd.DataFrame:
+    """
+    每个 (trade_date, underlying_contract)：
+      atm_iv      ATM IV，按虚值一侧（K ≥ F 取 call，K < F 取 put）的 IV 在 K = F 处插值
+      iv_call_25d 25Δ call IV（call 的 delta 插值到 0.25）
+      iv_put_25d  25Δ put IV（put 的 delta 插值到 −0.25）
+      skew_25d    iv_put_25d − iv_call_25d
+    """
+    rows = []
+    for (trade_date, underlying), g in surface.groupby(["trade_date", "underlying_contract"], sort=True):
+        F = g["underlying_price"].astype(float).iloc[0]
+        K = g["strike"].astype(float).to_numpy()
+        iv = g["iv"].to_numpy(dtype=float)
+        delta = g["delta"].to_numpy(dtype=float)
+        is_call = g["option_type"].astype(str).str.upper().eq("C").to_numpy()
+        otm = np.where(K >= F, is_call, ~is_call)
+        atm = _interp_at(K[otm], iv[otm], F) if np.isfinite(F) else None
+        call_25 = _interp_at(delta[is_call], iv[is_call], 0.25)
+        put_25 = _interp_at(delta[~is_call], iv[~is_call], -0.25)
+        rows.append({
+            "trade_date": trade_date,
+            "underlying_contract": underlying,
+            "expiry": g["expiry"].iloc[0],
+            "underlying_price": float(F) if np.isfinite(F) else None,
+            "atm_iv": atm,
+            "iv_call_25d": call_25,
+            "iv_put_25d": put_25,
+            "skew_25d": put_25 - call_25 if put_25 is not None and call_25 is not None else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def load_chain(
+    db: Session,
+    underlying: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """一次查询取期权链 + 标的期货价；未指定日期范围时只取最新交易日"""
+    where = ["1 = 1"]
+    params: dict = {}
+    if underlying:
+        where.append("o.underlying_contract = :underlying")
+        params["underlying"] = underlying
+    if from_date is None and to_date is None:
+        latest_sql = "SELECT MAX(trade_date) FROM fact_options_daily"
+        if underlying:
+            latest_sql += " WHERE underlying_contract = :underlying"
+        latest = db.execute(text(latest_sql), params).scalar()
+        if latest is None:
+            return pd.DataFrame()
+        from_date = to_date = latest
+    if from_date:
+        where.append("o.trade_date >= :from_date")
+        params["from_date"] = from_date
+    if to_date:
+        where.append("o.trade_date <= :to_date")
+        params["to_date"] = to_date
+    result = db.execute(text(_CHAIN_SQL.format(where=" AND ".join(where))), params)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def _json_records(df: pd.DataFrame, date_cols: tuple[str, ...]) -> list[dict]:
+    df = df.copy()
+    for col in date_cols:
+        df[col] = pd.to_datetime(df[col]).dt.strftime("%Y-%m-%d")
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def build_surface(
+    db: Session,
+    rate: float,
+    underlying: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> dict:
+    """波动率曲面接口数据：逐合约 IV/greeks + 每日每标的 ATM/25Δ skew"""
+    chain = load_chain(db, underlying, from_date, to_date)
+    if chain.empty:
+        return {"trade_dates": [], "points": [], "skew": []}
+    surface = compute_surface(chain, rate)
+    point_cols = [
+        "trade_date", "underlying_contract", "option_code", "option_type", "strike", "expiry", "T",
+        "price", "underlying_price", "iv", "iv_exchange", "delta", "gamma", "vega", "volume", "open_interest",
+    ]
+    points = surface[point_cols].copy()
+    for col in ("strike", "price", "underlying_price", "iv_exchange"):
+        points[col] = pd.to_numeric(points[col], errors="coerce")
+    trade_dates = sorted({pd.Timestamp(d).strftime("%Y-%m-%d") for d in surface["trade_date"]})
+    return {
+        "trade_dates": trade_dates,
+        "points": _json_records(points, ("trade_date", "expiry")),
+        "skew": _json_records(skew_table(surface), ("trade_date", "expiry")),
+    }
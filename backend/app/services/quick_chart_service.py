@@ -2,7 +2,9 @@
 快速图表服务：清理缓存、按配置预计算并写入缓存、按 key 读取缓存。
 """
 import logging
-from typing import Optional
+import threading
+import time
+from typing import FrozenSet, Optional, Set
 from urllib.parse import urlencode
 
 from sqlalchemy.orm import Session
@@ -38,6 +40,55 @@ def build_cache_key(path: str, query_string: str) -> str:
     return f"{path}?{normalized}" if normalized else path
 
 
+class ChartCacheIndex:
+    """
+    quick_chart_cache 中已有 key 的进程内索引：索引里没有的 key 直接按未命中处理，省去一次查库。
+
+    索引为 frozenset，多进程部署时在 fork 前加载、各 worker 共享；本进程写入的 key 另记在 _added。
+    索引加载超过 ttl_sec 后，下一次未命中会重新加载，
+    因此其它 worker 写入或导入后重新预计算的缓存，最多延迟 ttl_sec 可见（期间按未命中正常计算）。
+    """
+
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = ttl_sec
+        self._keys: Optional[FrozenSet[str]] = None
+        self._added: Set[str] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> int:
+        """从 quick_chart_cache 重新加载全部 key，返回 key 数"""
+        keys = frozenset(r[0] for r in db.query(QuickChartCache.cache_key).all())
+        with self._lock:
+            self._keys = keys
+            self._added = set()
+            self._loaded_at = time.monotonic()
+        return len(keys)
+
+    def may_contain(self, db: Session, cache_key: str) -> bool:
+        """key 可能已缓存时返回 True（需再查库确认）；索引过期且未命中时先重载"""
+        keys = self._keys
+        if keys is not None and (cache_key in keys or cache_key in self._added):
+            return True
+        if keys is None or time.monotonic() - self._loaded_at > self.ttl_sec:
+            self.load(db)
+            keys = self._keys
+            return keys is not None and cache_key in keys
+        return False
+
+    def add(self, cache_key: str) -> None:
+        self._added.add(cache_key)
+
+    def invalidate(self) -> None:
+        """缓存被清空后调用：下次查询时重载"""
+        with self._lock:
+            self._keys = None
+            self._added = set()
+
+
+chart_cache_index = ChartCacheIndex(getattr(settings, "CHART_CACHE_INDEX_TTL_SEC", 60.0))
+
+
 def get_cached(db: Session, cache_key: str) -> Optional[str]:
     """返回缓存的 response_body（JSON 字符串），未命中返回 None"""
     row = db.query(QuickChartCache).filter(QuickChartCache.cache_key == cache_key).first()
@@ -54,12 +105,14 @@ def set_cached(db: Session, cache_key: str, response_body: str) -> None:
     else:
         db.add(QuickChartCache(cache_key=cache_key, response_body=response_body))
     db.commit()
+    chart_cache_index.add(cache_key)
 
 
 def clear_all_cached(db: Session) -> int:
     """清空所有快速图表缓存，返回删除条数"""
     n = db.query(QuickChartCache).delete()
     db.commit()
+    chart_cache_index.invalidate()
     return n
 
 
@@ -69,6 +122,7 @@ def clear_cached_by_prefix(db: Session, prefix: str) -> int:
         synchronize_session=False
     )
     db.commit()
+    chart_cache_index.invalidate()
     return n
 
 
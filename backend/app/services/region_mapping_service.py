@@ -1,5 +1,6 @@
 """统一的区域映射服务 - 规范化 dim_region 的创建和查询"""
 from typing import Dict, Optional, Tuple
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.models.dim_region import DimRegion
 from app.utils.region_normalizer import normalize_province_name
@@ -363,3 +364,37 @@ def rebuild_all_regions(db: Session, dry_run: bool = False) -> Dict[str, int]:
         "updated": updated_count,
         "skipped": skipped_count
     }
+
+
+# ── dim_region 查找表（hogprice_v3）──
+# dim_region 只在 init-db 时填充，进程内加载一次；多进程部署时在 fork 前加载，各 worker 共享
+_dim_region_maps: Optional[Dict] = None
+
+
+def load_dim_region_maps(db) -> Dict:
+    """
+    读取 dim_region 并构建查找表（db 为 Session 或 Connection）
+
+    Returns:
+        {
+            "name_to_code": {region_name: region_code},
+            "code_to_name": {region_code: region_name},
+            "provinces": [(region_code, region_name, parent_code)]  # region_level = 2，按 code 排序
+        }
+    """
+    rows = db.execute(text(
+        "SELECT region_code, region_name, region_level, parent_code FROM dim_region ORDER BY region_code"
+    )).fetchall()
+    return {
+        "name_to_code": {r[1]: r[0] for r in rows},
+        "code_to_name": {r[0]: r[1] for r in rows},
+        "provinces": [(r[0], r[1], r[3]) for r in rows if int(r[2]) == 2],
+    }
+
+
+def get_dim_region_maps(db) -> Dict:
+    """dim_region 查找表（首次调用时加载，进程内复用）"""
+    global _dim_region_maps
+    if _dim_region_maps is None:
+        _dim_region_maps = load_dim_region_maps(db)
+    return _dim_region_maps
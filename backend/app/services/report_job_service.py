@@ -0,0 +1,181 @@
+"""
+报告异步任务 + 本地文件产物缓存
+
+提交时按 sha256(模板 id/配置, 参数, 数据版本) 计算缓存键：
+  - 产物已存在：直接生成一条 success 的 report_run 指向该文件，不再构建
+  - 同键任务仍在 pending/running（任一 worker）：返回该任务
+  - 否则建 pending 任务，交给进程内线程池构建，完成后写入产物目录
+数据版本取 import_batch 最大 id，任何一次导入后旧产物自然失效（按保留天数清理）。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import ReportRun, ReportTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class LocalArtifactStore:
+    """本地文件系统产物仓库：<root>/<key 前两位>/<key>.xlsx，写入经临时文件 + os.replace 原子落盘"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.xlsx")
+
+    def get(self, key: str) -> Optional[str]:
+        """命中时刷新 mtime：prune 按最近一次使用时间清理，仍被复用的产物不会被删除"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, key: str) -> str:
+        os.makedirs(os.path.join(self.root, ".tmp"), exist_ok=True)
+        return os.path.join(self.root, ".tmp", f"{key}.{os.getpid()}.{threading.get_ident()}.xlsx")
+
+    def put(self, key: str, src_path: str) -> str:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(src_path, path)
+        return path
+
+    def prune(self, max_age_days: int) -> int:
+        """删除超过保留天数未被使用（mtime 为写入或最近一次命中时间）的产物，返回删除个数"""
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+
+artifact_store = LocalArtifactStore(settings.REPORT_ARTIFACT_DIR)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(settings.REPORT_JOB_WORKERS, 1), thread_name_prefix="report-job"
+                )
+    return _executor
+
+
+def data_version(db: Session) -> str:
+    """数据版本：最近一次导入批次 id（无导入记录时为 0）"""
+    return str(db.execute(text("SELECT COALESCE(MAX(id), 0) FROM import_batch")).scalar() or 0)
+
+
+def report_cache_key(template_id: int, template_config: Optional[Dict], params: Dict, version: str) -> str:
+    payload = json.dumps(
+        {"template_id": template_id, "template": template_config, "params": params, "data_version": version},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def submit_report(db: Session, template: ReportTemplate, params: Dict) -> tuple[ReportRun, bool]:
+    """
+    提交报告任务
+
+    Returns:
+        (report_run, cached)：cached 为 True 表示直接复用了已生成的产物
+    """
+    key = report_cache_key(template.id, template.template_json, params, data_version(db))
+
+    path = artifact_store.get(key)
+    if path:
+        run = ReportRun(
+            template_id=template.id, params_json=params, status="success",
+            output_path=path, cache_key=key, finished_at=datetime.now(),
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        logger.info("report artifact hit run_id=%s template_id=%s key=%s", run.id, template.id, key[:12])
+        return run, True
+
+    stale_before = datetime.now() - timedelta(seconds=settings.REPORT_JOB_STALE_SEC)
+    inflight = db.query(ReportRun).filter(
+        ReportRun.cache_key == key,
+        ReportRun.status.in_(("pending", "running")),
+        ReportRun.created_at >= stale_before,
+    ).order_by(ReportRun.id.desc()).first()
+    if inflight is not None:
+        logger.info("report job joined run_id=%s template_id=%s key=%s", inflight.id, template.id, key[:12])
+        return inflight, False
+
+    run = ReportRun(template_id=template.id, params_json=params, status="pending", cache_key=key)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    _get_executor().submit(_run_report_job, run.id)
+    logger.info("report job submitted run_id=%s template_id=%s key=%s", run.id, template.id, key[:12])
+    return run, False
+
+
+def _run_report_job(run_id: int) -> None:
+    """线程池中执行：独立会话构建工作簿 → 写入产物仓库 → 更新运行记录"""
+    from app.services.report_service import write_report_workbook
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    tmp_path = None
+    try:
+        run = db.query(ReportRun).filter(ReportRun.id == run_id).first()
+        if run is None:
+            return
+        template = db.query(ReportTemplate).filter(ReportTemplate.id == run.template_id).first()
+        run.status = "running"
+        db.commit()
+        try:
+            tmp_path = artifact_store.temp_path(run.cache_key)
+            write_report_workbook(db, dict(template.template_json or {}), run.params_json or {}, tmp_path)
+            run.output_path = artifact_store.put(run.cache_key, tmp_path)
+            tmp_path = None
+            run.status = "success"
+        except Exception as e:
+            logger.exception("report job failed run_id=%s", run_id)
+            db.rollback()
+            run.status = "failed"
+            run.error_json = {"error": str(e)}
+        run.finished_at = datetime.now()
+        db.commit()
+        logger.info(
+            "report job finished run_id=%s status=%s elapsed_ms=%.0f",
+            run_id, run.status, (time.perf_counter() - start) * 1000,
+        )
+        artifact_store.prune(settings.REPORT_ARTIFACT_MAX_AGE_DAYS)
+    except Exception:
+        logger.exception("report job bookkeeping failed run_id=%s", run_id)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db.close()
@@ -3,7 +3,6 @@ import os
 from typing import Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-import xlsxwriter
 
 from app.models import ReportTemplate, ReportRun
 from app.services.query_service import query_timeseries
@@ -102,66 +101,7 @@ def generate_report(
         
         # 生成Excel文件
         output_path = os.path.join(output_dir, f"report_{report_run.id}.xlsx")
-        
-        # 创建Excel工作簿
-        workbook = xlsxwriter.Workbook(output_path)
-        
-        # 设置格式
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#366092',
-            'font_color': 'white',
-            'align': 'center',
-            'valign': 'vcenter',
-            'border': 1
-        })
-        
-        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
-        number_format = workbook.add_format({'num_format': '#,##0.00'})
-        
-        # 根据模板配置生成各个sheet
-        sheets = template_config.get("sheets", [])
-        
-        for sheet_config in sheets:
-            sheet_name = sheet_config.get("name", "Sheet1")
-            sheet_type = sheet_config.get("type")  # cover | summary | rank_table
-            chart_type = sheet_config.get("chart_type")  # seasonality | timeseries
-            
-            # Excel sheet名称限制为31个字符
-            excel_sheet_name = sheet_name[:31] if len(sheet_name) > 31 else sheet_name
-            worksheet = workbook.add_worksheet(excel_sheet_name)
-            
-            # 保存原始sheet_name用于图表引用
-            sheet_config["_excel_sheet_name"] = excel_sheet_name
-            
-            # 处理封面页
-            if sheet_type == "cover":
-                _generate_cover_sheet(
-                    workbook, worksheet, sheet_config, params,
-                    header_format
-                )
-            # 处理季节性图sheet
-            elif chart_type == "seasonality":
-                _generate_seasonality_sheet(
-                    db, workbook, worksheet, sheet_config, params,
-                    header_format, date_format, number_format
-                )
-            # 处理时间序列图sheet
-            elif chart_type == "timeseries":
-                _generate_timeseries_sheet(
-                    db, workbook, worksheet, sheet_config, params,
-                    header_format, date_format, number_format
-                )
-            # 处理摘要页
-            elif sheet_type == "summary":
-                worksheet.write(0, 0, "统计摘要")
-                worksheet.write(1, 0, "此功能待实现")
-            # 处理排名表
-            elif sheet_type == "rank_table":
-                worksheet.write(0, 0, "排名表")
-                worksheet.write(1, 0, "此功能待实现")
-        
-        workbook.close()
+        write_report_workbook(db, template_config, params, output_path)
         
         # 更新运行记录
         report_run.status = "success"
@@ -180,6 +120,88 @@ def generate_report(
         raise
 
 
+def write_report_workbook(
+    db: Session,
+    template_config: Dict,
+    params: Dict,
+    output_path: str
+) -> str:
+    """
+    按模板配置生成报告工作簿（只负责写文件，不涉及运行记录）
+    
+    Args:
+        db: 数据库会话
+        template_config: 报告模板配置（template_json）
+        params: 报告生成参数
+        output_path: 输出文件路径
+    
+    Returns:
+        输出文件路径
+    """
+    import xlsxwriter  # 首次生成报告时加载
+
+    # 创建Excel工作簿
+    workbook = xlsxwriter.Workbook(output_path)
+    
+    # 设置格式
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#366092',
+        'font_color': 'white',
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1
+    })
+    
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    number_format = workbook.add_format({'num_format': '#,##0.00'})
+    
+    # 根据模板配置生成各个sheet
+    sheets = template_config.get("sheets", [])
+    
+    for sheet_config in sheets:
+        sheet_name = sheet_config.get("name", "Sheet1")
+        sheet_type = sheet_config.get("type")  # cover | summary | rank_table
+        chart_type = sheet_config.get("chart_type")  # seasonality | timeseries
+        
+        # Excel sheet名称限制为31个字符
+        excel_sheet_name = sheet_name[:31] if len(sheet_name) > 31 else sheet_name
+        worksheet = workbook.add_worksheet(excel_sheet_name)
+        
+        # 保存原始sheet_name用于图表引用
+        sheet_config["_excel_sheet_name"] = excel_sheet_name
+        
+        # 处理封面页
+        if sheet_type == "cover":
+            _generate_cover_sheet(
+                workbook, worksheet, sheet_config, params,
+                header_format
+            )
+        # 处理季节性图sheet
+        elif chart_type == "seasonality":
+            _generate_seasonality_sheet(
+                db, workbook, worksheet, sheet_config, params,
+                header_format, date_format, number_format
+            )
+        # 处理时间序列图sheet
+        elif chart_type == "timeseries":
+            _generate_timeseries_sheet(
+                db, workbook, worksheet, sheet_config, params,
+                header_format, date_format, number_format
+            )
+        # 处理摘要页
+        elif sheet_type == "summary":
+            worksheet.write(0, 0, "统计摘要")
+            worksheet.write(1, 0, "此功能待实现")
+        # 处理排名表
+        elif sheet_type == "rank_table":
+            worksheet.write(0, 0, "排名表")
+            worksheet.write(1, 0, "此功能待实现")
+    
+    workbook.close()
+    return output_path
+
+
 def _generate_seasonality_sheet(
     db: Session,
     workbook,
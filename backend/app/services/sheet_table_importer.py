@@ -1,133 +1,176 @@
-"""Sheet表导入器 - 批量导入数据到指定表"""
-from typing import List, Dict, Any, Optional
+"""Sheet表导入器 - 批量导入数据到指定表
+
+每张表只反射一次列定义；记录先在 DataFrame 中按列类型一次性转换，
+再按块执行多行 INSERT IGNORE（executemany，pymysql 改写为多行 VALUES）。
+语义与逐行 INSERT IGNORE 一致：重复键跳过（先到先得），只写记录中出现的列（缺省列取表默认值），
+多行语句失败时该块退回逐行执行，逐条计入 errors。
+"""
+import logging
+import warnings
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
-from sqlalchemy import text, inspect
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.types import Date, DateTime, Float, Integer, Numeric
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 每条多行 INSERT 的行数（同时也是提交粒度）
+DEFAULT_CHUNK_SIZE = 1000
 
 
 class SheetTableImporter:
     """Sheet表导入器"""
-    
-    def __init__(self, db: Session):
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.db = db
-    
+        self.chunk_size = chunk_size
+        # 表名 → {列名: 列类型}，每张表只反射一次
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._inspector = None
+
     def import_to_table(
         self,
         table_name: str,
         records: List[Dict],
         unique_key: List[str],
-        batch_size: int = 1000
+        batch_size: Optional[int] = None
     ) -> Dict[str, int]:
         """
-        导入数据到指定表
-        
+        导入数据到指定表（插入优先：重复键跳过，不更新）
+
         Args:
             table_name: 目标表名
             records: 记录列表
             unique_key: 唯一键字段列表
-        
+            batch_size: 每条多行 INSERT 的行数，默认 chunk_size
+
         Returns:
             {
-                "inserted": int,
+                "inserted": int,   # 实际插入行数
+                "ignored": int,    # 重复键跳过行数
                 "updated": int,
-                "errors": int
+                "errors": int      # 无可写列或写入失败的行数
             }
         """
         if not records:
-            return {"inserted": 0, "updated": 0, "errors": 0}
-        
+            return {"inserted": 0, "ignored": 0, "updated": 0, "errors": 0}
+
         # 检查表是否存在
-        if not self._table_exists(table_name):
+        schema = self._table_schema(table_name)
+        if schema is None:
             raise ValueError(f"Table {table_name} does not exist")
-        
+
+        # 每条记录实际写入的列（过滤掉不存在的列）；无可写列的记录计为错误
+        column_sets = [tuple(k for k in record if k in schema) for record in records]
+        error_count = sum(1 for cols in column_sets if not cols)
+        frame = self._coerce_frame(records, schema)
+
         inserted_count = 0
-        updated_count = 0
-        error_count = 0
-        
-        # 批量处理
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            
+        ignored_count = 0
+        chunk_size = batch_size or self.chunk_size
+        for start in range(0, len(records), chunk_size):
+            end = min(start + chunk_size, len(records))
             try:
-                result = self._batch_upsert(table_name, batch, unique_key)
-                inserted_count += result["inserted"]
-                updated_count += result["updated"]
-                error_count += result["errors"]
-                # 每批提交一次
+                chunk_inserted = 0
+                chunk_errors = 0
+                chunk_ignored = 0
+                # 连续且列集合相同的记录合并为一条多行 INSERT，保持原有顺序（重复键先到先得）
+                run_start = start
+                for i in range(start + 1, end + 1):
+                    if i < end and column_sets[i] == column_sets[run_start]:
+                        continue
+                    columns = column_sets[run_start]
+                    if columns:
+                        params = frame.iloc[run_start:i][list(columns)].to_dict("records")
+                        ins, errs = self._insert_ignore(table_name, columns, params)
+                        chunk_inserted += ins
+                        chunk_errors += errs
+                        chunk_ignored += len(params) - ins - errs
+                    run_start = i
+                # 每块提交一次
                 self.db.commit()
+                inserted_count += chunk_inserted
+                ignored_count += chunk_ignored
+                error_count += chunk_errors
             except Exception as e:
                 self.db.rollback()
-                error_count += len(batch)
-                # 记录错误但继续处理下一批
-                continue
-        
+                logger.warning("sheet table chunk failed table=%s rows=%d error=%s", table_name, end - start, e)
+                error_count += sum(1 for cols in column_sets[start:end] if cols)
+
+        logger.info(
+            "sheet table imported table=%s rows=%d inserted=%d ignored=%d errors=%d",
+            table_name, len(records), inserted_count, ignored_count, error_count,
+        )
         return {
             "inserted": inserted_count,
-            "updated": updated_count,
+            "ignored": ignored_count,
+            "updated": 0,
             "errors": error_count
         }
-    
-    def _table_exists(self, table_name: str) -> bool:
-        """检查表是否存在"""
-        inspector = inspect(self.db.bind)
-        return table_name in inspector.get_table_names()
-    
-    def _batch_upsert(
-        self,
-        table_name: str,
-        records: List[Dict],
-        unique_key: List[str]
-    ) -> Dict[str, int]:
-        """批量upsert记录"""
-        if not records:
-            return {"inserted": 0, "updated": 0, "errors": 0}
-        
-        inserted_count = 0
-        updated_count = 0
-        error_count = 0
-        
-        # 获取表的所有列名
-        inspector = inspect(self.db.bind)
-        columns = [col["name"] for col in inspector.get_columns(table_name)]
-        
-        # 构建INSERT ... ON DUPLICATE KEY UPDATE语句
-        # 注意：这里使用动态SQL，需要确保安全性
-        
-        for record in records:
+
+    def _table_schema(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """表的 {列名: 列类型}（缓存）；表不存在时为 None"""
+        if table_name not in self._schemas:
+            if self._inspector is None:
+                self._inspector = inspect(self.db.bind)
+            if not self._inspector.has_table(table_name):
+                return None
+            self._schemas[table_name] = {
+                col["name"]: col["type"] for col in self._inspector.get_columns(table_name)
+            }
+        return self._schemas[table_name]
+
+    @staticmethod
+    def _coerce_frame(records: List[Dict], schema: Dict[str, Any]) -> "pd.DataFrame":
+        """
+        按列类型一次性转换：数值列转数值、日期列转 date/datetime，NaN/NaT/numpy 标量转为 Python 原生值。
+        无法解析的非空值原样保留，交由数据库按原逻辑处理（与逐行写入一致）。
+        """
+        import pandas as pd
+
+        df = pd.DataFrame.from_records(records, columns=list(set().union(*map(set, records)) & schema.keys()))
+        for col, col_type in schema.items():
+            if col not in df.columns:
+                continue
+            raw = df[col]
+            if isinstance(col_type, (Integer, Numeric, Float)):
+                converted = pd.to_numeric(raw, errors="coerce")
+            elif isinstance(col_type, (Date, DateTime)):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    converted = pd.to_datetime(raw, errors="coerce")
+                if not isinstance(col_type, DateTime):
+                    converted = converted.dt.date
+            else:
+                continue
+            converted = converted.astype(object)
+            df[col] = converted.where(converted.notna(), raw.astype(object))
+        return df.astype(object).where(df.notna(), None)
+
+    def _insert_ignore(self, table_name: str, columns: tuple, params: List[Dict]) -> tuple[int, int]:
+        """多行 INSERT IGNORE，返回 (插入行数, 错误行数)；失败时退回逐行"""
+        cols_sql = ", ".join(f"`{c}`" for c in columns)
+        values_sql = ", ".join(f":{c}" for c in columns)
+        stmt = text(f"INSERT IGNORE INTO `{table_name}` ({cols_sql}) VALUES ({values_sql})")
+        try:
+            with self.db.begin_nested():
+                result = self.db.execute(stmt, params)
+            return max(result.rowcount, 0), 0
+        except Exception as e:
+            logger.warning("sheet table multi-row insert failed, retry row by row table=%s error=%s", table_name, e)
+        inserted = 0
+        errors = 0
+        for row in params:
             try:
-                # 过滤掉不存在的列
-                filtered_record = {k: v for k, v in record.items() if k in columns}
-                
-                if not filtered_record:
-                    error_count += 1
-                    continue
-                
-                # 构建列名和值（插入优先：有重复则跳过，不更新）
-                col_names = list(filtered_record.keys())
-                col_placeholders = [f":{col}" for col in col_names]
-                
-                # 使用 INSERT IGNORE：重复键时跳过，不报错
-                insert_sql = f"""
-                    INSERT IGNORE INTO {table_name} ({', '.join(col_names)})
-                    VALUES ({', '.join(col_placeholders)})
-                """
-                
-                # 执行SQL
-                params = {col: filtered_record[col] for col in col_names}
-                result = self.db.execute(text(insert_sql), params)
-                
+                with self.db.begin_nested():
+                    result = self.db.execute(stmt, row)
                 if result.rowcount == 1:
-                    inserted_count += 1
-                # rowcount=0：INSERT IGNORE 下为重复键跳过，不计数
-                
-            except IntegrityError:
-                # 插入优先：INSERT IGNORE 已处理重复，此处多为外键等错误
-                error_count += 1
+                    inserted += 1
+                # rowcount=0：INSERT IGNORE 下为重复键跳过
             except Exception:
-                error_count += 1
-        
-        return {
-            "inserted": inserted_count,
-            "updated": updated_count,
-            "errors": error_count
-        }
+                errors += 1
+        return inserted, errors
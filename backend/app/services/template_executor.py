@@ -1,10 +1,15 @@
 """
 模板执行服务：解析预设模板并执行查询
+
+各 block 相互独立时并发执行（有界线程池，每个 block 独立 DB 会话），结果按模板中的原始顺序组装；
+block 可用 depends_on: [block_id, ...] 声明依赖，summary 默认依赖其前面的全部 block。
 """
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Dict, List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import datetime, timedelta
 
+from app.core.config import settings
 from app.services.template_service import resolve_template_params, resolve_block_query
 from app.services.seasonality_service import query_seasonality
 from app.services.query_service import query_timeseries
@@ -14,7 +19,8 @@ from app.models.metric_code_map import resolve_metric_id
 def execute_template(
     db: Session,
     template: Dict,
-    user_params: Dict
+    user_params: Dict,
+    max_workers: Optional[int] = None
 ) -> Dict:
     """
     执行模板，生成图表数据
@@ -23,6 +29,7 @@ def execute_template(
         db: 数据库会话
         template: 模板配置（从templates.json或数据库加载）
         user_params: 用户提供的参数
+        max_workers: block 并发数，默认 TEMPLATE_BLOCK_WORKERS；<=1 时在 db 会话中顺序执行
     
     Returns:
         包含所有blocks数据的字典，格式：
@@ -38,140 +45,207 @@ def execute_template(
     # 解析参数
     resolved_params = resolve_template_params(template, user_params, db)
     
-    # 执行所有blocks
+    # 执行所有blocks（按原始顺序组装结果）
+    blocks = template.get("blocks", [])
+    outputs = _run_blocks(
+        db, blocks, resolved_params,
+        settings.TEMPLATE_BLOCK_WORKERS if max_workers is None else max_workers,
+    )
     results = {}
+    for block, output in zip(blocks, outputs):
+        if output is not None:
+            results[block.get("block_id")] = output
     
-    for block in template.get("blocks", []):
-        block_id = block.get("block_id")
-        block_type = block.get("type")
+    return {
+        "template_id": template.get("template_id"),
+        "template_name": template.get("name"),
+        "blocks": results
+    }
+
+
+def _block_dependencies(blocks: List[Dict]) -> List[set]:
+    """每个 block 依赖的 block 下标：显式 depends_on（按 block_id），summary 默认依赖前面全部 block"""
+    index_by_id: Dict[str, List[int]] = {}
+    for i, block in enumerate(blocks):
+        index_by_id.setdefault(block.get("block_id"), []).append(i)
+    deps = []
+    for i, block in enumerate(blocks):
+        if "depends_on" in block:
+            deps.append({j for ref in block.get("depends_on") or [] for j in index_by_id.get(ref, []) if j != i})
+        elif block.get("type") == "summary":
+            deps.append(set(range(i)))
+        else:
+            deps.append(set())
+    return deps
+
+
+def _run_blocks(db: Session, blocks: List[Dict], resolved_params: Dict, max_workers: int) -> List[Optional[Dict]]:
+    """按依赖关系调度执行，返回与 blocks 同序的结果列表"""
+    if max_workers <= 1 or len(blocks) <= 1:
+        return [_execute_block(db, block, resolved_params) for block in blocks]
+
+    deps = _block_dependencies(blocks)
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+    outputs: List[Optional[Dict]] = [None] * len(blocks)
+    pending = set(range(len(blocks)))
+    done: set = set()
+    running: Dict[Future, int] = {}
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(blocks)), thread_name_prefix="template-block")
+    try:
+        while pending or running:
+            for i in sorted(pending):
+                if deps[i] <= done:
+                    pending.discard(i)
+                    running[pool.submit(_execute_block_in_session, session_factory, blocks[i], resolved_params)] = i
+            if not running:
+                raise ValueError(f"block depends_on 存在循环依赖: {[blocks[i].get('block_id') for i in sorted(pending)]}")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                outputs[i] = future.result()
+                done.add(i)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return outputs
+
+
+def _execute_block_in_session(session_factory, block: Dict, resolved_params: Dict) -> Optional[Dict]:
+    """线程池中执行单个 block，使用独立会话"""
+    db = session_factory()
+    try:
+        return _execute_block(db, block, resolved_params)
+    finally:
+        db.close()
+
+
+def _execute_block(db: Session, block: Dict, resolved_params: Dict) -> Optional[Dict]:
+    """执行单个 block，返回结果；未知类型返回 None（不出现在结果中）"""
+    block_id = block.get("block_id")
+    block_type = block.get("type")
+    
+    if block_type == "seasonality":
+        # 执行季节性查询
+        query_config = resolve_block_query(block, resolved_params, db)
+        
+        # 确保metric_id存在
+        if "metric_id" not in query_config:
+            metric_code = query_config.get("metric_code")
+            if metric_code:
+                metric_id = resolve_metric_id(db, metric_code)
+                if metric_id:
+                    query_config["metric_id"] = metric_id
         
-        if block_type == "seasonality":
-            # 执行季节性查询
-            query_config = resolve_block_query(block, resolved_params, db)
+        if "metric_id" in query_config:
+            years = query_config.get("years", [])
+            if isinstance(years, str):
+                if years.startswith("{{"):
+                    # 参数占位符，从resolved_params获取
+                    years = resolved_params.get("years", [])
+                else:
+                    # 尝试解析JSON
+                    try:
+                        import json
+                        years = json.loads(years)
+                    except:
+                        years = []
             
-            # 确保metric_id存在
-            if "metric_id" not in query_config:
-                metric_code = query_config.get("metric_code")
-                if metric_code:
-                    metric_id = resolve_metric_id(db, metric_code)
-                    if metric_id:
-                        query_config["metric_id"] = metric_id
+            if not isinstance(years, list):
+                years = [years] if years else []
             
-            if "metric_id" in query_config:
-                years = query_config.get("years", [])
-                if isinstance(years, str):
-                    if years.startswith("{{"):
-                        # 参数占位符，从resolved_params获取
-                        years = resolved_params.get("years", [])
-                    else:
-                        # 尝试解析JSON
-                        try:
-                            import json
-                            years = json.loads(years)
-                        except:
-                            years = []
-                
-                if not isinstance(years, list):
-                    years = [years] if years else []
-                
-                # 如果没有年份，使用默认值（最近6年）
-                if not years:
-                    current_year = datetime.now().year
-                    years = list(range(current_year - 5, current_year + 1))
+            # 如果没有年份，使用默认值（最近6年）
+            if not years:
+                current_year = datetime.now().year
+                years = list(range(current_year - 5, current_year + 1))
+        
+            result = query_seasonality(
+                db=db,
+                metric_id=query_config["metric_id"],
+                years=years,
+                filters={
+                    "geo_ids": query_config.get("geo_ids", []),
+                    "company_ids": []
+                },
+                x_mode=query_config.get("x_mode", "week_of_year"),
+                agg=query_config.get("agg", "mean")
+            )
             
-                result = query_seasonality(
-                    db=db,
-                    metric_id=query_config["metric_id"],
-                    years=years,
-                    filters={
-                        "geo_ids": query_config.get("geo_ids", []),
-                        "company_ids": []
-                    },
-                    x_mode=query_config.get("x_mode", "week_of_year"),
-                    agg=query_config.get("agg", "mean")
-                )
-                
-                results[block_id] = {
-                    "type": "seasonality",
-                    "data": result
-                }
-            else:
-                # metric_id缺失，无法执行
-                results[block_id] = {
-                    "type": "seasonality",
-                    "error": f"Metric ID not found for metric_code: {query_config.get('metric_code', 'unknown')}"
-                }
+            return {
+                "type": "seasonality",
+                "data": result
+            }
+        else:
+            # metric_id缺失，无法执行
+            return {
+                "type": "seasonality",
+                "error": f"Metric ID not found for metric_code: {query_config.get('metric_code', 'unknown')}"
+            }
+    
+    elif block_type == "timeseries" or block_type == "timeseries_dual_axis" or block_type == "timeseries_multi_line":
+        # 执行时间序列查询
+        query_config = resolve_block_query(block, resolved_params, db)
         
-        elif block_type == "timeseries" or block_type == "timeseries_dual_axis" or block_type == "timeseries_multi_line":
-            # 执行时间序列查询
-            query_config = resolve_block_query(block, resolved_params, db)
+        # 处理metric_ids
+        metric_ids = []
+        if "metric_id" in query_config:
+            metric_ids = [query_config["metric_id"]]
+        elif "metrics" in query_config:
+            # 双轴或多指标
+            for metric_config in query_config["metrics"]:
+                if "metric_id" in metric_config:
+                    metric_ids.append(metric_config["metric_id"])
+                elif "metric_code" in metric_config:
+                    metric_id = resolve_metric_id(db, metric_config["metric_code"])
+                    if metric_id:
+                        metric_ids.append(metric_id)
+        
+        if metric_ids:
+            # 处理日期范围
+            date_range = query_config.get("date_range")
+            if isinstance(date_range, str) and date_range.startswith("{{"):
+                date_range = resolved_params.get("date_range")
+            elif isinstance(date_range, str):
+                # 处理特殊值
+                if date_range == "YTD":
+                    today = datetime.now()
+                    date_range = {
+                        "start": f"{today.year}-01-01",
+                        "end": today.strftime("%Y-%m-%d")
+                    }
+                elif date_range == "last_90_days":
+                    end = datetime.now()
+                    start = end - timedelta(days=90)
+                    date_range = {
+                        "start": start.strftime("%Y-%m-%d"),
+                        "end": end.strftime("%Y-%m-%d")
+                    }
             
-            # 处理metric_ids
-            metric_ids = []
-            if "metric_id" in query_config:
-                metric_ids = [query_config["metric_id"]]
-            elif "metrics" in query_config:
-                # 双轴或多指标
-                for metric_config in query_config["metrics"]:
-                    if "metric_id" in metric_config:
-                        metric_ids.append(metric_config["metric_id"])
-                    elif "metric_code" in metric_config:
-                        metric_id = resolve_metric_id(db, metric_config["metric_code"])
-                        if metric_id:
-                            metric_ids.append(metric_id)
+            result = query_timeseries(
+                db=db,
+                date_range=date_range,
+                metric_ids=metric_ids,
+                geo_ids=query_config.get("geo_ids", []),
+                company_ids=query_config.get("company_ids", []),
+                time_dimension=query_config.get("time_dimension", "daily")
+            )
             
-            if metric_ids:
-                # 处理日期范围
-                date_range = query_config.get("date_range")
-                if isinstance(date_range, str) and date_range.startswith("{{"):
-                    date_range = resolved_params.get("date_range")
-                elif isinstance(date_range, str):
-                    # 处理特殊值
-                    if date_range == "YTD":
-                        today = datetime.now()
-                        date_range = {
-                            "start": f"{today.year}-01-01",
-                            "end": today.strftime("%Y-%m-%d")
-                        }
-                    elif date_range == "last_90_days":
-                        end = datetime.now()
-                        start = end - timedelta(days=90)
-                        date_range = {
-                            "start": start.strftime("%Y-%m-%d"),
-                            "end": end.strftime("%Y-%m-%d")
-                        }
-                
-                result = query_timeseries(
-                    db=db,
-                    date_range=date_range,
-                    metric_ids=metric_ids,
-                    geo_ids=query_config.get("geo_ids", []),
-                    company_ids=query_config.get("company_ids", []),
-                    time_dimension=query_config.get("time_dimension", "daily")
-                )
-                
-                results[block_id] = {
-                    "type": block_type,
-                    "data": result,
-                    "metrics_config": query_config.get("metrics", [])  # 保存axis配置
-                }
-            else:
-                # metric_ids缺失，无法执行
-                results[block_id] = {
-                    "type": block_type,
-                    "error": f"No valid metric IDs found for block {block_id}"
-                }
-        
-        elif block_type == "summary":
-            # 摘要统计（需要基于前面的查询结果）
-            # 这里简化处理，实际应该基于前面的block结果计算
-            results[block_id] = {
-                "type": "summary",
-                "data": {}  # 需要后续实现
+            return {
+                "type": block_type,
+                "data": result,
+                "metrics_config": query_config.get("metrics", [])  # 保存axis配置
+            }
+        else:
+            # metric_ids缺失，无法执行
+            return {
+                "type": block_type,
+                "error": f"No valid metric IDs found for block {block_id}"
             }
     
-    return {
-        "template_id": template.get("template_id"),
-        "template_name": template.get("name"),
-        "blocks": results
-    }
+    elif block_type == "summary":
+        # 摘要统计（需要基于前面的查询结果）
+        # 这里简化处理，实际应该基于前面的block结果计算
+        return {
+            "type": "summary",
+            "data": {}  # 需要后续实现
+        }
+    
+    return None
@@ -1,310 +1,278 @@
+"""TopN 排名服务（hogprice_v3）
+
+为 fact_price_daily / fact_spread_daily 中按省份分布的日度指标维护截面索引：
+  每个 (指标, 数据源) 一个「日期 × 省份」矩阵，每行即当日的省份截面（缺失为 NaN）。
+索引在导入完成后重建（rebuild_ranking_index），查询时按最新成功批次号校验版本，
+任意窗口的 TopN 只在两行截面上做向量运算 + numpy.argpartition，不再扫描事实表。
+"""
+import logging
+import threading
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
-from datetime import date, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case, desc
-from sqlalchemy.dialects.mysql import JSON
 
-from app.models import FactObservation, DimMetric, DimGeo, DimCompany, DimWarehouse
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.metric_catalog import EXPORT_ROUTING, METRIC_CATALOG
+
+logger = logging.getLogger(__name__)
+
+RANK_BY_OPTIONS = ("delta", "pct_change", "seasonal_percentile", "streak")
+_RANKABLE_TABLES = {"fact_price_daily", "fact_spread_daily"}
+_SEASONAL_YEARS = 5
+
+
+@dataclass
+class CrossSectionIndex:
+    """单个 (指标, 数据源) 的「日期 × 省份」截面矩阵"""
+    dates: np.ndarray          # datetime64[D]，升序
+    regions: List[str]
+    values: np.ndarray         # shape (len(dates), len(regions))，float，缺失为 NaN
+    source: Optional[str] = None
+
+    def row_at_or_before(self, d: np.datetime64) -> int:
+        """不晚于 d 的最近一个日期所在行，没有则为 -1"""
+        return int(np.searchsorted(self.dates, d, side="right")) - 1
+
+
+_index_lock = threading.Lock()
+_index_version: Optional[int] = None
+_indexes: Dict[Tuple[int, Optional[str]], CrossSectionIndex] = {}
+
+
+def rankable_metric_ids() -> List[int]:
+    """可做省份排名的指标（目录序号）"""
+    ids = []
+    for i, m in enumerate(METRIC_CATALOG, 1):
+        route = EXPORT_ROUTING.get(m["code"])
+        if route and route[0] in _RANKABLE_TABLES and "%" not in (route[4] or ""):
+            ids.append(i)
+    return ids
+
+
+def _data_version(engine: Engine) -> Optional[int]:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(id) FROM import_batch WHERE status = 'success'")).scalar()
+
+
+def _primary_source(conn, table: str, val_col: str, filter_col: str, filter_val: str) -> Optional[str]:
+    """未指定数据源时取该指标省份数据最多的一个源（不同源口径不同，不跨源合并）"""
+    return conn.execute(text(
+        f"SELECT source FROM `{table}` "
+        f"WHERE `{filter_col}` = :fv AND `{val_col}` IS NOT NULL AND region_code <> 'NATION' "
+        f"GROUP BY source ORDER BY COUNT(*) DESC, source LIMIT 1"
+    ), {"fv": filter_val}).scalar()
+
+
+def _build_index(engine: Engine, metric_id: int, source: Optional[str]) -> CrossSectionIndex:
+    """一次分组查询取出单一数据源的全部省份日度值，铺成截面矩阵"""
+    table, date_col, val_col, filter_col, filter_val, _ = EXPORT_ROUTING[METRIC_CATALOG[metric_id - 1]["code"]]
+    with engine.connect() as conn:
+        source = source or _primary_source(conn, table, val_col, filter_col, filter_val)
+        rows = conn.execute(text(
+            f"SELECT `{date_col}`, region_code, AVG(`{val_col}`) FROM `{table}` "
+            f"WHERE `{filter_col}` = :fv AND `{val_col}` IS NOT NULL AND region_code <> 'NATION' "
+            f"AND source = :src GROUP BY `{date_col}`, region_code"
+        ), {"fv": filter_val, "src": source}).fetchall() if source else []
+    if not rows:
+        return CrossSectionIndex(np.array([], dtype="datetime64[D]"), [], np.empty((0, 0)), source)
+
+    dates = np.array([r[0] for r in rows], dtype="datetime64[D]")
+    region_arr = np.array([r[1] for r in rows], dtype=object)
+    uniq_dates, date_pos = np.unique(dates, return_inverse=True)
+    uniq_regions, region_pos = np.unique(region_arr, return_inverse=True)
+    values = np.full((len(uniq_dates), len(uniq_regions)), np.nan)
+    values[date_pos, region_pos] = np.array([r[2] for r in rows], dtype=float)
+    return CrossSectionIndex(uniq_dates, [str(r) for r in uniq_regions], values, source)
+
+
+def rebuild_ranking_index(engine: Engine) -> int:
+    """导入完成后调用：清空并重建全部指标的截面索引（各指标的默认数据源），返回索引数"""
+    global _index_version
+    version = _data_version(engine)
+    built = {(mid, None): _build_index(engine, mid, None) for mid in rankable_metric_ids()}
+    with _index_lock:
+        _indexes.clear()
+        _indexes.update(built)
+        _index_version = version
+    logger.info("ranking index rebuilt version=%s indexes=%d", version, len(built))
+    return len(built)
+
+
+def get_cross_section_index(engine: Engine, metric_id: int, source: Optional[str] = None) -> CrossSectionIndex:
+    """取截面索引；数据版本（最新成功批次）变化时整体失效（兼容多进程 / CLI 导入）"""
+    global _index_version
+    version = _data_version(engine)
+    with _index_lock:
+        if version != _index_version:
+            _indexes.clear()
+            _index_version = version
+        index = _indexes.get((metric_id, source))
+    if index is None:
+        index = _build_index(engine, metric_id, source)
+        with _index_lock:
+            if _index_version == version:
+                _indexes[(metric_id, source)] = index
+    return index
+
+
+def _geo_dimension(engine: Engine) -> Dict[str, Tuple[int, str]]:
+    """region_code → (/dim/geo 的 id, 名称)，与 metadata.get_geo 的编号方式一致"""
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT region_code, region_name FROM dim_region WHERE region_level = 2 ORDER BY region_code"
+        )).fetchall()
+    return {r[0]: (i, r[1]) for i, r in enumerate(rows, 1)}
+
+
+def _streaks(block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    block: (n_days, n_regions)，最后一行为最新。
+    返回 (连续同向变化天数, 方向 1/-1/0)，遇到缺失、持平或反向即停止计数。
+    """
+    diffs = np.sign(np.diff(block, axis=0))[::-1]  # 最新的变化在第 0 行
+    if diffs.size == 0:
+        n = block.shape[1]
+        return np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+    direction = np.nan_to_num(diffs[0]).astype(int)
+    same = (diffs == direction) & (direction != 0)
+    broken = ~same
+    # 第一个不同向的位置即连续天数；全程同向则为窗口长度
+    streak = np.where(broken.any(axis=0), broken.argmax(axis=0), diffs.shape[0])
+    return streak, direction
+
+
+def _seasonal_percentile(index: CrossSectionIndex, latest_row: int, window_days: int) -> np.ndarray:
+    """最新截面在近 N 年同期（同月日 ± window_days）历史值中的分位（0-100）"""
+    latest_date = index.dates[latest_row]
+    latest = index.values[latest_row]
+    offsets = (index.dates - latest_date).astype(int)
+    mask = np.zeros(len(index.dates), dtype=bool)
+    for k in range(1, _SEASONAL_YEARS + 1):
+        center = latest_date - np.timedelta64(365 * k + k // 4, "D")
+        mask |= np.abs((index.dates - center).astype(int)) <= window_days
+    mask &= offsets < 0
+    hist = index.values[mask]
+    if hist.size == 0:
+        return np.full(len(index.regions), np.nan)
+    valid = ~np.isnan(hist)
+    counts = valid.sum(axis=0)
+    below = ((hist <= latest) & valid).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, below / counts * 100, np.nan)
+
+
+def _top_k(scores: np.ndarray, k: int, ascending: bool) -> np.ndarray:
+    """argpartition 取前 k（NaN 不参与），再对这 k 个排序"""
+    candidates = np.flatnonzero(~np.isnan(scores))
+    if candidates.size == 0:
+        return candidates
+    keyed = scores[candidates] if ascending else -scores[candidates]
+    k = min(k, candidates.size)
+    part = np.argpartition(keyed, k - 1)[:k]
+    return candidates[part[np.argsort(keyed[part], kind="stable")]]
 
 
 def query_topn(
-    db: Session,
+    engine: Engine,
     metric_id: int,
-    dimension: str,  # geo | company | warehouse
+    dimension: str = "geo",
     window_days: int = 7,
-    rank_by: str = "delta",  # delta | pct_change | seasonal_percentile | streak
+    rank_by: str = "delta",
     filters: Optional[Dict] = None,
-    topk: int = 10
+    topk: int = 10,
 ) -> Dict:
     """
-    查询TopN排名
-    
+    查询省份 TopN 排名
+
     Args:
-        db: 数据库会话
-        metric_id: 指标ID
-        dimension: 维度（geo/company/warehouse）
-        window_days: 窗口天数
-        rank_by: 排序方式
-        filters: 额外过滤条件
-        topk: 返回Top K条
-    
+        metric_id: 指标目录序号（/dim/metrics 的 id）
+        dimension: 仅支持 geo
+        window_days: 对比窗口天数（基准日取「最新日 - window_days」当天或之前最近一日）
+        rank_by: delta | pct_change | seasonal_percentile | streak
+        filters: source（数据源，缺省为该指标省份数据最多的源）、end_date（截止日）、order（desc/asc，asc 为倒数 N 名）、
+                 region_codes（限定省份）
+        topk: 返回条数
+
     Returns:
-        {
-            "metric_id": 101,
-            "metric_name": "全国标猪价格",
-            "dimension": "geo",
-            "rank_by": "delta",
-            "window_days": 7,
-            "items": [
-                {
-                    "dimension_id": 1,
-                    "dimension_name": "北京",
-                    "latest_value": 15.5,
-                    "baseline_value": 15.0,
-                    "delta": 0.5,
-                    "pct_change": 0.033,
-                    "rank": 1
-                }
-            ]
-        }
+        与旧版 /query/topn 相同结构：metric_id / metric_name / dimension / rank_by / window_days / items
     """
-    # 确定基准日期和窗口起始日期
-    latest_date_result = db.query(func.max(FactObservation.obs_date)).filter(
-        FactObservation.metric_id == metric_id
-    ).scalar()
-    
-    if not latest_date_result:
-        return {
-            "metric_id": metric_id,
-            "metric_name": "",
-            "dimension": dimension,
-            "rank_by": rank_by,
-            "window_days": window_days,
-            "items": []
-        }
-    
-    latest_date = latest_date_result
-    baseline_date = latest_date - timedelta(days=window_days)
-    
-    # 获取指标名称
-    metric = db.query(DimMetric).filter(DimMetric.id == metric_id).first()
-    metric_name = metric.metric_name if metric else ""
-    
-    # 构建基础查询：获取最新值和基准值
-    if dimension == "geo":
-        dim_table = DimGeo
-        dim_id_col = FactObservation.geo_id
-        dim_name_col = DimGeo.province
-        join_condition = FactObservation.geo_id == DimGeo.id
-    elif dimension == "company":
-        dim_table = DimCompany
-        dim_id_col = FactObservation.company_id
-        dim_name_col = DimCompany.company_name
-        join_condition = FactObservation.company_id == DimCompany.id
-    elif dimension == "warehouse":
-        dim_table = DimWarehouse
-        dim_id_col = FactObservation.warehouse_id
-        dim_name_col = DimWarehouse.warehouse_name
-        join_condition = FactObservation.warehouse_id == DimWarehouse.id
-    else:
-        raise ValueError(f"Unsupported dimension: {dimension}")
-    
-    # 查询最新值
-    latest_subq = db.query(
-        dim_id_col.label('dim_id'),
-        FactObservation.value.label('latest_value'),
-        FactObservation.obs_date.label('obs_date')
-    ).filter(
-        FactObservation.metric_id == metric_id,
-        FactObservation.obs_date == latest_date
-    ).subquery()
-    
-    # 查询基准值（窗口起始日期的值）
-    baseline_subq = db.query(
-        dim_id_col.label('dim_id'),
-        FactObservation.value.label('baseline_value')
-    ).filter(
-        FactObservation.metric_id == metric_id,
-        FactObservation.obs_date == baseline_date
-    ).subquery()
-    
-    # 根据rank_by选择不同的计算逻辑
-    if rank_by == "delta":
-        # 计算差值：latest - baseline
-        query = db.query(
-            latest_subq.c.dim_id,
-            dim_name_col.label('dim_name'),
-            latest_subq.c.latest_value,
-            baseline_subq.c.baseline_value,
-            (latest_subq.c.latest_value - baseline_subq.c.baseline_value).label('delta')
-        ).join(
-            dim_table, latest_subq.c.dim_id == dim_table.id
-        ).outerjoin(
-            baseline_subq, latest_subq.c.dim_id == baseline_subq.c.dim_id
-        ).filter(
-            latest_subq.c.latest_value.isnot(None),
-            baseline_subq.c.baseline_value.isnot(None)
-        ).order_by(desc('delta')).limit(topk)
-        
-        results = query.all()
-        
-        items = []
-        for idx, row in enumerate(results, 1):
-            items.append({
-                "dimension_id": row.dim_id,
-                "dimension_name": row.dim_name,
-                "latest_value": float(row.latest_value) if row.latest_value else None,
-                "baseline_value": float(row.baseline_value) if row.baseline_value else None,
-                "delta": float(row.delta) if row.delta else None,
-                "rank": idx
-            })
-    
-    elif rank_by == "pct_change":
-        # 计算百分比变化：(latest - baseline) / abs(baseline)
-        query = db.query(
-            latest_subq.c.dim_id,
-            dim_name_col.label('dim_name'),
-            latest_subq.c.latest_value,
-            baseline_subq.c.baseline_value,
-            case(
-                (baseline_subq.c.baseline_value != 0, 
-                 (latest_subq.c.latest_value - baseline_subq.c.baseline_value) / func.abs(baseline_subq.c.baseline_value)),
-                else_=None
-            ).label('pct_change')
-        ).join(
-            dim_table, latest_subq.c.dim_id == dim_table.id
-        ).outerjoin(
-            baseline_subq, latest_subq.c.dim_id == baseline_subq.c.dim_id
-        ).filter(
-            latest_subq.c.latest_value.isnot(None),
-            baseline_subq.c.baseline_value.isnot(None),
-            baseline_subq.c.baseline_value != 0
-        ).order_by(desc('pct_change')).limit(topk)
-        
-        results = query.all()
-        
-        items = []
-        for idx, row in enumerate(results, 1):
-            delta = row.latest_value - row.baseline_value if row.latest_value and row.baseline_value else None
-            items.append({
-                "dimension_id": row.dim_id,
-                "dimension_name": row.dim_name,
-                "latest_value": float(row.latest_value) if row.latest_value else None,
-                "baseline_value": float(row.baseline_value) if row.baseline_value else None,
-                "delta": float(delta) if delta else None,
-                "pct_change": float(row.pct_change) if row.pct_change else None,
-                "rank": idx
-            })
-    
-    elif rank_by == "streak":
-        # 连续上涨/下跌天数（仅日度数据）
-        # 需要查询最近N天的数据，计算连续趋势
-        # 简化实现：查询最近window_days天的数据，计算连续同向变化天数
-        # 注意：这需要metric的freq为daily
-        
-        # 查询最近window_days天的所有数据
-        start_date = latest_date - timedelta(days=window_days)
-        
-        all_data = db.query(
-            dim_id_col.label('dim_id'),
-            FactObservation.obs_date,
-            FactObservation.value
-        ).filter(
-            FactObservation.metric_id == metric_id,
-            FactObservation.obs_date >= start_date,
-            FactObservation.obs_date <= latest_date,
-            dim_id_col.isnot(None)
-        ).order_by(
-            dim_id_col, FactObservation.obs_date
-        ).all()
-        
-        # 按维度分组，计算连续趋势
-        dim_data = defaultdict(list)
-        for row in all_data:
-            dim_data[row.dim_id].append((row.obs_date, row.value))
-        
-        items = []
-        for dim_id, values in dim_data.items():
-            if len(values) < 2:
-                continue
-            
-            # 计算连续上涨/下跌天数
-            streak_days = 0
-            direction = None  # 'up' or 'down'
-            
-            # 从最新日期往前遍历
-            sorted_values = sorted(values, key=lambda x: x[0], reverse=True)
-            for i in range(len(sorted_values) - 1):
-                curr_val = sorted_values[i][1]
-                prev_val = sorted_values[i + 1][1]
-                
-                if curr_val is None or prev_val is None:
-                    break
-                
-                if curr_val > prev_val:
-                    if direction == 'down':
-                        break  # 方向改变，停止计数
-                    direction = 'up'
-                    streak_days += 1
-                elif curr_val < prev_val:
-                    if direction == 'up':
-                        break  # 方向改变，停止计数
-                    direction = 'down'
-                    streak_days += 1
-                else:
-                    break  # 相等，停止计数
-            
-            if streak_days > 0:
-                # 获取维度名称
-                dim_obj = db.query(dim_table).filter(dim_table.id == dim_id).first()
-                if dimension == "geo":
-                    dim_name = dim_obj.province if dim_obj else str(dim_id)
-                elif dimension == "company":
-                    dim_name = dim_obj.company_name if dim_obj else str(dim_id)
-                elif dimension == "warehouse":
-                    dim_name = dim_obj.warehouse_name if dim_obj else str(dim_id)
-                else:
-                    dim_name = str(dim_id)
-                
-                latest_val = sorted_values[0][1]
-                baseline_val = sorted_values[-1][1] if len(sorted_values) > 1 else None
-                
-                items.append({
-                    "dimension_id": dim_id,
-                    "dimension_name": dim_name,
-                    "latest_value": float(latest_val) if latest_val else None,
-                    "baseline_value": float(baseline_val) if baseline_val else None,
-                    "streak_days": streak_days,
-                    "streak_direction": direction,
-                    "rank": 0  # 稍后排序
-                })
-        
-        # 按streak_days降序排序
-        items.sort(key=lambda x: x["streak_days"], reverse=True)
-        items = items[:topk]
-        for idx, item in enumerate(items, 1):
-            item["rank"] = idx
-    
-    elif rank_by == "seasonal_percentile":
-        # 基于seasonality的历史分位（近5年同周/同日）
-        # 这需要调用seasonality_service的逻辑
-        # 简化实现：查询历史同期的数据，计算分位
-        from app.services.seasonality_service import query_seasonality
-        
-        # 获取当前日期在同年的周序号或月-日
-        from datetime import datetime
-        current_week = latest_date.isocalendar()[1]
-        current_month_day = f"{latest_date.month:02d}-{latest_date.day:02d}"
-        
-        # 查询近5年的同期数据
-        years = [latest_date.year - i for i in range(5)]
-        
-        try:
-            seasonality_result = query_seasonality(
-                db=db,
-                metric_id=metric_id,
-                years=years,
-                filters=filters,
-                x_mode="week_of_year",
-                agg="mean"
-            )
-            
-            # 从seasonality数据中提取当前周的数据
-            # 这里简化处理，实际需要更复杂的逻辑
-            items = []  # TODO: 实现seasonal_percentile的完整逻辑
-            
-        except Exception as e:
-            # 如果seasonality查询失败，返回空结果
-            items = []
-    
-    else:
-        raise ValueError(f"Unsupported rank_by: {rank_by}")
-    
-    return {
+    if dimension != "geo":
+        raise ValueError(f"仅支持按省份排名（dimension=geo），收到: {dimension}")
+    if rank_by not in RANK_BY_OPTIONS:
+        raise ValueError(f"不支持的排序方式: {rank_by}")
+    if metric_id not in rankable_metric_ids():
+        raise ValueError(f"指标 {metric_id} 不支持省份排名")
+    filters = filters or {}
+    window_days = max(int(window_days), 1)
+
+    result = {
         "metric_id": metric_id,
-        "metric_name": metric_name,
+        "metric_name": METRIC_CATALOG[metric_id - 1]["metric_name"],
         "dimension": dimension,
         "rank_by": rank_by,
         "window_days": window_days,
-        "items": items
+        "items": [],
     }
+
+    index = get_cross_section_index(engine, metric_id, filters.get("source"))
+    result["source"] = index.source
+    if not len(index.dates):
+        return result
+    end = np.datetime64(filters["end_date"], "D") if filters.get("end_date") else index.dates[-1]
+    latest_row = index.row_at_or_before(end)
+    if latest_row < 0:
+        return result
+    base_row = index.row_at_or_before(index.dates[latest_row] - np.timedelta64(window_days, "D"))
+
+    latest = index.values[latest_row]
+    baseline = index.values[base_row] if base_row >= 0 else np.full(len(index.regions), np.nan)
+    delta = latest - baseline
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(baseline != 0, delta / np.abs(baseline), np.nan)
+
+    streak = direction = None
+    if rank_by == "delta":
+        scores = delta
+    elif rank_by == "pct_change":
+        scores = pct
+    elif rank_by == "streak":
+        block = index.values[max(base_row, 0):latest_row + 1]
+        streak, direction = _streaks(block)
+        scores = np.where(streak > 0, streak.astype(float), np.nan)
+        scores[np.isnan(latest)] = np.nan
+    else:
+        scores = _seasonal_percentile(index, latest_row, window_days)
+
+    if filters.get("region_codes"):
+        allowed = np.isin(np.array(index.regions, dtype=object), list(filters["region_codes"]))
+        scores = np.where(allowed, scores, np.nan)
+
+    geo_dim = _geo_dimension(engine)
+    order = _top_k(scores, max(int(topk), 1), ascending=filters.get("order") == "asc")
+
+    def _num(v):
+        return None if np.isnan(v) else round(float(v), 4)
+
+    for rank, j in enumerate(order, 1):
+        code = index.regions[j]
+        item = {
+            "dimension_id": geo_dim.get(code, (None, code))[0],
+            "dimension_code": code,
+            "dimension_name": geo_dim.get(code, (None, code))[1],
+            "latest_value": _num(latest[j]),
+            "baseline_value": _num(baseline[j]),
+            "delta": _num(delta[j]),
+            "pct_change": _num(pct[j]),
+            "rank": rank,
+        }
+        if rank_by == "streak":
+            item["streak_days"] = int(streak[j])
+            item["streak_direction"] = "up" if direction[j] > 0 else "down"
+        if rank_by == "seasonal_percentile":
+            item["seasonal_percentile"] = _num(scores[j])
+        result["items"].append(item)
+    result["latest_date"] = str(index.dates[latest_row])
+    result["baseline_date"] = str(index.dates[base_row]) if base_row >= 0 else None
+    return result
@@ -0,0 +1,53 @@
+"""
+工作簿首行窥视：以 openpyxl 只读模式打开一次，只流式解析每个 sheet 的前若干行。
+
+模板识别（ingest_template_detector）与导入预览（ingest_preview_service）共用同一个实例，
+避免为了几行表头反复 pd.ExcelFile / pd.read_excel 整本解析。
+"""
+from io import BytesIO
+from typing import Optional
+
+# 每个 sheet 最多读取的行数（表头 + 预览样本）与列数（宽表按日期展开可达上万列）
+PEEK_MAX_ROWS = 11
+PEEK_MAX_COLS = 200
+
+
+class WorkbookPeek:
+    def __init__(self, file_content: bytes, max_rows: int = PEEK_MAX_ROWS, max_cols: int = PEEK_MAX_COLS):
+        from openpyxl import load_workbook
+
+        self.max_rows = max_rows
+        self.max_cols = max_cols
+        self._wb = load_workbook(BytesIO(file_content), read_only=True, data_only=True, keep_links=False)
+        self._heads: dict[str, list[tuple]] = {}
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return self._wb.sheetnames
+
+    def head(self, sheet_name: str, n: Optional[int] = None) -> list[tuple]:
+        """前 n 行单元格值（n 不超过 max_rows；首次访问时读取 max_rows 行并缓存），去掉全空的尾列"""
+        if sheet_name not in self._heads:
+            ws = self._wb[sheet_name]
+            rows = list(ws.iter_rows(max_row=self.max_rows, max_col=self.max_cols, values_only=True))
+            width = max(
+                (max((i + 1 for i, v in enumerate(r) if v is not None), default=0) for r in rows),
+                default=0,
+            )
+            self._heads[sheet_name] = [tuple(r[:width]) + (None,) * (width - len(r)) for r in rows]
+        rows = self._heads[sheet_name]
+        return rows if n is None else rows[:n]
+
+    def dimensions(self, sheet_name: str) -> tuple[Optional[int], Optional[int]]:
+        """sheet 声明的 (行数, 列数)，取自 dimension 标记，不扫描数据；缺失时为 None"""
+        ws = self._wb[sheet_name]
+        return ws.max_row, ws.max_column
+
+    def close(self) -> None:
+        self._wb.close()
+
+    def __enter__(self) -> "WorkbookPeek":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
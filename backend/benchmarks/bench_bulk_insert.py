@@ -0,0 +1,50 @@
+"""bulk_insert 写入吞吐（临时表加载 + upsert），需要 BENCH_DATABASE_URL"""
+import pytest
+from sqlalchemy import text
+
+from conftest import WORKBOOKS
+from import_tool.readers.r08_yongyi_daily import YongyiDailyReader
+from import_tool.readers.r09_yongyi_weekly import YongyiWeeklyReader
+
+# (reader, 表)：日度价格为最大的表，周度指标为第二大
+_CASES = [(YongyiDailyReader, "fact_price_daily"), (YongyiWeeklyReader, "fact_weekly_indicator")]
+_PATHS = {cls: path for cls, path in WORKBOOKS}
+
+
+@pytest.fixture(scope="module")
+def read_results():
+    """每个工作簿只解析一次"""
+    cache = {}
+
+    def get(reader_cls):
+        if reader_cls not in cache:
+            path = _PATHS.get(reader_cls)
+            if path is None:
+                pytest.skip(f"docs 下未找到 {reader_cls.FILE_PATTERN} 工作簿")
+            cache[reader_cls] = reader_cls(None, batch_id=0).read_file(str(path))
+        return cache[reader_cls]
+
+    return get
+
+
+@pytest.mark.parametrize(
+    "reader_cls,table",
+    [pytest.param(cls, table, id=table) for cls, table in _CASES],
+)
+def test_bulk_insert(benchmark, bench_engine, read_results, reader_cls, table):
+    records = read_results(reader_cls)[table]
+
+    def setup():
+        # 每轮从空表开始，测的是首次全量写入
+        with bench_engine.connect() as conn:
+            conn.execute(text(f"TRUNCATE TABLE `{table}`"))
+            conn.commit()
+
+    def insert():
+        return reader_cls(bench_engine, batch_id=0).bulk_insert(table, records)
+
+    written = benchmark.pedantic(insert, setup=setup, rounds=3, iterations=1)
+    benchmark.extra_info.update({
+        "rows": written,
+        "rows_per_sec": round(written / benchmark.stats.stats.mean) if benchmark.stats else None,
+    })
@@ -0,0 +1,50 @@
+"""图表接口延迟（导入预计算列表中的图表，绕过图表缓存），需要 BENCH_DATABASE_URL"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.quick_chart_config import QUICK_CHART_PRECOMPUTE_URLS
+
+
+@pytest.fixture(scope="module")
+def api_client(seeded_engine):
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    import main
+    from app.core.config import settings
+    from app.core.database import get_db
+    from app.core.security import get_current_user
+
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=seeded_engine)
+
+    def bench_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[get_db] = bench_db
+    main.app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, username="bench")
+    disable_cache = settings.DISABLE_CHART_CACHE
+    settings.DISABLE_CHART_CACHE = True  # 测真实计算耗时，不命中 quick_chart_cache
+    with TestClient(main.app) as client:
+        yield client
+    settings.DISABLE_CHART_CACHE = disable_cache
+    main.app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(
+    "item",
+    [pytest.param(item, id=item["path"] + "".join(f"[{v}]" for v in item["params"].values()))
+     for item in QUICK_CHART_PRECOMPUTE_URLS],
+)
+def test_chart_endpoint(benchmark, api_client, item):
+    def get():
+        resp = api_client.get(item["path"], params=item["params"])
+        assert resp.status_code == 200, resp.text[:300]
+        return resp
+
+    resp = benchmark.pedantic(get, rounds=5, iterations=1, warmup_rounds=1)
+    benchmark.extra_info["response_kb"] = round(len(resp.content) / 1024, 1)
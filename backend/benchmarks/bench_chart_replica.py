@@ -0,0 +1,49 @@
+"""最重的季节性/供需图表查询：MySQL 与 Parquet 只读副本（DuckDB）对比，需要 BENCH_DATABASE_URL 与 duckdb/pyarrow"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from app.api import price_display, supply_demand  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from import_tool.parquet_replica import export_replica  # noqa: E402
+
+USER = SimpleNamespace(id=1, username="bench")
+
+CASES = {
+    "national-price": lambda db: price_display.get_national_price_seasonality(
+        start_year=2015, end_year=None, db=db, current_user=USER),
+    "province-indicators": lambda db: price_display.get_province_indicators_seasonality(
+        province_name="广东", start_year=None, end_year=None, db=db, current_user=USER),
+    "industry-chain-ratio": lambda db: price_display.get_industry_chain_seasonality(
+        metric_name="4#冻肉/白条", start_year=2015, end_year=None, db=db, current_user=USER),
+    "supply-demand-curve": lambda db: supply_demand.get_supply_demand_curve(db=db),
+}
+
+
+@pytest.fixture(scope="module")
+def replica_root(seeded_engine, tmp_path_factory):
+    root = tmp_path_factory.mktemp("chart_replica")
+    export_replica(seeded_engine, root)
+    return root
+
+
+@pytest.fixture(scope="module")
+def bench_session(seeded_engine):
+    from sqlalchemy.orm import sessionmaker
+
+    db = sessionmaker(bind=seeded_engine)()
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize("backend", ["mysql", "parquet"])
+@pytest.mark.parametrize("case", list(CASES))
+def test_chart_query(benchmark, bench_session, replica_root, monkeypatch, case, backend):
+    monkeypatch.setattr(settings, "CHART_REPLICA_DIR", str(replica_root) if backend == "parquet" else None)
+    benchmark.group = case
+    resp = benchmark.pedantic(lambda: asyncio.run(CASES[case](bench_session)), rounds=10, iterations=1, warmup_rounds=1)
+    benchmark.extra_info["response_kb"] = round(len(resp.model_dump_json()) / 1024, 1)
@@ -0,0 +1,25 @@
+"""各 import_tool reader 的 read_file 耗时与内存峰值（docs/ 下的真实工作簿）"""
+import pytest
+
+from conftest import WORKBOOKS, measure_peak_memory
+
+
+@pytest.mark.parametrize(
+    "reader_cls,path",
+    [pytest.param(cls, path, id=cls.__name__) for cls, path in WORKBOOKS],
+)
+def test_read_file(benchmark, reader_cls, path):
+    if path is None:
+        pytest.skip(f"docs 下未找到 {reader_cls.FILE_PATTERN} 工作簿")
+
+    def read():
+        return reader_cls(None, batch_id=0).read_file(str(path))
+
+    results, peak_mb = measure_peak_memory(read)
+    benchmark.extra_info.update({
+        "workbook": path.name,
+        "size_mb": round(path.stat().st_size / 1024 / 1024, 2),
+        "peak_memory_mb": peak_mb,
+        "rows": {table: len(records) for table, records in results.items()},
+    })
+    benchmark.pedantic(read, rounds=3, iterations=1, warmup_rounds=0)
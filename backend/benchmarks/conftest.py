@@ -0,0 +1,83 @@
+"""
+性能基准公共 fixture。
+
+- 工作簿：默认在仓库 docs/ 下按 reader.FILE_PATTERN 查找（BENCH_DOCS_DIR 可覆盖），找不到的 reader 跳过
+- 数据库：BENCH_DATABASE_URL 指向本地 MySQL/MariaDB 的独立库（会建表并清空 fact 表），未设置时
+  写入吞吐与图表接口基准跳过
+"""
+import logging
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from import_tool.cli import FILE_READERS  # noqa: E402
+
+DOCS_DIR = Path(os.environ.get("BENCH_DOCS_DIR", BACKEND_DIR.parent / "docs"))
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL")
+
+# 基准期间关闭 import_stage 等 INFO 日志，避免 I/O 干扰计时
+logging.getLogger("import_tool").setLevel(logging.WARNING)
+
+
+def find_workbook(filename: str, reader_cls) -> Optional[Path]:
+    """docs 下与 reader 对应的工作簿：优先与 cli.FILE_READERS 同名，其次取文件名最短的匹配（排除「副本」）"""
+    if not DOCS_DIR.is_dir():
+        return None
+    matches = sorted(
+        (p for p in DOCS_DIR.rglob("*.xlsx")
+         if reader_cls.FILE_PATTERN in p.name and "副本" not in p.name and not p.name.startswith("~$")),
+        key=lambda p: (p.name != filename, len(p.name), str(p)),
+    )
+    return matches[0] if matches else None
+
+
+WORKBOOKS = [(cls, find_workbook(name, cls)) for name, cls in FILE_READERS]
+
+
+def measure_peak_memory(fn: Callable[[], object]) -> tuple[object, float]:
+    """执行一次 fn，返回 (结果, Python 堆峰值 MB)；单独执行，不计入耗时统计"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 1024 / 1024, 1)
+
+
+@pytest.fixture(scope="session")
+def bench_engine():
+    """基准专用数据库（建表 + 维度表）；未配置 BENCH_DATABASE_URL 时跳过"""
+    if not BENCH_DATABASE_URL:
+        pytest.skip("未设置 BENCH_DATABASE_URL")
+    from sqlalchemy import create_engine
+
+    from import_tool.db import init_db, populate_dim_region
+
+    engine = create_engine(BENCH_DATABASE_URL, pool_pre_ping=True)
+    init_db(engine)
+    populate_dim_region(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def seeded_engine(bench_engine):
+    """清空 fact 表后导入 docs 下找到的全部工作簿（与 cli bulk 相同的 read_file → insert_all 路径）"""
+    from import_tool.db import truncate_fact_tables
+
+    truncate_fact_tables(bench_engine)
+    for reader_cls, path in WORKBOOKS:
+        if path is None:
+            continue
+        reader = reader_cls(bench_engine, batch_id=0)
+        reader.insert_all(reader.read_file(str(path)), mode="bulk")
+    return bench_engine
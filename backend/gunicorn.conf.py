@@ -0,0 +1,30 @@
+"""
+gunicorn 配置（多进程部署入口）：gunicorn -c gunicorn.conf.py
+监听地址、worker 数与超时来自 Settings（.env 中 WEB_BIND / WEB_WORKERS / WEB_TIMEOUT 等）。
+"""
+from app.core.config import settings
+
+wsgi_app = "main:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = settings.WEB_BIND
+workers = settings.WEB_WORKERS
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+keepalive = settings.WEB_KEEPALIVE
+# master 进程导入 main:app 并预加载共享状态，fork 后各 worker 写时复制共享
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    """master 已导入应用、尚未 fork worker 时调用"""
+    from app.core.preload import preload_shared_state
+
+    preload_shared_state()
+
+
+def post_fork(server, worker):
+    """fork 后丢弃继承自 master 的连接池（不关闭父进程的连接）"""
+    from app.core.database import engine
+
+    engine.dispose(close=False)
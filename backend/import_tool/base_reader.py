@@ -1,55 +1,172 @@
 """BaseSheetReader - 所有 Excel reader 的基类"""
 import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
 import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from import_tool.data_quality import QUALITY_TABLES, refresh_quality_findings
+from import_tool.parquet_replica import export_replica, replica_dir, replica_enabled, touched_replica_scope
+from import_tool.replace_scope import (
+    ReplaceScope, merge_replace_scope, refresh_replaced_derived, replaced_stats_scope, scope_where_sql,
+)
+from import_tool.rollups import refresh_rollups, touched_rollup_scope
+from import_tool.series_registry import refresh_series, touched_series_scope
+from import_tool.table_stats import refresh_table_stats_on, touched_scope, touched_stats_range
+from import_tool.warehouse_receipts import refresh_warehouse_receipts, touched_receipt_range
+
 logger = logging.getLogger(__name__)
 
 # 不参与 upsert UPDATE 的系统列
 _SKIP_UPDATE_COLS = frozenset({"id", "created_at"})
 
+# NOT NULL 且参与唯一键的列：记录缺失时写入默认值（避免显式 NULL 违反约束）
+_NOT_NULL_DEFAULTS = {"sub_category": ""}
+
+
+@dataclass
+class ImportStage:
+    """导入过程中的一个计时阶段：sheet 解析（kind=sheet）、单表写入（kind=write）或派生数据维护（kind=derived）"""
+    kind: str
+    name: str
+    table_name: Optional[str] = None
+    row_count: int = 0
+    duration_ms: int = 0
+    load_ms: Optional[int] = None      # 写入阶段：加载临时表耗时
+    upsert_ms: Optional[int] = None    # 写入阶段：临时表 → 目标表 upsert 耗时
+    status: str = "success"
+    error_msg: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
 
 class BaseSheetReader:
     """
     每个子类对应一个 Excel 数据源文件。
     核心方法：
       read_file(filepath) -> {table_name: [record_dict, ...]}
+
+    分段计时：子类在解析每个 sheet 时使用 track_sheet()，写入阶段由 bulk_insert /
+    incremental_insert 自动记录；结果保存在 self.stages，insert_all 结束时写入
+    import_batch_stage 表。on_stage 回调在每个阶段结束时调用（用于推送导入进度）。
+
+    覆盖写入：子类在 read_file 中向 self.replace_scope 登记需要整体替换的范围（如钢联毛白价差），
+    调用方也可通过 insert_all(replace_scope=...) 传入模板级覆盖范围；两者合并后由 _swap_scope
+    在一个事务内完成「删除范围内旧行 + 写入新数据」。
     """
 
     FILE_PATTERN = ""  # 子类覆盖：文件名匹配关键字
 
-    def __init__(self, engine: Engine, batch_id: int):
+    def __init__(self, engine: Engine, batch_id: int, on_stage: Optional[Callable[[ImportStage], None]] = None):
         self.engine = engine
         self.batch_id = batch_id
-        self._uk_cache: dict[str, set[str]] = {}
+        self.on_stage = on_stage
+        self.stages: list[ImportStage] = []
+        self._saved_stages = 0
+        self._uk_cache: dict[str, dict[str, list[str]]] = {}
+        self.replace_scope: ReplaceScope = {}
+        # 最近一次 insert_all 中各覆盖表删除的旧行数
+        self.replaced_rows: dict[str, int] = {}
 
     def read_file(self, filepath: str) -> dict[str, list[dict]]:
         """读取 Excel 文件，返回 {table_name: [records]}"""
         raise NotImplementedError
 
+    # ------ 分段计时 ------
+
+    def _record_stage(self, stage: ImportStage) -> None:
+        self.stages.append(stage)
+        logger.info(
+            "import_stage batch_id=%s kind=%s name=%s table=%s rows=%d elapsed_ms=%d load_ms=%s upsert_ms=%s status=%s",
+            self.batch_id, stage.kind, stage.name, stage.table_name or "-", stage.row_count,
+            stage.duration_ms, stage.load_ms, stage.upsert_ms, stage.status,
+        )
+        if self.on_stage is not None:
+            try:
+                self.on_stage(stage)
+            except Exception:
+                logger.exception("on_stage 回调异常")
+
+    @contextmanager
+    def track_sheet(self, sheet_name: str, *record_lists: list):
+        """
+        记录一个 sheet 的解析耗时与产出行数。
+        record_lists 为该 sheet 追加记录的目标列表，产出行数 = 退出时与进入时的长度差。
+        sheet 内抛出的异常会记为 failed 后继续向上抛出。
+        """
+        before = sum(len(r) for r in record_lists)
+        stage = ImportStage(kind="sheet", name=sheet_name)
+        t0 = time.perf_counter()
+        try:
+            yield stage
+        except Exception as e:
+            stage.status = "failed"
+            stage.error_msg = str(e)[:500]
+            raise
+        finally:
+            stage.duration_ms = int((time.perf_counter() - t0) * 1000)
+            stage.row_count = sum(len(r) for r in record_lists) - before
+            self._record_stage(stage)
+
+    def save_stages(self) -> None:
+        """将尚未保存的 self.stages 写入 import_batch_stage（可重复调用；失败只记日志，不影响导入结果）"""
+        pending = self.stages[self._saved_stages:]
+        if not pending or not self.batch_id:
+            return
+        rows = [
+            {**s.to_dict(), "batch_id": self.batch_id, "seq": i}
+            for i, s in enumerate(pending, start=self._saved_stages)
+        ]
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(
+                    "INSERT INTO import_batch_stage "
+                    "(batch_id, seq, kind, name, table_name, row_count, duration_ms, load_ms, upsert_ms, status, error_msg) "
+                    "VALUES (:batch_id, :seq, :kind, :name, :table_name, :row_count, :duration_ms, :load_ms, "
+                    ":upsert_ms, :status, :error_msg)"
+                ), rows)
+                conn.commit()
+            self._saved_stages = len(self.stages)
+        except Exception as e:
+            logger.warning("写入 import_batch_stage 失败 batch_id=%s: %s", self.batch_id, e)
+
     # ------ 唯一键检测 ------
 
-    def _get_unique_key_columns(self, table_name: str) -> set[str]:
-        """查询目标表的唯一键列（含主键），用于构建 ON DUPLICATE KEY UPDATE"""
+    def _get_unique_indexes(self, table_name: str) -> dict[str, list[str]]:
+        """查询目标表的唯一索引 {index_name: [columns]}（含 PRIMARY），结果按表缓存"""
         if table_name in self._uk_cache:
             return self._uk_cache[table_name]
-        uk_cols: set[str] = set()
+        indexes: dict[str, list[str]] = {}
         with self.engine.connect() as conn:
             rows = conn.execute(text(
-                "SELECT COLUMN_NAME FROM information_schema.STATISTICS "
-                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tbl AND NON_UNIQUE = 0"
+                "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tbl AND NON_UNIQUE = 0 "
+                "ORDER BY INDEX_NAME, SEQ_IN_INDEX"
             ), {"tbl": table_name}).fetchall()
             for r in rows:
-                uk_cols.add(r[0])
-        self._uk_cache[table_name] = uk_cols
-        return uk_cols
+                indexes.setdefault(r[0], []).append(r[1])
+        self._uk_cache[table_name] = indexes
+        return indexes
+
+    def _get_unique_key_columns(self, table_name: str) -> set[str]:
+        """查询目标表的唯一键列（含主键），用于构建 ON DUPLICATE KEY UPDATE"""
+        return {c for cols in self._get_unique_indexes(table_name).values() for c in cols}
+
+    def _swap_key_columns(self, table_name: str) -> list[str]:
+        """覆盖写入时判断「旧行是否仍在新数据中」所用的业务唯一键（按索引名取第一个二级唯一索引）"""
+        secondary = sorted(name for name in self._get_unique_indexes(table_name) if name != "PRIMARY")
+        return self._get_unique_indexes(table_name)[secondary[0]] if secondary else []
 
-    def _build_upsert_sql(self, table_name: str, columns: list[str]) -> str:
+    def _build_upsert_sql(self, table_name: str, columns: list[str], tmp_table: str) -> str:
         """构建 INSERT ... ON DUPLICATE KEY UPDATE 语句"""
         uk_cols = self._get_unique_key_columns(table_name)
         cols_sql = ", ".join(f"`{c}`" for c in columns)
-        select_sql = f"SELECT {cols_sql} FROM `_tmp_{table_name}`"
+        select_sql = f"SELECT {cols_sql} FROM `{tmp_table}` ORDER BY `id`"
         insert_sql = f"INSERT INTO `{table_name}` ({cols_sql}) {select_sql}"
 
         # 需要更新的列：不在唯一键中、不在系统列中的所有列
@@ -65,22 +182,164 @@ class BaseSheetReader:
 
     # ------ 数据写入 ------
 
+    def _create_staging_table(self, conn, table_name: str, lookup_index: bool = False) -> str:
+        """
+        在当前连接上创建会话级临时表（CREATE TEMPORARY TABLE ... LIKE 目标表），返回表名。
+        临时表只对本连接可见，并发导入同一张目标表时互不覆盖；CREATE/DROP TEMPORARY TABLE
+        不会触发隐式提交。去掉临时表上的二级唯一索引，使同一批次内的重复键像旧实现一样
+        交给 upsert 处理（后出现的行覆盖先出现的行）。
+        lookup_index=True 时在业务唯一键上补一个普通索引，供覆盖写入的 NOT EXISTS 反连接使用。
+        """
+        tmp_table = f"_tmp_{table_name}"
+        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{tmp_table}`"))
+        conn.execute(text(f"CREATE TEMPORARY TABLE `{tmp_table}` LIKE `{table_name}`"))
+        secondary = [name for name in self._get_unique_indexes(table_name) if name != "PRIMARY"]
+        if secondary:
+            # 临时表上的 ALTER 发生在本事务任何写入之前，隐式提交不影响原子性
+            alters = [f"DROP INDEX `{name}`" for name in secondary]
+            if lookup_index:
+                cols = ", ".join(f"`{c}`" for c in self._swap_key_columns(table_name))
+                alters.append(f"ADD INDEX `_swap_lookup` ({cols})")
+            conn.execute(text(f"ALTER TABLE `{tmp_table}` {', '.join(alters)}"))
+        return tmp_table
+
+    @staticmethod
+    def _fill_not_null_defaults(df: pd.DataFrame) -> pd.DataFrame:
+        for col, default in _NOT_NULL_DEFAULTS.items():
+            if col in df.columns:
+                df[col] = df[col].fillna(default)
+        return df
+
+    @staticmethod
+    def _df_to_params(df: pd.DataFrame) -> list[dict]:
+        """DataFrame → executemany 参数（NaN/NaT → None）"""
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+
+    def _load_staging(self, conn, tmp_table: str, df: pd.DataFrame, chunksize: int = 2000) -> None:
+        """按块 executemany 写入临时表"""
+        cols_sql = ", ".join(f"`{c}`" for c in df.columns)
+        values_sql = ", ".join(f":{c}" for c in df.columns)
+        insert_tmp = text(f"INSERT INTO `{tmp_table}` ({cols_sql}) VALUES ({values_sql})")
+        params = self._df_to_params(df)
+        for i in range(0, len(params), chunksize):
+            conn.execute(insert_tmp, params[i:i + chunksize])
+
+    def _load_and_upsert(
+        self, table_name: str, df: pd.DataFrame, records: list[dict], chunksize: int = 2000,
+    ) -> None:
+        """
+        单连接单事务：临时表加载 + upsert + 按 records 同步 fact_table_stats 目录 + 提交。
+        加载与 upsert 分别计时（upsert_ms 含目录重算），记录为一个 write 阶段。
+        """
+        stage = ImportStage(kind="write", name=table_name, table_name=table_name, row_count=len(df))
+        columns = list(df.columns)
+        t0 = time.perf_counter()
+        with self.engine.connect() as conn:
+            tmp_table = None
+            try:
+                tmp_table = self._create_staging_table(conn, table_name)
+                self._load_staging(conn, tmp_table, df, chunksize)
+                t1 = time.perf_counter()
+                stage.load_ms = int((t1 - t0) * 1000)
+                conn.execute(text(self._build_upsert_sql(table_name, columns, tmp_table)))
+                conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{tmp_table}`"))
+                tmp_table = None
+                results = {table_name: records}
+                refresh_table_stats_on(conn, touched_scope(results), self.batch_id, touched_stats_range(results))
+                conn.commit()
+                stage.upsert_ms = int((time.perf_counter() - t1) * 1000)
+            except Exception as e:
+                conn.rollback()
+                stage.status = "failed"
+                stage.error_msg = str(e)[:500]
+                raise
+            finally:
+                if tmp_table:
+                    # 连接会回到连接池，必须清掉临时表，避免下次复用该连接时残留
+                    try:
+                        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{tmp_table}`"))
+                    except Exception:
+                        logger.warning("清理临时表失败: %s", tmp_table)
+                stage.duration_ms = int((time.perf_counter() - t0) * 1000)
+                self._record_stage(stage)
+
+    def _swap_scope(self, frames: dict[str, pd.DataFrame], scope: ReplaceScope, chunksize: int = 2000) -> dict[str, int]:
+        """
+        覆盖写入：单连接单事务完成 scope 中所有表的替换，只提交一次。
+          1. 为有新数据的表建临时表（CREATE TEMPORARY 与临时表 ALTER 都在任何写入之前）并加载
+          2. 每张表一条 DELETE：删除范围内、且按业务唯一键在临时表中已不存在的旧行（NOT EXISTS 反连接；
+             仍存在的行留给 upsert 原地更新），没有新数据的表删除整个范围
+          3. 临时表 → 目标表 upsert
+          4. 按整个覆盖范围重算 fact_table_stats 目录
+        提交前其它连接看到的始终是旧数据；任一步失败整体回滚，旧数据不受影响。
+        返回 {表: 删除的旧行数}；每张表记录一个 write 阶段（upsert_ms 含删除）。
+        """
+        stages = {
+            table: ImportStage(
+                kind="write", name=table, table_name=table,
+                row_count=len(frames[table]) if table in frames else 0,
+            )
+            for table in scope
+        }
+        deleted: dict[str, int] = {}
+        tmp_tables: dict[str, str] = {}
+        with self.engine.connect() as conn:
+            try:
+                for table in frames:
+                    tmp_tables[table] = self._create_staging_table(conn, table, lookup_index=True)
+                for table, df in frames.items():
+                    t0 = time.perf_counter()
+                    self._load_staging(conn, tmp_tables[table], df, chunksize)
+                    stages[table].load_ms = int((time.perf_counter() - t0) * 1000)
+                for table, rules in scope.items():
+                    t0 = time.perf_counter()
+                    where_sql, params = scope_where_sql(table, rules)
+                    tmp_table = tmp_tables.get(table)
+                    key_cols = self._swap_key_columns(table) if tmp_table else []
+                    if key_cols:
+                        match = " AND ".join(f"s.`{c}` <=> `{table}`.`{c}`" for c in key_cols)
+                        where_sql = f"({where_sql}) AND NOT EXISTS (SELECT 1 FROM `{tmp_table}` s WHERE {match})"
+                    res = conn.execute(text(f"DELETE FROM `{table}` WHERE {where_sql}"), params)
+                    deleted[table] = res.rowcount or 0
+                    if tmp_table:
+                        conn.execute(text(self._build_upsert_sql(table, list(frames[table].columns), tmp_table)))
+                    stages[table].upsert_ms = int((time.perf_counter() - t0) * 1000)
+                for tmp_table in tmp_tables.values():
+                    conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{tmp_table}`"))
+                tmp_tables = {}
+                refresh_table_stats_on(conn, replaced_stats_scope(scope), self.batch_id)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                for stage in stages.values():
+                    stage.status = "failed"
+                    stage.error_msg = str(e)[:500]
+                raise
+            finally:
+                for tmp_table in tmp_tables.values():
+                    try:
+                        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{tmp_table}`"))
+                    except Exception:
+                        logger.warning("清理临时表失败: %s", tmp_table)
+                for stage in stages.values():
+                    stage.duration_ms = (stage.load_ms or 0) + (stage.upsert_ms or 0)
+                    self._record_stage(stage)
+        logger.info("replace scope swapped batch_id=%s deleted=%s", self.batch_id, deleted)
+        return deleted
+
+    def _prepare_frame(self, records: list[dict]) -> pd.DataFrame:
+        df = self._fill_not_null_defaults(pd.DataFrame(records))
+        # 去重：按非 batch_id 列去重
+        dedup_cols = [c for c in df.columns if c not in ("batch_id", "id")]
+        return df.drop_duplicates(subset=dedup_cols, keep="last")
+
     def bulk_insert(self, table_name: str, records: list[dict]) -> int:
         """批量 upsert（INSERT ... ON DUPLICATE KEY UPDATE），自动处理重复键"""
         if not records:
             return 0
-        df = pd.DataFrame(records)
-        # 去重：按非 batch_id 列去重
-        dedup_cols = [c for c in df.columns if c not in ("batch_id", "id")]
-        df = df.drop_duplicates(subset=dedup_cols, keep="last")
-        # 通过临时表 + upsert 处理跨文件重复
-        tmp_table = f"_tmp_{table_name}"
-        df.to_sql(tmp_table, self.engine, if_exists="replace", index=False, method="multi", chunksize=2000)
-        upsert_sql = self._build_upsert_sql(table_name, list(df.columns))
-        with self.engine.connect() as conn:
-            conn.execute(text(upsert_sql))
-            conn.execute(text(f"DROP TABLE IF EXISTS `{tmp_table}`"))
-            conn.commit()
+        df = self._prepare_frame(records)
+        # 通过会话级临时表 + upsert 处理跨文件重复
+        self._load_and_upsert(table_name, df, records)
         return len(df)
 
     def incremental_insert(self, table_name: str, records: list[dict], date_column: str) -> int:
@@ -100,31 +359,97 @@ class BaseSheetReader:
         if not new_records:
             return 0
 
-        df = pd.DataFrame(new_records)
-        tmp_table = f"_tmp_{table_name}"
-        df.to_sql(tmp_table, self.engine, if_exists="replace", index=False, method="multi", chunksize=2000)
-        upsert_sql = self._build_upsert_sql(table_name, list(df.columns))
-        with self.engine.connect() as conn:
-            conn.execute(text(upsert_sql))
-            conn.execute(text(f"DROP TABLE IF EXISTS `{tmp_table}`"))
-            conn.commit()
+        df = self._fill_not_null_defaults(pd.DataFrame(new_records))
+        self._load_and_upsert(table_name, df, new_records)
 
         return len(new_records)
 
-    def insert_all(self, results: dict[str, list[dict]], mode: str = "bulk") -> dict[str, int]:
-        """将 read_file 的结果写入数据库"""
+    def insert_all(
+        self,
+        results: dict[str, list[dict]],
+        mode: str = "bulk",
+        replace_scope: Optional[ReplaceScope] = None,
+    ) -> dict[str, int]:
+        """
+        将 read_file 的结果写入数据库（fact_table_stats 目录随各表写入事务一起更新），结束时保存分段计时。
+        replace_scope 与 self.replace_scope 合并后非空时，这些表按覆盖写入（_swap_scope，
+        忽略 incremental：覆盖需要完整数据），各表删除的旧行数记在 self.replaced_rows。
+        """
         counts = {}
-        for table_name, records in results.items():
-            if not records:
-                counts[table_name] = 0
-                continue
-            if mode == "bulk":
-                counts[table_name] = self.bulk_insert(table_name, records)
-            else:
-                date_col = self._guess_date_column(table_name)
-                counts[table_name] = self.incremental_insert(table_name, records, date_col)
+        scope = merge_replace_scope(dict(self.replace_scope), replace_scope or {})
+        self.replaced_rows = {}
+        try:
+            if scope:
+                frames = {t: self._prepare_frame(results[t]) for t in scope if results.get(t)}
+                self.replaced_rows = self._swap_scope(frames, scope)
+                counts.update({t: len(df) for t, df in frames.items()})
+                self._run_derived_step(
+                    "replace_scope", len(scope), lambda: refresh_replaced_derived(self.engine, scope),
+                )
+            for table_name, records in results.items():
+                if table_name in scope:
+                    counts.setdefault(table_name, 0)
+                    continue
+                if not records:
+                    counts[table_name] = 0
+                    continue
+                if mode == "bulk":
+                    counts[table_name] = self.bulk_insert(table_name, records)
+                else:
+                    date_col = self._guess_date_column(table_name)
+                    counts[table_name] = self.incremental_insert(table_name, records, date_col)
+            self.refresh_derived(results)
+        finally:
+            self.save_stages()
         return counts
 
+    def refresh_derived(self, results: dict[str, list[dict]]) -> None:
+        """重算本次写入涉及的派生数据：日度表周/月汇总、规范序列、仓单物化、数据质量扫描、图表只读副本"""
+        scope = touched_scope(results)
+        for table, (date_range, sources) in touched_rollup_scope(results).items():
+            self._run_derived_step(
+                f"rollup:{table}", 0,
+                lambda t=table, r=date_range, s=sources: sum(refresh_rollups(self.engine, t, r, s).values()),
+            )
+        series_scope = touched_series_scope(results)
+        if series_scope:
+            codes, date_range = series_scope
+            self._run_derived_step(
+                "series", 0, lambda: sum(refresh_series(self.engine, codes, date_range).values()),
+            )
+        receipt_range = touched_receipt_range(results)
+        if receipt_range:
+            self._run_derived_step(
+                "warehouse_receipts", 0, lambda: refresh_warehouse_receipts(self.engine, receipt_range),
+            )
+        quality_scope = {t: s for t, s in scope.items() if t in QUALITY_TABLES}
+        if quality_scope:
+            self._run_derived_step(
+                "data_quality", len(quality_scope),
+                lambda: refresh_quality_findings(self.engine, quality_scope, self.batch_id),
+            )
+        replica_scope = touched_replica_scope(results) if replica_enabled() else {}
+        if replica_scope:
+            self._run_derived_step(
+                "parquet_replica", 0,
+                lambda: sum(export_replica(self.engine, replica_dir(), replica_scope).values()),
+            )
+
+    def _run_derived_step(self, name: str, row_count: int, fn: Callable[[], Optional[int]]) -> None:
+        """执行一个派生数据维护步骤并记录为 derived 阶段；失败只记日志，不影响导入结果"""
+        stage = ImportStage(kind="derived", name=name, row_count=row_count)
+        t0 = time.perf_counter()
+        try:
+            written = fn()
+            if isinstance(written, int):
+                stage.row_count = written
+        except Exception as e:
+            stage.status = "failed"
+            stage.error_msg = str(e)[:500]
+            logger.warning("派生数据维护失败 batch_id=%s step=%s: %s", self.batch_id, name, e)
+        stage.duration_ms = int((time.perf_counter() - t0) * 1000)
+        self._record_stage(stage)
+
     @staticmethod
     def _guess_date_column(table_name: str) -> str:
         if "weekly" in table_name:
@@ -31,6 +31,12 @@ from import_tool.readers.r06_futures_premium import FuturesPremiumReader
 from import_tool.readers.r07_futures_basis import FuturesBasisReader
 from import_tool.readers.r08_yongyi_daily import YongyiDailyReader
 from import_tool.readers.r09_yongyi_weekly import YongyiWeeklyReader
+from import_tool.data_quality import refresh_quality_findings
+from import_tool.parquet_replica import HAS_PYARROW, export_replica, replica_dir
+from import_tool.rollups import ROLLUP_SPECS, refresh_rollups
+from import_tool.series_registry import refresh_series
+from import_tool.table_stats import refresh_table_stats
+from import_tool.warehouse_receipts import refresh_warehouse_receipts
 
 # ── 文件 → Reader 映射 ──
 # 顺序决定导入优先级
@@ -117,6 +123,14 @@ def update_batch(engine, batch_id: int, status: str, row_count: int = 0, duratio
         conn.commit()
 
 
+def print_slowest_stages(reader, top: int = 3):
+    """打印耗时最长的几个阶段（sheet 解析 / 单表写入），便于定位慢 sheet"""
+    stages = sorted(reader.stages, key=lambda s: s.duration_ms, reverse=True)[:top]
+    for s in stages:
+        detail = f", 加载 {s.load_ms}ms / upsert {s.upsert_ms}ms" if s.kind == "write" else ""
+        print(f"    ⏱ [{s.kind}] {s.name}: {s.duration_ms}ms ({s.row_count} 行{detail})")
+
+
 def run_bulk(engine, source_dir: str, file_filter: list[str] | None = None):
     """全量导入：TRUNCATE + INSERT"""
     print("=" * 60)
@@ -146,6 +160,7 @@ def run_bulk(engine, source_dir: str, file_filter: list[str] | None = None):
         batch_id = create_batch(engine, filename, "bulk")
         t1 = time.time()
 
+        reader = None
         try:
             reader = ReaderClass(engine, batch_id)
             results = reader.read_file(filepath)
@@ -158,12 +173,15 @@ def run_bulk(engine, source_dir: str, file_filter: list[str] | None = None):
             for table, n in counts.items():
                 if n > 0:
                     print(f"    {table}: {n} 行")
+            print_slowest_stages(reader)
 
             update_batch(engine, batch_id, "success", file_total, duration)
             print(f"  ✓ 完成 ({file_total} 行, {duration}ms)")
 
         except Exception as e:
             duration = int((time.time() - t1) * 1000)
+            if reader is not None:
+                reader.save_stages()
             update_batch(engine, batch_id, "failed", 0, duration, str(e))
             print(f"  ✗ 失败: {e}")
             import traceback
@@ -200,6 +218,7 @@ def run_incremental(engine, source_dir: str, file_filter: list[str] | None = Non
         batch_id = create_batch(engine, filename, "incremental")
         t1 = time.time()
 
+        reader = None
         try:
             reader = ReaderClass(engine, batch_id)
             results = reader.read_file(filepath)
@@ -212,12 +231,15 @@ def run_incremental(engine, source_dir: str, file_filter: list[str] | None = Non
             for table, n in counts.items():
                 if n > 0:
                     print(f"    {table}: {n} 行 (新增)")
+            print_slowest_stages(reader)
 
             update_batch(engine, batch_id, "success", file_total, duration)
             print(f"  ✓ 完成 ({file_total} 行新增, {duration}ms)")
 
         except Exception as e:
             duration = int((time.time() - t1) * 1000)
+            if reader is not None:
+                reader.save_stages()
             update_batch(engine, batch_id, "failed", 0, duration, str(e))
             print(f"  ✗ 失败: {e}")
             import traceback
@@ -233,8 +255,8 @@ def main():
     parser = argparse.ArgumentParser(description="HogPrice 统一数据导入工具")
     parser.add_argument(
         "command",
-        choices=["init-db", "bulk", "incremental"],
-        help="init-db: 初始化数据库 | bulk: 全量导入 | incremental: 增量导入",
+        choices=["init-db", "bulk", "incremental", "refresh-stats", "export-replica"],
+        help="init-db: 初始化数据库 | bulk: 全量导入 | incremental: 增量导入 | refresh-stats: 全量重算 fact_table_stats、周/月汇总、规范序列、仓单物化与数据质量扫描 | export-replica: 全量导出图表只读副本（Parquet）",
     )
     parser.add_argument(
         "--source-dir",
@@ -264,6 +286,25 @@ def main():
         print("✓ 已初始化管理员用户和角色")
         return
 
+    if args.command == "refresh-stats":
+        n = refresh_table_stats(engine)
+        print(f"✓ 已重算 fact_table_stats（{n} 行）")
+        for table in ROLLUP_SPECS:
+            written = refresh_rollups(engine, table)
+            print(f"✓ 已重算 {table} 周/月汇总: {written}")
+        print(f"✓ 已物化规范序列: {refresh_series(engine)}")
+        print(f"✓ 已物化注册仓单（{refresh_warehouse_receipts(engine)} 行）")
+        print(f"✓ 已重扫数据质量（{refresh_quality_findings(engine)} 条）")
+        return
+
+    if args.command == "export-replica":
+        root = replica_dir()
+        if root is None or not HAS_PYARROW:
+            print("✗ 需要配置 CHART_REPLICA_DIR 并安装 pyarrow")
+            sys.exit(1)
+        print(f"✓ 已导出图表只读副本 {root}: {export_replica(engine, root)}")
+        return
+
     if args.command == "bulk":
         run_bulk(engine, args.source_dir, args.files)
     elif args.command == "incremental":
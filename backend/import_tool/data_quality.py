@@ -0,0 +1,206 @@
+"""数据质量扫描（异常值 + 缺失区间）
+
+对每张 fact 表按 (类型, region_code, source, 日期) 排序流式读取一次，逐序列在 NumPy 中计算：
+  - anomaly：相邻观测变动的滚动 z-score（基线为此前 window 个变动，不含当前点），
+    |z| >= Z_THRESHOLD 记为一条；用变动而非水平值，趋势行情不会被整段误判
+  - gap：相邻观测之间缺失的期数（日度按工作日、周度按 7 天、月度按自然月），
+    缺失期数 >= GAP_MIN 记为一段
+结果写入 data_quality_findings（每次导入后按 (表, source) 替换），
+/reconciliation/anomalies 与 /reconciliation/missing 只分页读取该表。
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 表名 → (日期列, type_code 表达式, 值列, 频率, 额外过滤条件)
+QUALITY_TABLES: dict[str, tuple[str, str, str, str, str]] = {
+    "fact_price_daily": ("trade_date", "price_type", "value", "D", ""),
+    "fact_spread_daily": ("trade_date", "spread_type", "value", "D", ""),
+    "fact_slaughter_daily": ("trade_date", "''", "volume", "D", ""),
+    "fact_weekly_indicator": ("week_end", "indicator_code", "value", "W", ""),
+    "fact_monthly_indicator": (
+        "month_date", "CONCAT_WS(':', indicator_code, NULLIF(sub_category, ''))", "value", "M",
+        "value_type = 'abs'",
+    ),
+}
+
+Z_THRESHOLD = 3.0
+# 频率 → (滚动窗口, 最少样本数)
+WINDOW = {"D": (60, 20), "W": (26, 12), "M": (24, 12)}
+# 频率 → 记为缺失区间的最少缺失期数（日度容忍 1~2 个工作日的节假日缺口）
+GAP_MIN = {"D": 3, "W": 1, "M": 1}
+
+_FETCH_SIZE = 5000
+
+
+def rolling_zscores(values: np.ndarray, window: int, min_periods: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    变动序列的滚动 z-score：第 i 个变动与其前 window 个变动的均值/标准差比较。
+
+    Returns:
+        (z, mean, std)，长度与 values 相同；首点与样本不足处为 NaN
+    """
+    import numpy as np
+
+    n = len(values)
+    z = np.full(n, np.nan)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < min_periods + 2:
+        return z, mean, std
+    chg = np.diff(values)
+    center = chg.mean()
+    chg = chg - center  # 居中后再累加，减小平方和的数值误差
+    c1 = np.concatenate(([0.0], np.cumsum(chg)))
+    c2 = np.concatenate(([0.0], np.cumsum(chg * chg)))
+    idx = np.arange(len(chg))
+    lo = np.maximum(idx - window, 0)
+    cnt = idx - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = (c1[idx] - c1[lo]) / cnt
+        var = (c2[idx] - c2[lo]) / cnt - m * m
+        s = np.sqrt(np.clip(var, 0.0, None))
+        zz = (chg - m) / s
+    ok = (cnt >= min_periods) & (s > 1e-9)
+    z[1:] = np.where(ok, zz, np.nan)
+    mean[1:] = np.where(ok, m + center, np.nan)
+    std[1:] = np.where(ok, s, np.nan)
+    return z, mean, std
+
+
+def missing_periods(dates: np.ndarray, freq: str) -> np.ndarray:
+    """相邻观测之间缺失的期数（长度 len(dates) - 1）；dates 为升序 datetime64[D]"""
+    import numpy as np
+
+    if len(dates) < 2:
+        return np.array([], dtype=np.int64)
+    if freq == "D":
+        return np.busday_count(dates[:-1] + 1, dates[1:]).astype(np.int64)
+    if freq == "W":
+        return np.maximum(np.rint((dates[1:] - dates[:-1]).astype(np.int64) / 7).astype(np.int64) - 1, 0)
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    return np.maximum(np.diff(months) - 1, 0)
+
+
+def scan_series(dates: list[date], values: list[float], freq: str) -> list[dict]:
+    """单条序列 → findings（不含表/维度字段）"""
+    import numpy as np
+
+    d = np.array(dates, dtype="datetime64[D]")
+    v = np.asarray(values, dtype=float)
+    findings: list[dict] = []
+
+    window, min_periods = WINDOW[freq]
+    z, mean, std = rolling_zscores(v, window, min_periods)
+    for i in np.flatnonzero(np.abs(np.nan_to_num(z)) >= Z_THRESHOLD):
+        findings.append({
+            "finding_type": "anomaly", "start_date": d[i].item(), "end_date": d[i].item(),
+            "value": float(v[i]), "change_value": float(v[i] - v[i - 1]),
+            "mean": float(mean[i]), "std": float(std[i]), "zscore": float(z[i]),
+            "missing_periods": None,
+        })
+
+    gaps = missing_periods(d, freq)
+    for i in np.flatnonzero(gaps >= GAP_MIN[freq]):
+        findings.append({
+            "finding_type": "gap",
+            "start_date": (d[i] + 1).item(), "end_date": (d[i + 1] - 1).item(),
+            "value": None, "change_value": None, "mean": None, "std": None, "zscore": None,
+            "missing_periods": int(gaps[i]),
+        })
+    return findings
+
+
+def scan_table(conn, table: str, sources: Optional[list[str]] = None) -> list[dict]:
+    """流式扫描一张表（可限定 source），返回全部 findings"""
+    date_col, type_expr, val_col, freq, extra_where = QUALITY_TABLES[table]
+    where = [f"`{val_col}` IS NOT NULL"]
+    params: dict = {}
+    if extra_where:
+        where.append(extra_where)
+    if sources is not None:
+        names = [f"s{i}" for i in range(len(sources))]
+        where.append(f"source IN ({', '.join(':' + n for n in names)})")
+        params = dict(zip(names, sources))
+
+    result = conn.execution_options(stream_results=True, yield_per=_FETCH_SIZE).execute(text(f"""
+        SELECT {type_expr} AS type_code, region_code, source, `{date_col}` AS d, `{val_col}` AS v
+        FROM `{table}`
+        WHERE {' AND '.join(where)}
+        ORDER BY type_code, region_code, source, d
+    """), params)
+
+    findings: list[dict] = []
+    series_count = 0
+    for key, rows in itertools.groupby(result, key=lambda r: (r[0] or "", r[1], r[2])):
+        rows = list(rows)
+        series_count += 1
+        for f in scan_series([r[3] for r in rows], [float(r[4]) for r in rows], freq):
+            f.update({"table_name": table, "type_code": key[0], "region_code": key[1], "source": key[2]})
+            findings.append(f)
+    logger.info("data quality scanned table=%s series=%d findings=%d", table, series_count, len(findings))
+    return findings
+
+
+def refresh_quality_findings(
+    engine: Engine,
+    tables: Optional[dict[str, Optional[set[str]]]] = None,
+    batch_id: Optional[int] = None,
+) -> int:
+    """
+    扫描并替换 data_quality_findings（每张表单事务）。
+
+    Args:
+        tables: {表名: 本次涉及的 source 集合}；source 为 None 表示整表重扫。
+                为 None 时重扫 QUALITY_TABLES 中全部表。
+        batch_id: 写入 batch_id（手工全量重扫时为 None）
+
+    Returns:
+        写入的 findings 行数
+    """
+    if tables is None:
+        tables = {t: None for t in QUALITY_TABLES}
+    written = 0
+    for table, sources in tables.items():
+        if table not in QUALITY_TABLES:
+            continue
+        source_list = sorted(sources) if sources else None
+        # 流式游标占用连接，扫描与写入分开
+        with engine.connect() as conn:
+            findings = scan_table(conn, table, source_list)
+        with engine.connect() as conn:
+            try:
+                if source_list is not None:
+                    names = [f"s{i}" for i in range(len(source_list))]
+                    conn.execute(text(
+                        f"DELETE FROM data_quality_findings WHERE table_name = :t "
+                        f"AND source IN ({', '.join(':' + n for n in names)})"
+                    ), {"t": table, **dict(zip(names, source_list))})
+                else:
+                    conn.execute(text("DELETE FROM data_quality_findings WHERE table_name = :t"), {"t": table})
+                if findings:
+                    conn.execute(text("""
+                        INSERT INTO data_quality_findings
+                            (table_name, type_code, region_code, source, finding_type, start_date, end_date,
+                             value, change_value, mean_value, std_value, zscore, missing_periods, batch_id)
+                        VALUES (:table_name, :type_code, :region_code, :source, :finding_type, :start_date,
+                                :end_date, :value, :change_value, :mean, :std, :zscore, :missing_periods, :b)
+                    """), [{**f, "b": batch_id} for f in findings])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        written += len(findings)
+    logger.info("data_quality_findings refreshed tables=%d rows=%d batch_id=%s", len(tables), written, batch_id)
+    return written
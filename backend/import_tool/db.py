@@ -58,6 +58,76 @@ DDL_STATEMENTS = [
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
     """,
 
+    """
+    CREATE TABLE IF NOT EXISTS import_batch_stage (
+        id          BIGINT       AUTO_INCREMENT PRIMARY KEY,
+        batch_id    BIGINT       NOT NULL,
+        seq         INT          NOT NULL DEFAULT 0,
+        kind        VARCHAR(16)  NOT NULL,
+        name        VARCHAR(128) NOT NULL,
+        table_name  VARCHAR(64),
+        row_count   INT          DEFAULT 0,
+        duration_ms INT,
+        load_ms     INT,
+        upsert_ms   INT,
+        status      VARCHAR(16)  NOT NULL DEFAULT 'success',
+        error_msg   TEXT,
+        created_at  DATETIME(3)  NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+        INDEX idx_batch (batch_id, seq)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+
+    # fact 表统计目录（导入写入事务内按 (表, source, 日期范围) 重算，见 import_tool/table_stats.py）
+    """
+    CREATE TABLE IF NOT EXISTS fact_table_stats (
+        table_name    VARCHAR(64)  NOT NULL,
+        source        VARCHAR(16)  NOT NULL DEFAULT '',
+        row_count     BIGINT       NOT NULL DEFAULT 0,
+        min_date      DATE,
+        max_date      DATE,
+        coverage      MEDIUMBLOB,
+        last_batch_id BIGINT,
+        updated_at    DATETIME(3)  NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3),
+        PRIMARY KEY (table_name, source)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+
+    # fact 表按天行数（目录的明细，导入时只替换写入日期范围内的行，见 import_tool/table_stats.py）
+    """
+    CREATE TABLE IF NOT EXISTS fact_table_stats_daily (
+        table_name VARCHAR(64) NOT NULL,
+        source     VARCHAR(16) NOT NULL DEFAULT '',
+        stat_date  DATE        NOT NULL,
+        row_count  INT         NOT NULL,
+        PRIMARY KEY (table_name, source, stat_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+
+    # 数据质量扫描结果（每次导入后按 (表, source) 替换，见 import_tool/data_quality.py）
+    """
+    CREATE TABLE IF NOT EXISTS data_quality_findings (
+        id              BIGINT        AUTO_INCREMENT PRIMARY KEY,
+        table_name      VARCHAR(64)   NOT NULL,
+        type_code       VARCHAR(160)  NOT NULL DEFAULT '',
+        region_code     VARCHAR(32)   NOT NULL,
+        source          VARCHAR(16)   NOT NULL,
+        finding_type    VARCHAR(16)   NOT NULL,
+        start_date      DATE          NOT NULL,
+        end_date        DATE          NOT NULL,
+        value           DECIMAL(18,4),
+        change_value    DECIMAL(18,4),
+        mean_value      DECIMAL(18,4),
+        std_value       DECIMAL(18,4),
+        zscore          DECIMAL(10,4),
+        missing_periods INT,
+        batch_id        BIGINT,
+        detected_at     DATETIME      NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_table_source (table_name, source),
+        INDEX idx_type_date (finding_type, start_date),
+        INDEX idx_series (type_code, region_code)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+
     # ── 系统表 ──
     """
     CREATE TABLE IF NOT EXISTS sys_user (
@@ -155,7 +225,7 @@ DDL_STATEMENTS = [
         month_date     DATE         NOT NULL,
         region_code    VARCHAR(32)  NOT NULL DEFAULT 'NATION',
         indicator_code VARCHAR(64)  NOT NULL,
-        sub_category   VARCHAR(64)  DEFAULT '',
+        sub_category   VARCHAR(64)  NOT NULL DEFAULT '',
         source         VARCHAR(16)  NOT NULL,
         value          DECIMAL(18,6),
         value_type     VARCHAR(16)  NOT NULL DEFAULT 'abs',
@@ -318,6 +388,103 @@ DDL_STATEMENTS = [
         created_at   DATETIME     DEFAULT CURRENT_TIMESTAMP
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
     """,
+    # 报告任务（/api/reports，见 app/services/report_job_service.py）：cache_key 复用产物 / 进行中的任务
+    """
+    CREATE TABLE IF NOT EXISTS report_template (
+        id            BIGINT       AUTO_INCREMENT PRIMARY KEY,
+        name          VARCHAR(128) NOT NULL,
+        template_json JSON,
+        is_public     TINYINT(1)   DEFAULT 0,
+        owner_id      BIGINT,
+        created_at    DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_owner (owner_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS report_run (
+        id          BIGINT       AUTO_INCREMENT PRIMARY KEY,
+        template_id BIGINT       NOT NULL,
+        params_json JSON,
+        status      VARCHAR(20)  NOT NULL DEFAULT 'pending',
+        output_path VARCHAR(512),
+        error_json  JSON,
+        cache_key   VARCHAR(64),
+        created_at  DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        finished_at DATETIME,
+        INDEX idx_template (template_id),
+        INDEX ix_report_run_cache_key (cache_key)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# ── 日度表周/月汇总（结构相同，维护逻辑见 import_tool/rollups.py）──
+_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id          BIGINT        AUTO_INCREMENT PRIMARY KEY,
+        period_date DATE          NOT NULL,
+        region_code VARCHAR(32)   NOT NULL,
+        type_code   VARCHAR(64)   NOT NULL DEFAULT '',
+        source      VARCHAR(16)   NOT NULL,
+        avg_value   DECIMAL(14,4),
+        min_value   DECIMAL(14,4),
+        max_value   DECIMAL(14,4),
+        last_value  DECIMAL(14,4),
+        last_date   DATE,
+        day_count   INT           NOT NULL DEFAULT 0,
+        UNIQUE KEY uq_period (period_date, region_code, type_code, source),
+        INDEX idx_type_region (type_code, region_code, period_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+DDL_STATEMENTS += [
+    # 规范序列（按数据源优先级合并）及其月均值，定义见 import_tool/series_registry.py
+    """
+    CREATE TABLE IF NOT EXISTS fact_series_daily (
+        id          BIGINT       AUTO_INCREMENT PRIMARY KEY,
+        series_code VARCHAR(64)  NOT NULL,
+        trade_date  DATE         NOT NULL,
+        value       DECIMAL(10,2),
+        source      VARCHAR(16)  NOT NULL,
+        member_type VARCHAR(64)  NOT NULL,
+        UNIQUE KEY uq_series_date (series_code, trade_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fact_series_monthly (
+        series_code VARCHAR(64)   NOT NULL,
+        period_date DATE          NOT NULL,
+        avg_value   DECIMAL(14,4),
+        day_count   INT           NOT NULL DEFAULT 0,
+        PRIMARY KEY (series_code, period_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    # 注册仓单：仓库维度 + 逐日物化（由 fact_futures_basis 派生，见 import_tool/warehouse_receipts.py）
+    """
+    CREATE TABLE IF NOT EXISTS dim_receipt_warehouse (
+        id             INT          AUTO_INCREMENT PRIMARY KEY,
+        indicator_code VARCHAR(64)  NOT NULL,
+        warehouse_name VARCHAR(64)  NOT NULL,
+        display_name   VARCHAR(64)  NOT NULL,
+        is_total       TINYINT(1)   NOT NULL DEFAULT 0,
+        UNIQUE KEY uq_indicator (indicator_code)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fact_warehouse_receipt_daily (
+        trade_date   DATE          NOT NULL,
+        warehouse_id INT           NOT NULL,
+        value        DECIMAL(18,4) NOT NULL,
+        PRIMARY KEY (trade_date, warehouse_id),
+        INDEX idx_warehouse_date (warehouse_id, trade_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+] + [
+    _ROLLUP_DDL.format(table=t)
+    for t in (
+        "fact_price_weekly", "fact_price_monthly",
+        "fact_spread_weekly", "fact_spread_monthly",
+        "fact_slaughter_weekly", "fact_slaughter_monthly",
+    )
 ]
 
 # 需要清空的 fact 表（bulk import 时使用）
@@ -336,6 +503,19 @@ FACT_TABLES = [
     "fact_quarterly_stats",
 ]
 
+# 由 fact 表派生、随导入维护的表（清空 fact 表时一并清空）
+DERIVED_TABLES = [
+    "fact_table_stats",
+    "fact_table_stats_daily",
+    "data_quality_findings",
+    "fact_series_daily",
+    "fact_series_monthly",
+    "fact_warehouse_receipt_daily",
+    "fact_price_weekly", "fact_price_monthly",
+    "fact_spread_weekly", "fact_spread_monthly",
+    "fact_slaughter_weekly", "fact_slaughter_monthly",
+]
+
 
 def init_db(engine=None):
     """创建所有表"""
@@ -352,7 +532,7 @@ def truncate_fact_tables(engine):
     """清空所有 fact 表（bulk import 前调用）"""
     with engine.connect() as conn:
         conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
-        for table in FACT_TABLES:
+        for table in FACT_TABLES + DERIVED_TABLES:
             conn.execute(text(f"TRUNCATE TABLE {table}"))
         conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
         conn.commit()
@@ -0,0 +1,132 @@
+"""图表只读副本：fact 表按年分区导出为 Parquet
+
+目录结构：{CHART_REPLICA_DIR}/{table}/year=YYYY/data.parquet。导入后只重写本批次触达的年份分区
+（先写临时文件再 os.replace，读者不会读到写了一半的文件）；图表接口经 app/services/chart_repository.py
+用 DuckDB 读取，副本缺失或查询失败时回退 MySQL。
+写入依赖可选的 pyarrow；未配置 CHART_REPLICA_DIR 或未安装时导出步骤跳过。
+CHART_REPLICA_DIR 与图表读取侧（app/core/config.py）取自同一个 backend/.env，但这里只读取取值，
+不导入 app 配置（避免 load_dotenv(override=True) 改写导入进程的环境变量）。
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from dotenv import dotenv_values
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+
+# 副本表 → 分区日期列
+REPLICA_TABLES: dict[str, str] = {
+    "fact_price_daily": "trade_date",
+    "fact_spread_daily": "trade_date",
+    "fact_slaughter_daily": "trade_date",
+    "fact_weekly_indicator": "week_end",
+    "fact_monthly_indicator": "month_date",
+    "fact_futures_daily": "trade_date",
+    "fact_futures_basis": "trade_date",
+    "fact_series_daily": "trade_date",
+}
+# 派生表 → 源表：源表触达的年份同步重导（规范序列随 fact_price_daily 重算）
+_DERIVED_FROM = {"fact_series_daily": "fact_price_daily"}
+
+ReplicaScope = dict[str, Optional[set[int]]]
+
+
+def replica_dir() -> Optional[Path]:
+    """
+    副本根目录，未配置时为 None。与 app 配置的优先级一致：
+    backend/.env 中的 CHART_REPLICA_DIR 优先，其次环境变量
+    """
+    d = (dotenv_values(ENV_PATH).get("CHART_REPLICA_DIR") if ENV_PATH.exists() else None) \
+        or os.getenv("CHART_REPLICA_DIR")
+    return Path(d) if d else None
+
+
+def replica_enabled() -> bool:
+    return replica_dir() is not None and HAS_PYARROW
+
+
+def partition_path(root: Path, table: str, year: int) -> Path:
+    return root / table / f"year={year}" / "data.parquet"
+
+
+def export_replica(engine: Engine, root: Path, scope: Optional[ReplicaScope] = None) -> dict[str, int]:
+    """
+    按年分区导出副本。
+
+    Args:
+        scope: {表: 年份集合}；年份为 None 表示整表（并删除库中已无数据的年份分区）；
+               scope 为 None 表示全部副本表整表导出
+
+    Returns:
+        {table: 写入行数}
+    """
+    import pandas as pd
+
+    written: dict[str, int] = {}
+    for table, years in (scope if scope is not None else dict.fromkeys(REPLICA_TABLES)).items():
+        date_col = REPLICA_TABLES[table]
+        with engine.connect() as conn:
+            if years is None:
+                present = {
+                    int(y) for y in conn.execute(text(
+                        f"SELECT DISTINCT YEAR({date_col}) FROM {table} WHERE {date_col} IS NOT NULL"
+                    )).scalars()
+                }
+                stale = {int(p.name.split("=", 1)[1]) for p in (root / table).glob("year=*")}
+                years = present | stale
+            written[table] = 0
+            for year in sorted(years):
+                frame = pd.read_sql(
+                    text(f"SELECT * FROM {table} WHERE {date_col} BETWEEN :lo AND :hi"),
+                    conn, params={"lo": date(year, 1, 1), "hi": date(year, 12, 31)},
+                )
+                written[table] += _write_partition(frame, partition_path(root, table, year))
+    logger.info("parquet replica exported root=%s written=%s", root, written)
+    return written
+
+
+def _write_partition(frame: pd.DataFrame, path: Path) -> int:
+    """写入一个年份分区；无数据时删除该分区"""
+    if frame.empty:
+        path.unlink(missing_ok=True)
+        if path.parent.is_dir() and not any(path.parent.iterdir()):
+            path.parent.rmdir()
+        return 0
+    # DECIMAL 列经 pymysql 读出为 Decimal 对象，统一转 float（DuckDB 侧按 DOUBLE 读取）
+    for col in frame.columns:
+        if frame[col].dtype == object and frame[col].map(lambda v: isinstance(v, Decimal)).any():
+            frame[col] = frame[col].astype(float)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return len(frame)
+
+
+def touched_replica_scope(results: dict[str, list[dict]]) -> ReplicaScope:
+    """read_file 结果 → {副本表: 触达年份}"""
+    scope: ReplicaScope = {}
+    for table, date_col in REPLICA_TABLES.items():
+        years = {r[date_col].year for r in results.get(table) or [] if r.get(date_col)}
+        if years:
+            scope[table] = years
+    for derived, source in _DERIVED_FROM.items():
+        if source in scope:
+            scope.setdefault(derived, set()).update(scope[source])
+    return scope
@@ -16,6 +16,7 @@ from typing import Optional
 import openpyxl
 
 from import_tool.base_reader import BaseSheetReader
+from import_tool.replace_scope import DeleteRule, merge_replace_scope
 from import_tool.utils import parse_date, parse_month, clean_value, province_to_code
 
 logger = logging.getLogger(__name__)
@@ -236,23 +237,20 @@ class GanglianDailyReader(BaseSheetReader):
                 continue
             ws = wb[sheet_name]
             try:
-                handler(ws, results)
+                with self.track_sheet(sheet_name, *results.values()):
+                    handler(ws, results)
                 logger.info(f"  ✓ {sheet_name} 处理完成")
             except Exception:
                 logger.exception(f"  ✗ {sheet_name} 处理异常")
 
         wb.close()
 
-        # 毛白价差：每次导入前删除库中已有钢联毛白价差，再插入本次读取的数据，使「同日期数据更新」能生效（增量导入不会覆盖已有日期）
+        # 毛白价差：整体替换库中已有钢联毛白价差，使「同日期数据更新」能生效（增量导入不会覆盖已有日期）；
+        # 删除与写入在 insert_all 的同一事务内完成，导入期间读者不会看到空序列
         if results["fact_spread_daily"]:
-            from sqlalchemy import text
-            with self.engine.connect() as conn:
-                deleted = conn.execute(
-                    text("DELETE FROM fact_spread_daily WHERE source = 'GANGLIAN' AND spread_type = 'mao_bai_spread'")
-                )
-                conn.commit()
-                if deleted.rowcount and deleted.rowcount > 0:
-                    logger.info(f"  已清除库中钢联毛白价差 {deleted.rowcount} 条，将插入本次读取数据")
+            merge_replace_scope(self.replace_scope, {
+                "fact_spread_daily": [DeleteRule("fact_spread_daily", SOURCE, "spread_type = 'mao_bai_spread'")],
+            })
 
         # 汇总日志
         for tbl, recs in results.items():
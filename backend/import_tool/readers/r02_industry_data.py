@@ -131,62 +131,74 @@ class IndustryDataReader(BaseSheetReader):
         quarterly: list[dict] = []
 
         try:
-            monthly += self._read_nyb(wb)
+            with self.track_sheet("NYB", monthly):
+                monthly += self._read_nyb(wb)
         except Exception:
             logger.exception("Error reading NYB sheet")
 
         try:
-            monthly += self._read_association_feed(wb)
+            with self.track_sheet("02.协会猪料", monthly):
+                monthly += self._read_association_feed(wb)
         except Exception:
             logger.exception("Error reading 02.协会猪料 sheet")
 
         try:
-            monthly += self._read_yongyi_draft(wb)
+            with self.track_sheet("4.2涌益底稿", monthly):
+                monthly += self._read_yongyi_draft(wb)
         except Exception:
             logger.exception("Error reading 4.2涌益底稿 sheet")
 
         try:
-            monthly += self._read_yongyi_sample(wb)
+            with self.track_sheet("涌益样本", monthly):
+                monthly += self._read_yongyi_sample(wb)
         except Exception:
             logger.exception("Error reading 涌益样本 sheet")
 
         try:
-            monthly += self._read_ganglian_data(wb)
+            with self.track_sheet("4.1.钢联数据", monthly):
+                monthly += self._read_ganglian_data(wb)
         except Exception:
             logger.exception("Error reading 4.1.钢联数据 sheet")
 
         try:
-            monthly += self._read_ganglian_draft(wb)
+            with self.track_sheet("钢联底稿", monthly):
+                monthly += self._read_ganglian_draft(wb)
         except Exception:
             logger.exception("Error reading 钢联底稿 sheet")
 
         try:
-            quarterly += self._read_statistics_bureau(wb)
+            with self.track_sheet("03.统计局季度数据", quarterly):
+                quarterly += self._read_statistics_bureau(wb)
         except Exception:
             logger.exception("Error reading 03.统计局季度数据 sheet")
 
         try:
-            monthly += self._read_provincial_inventory(wb)
+            with self.track_sheet("分省区存栏", monthly):
+                monthly += self._read_provincial_inventory(wb)
         except Exception:
             logger.exception("Error reading 分省区存栏 sheet")
 
         try:
-            monthly += self._read_feed_summary(wb)
+            with self.track_sheet("饲料数据汇总", monthly):
+                monthly += self._read_feed_summary(wb)
         except Exception:
             logger.exception("Error reading 饲料数据汇总 sheet")
 
         try:
-            monthly += self._read_pork_import(wb)
+            with self.track_sheet("猪肉进口", monthly):
+                monthly += self._read_pork_import(wb)
         except Exception:
             logger.exception("Error reading 猪肉进口 sheet")
 
         try:
-            monthly += self._read_designated_slaughter(wb)
+            with self.track_sheet("定点屠宰", monthly):
+                monthly += self._read_designated_slaughter(wb)
         except Exception:
             logger.exception("Error reading 定点屠宰 sheet")
 
         try:
-            monthly += self._read_a1_supply_forecast(wb)
+            with self.track_sheet("A1供给预测", monthly):
+                monthly += self._read_a1_supply_forecast(wb)
         except Exception:
             logger.exception("Error reading A1供给预测 sheet")
 
@@ -101,15 +101,24 @@ class EnterpriseProvinceReader(BaseSheetReader):
         records = []
         wb = openpyxl.load_workbook(filepath, data_only=True)
         try:
-            records += self._read_cr5(wb)
-            records += self._read_province_summary(wb)
-            records += self._read_southwest_summary(wb)
-            records += self._read_province_detail_sheets(wb)
-            records += self._read_province_daily_sheets(wb)
-            records += self._read_shaanxi_daily(wb)
-            records += self._read_northeast_daily(wb)
-            records += self._read_south_summary(wb)
-            records += self._read_ms_price(wb)
+            with self.track_sheet("CR5日度", records):
+                records += self._read_cr5(wb)
+            with self.track_sheet("重点省区汇总", records):
+                records += self._read_province_summary(wb)
+            with self.track_sheet("西南汇总", records):
+                records += self._read_southwest_summary(wb)
+            with self.track_sheet("四川/贵州/广西", records):
+                records += self._read_province_detail_sheets(wb)
+            with self.track_sheet("分省日度", records):
+                records += self._read_province_daily_sheets(wb)
+            with self.track_sheet("陕西日度", records):
+                records += self._read_shaanxi_daily(wb)
+            with self.track_sheet("东北日度", records):
+                records += self._read_northeast_daily(wb)
+            with self.track_sheet("华南合计", records):
+                records += self._read_south_summary(wb)
+            with self.track_sheet("MS猪价", records):
+                records += self._read_ms_price(wb)
         finally:
             wb.close()
 
@@ -100,11 +100,16 @@ class EnterpriseMonthlyReader(BaseSheetReader):
         records = []
         wb = openpyxl.load_workbook(filepath, data_only=True)
         try:
-            records += self._read_summary(wb)
-            records += self._read_sichuan(wb)
-            records += self._read_guangdong(wb)
-            records += self._read_guizhou(wb)
-            records += self._read_national(wb)
+            with self.track_sheet("汇总", records):
+                records += self._read_summary(wb)
+            with self.track_sheet("四川", records):
+                records += self._read_sichuan(wb)
+            with self.track_sheet("广东", records):
+                records += self._read_guangdong(wb)
+            with self.track_sheet("贵州", records):
+                records += self._read_guizhou(wb)
+            with self.track_sheet("集团企业全国", records):
+                records += self._read_national(wb)
         finally:
             wb.close()
 
@@ -143,9 +143,12 @@ class CarcassMarketReader(BaseSheetReader):
 
         wb = openpyxl.load_workbook(filepath, data_only=True)
         try:
-            carcass_records += self._read_huabao_muyuan(wb)
-            carcass_records += self._read_carcass_market(wb)
-            slaughter_records += self._read_slaughter_daily(wb)
+            with self.track_sheet("华宝和牧原白条", carcass_records):
+                carcass_records += self._read_huabao_muyuan(wb)
+            with self.track_sheet("白条市场", carcass_records):
+                carcass_records += self._read_carcass_market(wb)
+            with self.track_sheet("日度屠宰统计", slaughter_records):
+                slaughter_records += self._read_slaughter_daily(wb)
         finally:
             wb.close()
 
@@ -62,49 +62,50 @@ class FuturesPremiumReader(BaseSheetReader):
         records: list[dict] = []
         skipped = 0
 
-        for row_idx, row in enumerate(ws.iter_rows(min_row=DATA_START_ROW, values_only=False), start=DATA_START_ROW):
-            try:
-                # Col A (1) = 日期
-                raw_date = row[0].value if len(row) > 0 else None
-                trade_date = parse_date(raw_date)
-                if trade_date is None:
-                    skipped += 1
-                    continue
-
-                # 读取持仓量（所有合约共享同一个持仓量值）
-                raw_oi = row[OI_COL - 1].value if len(row) >= OI_COL else None
-                oi_val = clean_value(raw_oi)
-                open_interest = int(oi_val) if oi_val is not None else None
-
-                # 每列生成一条 settle 记录
-                for col_idx, contract_code in COL_CONTRACT_MAP.items():
-                    raw_val = row[col_idx - 1].value if len(row) >= col_idx else None
-                    settle = clean_value(raw_val)
-                    if settle is None:
+        with self.track_sheet(SHEET_NAME, records):
+            for row_idx, row in enumerate(ws.iter_rows(min_row=DATA_START_ROW, values_only=False), start=DATA_START_ROW):
+                try:
+                    # Col A (1) = 日期
+                    raw_date = row[0].value if len(row) > 0 else None
+                    trade_date = parse_date(raw_date)
+                    if trade_date is None:
+                        skipped += 1
                         continue
 
-                    rec = {
-                        "contract_code": contract_code,
-                        "trade_date": trade_date,
-                        "open": None,
-                        "high": None,
-                        "low": None,
-                        "close": None,
-                        "settle": settle,
-                        "pre_settle": None,
-                        "chg": None,
-                        "volume": None,
-                        "open_interest": open_interest if contract_code == "LH_CONT" else None,
-                        "oi_chg": None,
-                        "turnover": None,
-                        "batch_id": self.batch_id,
-                    }
-                    records.append(rec)
-
-            except Exception as e:
-                logger.warning("Row %d 解析异常: %s", row_idx, e)
-                skipped += 1
-                continue
+                    # 读取持仓量（所有合约共享同一个持仓量值）
+                    raw_oi = row[OI_COL - 1].value if len(row) >= OI_COL else None
+                    oi_val = clean_value(raw_oi)
+                    open_interest = int(oi_val) if oi_val is not None else None
+
+                    # 每列生成一条 settle 记录
+                    for col_idx, contract_code in COL_CONTRACT_MAP.items():
+                        raw_val = row[col_idx - 1].value if len(row) >= col_idx else None
+                        settle = clean_value(raw_val)
+                        if settle is None:
+                            continue
+
+                        rec = {
+                            "contract_code": contract_code,
+                            "trade_date": trade_date,
+                            "open": None,
+                            "high": None,
+                            "low": None,
+                            "close": None,
+                            "settle": settle,
+                            "pre_settle": None,
+                            "chg": None,
+                            "volume": None,
+                            "open_interest": open_interest if contract_code == "LH_CONT" else None,
+                            "oi_chg": None,
+                            "turnover": None,
+                            "batch_id": self.batch_id,
+                        }
+                        records.append(rec)
+
+                except Exception as e:
+                    logger.warning("Row %d 解析异常: %s", row_idx, e)
+                    skipped += 1
+                    continue
 
         wb.close()
         logger.info(
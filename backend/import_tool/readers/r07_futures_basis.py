@@ -34,16 +34,26 @@ class FuturesBasisReader(BaseSheetReader):
 
         records: list[dict] = []
 
-        records += self._read_main_contract_basis(wb)
-        records += self._read_export_data(wb)
-        records += self._read_spot_premium_draft(wb)
-        records += self._read_contract_03(wb)
-        records += self._read_contract_05(wb)
-        records += self._read_contract_07(wb)
-        records += self._read_contract_09(wb)
-        records += self._read_contract_11(wb)
-        records += self._read_seasonal_09(wb)
-        records += self._read_seasonal_11(wb)
+        with self.track_sheet("主力合约基差", records):
+            records += self._read_main_contract_basis(wb)
+        with self.track_sheet("导出数据", records):
+            records += self._read_export_data(wb)
+        with self.track_sheet("现货盘面和升贴水底稿", records):
+            records += self._read_spot_premium_draft(wb)
+        with self.track_sheet("03合约", records):
+            records += self._read_contract_03(wb)
+        with self.track_sheet("05合约", records):
+            records += self._read_contract_05(wb)
+        with self.track_sheet("07合约", records):
+            records += self._read_contract_07(wb)
+        with self.track_sheet("09合约", records):
+            records += self._read_contract_09(wb)
+        with self.track_sheet("Sheet3", records):
+            records += self._read_contract_11(wb)
+        with self.track_sheet("09合约季节性", records):
+            records += self._read_seasonal_09(wb)
+        with self.track_sheet("11合约季节性", records):
+            records += self._read_seasonal_11(wb)
 
         wb.close()
         logger.info("基差/价差读取完成: 共 %d 条记录", len(records))
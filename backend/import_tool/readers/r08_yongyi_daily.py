@@ -82,21 +82,29 @@ class YongyiDailyReader(BaseSheetReader):
 
         try:
             # ── Sheet 0: 出栏价 ──
-            self._read_sheet0_chulanjia(wb, price_records)
+            with self.track_sheet("出栏价", price_records):
+                self._read_sheet0_chulanjia(wb, price_records)
             # ── Sheet 1: 价格+宰量 ──
-            self._read_sheet1_price_slaughter(wb, price_records, slaughter_records)
+            with self.track_sheet("价格+宰量", price_records, slaughter_records):
+                self._read_sheet1_price_slaughter(wb, price_records, slaughter_records)
             # ── Sheet 2: 散户标肥价差 ──
-            self._read_sheet2_spread(wb, price_records, spread_records)
+            with self.track_sheet("散户标肥价差", price_records, spread_records):
+                self._read_sheet2_spread(wb, price_records, spread_records)
             # ── Sheet 3: 各省份均价 ──
-            self._read_sheet3_province_avg(wb, price_records)
+            with self.track_sheet("各省份均价", price_records):
+                self._read_sheet3_province_avg(wb, price_records)
             # ── Sheet 4: 市场主流标猪肥猪价格 ──
-            self._read_sheet4_mainstream(wb, price_records)
+            with self.track_sheet("市场主流标猪肥猪价格", price_records):
+                self._read_sheet4_mainstream(wb, price_records)
             # ── Sheet 5: 屠宰企业日度屠宰量 ──
-            self._read_sheet5_slaughter(wb, slaughter_records)
+            with self.track_sheet("屠宰企业日度屠宰量", slaughter_records):
+                self._read_sheet5_slaughter(wb, slaughter_records)
             # ── Sheet 6: 市场主流标猪肥猪均价方便作图 ──
-            self._read_sheet6_charting(wb, price_records)
+            with self.track_sheet("市场主流标猪肥猪均价方便作图", price_records):
+                self._read_sheet6_charting(wb, price_records)
             # ── Sheet 7: 交割地市出栏价 ──
-            self._read_sheet7_delivery_city(wb, price_records)
+            with self.track_sheet("交割地市出栏价", price_records):
+                self._read_sheet7_delivery_city(wb, price_records)
         finally:
             wb.close()
 
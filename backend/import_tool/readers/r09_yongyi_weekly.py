@@ -64,9 +64,10 @@ class YongyiWeeklyReader(BaseSheetReader):
         for sheet_name in wb.sheetnames:
             try:
                 ws = wb[sheet_name]
-                w, m = self._dispatch(sheet_name, ws)
-                weekly_records.extend(w)
-                monthly_records.extend(m)
+                with self.track_sheet(sheet_name, weekly_records, monthly_records):
+                    w, m = self._dispatch(sheet_name, ws)
+                    weekly_records.extend(w)
+                    monthly_records.extend(m)
             except Exception:
                 logger.exception("Sheet [%s] failed", sheet_name)
 
@@ -1,7 +1,12 @@
 """
 Web 导入覆盖策略：
-1) truncate_tables: 整表 TRUNCATE（仅独占单表模板）
-2) delete_rules: 按 source 精准删除（共享表低风险覆盖）
+1) truncate_tables: 整表覆盖（仅独占单表模板）
+2) delete_rules: 按 source 精准覆盖（共享表低风险覆盖）
+
+覆盖不在导入前单独执行删除/TRUNCATE：build_replace_scope 只给出 {表: 范围}，
+由 BaseSheetReader.insert_all 在写入同一事务内先加载临时表，再删除「范围内且不在本次数据中」
+的行并 upsert 新数据，一次提交（见 BaseSheetReader._swap_scope）。读者与图表缓存只会看到
+旧数据或新数据，写入失败时旧数据原样保留。
 
 注意：即使不使用覆盖导入，bulk_insert 也会通过 INSERT ... ON DUPLICATE KEY UPDATE
 自动更新已存在的重复记录，因此覆盖策略仅影响「旧批次中有但新批次中已删除」的行。
@@ -11,9 +16,14 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
-from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from import_tool.data_quality import refresh_quality_findings
+from import_tool.parquet_replica import REPLICA_TABLES, export_replica, replica_dir, replica_enabled
+from import_tool.rollups import ROLLUP_SPECS, refresh_rollups
+from import_tool.series_registry import refresh_series
+from import_tool.warehouse_receipts import refresh_warehouse_receipts
+
 
 @dataclass(frozen=True)
 class DeleteRule:
@@ -22,6 +32,10 @@ class DeleteRule:
     extra_where_sql: str | None = None
 
 
+# {表名: 覆盖范围}；None 表示整表，否则为各规则（OR）的并集
+ReplaceScope = dict[str, list[DeleteRule] | None]
+
+
 @dataclass
 class ReplaceSummary:
     mode: str
@@ -77,45 +91,81 @@ def get_replace_support_hint() -> str:
     return "当前所有模板均支持覆盖导入。"
 
 
-def apply_replace_strategy(engine: Engine, template_type: str) -> ReplaceSummary:
+def build_replace_scope(template_type: str) -> ReplaceScope:
+    """模板的覆盖范围（整表 + 按 source），交给 insert_all(replace_scope=...) 在写入事务内执行"""
+    scope: ReplaceScope = {t: None for t in REPLACE_TRUNCATE_TABLES.get(template_type, [])}
+    for rule in REPLACE_DELETE_RULES.get(template_type, []):
+        merge_replace_scope(scope, {rule.table: [rule]})
+    return scope
+
+
+def merge_replace_scope(scope: ReplaceScope, other: ReplaceScope) -> ReplaceScope:
+    """把 other 并入 scope（原地修改并返回）：任一方为整表则为整表，否则合并规则"""
+    for table, rules in other.items():
+        if table in scope and scope[table] is None:
+            continue
+        if rules is None:
+            scope[table] = None
+        else:
+            scope[table] = scope.get(table, []) + [r for r in rules if r not in scope.get(table, [])]
+    return scope
+
+
+def scope_where_sql(table: str, rules: list[DeleteRule] | None, key: str = "scope") -> tuple[str, dict[str, Any]]:
     """
-    统一执行覆盖策略，返回执行摘要。
-    支持同一模板同时 TRUNCATE 部分表 + 按 source DELETE 其他表。
-    调用方需先用 supports_replace_tables 校验。
+    覆盖范围的 WHERE 条件（列名带目标表前缀），返回 (sql, params)；整表时为 1 = 1。
+    extra_where_sql 原样拼入，其中的列名在 DELETE 的外层查询里解析为目标表的列。
     """
-    truncated: list[str] = []
-    deleted: dict[str, int] = {}
-
-    # 阶段一：TRUNCATE 无 source 列的独占表
-    tables = REPLACE_TRUNCATE_TABLES.get(template_type, [])
-    if tables:
-        with engine.connect() as conn:
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
-            for table in tables:
-                conn.execute(text(f"TRUNCATE TABLE `{table}`"))
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
-            conn.commit()
-        truncated = list(tables)
-
-    # 阶段二：按 source 精准删除共享表中本模板的数据
-    rules = REPLACE_DELETE_RULES.get(template_type, [])
-    if rules:
-        with engine.connect() as conn:
-            for rule in rules:
-                sql = f"DELETE FROM `{rule.table}` WHERE source = :src"
-                params: dict[str, Any] = {"src": rule.source}
-                if rule.extra_where_sql:
-                    sql += f" AND ({rule.extra_where_sql})"
-                res = conn.execute(text(sql), params)
-                deleted[rule.table] = deleted.get(rule.table, 0) + (res.rowcount or 0)
-            conn.commit()
-
-    mode = "truncate_and_delete" if truncated and deleted else (
+    if rules is None:
+        return "1 = 1", {}
+    parts = []
+    params: dict[str, Any] = {}
+    for i, rule in enumerate(rules):
+        params[f"{key}_src_{i}"] = rule.source
+        part = f"`{table}`.source = :{key}_src_{i}"
+        if rule.extra_where_sql:
+            part += f" AND ({rule.extra_where_sql})"
+        parts.append(f"({part})")
+    return " OR ".join(parts) or "1 = 0", params
+
+
+def summarize_replace(template_type: str, scope: ReplaceScope, deleted: dict[str, int]) -> ReplaceSummary:
+    """按 insert_all 返回的每表删除行数生成覆盖摘要"""
+    truncated = [t for t, rules in scope.items() if rules is None]
+    deleted_by_rule = {t: deleted.get(t, 0) for t, rules in scope.items() if rules is not None}
+    mode = "truncate_and_delete" if truncated and deleted_by_rule else (
         "truncate_tables" if truncated else "delete_by_source"
     )
     return ReplaceSummary(
         mode=mode,
         template_type=template_type,
         truncated_tables=truncated,
-        deleted_rows_by_table=deleted,
+        deleted_rows_by_table=deleted_by_rule,
     )
+
+
+def replaced_stats_scope(scope: ReplaceScope) -> dict[str, set[str] | None]:
+    """覆盖范围 → {表: 涉及的 source 集合}（整表覆盖为 None）"""
+    return {table: None if rules is None else {r.source for r in rules} for table, rules in scope.items()}
+
+
+def refresh_replaced_derived(engine: Engine, scope: ReplaceScope) -> None:
+    """
+    同步周/月汇总、规范序列、仓单物化、数据质量结果与图表只读副本：覆盖范围内被删除的行可能落在
+    本次写入的日期范围之外，需按整个范围（不限日期）重算。统计目录已在 _swap_scope 的替换事务内重算
+    """
+    stats_scope = replaced_stats_scope(scope)
+    for table, sources in stats_scope.items():
+        if table in ROLLUP_SPECS:
+            refresh_rollups(engine, table, None, sources)
+    if "fact_price_daily" in stats_scope:
+        refresh_series(engine)
+    if "fact_futures_basis" in stats_scope:
+        refresh_warehouse_receipts(engine)
+    refresh_quality_findings(engine, stats_scope)
+    if replica_enabled():
+        replica_scope = {t: None for t in stats_scope if t in REPLICA_TABLES}
+        if "fact_price_daily" in replica_scope:
+            replica_scope["fact_series_daily"] = None
+        if replica_scope:
+            export_replica(engine, replica_dir(), replica_scope)
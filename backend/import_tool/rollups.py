@@ -0,0 +1,143 @@
+"""日度 fact 表的周/月汇总（rollup）表维护
+
+每张日度表对应一张周表、一张月表，按 (period_date, region_code, type_code, source) 存
+avg / min / max / last / count。period_date：月表为当月 1 日，周表为当周周一（ISO 周）。
+slaughter 没有类型列，type_code 记为 ''。
+
+导入时只重算本批次触达的周期：先删除范围内的汇总行，再 INSERT ... SELECT ... GROUP BY，
+同一事务完成，因此覆盖导入删掉的数据也会从汇总中消失。
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 日度表 → (类型列, 值列, 周汇总表, 月汇总表)
+ROLLUP_SPECS: dict[str, tuple[Optional[str], str, str, str]] = {
+    "fact_price_daily": ("price_type", "value", "fact_price_weekly", "fact_price_monthly"),
+    "fact_spread_daily": ("spread_type", "value", "fact_spread_weekly", "fact_spread_monthly"),
+    "fact_slaughter_daily": (None, "volume", "fact_slaughter_weekly", "fact_slaughter_monthly"),
+}
+
+ROLLUP_TABLES = [t for spec in ROLLUP_SPECS.values() for t in spec[2:]]
+
+# 周期起始日表达式（MySQL）
+_PERIOD_EXPR = {
+    "W": "DATE_SUB(trade_date, INTERVAL WEEKDAY(trade_date) DAY)",
+    "M": "DATE_FORMAT(trade_date, '%Y-%m-01')",
+}
+
+
+def period_start(d: date, freq: str) -> date:
+    """日期 → 所属周期起始日（W: 周一，M: 当月 1 日）"""
+    if freq == "W":
+        return d - timedelta(days=d.weekday())
+    return d.replace(day=1)
+
+
+def period_end(d: date, freq: str) -> date:
+    """日期 → 所属周期最后一天"""
+    if freq == "W":
+        return period_start(d, "W") + timedelta(days=6)
+    nxt = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return nxt - timedelta(days=1)
+
+
+def _rollup_sql(daily_table: str, freq: str, with_range: bool, source_params: list[str]) -> tuple[str, str]:
+    """返回 (DELETE 语句, INSERT ... SELECT 语句)"""
+    type_col, val_col, weekly, monthly = ROLLUP_SPECS[daily_table]
+    target = weekly if freq == "W" else monthly
+    period = _PERIOD_EXPR[freq]
+    type_expr = f"`{type_col}`" if type_col else "''"
+
+    del_where, src_where = [], [f"`{val_col}` IS NOT NULL"]
+    if with_range:
+        del_where.append("period_date BETWEEN :p_lo AND :p_hi")
+        src_where.append("trade_date BETWEEN :p_lo AND :d_hi")
+    if source_params:
+        in_list = ", ".join(f":{p}" for p in source_params)
+        del_where.append(f"source IN ({in_list})")
+        src_where.append(f"source IN ({in_list})")
+
+    delete_sql = f"DELETE FROM `{target}`" + (f" WHERE {' AND '.join(del_where)}" if del_where else "")
+    insert_sql = f"""
+        INSERT INTO `{target}`
+            (period_date, region_code, type_code, source,
+             avg_value, min_value, max_value, last_value, last_date, day_count)
+        SELECT {period} AS period_date, region_code, {type_expr} AS type_code, source,
+               AVG(`{val_col}`), MIN(`{val_col}`), MAX(`{val_col}`),
+               SUBSTRING_INDEX(GROUP_CONCAT(`{val_col}` ORDER BY trade_date DESC), ',', 1),
+               MAX(trade_date), COUNT(*)
+        FROM `{daily_table}`
+        WHERE {' AND '.join(src_where)}
+        GROUP BY period_date, region_code, type_code, source
+    """
+    return delete_sql, insert_sql
+
+
+def refresh_rollups(
+    engine: Engine,
+    daily_table: str,
+    date_range: Optional[tuple[date, date]] = None,
+    sources: Optional[set[str]] = None,
+) -> dict[str, int]:
+    """
+    重算一张日度表的周/月汇总（单事务）。
+
+    Args:
+        date_range: 本批次触达的 (最小日期, 最大日期)；None 表示全量重算
+        sources: 限定 source；None 表示全部
+
+    Returns:
+        {汇总表: 写入行数}
+    """
+    if daily_table not in ROLLUP_SPECS:
+        return {}
+    source_list = sorted(sources) if sources else []
+    source_params = [f"s{i}" for i in range(len(source_list))]
+    _, _, weekly, monthly = ROLLUP_SPECS[daily_table]
+
+    written: dict[str, int] = {}
+    with engine.connect() as conn:
+        try:
+            for freq, target in (("W", weekly), ("M", monthly)):
+                params: dict = dict(zip(source_params, source_list))
+                if date_range:
+                    lo, hi = date_range
+                    params.update({
+                        "p_lo": period_start(lo, freq),
+                        "p_hi": period_start(hi, freq),
+                        "d_hi": period_end(hi, freq),
+                    })
+                delete_sql, insert_sql = _rollup_sql(daily_table, freq, bool(date_range), source_params)
+                conn.execute(text(delete_sql), params)
+                res = conn.execute(text(insert_sql), params)
+                written[target] = res.rowcount or 0
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info("rollup refreshed table=%s range=%s sources=%s written=%s",
+                daily_table, date_range, source_list or "*", written)
+    return written
+
+
+def touched_rollup_scope(results: dict[str, list[dict]]) -> dict[str, tuple[tuple[date, date], Optional[set[str]]]]:
+    """read_file 结果 → {日度表: ((最小日期, 最大日期), source 集合)}"""
+    scope = {}
+    for table, records in results.items():
+        if table not in ROLLUP_SPECS or not records:
+            continue
+        dates = [r["trade_date"] for r in records if r.get("trade_date")]
+        if not dates:
+            continue
+        sources = {r.get("source") for r in records}
+        # 记录未带 source 时使用列默认值，范围无法确定 → 不限定 source
+        scope[table] = ((min(dates), max(dates)), None if None in sources else sources)
+    return scope
@@ -0,0 +1,229 @@
+"""规范序列注册表（canonical series）
+
+声明式定义「按数据源优先级合并」的序列，例如：
+    national_spot = coalesce(GANGLIAN.hog_avg_price, YONGYI.全国均价, YONGYI.标猪均价)
+即每个交易日取优先级最高且有值的成员。priority 决定择一的粒度：
+    day    逐日择一（默认）
+    year   逐年择一：每个自然年整体使用该年有数据的最高优先级成员
+    series 整条序列择一：只要最高优先级成员有数据就整条使用它
+合并结果物化到 fact_series_daily，并在同一事务内汇总为月均值 fact_series_monthly；
+导入后只重算本批次触达的日期范围（year / series 粒度分别扩展到整年 / 全量）；
+消费方按 series_code 单次索引扫描读取。
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from import_tool.rollups import period_end, period_start
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SeriesDef:
+    code: str
+    label: str
+    members: tuple[tuple[str, str], ...]   # ((source, price_type), ...)，按优先级从高到低
+    region_code: str = "NATION"
+    table: str = "fact_price_daily"
+    type_column: str = "price_type"
+    unit: str = "元/公斤"
+    priority: str = "day"                  # 择一粒度：day / year / series
+
+    @property
+    def expr(self) -> str:
+        expr = f"{self.code} = coalesce({', '.join(f'{s}.{t}' for s, t in self.members)})"
+        return expr if self.priority == "day" else f"{expr} per {self.priority}"
+
+
+SERIES_REGISTRY: dict[str, SeriesDef] = {
+    s.code: s for s in (
+        # 全国现货：钢联分省区猪价中国优先，缺日用涌益填补（升贴水）
+        SeriesDef("national_spot", "全国现货均价", (
+            ("GANGLIAN", "hog_avg_price"), ("YONGYI", "全国均价"), ("YONGYI", "标猪均价"),
+        )),
+        # 全国标猪价：涌益标猪均价优先（屠宰&价格走势）
+        SeriesDef("national_std_hog", "全国标猪均价", (
+            ("YONGYI", "标猪均价"), ("YONGYI", "全国均价"), ("GANGLIAN", "hog_avg_price"),
+        )),
+        # 全国猪价季节性：标猪均价仅覆盖近几年，缺少的年份整年用全国均价，仍缺再用钢联
+        SeriesDef("national_seasonal", "全国猪价（季节性）", (
+            ("YONGYI", "标猪均价"), ("YONGYI", "全国均价"), ("GANGLIAN", "hog_avg_price"),
+        ), priority="year"),
+        # 供需曲线猪价系数：整条序列择一，避免不同口径的月均值拼接
+        SeriesDef("supply_demand_price", "全国猪价（供需曲线）", (
+            ("GANGLIAN", "hog_avg_price"), ("YONGYI", "标猪均价"), ("YONGYI", "全国均价"),
+        ), priority="series"),
+    )
+}
+
+
+def merge_by_priority(rows: pd.DataFrame, series: SeriesDef) -> pd.DataFrame:
+    """
+    rows: 列 trade_date / source / type_code / value（成员序列的原始行）
+    返回每个 trade_date 一行：trade_date / value / source / type_code。
+    day 粒度取当日优先级最高的成员；year / series 粒度先按年 / 整体选出有数据的最高优先级成员，
+    只保留该成员的行
+    """
+    import pandas as pd
+
+    if rows.empty:
+        return pd.DataFrame(columns=["trade_date", "value", "source", "type_code"])
+    priority = {m: i for i, m in enumerate(series.members)}
+    ranked = rows.assign(
+        _rank=[priority.get((s, t), len(priority)) for s, t in zip(rows["source"], rows["type_code"])]
+    )
+    ranked = ranked[ranked["_rank"] < len(priority)].dropna(subset=["value"])
+    if series.priority == "year":
+        years = ranked["trade_date"].map(lambda d: d.year)
+        ranked = ranked[ranked["_rank"] == ranked.groupby(years)["_rank"].transform("min")]
+    elif series.priority == "series":
+        ranked = ranked[ranked["_rank"] == ranked["_rank"].min()]
+    merged = ranked.sort_values(["trade_date", "_rank"]).drop_duplicates("trade_date", keep="first")
+    return merged[["trade_date", "value", "source", "type_code"]].reset_index(drop=True)
+
+
+def _refresh_range(series: SeriesDef, date_range: Optional[tuple[date, date]]) -> Optional[tuple[date, date]]:
+    """择一依赖范围外的数据：year 粒度扩展到整年，series 粒度全量重算"""
+    if date_range is None or series.priority == "day":
+        return date_range
+    if series.priority == "year":
+        return date(date_range[0].year, 1, 1), date(date_range[1].year, 12, 31)
+    return None
+
+
+def _refresh_monthly(conn, code: str, date_range: Optional[tuple[date, date]]) -> None:
+    """由 fact_series_daily 重算触达月份的月均值（调用方事务内）"""
+    params: dict = {"code": code}
+    range_sql = ""
+    if date_range:
+        range_sql = " AND {col} BETWEEN :m_lo AND :m_hi"
+        params.update({"m_lo": period_start(date_range[0], "M"), "m_hi": period_end(date_range[1], "M")})
+    conn.execute(text(
+        "DELETE FROM fact_series_monthly WHERE series_code = :code" + range_sql.format(col="period_date")
+    ), params)
+    conn.execute(text(f"""
+        INSERT INTO fact_series_monthly (series_code, period_date, avg_value, day_count)
+        SELECT series_code, DATE_FORMAT(trade_date, '%Y-%m-01') AS period_date, AVG(value), COUNT(*)
+        FROM fact_series_daily
+        WHERE series_code = :code AND value IS NOT NULL{range_sql.format(col="trade_date")}
+        GROUP BY series_code, period_date
+    """), params)
+
+
+def refresh_series(
+    engine: Engine,
+    codes: Optional[list[str]] = None,
+    date_range: Optional[tuple[date, date]] = None,
+) -> dict[str, int]:
+    """
+    重算并物化序列（每个序列单事务：删除范围内旧行 → 写入合并结果 → 重算触达月份的月均值）。
+
+    Args:
+        codes: 要重算的序列；None 表示全部
+        date_range: 只重算该日期范围；None 表示全量
+
+    Returns:
+        {series_code: 写入行数}
+    """
+    import pandas as pd
+
+    written: dict[str, int] = {}
+    for code in codes or list(SERIES_REGISTRY):
+        series = SERIES_REGISTRY[code]
+        series_range = _refresh_range(series, date_range)
+        member_sql = " OR ".join(
+            f"(source = :s{i} AND `{series.type_column}` = :t{i})" for i in range(len(series.members))
+        )
+        params: dict = {"region": series.region_code}
+        for i, (src, typ) in enumerate(series.members):
+            params[f"s{i}"] = src
+            params[f"t{i}"] = typ
+        range_sql = ""
+        if series_range:
+            range_sql = " AND trade_date BETWEEN :lo AND :hi"
+            params.update({"lo": series_range[0], "hi": series_range[1]})
+
+        with engine.connect() as conn:
+            try:
+                rows = conn.execute(text(f"""
+                    SELECT trade_date, source, `{series.type_column}` AS type_code, value
+                    FROM `{series.table}`
+                    WHERE region_code = :region AND value IS NOT NULL AND ({member_sql}){range_sql}
+                """), params).fetchall()
+                merged = merge_by_priority(
+                    pd.DataFrame(rows, columns=["trade_date", "source", "type_code", "value"]), series
+                )
+                conn.execute(
+                    text("DELETE FROM fact_series_daily WHERE series_code = :code" + range_sql),
+                    {"code": code, **({"lo": series_range[0], "hi": series_range[1]} if series_range else {})},
+                )
+                records = [
+                    {"code": code, "d": r.trade_date, "v": r.value, "src": r.source, "t": r.type_code}
+                    for r in merged.itertuples(index=False)
+                ]
+                if records:
+                    conn.execute(text("""
+                        INSERT INTO fact_series_daily (series_code, trade_date, value, source, member_type)
+                        VALUES (:code, :d, :v, :src, :t)
+                    """), records)
+                _refresh_monthly(conn, code, series_range)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        written[code] = len(merged)
+    logger.info("series materialized range=%s written=%s", date_range, written)
+    return written
+
+
+def touched_series_scope(results: dict[str, list[dict]]) -> Optional[tuple[list[str], tuple[date, date]]]:
+    """read_file 结果 → (需重算的序列, 日期范围)；未触达任何成员表时为 None"""
+    codes: list[str] = []
+    dates: list[date] = []
+    for code, series in SERIES_REGISTRY.items():
+        records = results.get(series.table) or []
+        # 只按类型判断（记录可能不带 source，使用列默认值）
+        member_types = {t for _, t in series.members}
+        hit = [
+            r["trade_date"] for r in records
+            if r.get("trade_date") and r.get("region_code") == series.region_code
+            and r.get(series.type_column) in member_types
+        ]
+        if hit:
+            codes.append(code)
+            dates.extend(hit)
+    if not codes:
+        return None
+    return codes, (min(dates), max(dates))
+
+
+def fetch_series(db, code: str, start: Optional[date] = None, end: Optional[date] = None) -> list[tuple[date, float]]:
+    """读取物化序列 [(trade_date, value)]，按日期升序；db 为 Session 或 Connection"""
+    sql = "SELECT trade_date, value FROM fact_series_daily WHERE series_code = :code"
+    params: dict = {"code": code}
+    if start:
+        sql += " AND trade_date >= :s"
+        params["s"] = start
+    if end:
+        sql += " AND trade_date <= :e"
+        params["e"] = end
+    rows = db.execute(text(sql + " ORDER BY trade_date"), params).fetchall()
+    return [(r[0], float(r[1])) for r in rows if r[1] is not None]
+
+
+def fetch_series_monthly(db, code: str) -> list[tuple[date, float]]:
+    """读取物化序列的月均值 [(当月 1 日, 均值)]，按月份升序；db 为 Session 或 Connection"""
+    rows = db.execute(text(
+        "SELECT period_date, avg_value FROM fact_series_monthly WHERE series_code = :code ORDER BY period_date"
+    ), {"code": code}).fetchall()
+    return [(r[0], float(r[1])) for r in rows if r[1] is not None]
@@ -0,0 +1,260 @@
+"""fact 表统计目录（fact_table_stats）
+
+导入写入每张表时，在同一写入事务内只对本次写入的 (表, source) 与日期范围重新统计：
+  1. 替换 fact_table_stats_daily 中该范围内的按天行数（只扫描 fact 表的该日期范围）；
+  2. 由按天行数（每个 source 每天一行，数据量小）重新汇总目录行：
+     row_count / min_date / max_date / last_batch_id / coverage（按天覆盖位图）
+覆盖写入（replace scope）在其替换事务内按整个范围重算：被删除的旧行可能落在写入日期范围之外。
+coverage 第 i 位表示 min_date + i 天有数据（np.packbits 大端位序）。
+/data-freshness 与 /dim/metrics/completeness 只读该目录，不再扫描事实表。
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 表名 → (日期列, source 列)；无 source 列的表在目录中 source 记为 ''
+STATS_TABLES: dict[str, tuple[str, Optional[str]]] = {
+    "fact_price_daily": ("trade_date", "source"),
+    "fact_spread_daily": ("trade_date", "source"),
+    "fact_slaughter_daily": ("trade_date", "source"),
+    "fact_weekly_indicator": ("week_end", "source"),
+    "fact_monthly_indicator": ("month_date", "source"),
+    "fact_enterprise_daily": ("trade_date", None),
+    "fact_enterprise_monthly": ("month_date", None),
+    "fact_carcass_market": ("trade_date", "source"),
+    "fact_futures_daily": ("trade_date", None),
+    "fact_options_daily": ("trade_date", None),
+    "fact_futures_basis": ("trade_date", None),
+    "fact_quarterly_stats": ("quarter_date", None),
+}
+
+
+def encode_coverage(days: Iterable[date]) -> tuple[Optional[date], Optional[date], bytes]:
+    """有数据的日期 → (min_date, max_date, 位图)"""
+    import numpy as np
+
+    arr = np.unique(np.array(list(days), dtype="datetime64[D]"))
+    if arr.size == 0:
+        return None, None, b""
+    offsets = (arr - arr[0]).astype(np.int64)
+    bits = np.zeros(int(offsets[-1]) + 1, dtype=np.uint8)
+    bits[offsets] = 1
+    return arr[0].item(), arr[-1].item(), np.packbits(bits).tobytes()
+
+
+def covered_days(min_date: Optional[date], coverage: Optional[bytes], start: date, end: date) -> np.ndarray:
+    """位图中落在 [start, end] 内、有数据的日期（datetime64[D] 数组）"""
+    import numpy as np
+
+    if min_date is None or not coverage or end < start:
+        return np.array([], dtype="datetime64[D]")
+    bits = np.unpackbits(np.frombuffer(coverage, dtype=np.uint8))
+    lo = max((start - min_date).days, 0)
+    hi = min((end - min_date).days, len(bits) - 1)
+    if hi < lo:
+        return np.array([], dtype="datetime64[D]")
+    offsets = np.flatnonzero(bits[lo:hi + 1]) + lo
+    return np.datetime64(min_date, "D") + offsets.astype("timedelta64[D]")
+
+
+def _source_filter(column: str, sources: Optional[list[str]]) -> tuple[str, dict]:
+    if sources is None:
+        return "", {}
+    names = [f"s{i}" for i in range(len(sources))]
+    return f" AND {column} IN ({', '.join(':' + n for n in names)})", dict(zip(names, sources))
+
+
+def _refresh_daily_counts(
+    conn, table: str, sources: Optional[list[str]], date_range: Optional[tuple[date, date]]
+) -> None:
+    """替换 fact_table_stats_daily 中 (表, source, 日期范围) 内的按天行数；date_range 为 None 时整表重扫"""
+    date_col, source_col = STATS_TABLES[table]
+    src_expr = f"COALESCE(`{source_col}`, '')" if source_col else "''"
+    daily_src, params = _source_filter("source", sources)
+    fact_src, _ = _source_filter(f"`{source_col}`", sources) if source_col else ("", {})
+    daily_range = fact_range = ""
+    if date_range is not None:
+        daily_range = " AND stat_date BETWEEN :lo AND :hi"
+        fact_range = f" AND `{date_col}` BETWEEN :lo AND :hi"
+        params.update(lo=date_range[0], hi=date_range[1])
+    conn.execute(text(
+        f"DELETE FROM fact_table_stats_daily WHERE table_name = :t{daily_src}{daily_range}"
+    ), {"t": table, **params})
+    conn.execute(text(f"""
+        INSERT INTO fact_table_stats_daily (table_name, source, stat_date, row_count)
+        SELECT :t, {src_expr}, `{date_col}`, COUNT(*) FROM `{table}`
+        WHERE `{date_col}` IS NOT NULL{fact_src}{fact_range}
+        GROUP BY {src_expr}, `{date_col}`
+    """), {"t": table, **params})
+
+
+def _daily_counts_ready(conn, table: str, sources: Optional[list[str]]) -> bool:
+    """目录中已有的 source 是否都已建立按天行数（升级前的目录只有汇总行，首次需整表重扫）"""
+    where, params = _source_filter("s.source", sources)
+    return conn.execute(text(f"""
+        SELECT 1 FROM fact_table_stats s
+        WHERE s.table_name = :t{where}
+          AND NOT EXISTS (
+              SELECT 1 FROM fact_table_stats_daily d WHERE d.table_name = s.table_name AND d.source = s.source
+          )
+        LIMIT 1
+    """), {"t": table, **params}).first() is None
+
+
+def _scope_rows(conn, table: str, sources: Optional[list[str]]) -> list[tuple[str, int, list[date]]]:
+    """由按天行数汇总一张表（可限定 source）：[(source, row_count, [有数据的日期])]"""
+    where, params = _source_filter("source", sources)
+    rows = conn.execute(text(
+        f"SELECT source, stat_date, row_count FROM fact_table_stats_daily WHERE table_name = :t{where}"
+    ), {"t": table, **params}).fetchall()
+    by_source: dict[str, tuple[int, list[date]]] = {}
+    for src, d, cnt in rows:
+        total, days = by_source.get(src, (0, []))
+        days.append(d)
+        by_source[src] = (total + cnt, days)
+    return [(src, total, days) for src, (total, days) in by_source.items()]
+
+
+def refresh_table_stats(
+    engine: Engine,
+    tables: Optional[dict[str, Optional[set[str]]]] = None,
+    batch_id: Optional[int] = None,
+    date_ranges: Optional[dict[str, tuple[date, date]]] = None,
+) -> int:
+    """独立连接单事务重算目录（cli refresh-stats 等手工全量重算）；参数同 refresh_table_stats_on"""
+    with engine.connect() as conn:
+        try:
+            written = refresh_table_stats_on(conn, tables, batch_id, date_ranges)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return written
+
+
+def refresh_table_stats_on(
+    conn,
+    tables: Optional[dict[str, Optional[set[str]]]] = None,
+    batch_id: Optional[int] = None,
+    date_ranges: Optional[dict[str, tuple[date, date]]] = None,
+) -> int:
+    """
+    在调用方的连接上重新统计并替换目录行，不提交：导入时在写入事务内调用，
+    目录与事实表一起提交或回滚。
+
+    Args:
+        tables: {表名: 本次涉及的 source 集合}；source 为 None 表示不限 source。
+                为 None 时重算 STATS_TABLES 中全部表。
+        batch_id: 写入 last_batch_id（手工全量重算时为 None）
+        date_ranges: {表名: (起始日期, 结束日期)}，只重扫 fact 表的该范围；
+                     未给出的表（或按天行数尚未建立的表）整表重扫
+
+    Returns:
+        写入的目录行数
+    """
+    if tables is None:
+        tables = {t: None for t in STATS_TABLES}
+    date_ranges = date_ranges or {}
+    written = 0
+    for table, sources in tables.items():
+        if table not in STATS_TABLES:
+            continue
+        has_source = STATS_TABLES[table][1] is not None
+        source_list = sorted(sources) if (has_source and sources) else None
+        date_range = date_ranges.get(table)
+        if date_range is not None and not _daily_counts_ready(conn, table, source_list):
+            date_range = None
+        _refresh_daily_counts(conn, table, source_list, date_range)
+        stats = _scope_rows(conn, table, source_list)
+
+        # 先删除范围内旧行：source 限定时只删这些 source，否则整表
+        where, params = _source_filter("source", source_list)
+        conn.execute(text(
+            f"DELETE FROM fact_table_stats WHERE table_name = :t{where}"
+        ), {"t": table, **params})
+
+        for source, row_count, days in stats:
+            min_d, max_d, bitmap = encode_coverage(days)
+            conn.execute(text("""
+                INSERT INTO fact_table_stats
+                    (table_name, source, row_count, min_date, max_date, coverage, last_batch_id)
+                VALUES (:t, :s, :n, :mn, :mx, :cov, :b)
+            """), {"t": table, "s": source, "n": row_count, "mn": min_d, "mx": max_d,
+                   "cov": bitmap, "b": batch_id})
+            written += 1
+    logger.info(
+        "fact_table_stats refreshed tables=%d ranged=%d rows=%d batch_id=%s",
+        len(tables), len(date_ranges), written, batch_id,
+    )
+    return written
+
+
+def load_table_stats(conn) -> list[dict]:
+    """读取目录全部行（按表名、source 排序）"""
+    rows = conn.execute(text("""
+        SELECT table_name, source, row_count, min_date, max_date, coverage, last_batch_id, updated_at
+        FROM fact_table_stats ORDER BY table_name, source
+    """)).fetchall()
+    return [
+        {
+            "table_name": r[0], "source": r[1], "row_count": r[2] or 0,
+            "min_date": r[3], "max_date": r[4], "coverage": r[5],
+            "last_batch_id": r[6], "updated_at": r[7],
+        }
+        for r in rows
+    ]
+
+
+def window_coverage(stats: list[dict], start: date, end: date) -> dict:
+    """合并多行（如同表多个 source）的覆盖位图，返回窗口内覆盖情况"""
+    import numpy as np
+
+    days = [covered_days(s["min_date"], s["coverage"], start, end) for s in stats]
+    merged = np.unique(np.concatenate(days)) if days else np.array([], dtype="datetime64[D]")
+    window = (end - start).days + 1
+    latest = merged[-1].item() if merged.size else None
+    return {
+        "days_covered": int(merged.size),
+        "missing_days": max(window - int(merged.size), 0),
+        "coverage_ratio": round(merged.size / window, 4) if window > 0 else 0.0,
+        "latest_date": latest,
+    }
+
+
+def touched_scope(results: dict[str, list[dict]]) -> dict[str, Optional[set[str]]]:
+    """read_file 结果 → {表: 涉及的 source 集合}"""
+    scope: dict[str, Optional[set[str]]] = {}
+    for table, records in results.items():
+        if not records or table not in STATS_TABLES:
+            continue
+        source_col = STATS_TABLES[table][1]
+        if source_col is None:
+            scope[table] = None
+            continue
+        sources = {r.get(source_col) for r in records}
+        # 记录未带 source 时使用列默认值，范围无法确定 → 整表重算
+        scope[table] = None if None in sources else sources
+    return scope
+
+
+def touched_stats_range(results: dict[str, list[dict]]) -> dict[str, tuple[date, date]]:
+    """read_file 结果 → {表: (最小日期, 最大日期)}"""
+    ranges: dict[str, tuple[date, date]] = {}
+    for table, records in results.items():
+        if not records or table not in STATS_TABLES:
+            continue
+        date_col = STATS_TABLES[table][0]
+        dates = [r[date_col] for r in records if r.get(date_col)]
+        if dates:
+            ranges[table] = (min(dates), max(dates))
+    return ranges
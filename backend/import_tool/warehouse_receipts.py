@@ -0,0 +1,157 @@
+"""注册仓单序列层
+
+r01 把「仓单数据」sheet 写入 fact_futures_basis（indicator_code = warehouse_receipt_total /
+warehouse_receipt_{库名}），接口若直接读取只能按 LIKE 'warehouse_receipt%' 前缀扫描再在 Python 里透视。
+这里把仓库规范化为 dim_receipt_warehouse，逐日数值物化到 fact_warehouse_receipt_daily
+(trade_date, warehouse_id)；导入后只重算本批次触达的日期范围。C4 页面读取时先取维度（几十行），
+再用一条条件聚合 SQL 在库内完成「日期 × 仓库」透视（fetch_receipt_matrix）。
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+INDICATOR_PREFIX = "warehouse_receipt_"
+TOTAL_INDICATOR = "warehouse_receipt_total"
+# LIKE 中 _ 为通配符，需转义
+_PREFIX_LIKE = r"warehouse\_receipt%"
+
+# 注册仓单图例显示名：原始仓库名 -> 前端图例显示名
+WAREHOUSE_LEGEND_DISPLAY = {
+    "粮肉食库": "中粮",
+    "中粮肉食库": "中粮",
+    "德康农牧库": "德康",
+}
+
+
+@dataclass(frozen=True)
+class ReceiptWarehouse:
+    id: int
+    indicator_code: str
+    warehouse_name: str
+    display_name: str
+    is_total: bool
+
+
+def warehouse_display_name(raw_name: str) -> str:
+    return WAREHOUSE_LEGEND_DISPLAY.get(raw_name, raw_name)
+
+
+def _warehouse_row(indicator_code: str) -> dict:
+    """indicator_code → dim_receipt_warehouse 行（总仓单 warehouse_name 为空串）"""
+    is_total = indicator_code == TOTAL_INDICATOR
+    name = "" if is_total else indicator_code[len(INDICATOR_PREFIX):]
+    return {
+        "code": indicator_code, "name": name,
+        "display": "总仓单量" if is_total else warehouse_display_name(name), "total": int(is_total),
+    }
+
+
+def refresh_warehouse_receipts(engine: Engine, date_range: Optional[tuple[date, date]] = None) -> int:
+    """
+    重算仓单物化表（单事务：补齐维度 → 删除范围内旧行 → INSERT ... SELECT 写入）。
+
+    fact_futures_basis 的唯一键含可空列，同一仓库同日可能有多行，按 id 顺序写入、后写覆盖先写。
+
+    Args:
+        date_range: 只重算该日期范围；None 表示全量
+
+    Returns:
+        写入行数
+    """
+    params: dict = {"prefix": _PREFIX_LIKE}
+    range_sql = ""
+    if date_range:
+        range_sql = " AND trade_date BETWEEN :lo AND :hi"
+        params.update({"lo": date_range[0], "hi": date_range[1]})
+
+    with engine.connect() as conn:
+        try:
+            codes = conn.execute(text(
+                "SELECT DISTINCT indicator_code FROM fact_futures_basis WHERE indicator_code LIKE :prefix" + range_sql
+            ), params).scalars().all()
+            if codes:
+                conn.execute(text("""
+                    INSERT INTO dim_receipt_warehouse (indicator_code, warehouse_name, display_name, is_total)
+                    VALUES (:code, :name, :display, :total)
+                    ON DUPLICATE KEY UPDATE warehouse_name = VALUES(warehouse_name),
+                        display_name = VALUES(display_name), is_total = VALUES(is_total)
+                """), [_warehouse_row(c) for c in codes])
+            conn.execute(text("DELETE FROM fact_warehouse_receipt_daily WHERE 1 = 1" + range_sql), params)
+            written = conn.execute(text(f"""
+                INSERT INTO fact_warehouse_receipt_daily (trade_date, warehouse_id, value)
+                SELECT b.trade_date, w.id, b.value
+                FROM fact_futures_basis b
+                JOIN dim_receipt_warehouse w ON w.indicator_code = b.indicator_code
+                WHERE b.indicator_code LIKE :prefix AND b.value IS NOT NULL{range_sql}
+                ORDER BY b.id
+                ON DUPLICATE KEY UPDATE value = VALUES(value)
+            """), params).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info("warehouse receipts materialized range=%s warehouses=%d written=%d", date_range, len(codes), written)
+    return written
+
+
+def touched_receipt_range(results: dict[str, list[dict]]) -> Optional[tuple[date, date]]:
+    """read_file 结果 → 需重算的仓单日期范围；本批次无仓单记录时为 None"""
+    dates = [
+        r["trade_date"] for r in results.get("fact_futures_basis") or []
+        if r.get("trade_date") and str(r.get("indicator_code") or "").startswith(INDICATOR_PREFIX)
+    ]
+    if not dates:
+        return None
+    return min(dates), max(dates)
+
+
+def load_receipt_warehouses(db) -> list[ReceiptWarehouse]:
+    """读取仓库维度，按 id（首次出现顺序）排列；db 为 Session 或 Connection"""
+    rows = db.execute(text(
+        "SELECT id, indicator_code, warehouse_name, display_name, is_total FROM dim_receipt_warehouse ORDER BY id"
+    )).fetchall()
+    return [ReceiptWarehouse(r[0], r[1], r[2], r[3], bool(r[4])) for r in rows]
+
+
+def latest_receipt_date(db) -> Optional[date]:
+    return db.execute(text("SELECT MAX(trade_date) FROM fact_warehouse_receipt_daily")).scalar()
+
+
+def fetch_receipt_matrix(
+    db,
+    warehouses: list[ReceiptWarehouse],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    descending: bool = False,
+) -> list[tuple[date, list[Optional[float]]]]:
+    """
+    单条 SQL 在库内透视：[(trade_date, [warehouses[0] 的值, warehouses[1] 的值, ...])]。
+    只返回至少一个所选仓库有值的日期；缺值为 None。
+    """
+    if not warehouses:
+        return []
+    params: dict = {f"w{i}": w.id for i, w in enumerate(warehouses)}
+    pivot_sql = ", ".join(
+        f"MAX(CASE WHEN warehouse_id = :w{i} THEN value END) AS c{i}" for i in range(len(warehouses))
+    )
+    sql = (
+        f"SELECT trade_date, {pivot_sql} FROM fact_warehouse_receipt_daily "
+        f"WHERE warehouse_id IN ({', '.join(f':w{i}' for i in range(len(warehouses)))})"
+    )
+    if start:
+        sql += " AND trade_date >= :s"
+        params["s"] = start
+    if end:
+        sql += " AND trade_date <= :e"
+        params["e"] = end
+    sql += f" GROUP BY trade_date ORDER BY trade_date{' DESC' if descending else ''}"
+    rows = db.execute(text(sql), params).fetchall()
+    return [(r[0], [float(v) if v is not None else None for v in r[1:]]) for r in rows]
@@ -7,9 +7,10 @@ from app.api import (
     observation, price_display, enterprise_statistics, sales_plan,
     structure_analysis, group_price, production_indicators, multi_source,
     supply_demand, statistics_bureau, ingest, query, export, data_freshness,
-    internal, users_admin,
+    internal, users_admin, reports,
 )
 from app.middleware.chart_timing_and_cache import ChartTimingAndCacheMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 from app.middleware.request_logging import RequestLoggingMiddleware
 
 # 全局抑制常见警告
@@ -32,6 +33,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(ChartTimingAndCacheMiddleware)
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
 # 注册路由 —— 核心业务 API（已改写为 hogprice_v3）
@@ -57,6 +59,8 @@ app.include_router(ingest.router)
 # 通用查询 & 导出（精简版）
 app.include_router(query.router)
 app.include_router(export.router)
+# 报告任务（提交 / 状态 / 下载）
+app.include_router(reports.router)
 # 数据新鲜度
 app.include_router(data_freshness.router)
 # 内部接口（脚本/cron 刷新缓存等，不通过 Web）
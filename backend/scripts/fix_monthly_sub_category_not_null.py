@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+将 fact_monthly_indicator.sub_category 规范为 NOT NULL DEFAULT ''。
+多渠道汇总等查询直接按 sub_category = '' 过滤，不再需要 COALESCE，可以走 idx_indicator_date。
+运行：cd backend && python scripts/fix_monthly_sub_category_not_null.py
+"""
+import os
+import sys
+
+# 确保 backend 在 path 中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+
+def main():
+    url = getattr(settings, "DATABASE_URL", None) or os.getenv("DATABASE_URL")
+    if not url:
+        print("DATABASE_URL not set")
+        sys.exit(1)
+    if "mysql" not in url.lower() and "mariadb" not in url.lower():
+        print("Skip: only MySQL/MariaDB supported")
+        sys.exit(0)
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        # 已存在同键 '' 行的 NULL 行是重复数据：UPDATE IGNORE 跳过后删除
+        updated = conn.execute(text(
+            "UPDATE IGNORE fact_monthly_indicator SET sub_category = '' WHERE sub_category IS NULL"
+        )).rowcount
+        deleted = conn.execute(text(
+            "DELETE FROM fact_monthly_indicator WHERE sub_category IS NULL"
+        )).rowcount
+        conn.execute(text(
+            "ALTER TABLE fact_monthly_indicator MODIFY sub_category VARCHAR(64) NOT NULL DEFAULT ''"
+        ))
+    print(f"OK: fact_monthly_indicator.sub_category -> NOT NULL (updated={updated}, deleted_dup={deleted})")
+
+
+if __name__ == "__main__":
+    main()
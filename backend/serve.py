@@ -0,0 +1,37 @@
+"""
+生产启动入口：python serve.py
+
+- Linux / macOS：exec gunicorn -c gunicorn.conf.py（uvicorn worker + preload_app，共享状态 fork 前加载）
+- Windows（无 gunicorn）：uvicorn 多进程模式，各 worker 独立导入应用，共享状态按需构建
+worker 数与监听地址见 Settings.WEB_WORKERS / WEB_BIND。开发调试仍用 uvicorn main:app --reload。
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def main() -> None:
+    os.chdir(BACKEND_DIR)
+    gunicorn = shutil.which("gunicorn")
+    if sys.platform != "win32" and gunicorn:
+        os.execv(gunicorn, [gunicorn, "-c", str(BACKEND_DIR / "gunicorn.conf.py")])
+
+    import uvicorn
+    from app.core.config import settings
+
+    host, _, port = settings.WEB_BIND.rpartition(":")
+    uvicorn.run(
+        "main:app",
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=settings.WEB_WORKERS,
+        timeout_keep_alive=settings.WEB_KEEPALIVE,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""import_tool 单元测试"""
@@ -0,0 +1,128 @@
+"""BaseSheetReader 分段计时测试"""
+import pytest
+from import_tool.base_reader import BaseSheetReader
+
+
+def test_track_sheet_records_rows_and_callback():
+    """测试 sheet 计时记录产出行数并回调 on_stage"""
+    seen = []
+    reader = BaseSheetReader(engine=None, batch_id=1, on_stage=seen.append)
+    price, spread = [{"v": 0}], []
+
+    with reader.track_sheet("出栏价", price, spread):
+        price.extend([{"v": 1}, {"v": 2}])
+        spread.append({"v": 3})
+
+    assert len(reader.stages) == 1
+    stage = reader.stages[0]
+    assert stage.kind == "sheet"
+    assert stage.name == "出栏价"
+    assert stage.row_count == 3
+    assert stage.status == "success"
+    assert seen == [stage]
+
+
+def test_track_sheet_marks_failed_and_reraises():
+    """测试 sheet 解析异常时记为 failed 并继续抛出"""
+    reader = BaseSheetReader(engine=None, batch_id=1)
+    with pytest.raises(ValueError):
+        with reader.track_sheet("坏 sheet"):
+            raise ValueError("boom")
+    assert reader.stages[0].status == "failed"
+    assert reader.stages[0].error_msg == "boom"
+
+
+class _FakeResult:
+    rowcount = 3
+
+    def fetchall(self):
+        return []
+
+
+class _FakeConn:
+    def __init__(self, log, fail_on=None):
+        self.log = log
+        self.fail_on = fail_on
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.log.append(sql)
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise RuntimeError("boom")
+        return _FakeResult()
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+
+class _FakeEngine:
+    def __init__(self, fail_on=None):
+        self.log = []
+        self.fail_on = fail_on
+
+    def connect(self):
+        return _FakeConn(self.log, self.fail_on)
+
+
+def _swap_reader(engine):
+    reader = BaseSheetReader(engine=engine, batch_id=0)
+    reader._uk_cache = {
+        "fact_spread_daily": {"PRIMARY": ["id"], "uk_spread": ["trade_date", "source", "spread_type"]},
+        "fact_price_daily": {"PRIMARY": ["id"], "uk_price": ["trade_date", "source"]},
+    }
+    return reader
+
+
+def test_replace_scope_swaps_in_one_transaction(monkeypatch):
+    """测试覆盖写入：临时表加载后在同一事务内反连接删除旧行 + upsert，只提交一次"""
+    import import_tool.base_reader as base_reader
+    from import_tool.replace_scope import DeleteRule
+
+    monkeypatch.setattr(base_reader, "refresh_replaced_derived", lambda engine, scope: None)
+    monkeypatch.setattr(BaseSheetReader, "refresh_derived", lambda self, results: None)
+    engine = _FakeEngine()
+    reader = _swap_reader(engine)
+    reader.replace_scope = {
+        "fact_spread_daily": [DeleteRule("fact_spread_daily", "GANGLIAN", "spread_type = 'mao_bai_spread'")],
+    }
+    results = {
+        "fact_spread_daily": [{"trade_date": "2024-01-02", "source": "GANGLIAN", "spread_type": "mao_bai_spread", "value": 1.0}],
+        "fact_price_daily": [],
+    }
+
+    counts = reader.insert_all(results, replace_scope={"fact_price_daily": None})
+
+    log = engine.log
+    assert counts == {"fact_spread_daily": 1, "fact_price_daily": 0}
+    assert log.count("COMMIT") == 1 and log[-1] == "COMMIT"
+    assert log.index("ALTER TABLE `_tmp_fact_spread_daily` DROP INDEX `uk_spread`, "
+                     "ADD INDEX `_swap_lookup` (`trade_date`, `source`, `spread_type`)") \
+        < log.index("INSERT INTO `_tmp_fact_spread_daily` (`trade_date`, `source`, `spread_type`, `value`) "
+                    "VALUES (:trade_date, :source, :spread_type, :value)")
+    deletes = [sql for sql in log if sql.startswith("DELETE")]
+    assert "NOT EXISTS (SELECT 1 FROM `_tmp_fact_spread_daily` s" in deletes[0]
+    assert "spread_type = 'mao_bai_spread'" in deletes[0]
+    assert deletes[1] == "DELETE FROM `fact_price_daily` WHERE 1 = 1"
+    # 统计目录在同一事务内、提交之前按整个覆盖范围重算
+    assert any(sql.startswith("DELETE FROM fact_table_stats WHERE") for sql in log[:log.index("COMMIT")])
+    assert reader.replaced_rows == {"fact_spread_daily": 3, "fact_price_daily": 3}
+
+
+def test_replace_scope_failure_rolls_back():
+    """测试覆盖写入失败时回滚且不提交，旧数据不受影响"""
+    engine = _FakeEngine(fail_on="INSERT INTO `fact_spread_daily`")
+    reader = _swap_reader(engine)
+    frames = {"fact_spread_daily": reader._prepare_frame([{"trade_date": "2024-01-02", "source": "GANGLIAN", "spread_type": "x", "value": 2.0}])}
+    with pytest.raises(RuntimeError):
+        reader._swap_scope(frames, {"fact_spread_daily": None})
+    assert "COMMIT" not in engine.log and "ROLLBACK" in engine.log
+    assert reader.stages[0].status == "failed"
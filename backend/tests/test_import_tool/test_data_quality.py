@@ -0,0 +1,89 @@
+"""数据质量扫描测试"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from import_tool.data_quality import missing_periods, rolling_zscores, scan_series
+
+
+def test_rolling_zscores_flags_jump_not_trend():
+    """测试稳定趋势不报异常，单日跳变报异常"""
+    values = 10 + 0.1 * np.arange(80) + np.tile([0.02, -0.02], 40)
+    z, _, _ = rolling_zscores(values, 60, 20)
+    assert np.nanmax(np.abs(z)) < 3
+    values[70] += 5
+    z, mean, std = rolling_zscores(values, 60, 20)
+    assert np.nanargmax(np.abs(z)) == 70
+    assert abs(mean[70] - 0.1) < 1e-6 and std[70] > 0
+
+
+def test_missing_periods_by_freq():
+    """测试日度按工作日、周度按 7 天、月度按自然月计缺失期数"""
+    d = np.array(["2024-01-05", "2024-01-08", "2024-01-12"], dtype="datetime64[D]")  # 周五、周一、周五
+    assert missing_periods(d, "D").tolist() == [0, 3]
+    w = np.array(["2024-01-05", "2024-01-12", "2024-02-02"], dtype="datetime64[D]")
+    assert missing_periods(w, "W").tolist() == [0, 2]
+    m = np.array(["2024-01-01", "2024-04-01"], dtype="datetime64[D]")
+    assert missing_periods(m, "M").tolist() == [2]
+
+
+def test_scan_series_gap_run():
+    """测试缺失区间的起止日期"""
+    dates = [date(2024, 1, 1) + timedelta(days=i) for i in range(5)] + [date(2024, 1, 15)]
+    findings = scan_series(dates, [15.0] * 6, "D")
+    assert findings == [{
+        "finding_type": "gap", "start_date": date(2024, 1, 6), "end_date": date(2024, 1, 14),
+        "value": None, "change_value": None, "mean": None, "std": None, "zscore": None,
+        "missing_periods": 5,
+    }]
+
+
+def test_anomalies_value_threshold_reads_fact_tables():
+    """测试 /anomalies 给出值阈值时返回超出阈值的观测，已记为 z-score 异常的观测不重复"""
+    import asyncio
+    import sqlite3
+    from types import SimpleNamespace
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+
+    from app.api.reconciliation import get_anomalies
+
+    engine = create_engine("sqlite://", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        for table, type_col, val_col in (
+            ("fact_price_daily", "price_type", "value"),
+            ("fact_spread_daily", "spread_type", "value"),
+            ("fact_slaughter_daily", None, "volume"),
+        ):
+            type_def = f"{type_col} TEXT, " if type_col else ""
+            conn.execute(text(
+                f"CREATE TABLE {table} (trade_date DATE, {type_def}region_code TEXT, source TEXT, {val_col} REAL)"
+            ))
+        conn.execute(text(
+            "CREATE TABLE data_quality_findings (id INTEGER PRIMARY KEY, table_name TEXT, type_code TEXT, "
+            "region_code TEXT, source TEXT, finding_type TEXT, start_date DATE, end_date DATE, value REAL, "
+            "change_value REAL, mean_value REAL, std_value REAL, zscore REAL)"
+        ))
+        conn.execute(text("INSERT INTO fact_price_daily VALUES (:d, 'hog', 'NATION', 'YONGYI', :v)"), [
+            {"d": date(2026, 1, 1), "v": 14.0},
+            {"d": date(2026, 1, 2), "v": 30.0},
+            {"d": date(2026, 1, 3), "v": 8.0},
+        ])
+        conn.execute(text(
+            "INSERT INTO data_quality_findings (table_name, type_code, region_code, source, finding_type, "
+            "start_date, end_date, value, change_value, mean_value, std_value, zscore) "
+            "VALUES ('fact_price_daily', 'hog', 'NATION', 'YONGYI', 'anomaly', :d, :d, 30, 16, 0.1, 1, 5.2)"
+        ), {"d": date(2026, 1, 2)})
+
+    def _call(**kwargs):
+        args = dict(indicator_code=None, region_code=None, freq="D", source=None, start_date=None,
+                    end_date=None, min_value=None, max_value=None, std_multiplier=3.0, limit=100, offset=0)
+        args.update(kwargs)
+        with Session(engine) as db:
+            return asyncio.run(get_anomalies(current_user=SimpleNamespace(id=1), db=db, **args))
+
+    assert [a["date"] for a in _call().anomalies] == ["2026-01-02"]
+    resp = _call(min_value=10.0, max_value=20.0, indicator_code="hog")
+    assert resp.total == 2
+    assert [(a["date"], a["deviation"]) for a in resp.anomalies] == [("2026-01-03", None), ("2026-01-02", 5.2)]
@@ -0,0 +1,62 @@
+"""图表只读副本导出范围测试"""
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from import_tool.parquet_replica import touched_replica_scope
+
+
+def test_touched_replica_scope():
+    """测试按表收集触达年份，fact_price_daily 触达时规范序列同步重导，非副本表忽略"""
+    scope = touched_replica_scope({
+        "fact_price_daily": [{"trade_date": date(2024, 12, 31)}, {"trade_date": date(2025, 1, 2)}],
+        "fact_weekly_indicator": [{"week_end": date(2023, 6, 4)}, {"week_end": None}],
+        "fact_enterprise_daily": [{"trade_date": date(2024, 1, 1)}],
+        "fact_spread_daily": [],
+    })
+    assert scope == {
+        "fact_price_daily": {2024, 2025},
+        "fact_weekly_indicator": {2023},
+        "fact_series_daily": {2024, 2025},
+    }
+
+
+def test_replica_dir_does_not_load_app_settings():
+    """测试导入侧读取副本目录不导入 app 配置（其 load_dotenv(override=True) 会改写进程环境变量）"""
+    code = (
+        "import sys, import_tool.parquet_replica as r; r.replica_dir(); "
+        "assert 'app.core.config' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).resolve().parents[2])
+
+
+def test_import_refreshes_replica_configured_in_dotenv(monkeypatch, tmp_path):
+    """测试副本目录只在 .env 中配置时，导入后的派生步骤同样刷新触达的年份分区"""
+    from sqlalchemy import create_engine, text
+
+    import import_tool.parquet_replica as parquet_replica
+    from import_tool.base_reader import BaseSheetReader
+    from import_tool.parquet_replica import partition_path, replica_dir
+
+    env_file = tmp_path / ".env"
+    env_file.write_text(f"CHART_REPLICA_DIR={tmp_path}\n", encoding="utf-8")
+    monkeypatch.setattr(parquet_replica, "ENV_PATH", env_file)
+    monkeypatch.delenv("CHART_REPLICA_DIR", raising=False)
+    assert replica_dir() == tmp_path
+
+    pytest.importorskip("pyarrow")
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE fact_price_daily (trade_date DATE, region_code TEXT, value REAL)"))
+        conn.execute(text("INSERT INTO fact_price_daily VALUES ('2025-03-03', 'NATION', 14.2)"))
+        conn.execute(text("CREATE TABLE fact_series_daily (series_code TEXT, trade_date DATE, value REAL)"))
+
+    reader = BaseSheetReader(engine=engine, batch_id=1)
+    reader.refresh_derived({"fact_price_daily": [{"trade_date": date(2025, 3, 3), "region_code": "NATION"}]})
+
+    stage = next(s for s in reader.stages if s.name == "parquet_replica")
+    assert stage.status == "success" and stage.row_count == 1
+    assert partition_path(tmp_path, "fact_price_daily", 2025).exists()
@@ -0,0 +1,30 @@
+"""日度表周/月汇总范围测试"""
+from datetime import date
+
+from import_tool.rollups import period_end, period_start, touched_rollup_scope
+
+
+def test_period_bounds():
+    """测试周期起止：周为 ISO 周一至周日，月为自然月"""
+    d = date(2024, 2, 14)  # 周三
+    assert period_start(d, "W") == date(2024, 2, 12)
+    assert period_end(d, "W") == date(2024, 2, 18)
+    assert period_start(d, "M") == date(2024, 2, 1)
+    assert period_end(d, "M") == date(2024, 2, 29)
+    assert period_end(date(2024, 12, 31), "M") == date(2024, 12, 31)
+
+
+def test_touched_rollup_scope():
+    """测试只对日度表计算触达范围"""
+    scope = touched_rollup_scope({
+        "fact_price_daily": [
+            {"trade_date": date(2024, 3, 5), "source": "YONGYI"},
+            {"trade_date": date(2024, 1, 2), "source": "YONGYI"},
+        ],
+        "fact_slaughter_daily": [{"trade_date": date(2024, 3, 1)}],
+        "fact_weekly_indicator": [{"week_end": date(2024, 3, 1), "source": "YONGYI"}],
+    })
+    assert scope == {
+        "fact_price_daily": ((date(2024, 1, 2), date(2024, 3, 5)), {"YONGYI"}),
+        "fact_slaughter_daily": ((date(2024, 3, 1), date(2024, 3, 1)), None),
+    }
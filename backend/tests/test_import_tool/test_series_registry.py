@@ -0,0 +1,55 @@
+"""规范序列优先级合并测试"""
+from datetime import date
+
+import pandas as pd
+
+from import_tool.series_registry import SERIES_REGISTRY, merge_by_priority, touched_series_scope
+
+
+def test_merge_by_priority_per_day():
+    """测试逐日取优先级最高的成员，高优先级缺日由低优先级填补"""
+    series = SERIES_REGISTRY["national_spot"]
+    rows = pd.DataFrame([
+        (date(2024, 1, 1), "GANGLIAN", "hog_avg_price", 14.2),
+        (date(2024, 1, 1), "YONGYI", "全国均价", 14.0),
+        (date(2024, 1, 2), "YONGYI", "标猪均价", 13.9),
+        (date(2024, 1, 2), "YONGYI", "全国均价", 13.8),
+        (date(2024, 1, 3), "YONGYI", "其他", 99.0),
+    ], columns=["trade_date", "source", "type_code", "value"])
+    merged = merge_by_priority(rows, series)
+    assert merged["trade_date"].tolist() == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert merged["value"].tolist() == [14.2, 13.8]
+    assert merged["source"].tolist() == ["GANGLIAN", "YONGYI"]
+
+
+def test_merge_by_priority_per_year_and_series():
+    """测试逐年 / 整条序列择一：选中成员之外的行即使当日有值也不混入"""
+    rows = pd.DataFrame([
+        (date(2023, 1, 2), "YONGYI", "全国均价", 15.0),
+        (date(2023, 1, 3), "GANGLIAN", "hog_avg_price", 15.2),
+        (date(2024, 1, 2), "YONGYI", "标猪均价", 14.0),
+        (date(2024, 1, 3), "YONGYI", "全国均价", 13.8),
+    ], columns=["trade_date", "source", "type_code", "value"])
+
+    by_year = merge_by_priority(rows, SERIES_REGISTRY["national_seasonal"])
+    assert by_year["trade_date"].tolist() == [date(2023, 1, 2), date(2024, 1, 2)]
+    assert by_year["type_code"].tolist() == ["全国均价", "标猪均价"]
+
+    whole = merge_by_priority(rows, SERIES_REGISTRY["supply_demand_price"])
+    assert whole["trade_date"].tolist() == [date(2023, 1, 3)]
+    assert whole["source"].tolist() == ["GANGLIAN"]
+
+
+def test_touched_series_scope():
+    """测试只有全国成员类型的记录触发重算"""
+    scope = touched_series_scope({
+        "fact_price_daily": [
+            {"trade_date": date(2024, 3, 5), "region_code": "NATION", "price_type": "标猪均价"},
+            {"trade_date": date(2024, 1, 2), "region_code": "HENAN", "price_type": "标猪均价"},
+        ],
+    })
+    assert scope == (
+        ["national_spot", "national_std_hog", "national_seasonal", "supply_demand_price"],
+        (date(2024, 3, 5), date(2024, 3, 5)),
+    )
+    assert touched_series_scope({"fact_spread_daily": [{"trade_date": date(2024, 1, 1)}]}) is None
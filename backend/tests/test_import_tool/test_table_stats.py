@@ -0,0 +1,93 @@
+"""fact_table_stats 覆盖位图测试"""
+import sqlite3
+from datetime import date
+
+from sqlalchemy import create_engine, event, text
+
+from import_tool.table_stats import (
+    encode_coverage, load_table_stats, refresh_table_stats, touched_scope, touched_stats_range, window_coverage,
+)
+
+
+def test_coverage_bitmap_roundtrip_and_window():
+    """测试位图编码后按窗口统计覆盖天数，多 source 合并去重"""
+    mn, mx, bitmap = encode_coverage([date(2026, 1, 10), date(2026, 1, 1), date(2026, 1, 3)])
+    assert (mn, mx) == (date(2026, 1, 1), date(2026, 1, 10))
+    other = encode_coverage([date(2026, 1, 3), date(2026, 1, 4)])
+
+    stats = [
+        {"min_date": mn, "coverage": bitmap},
+        {"min_date": other[0], "coverage": other[2]},
+    ]
+    cov = window_coverage(stats, date(2026, 1, 2), date(2026, 1, 8))
+    assert cov["days_covered"] == 2  # 1/3、1/4
+    assert cov["missing_days"] == 5
+    assert cov["latest_date"] == date(2026, 1, 4)
+    assert window_coverage([], date(2026, 1, 1), date(2026, 1, 7))["days_covered"] == 0
+
+
+def test_touched_scope():
+    """测试按 source 限定重算范围，缺 source 或无 source 列时整表重算"""
+    scope = touched_scope({
+        "fact_price_daily": [{"source": "YONGYI"}, {"source": "GANGLIAN"}],
+        "fact_weekly_indicator": [{"value": 1}],
+        "fact_futures_daily": [{"close": 1}],
+        "fact_spread_daily": [],
+    })
+    assert scope == {
+        "fact_price_daily": {"YONGYI", "GANGLIAN"},
+        "fact_weekly_indicator": None,
+        "fact_futures_daily": None,
+    }
+
+
+def _stats_engine():
+    engine = create_engine("sqlite://", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE fact_price_daily (trade_date DATE, source TEXT, value REAL)"))
+        conn.execute(text(
+            "CREATE TABLE fact_table_stats (table_name TEXT, source TEXT, row_count INTEGER, min_date DATE, "
+            "max_date DATE, coverage BLOB, last_batch_id INTEGER, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+            "PRIMARY KEY (table_name, source))"
+        ))
+        conn.execute(text(
+            "CREATE TABLE fact_table_stats_daily (table_name TEXT, source TEXT, stat_date DATE, row_count INTEGER, "
+            "PRIMARY KEY (table_name, source, stat_date))"
+        ))
+    return engine
+
+
+def test_refresh_rescans_only_touched_range():
+    """测试导入后只重扫写入日期范围，目录行数与覆盖位图与整表重算一致"""
+    engine = _stats_engine()
+    insert = text("INSERT INTO fact_price_daily VALUES (:d, :s, 1)")
+    with engine.begin() as conn:
+        conn.execute(insert, [
+            {"d": date(2025, 1, 1), "s": "YONGYI"},
+            {"d": date(2025, 1, 1), "s": "YONGYI"},
+            {"d": date(2025, 6, 1), "s": "GANGLIAN"},
+        ])
+    refresh_table_stats(engine, {"fact_price_daily": None})
+
+    new_rows = [
+        {"trade_date": date(2026, 3, 2), "source": "YONGYI"},
+        {"trade_date": date(2026, 3, 4), "source": "YONGYI"},
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert, [{"d": r["trade_date"], "s": r["source"]} for r in new_rows])
+    results = {"fact_price_daily": new_rows}
+    assert touched_stats_range(results) == {"fact_price_daily": (date(2026, 3, 2), date(2026, 3, 4))}
+
+    scans = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cur, sql, params, *a: scans.append(params) if "FROM `fact_price_daily`" in sql else None)
+    refresh_table_stats(engine, touched_scope(results), 7, touched_stats_range(results))
+    assert len(scans) == 1 and date(2026, 3, 2) in scans[0]
+
+    with engine.connect() as conn:
+        stats = {s["source"]: s for s in load_table_stats(conn)}
+    yongyi = stats["YONGYI"]
+    assert yongyi["row_count"] == 4 and yongyi["last_batch_id"] == 7
+    assert (yongyi["min_date"], yongyi["max_date"]) == (date(2025, 1, 1), date(2026, 3, 4))
+    assert stats["GANGLIAN"]["row_count"] == 1
+    assert window_coverage([yongyi], date(2026, 3, 1), date(2026, 3, 31))["days_covered"] == 2
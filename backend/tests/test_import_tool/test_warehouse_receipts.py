@@ -0,0 +1,59 @@
+"""注册仓单序列层测试：导入范围推导与库内透视（SQLite 内存库）"""
+from datetime import date
+
+from sqlalchemy import create_engine, text
+
+from import_tool.warehouse_receipts import fetch_receipt_matrix, load_receipt_warehouses, touched_receipt_range
+
+
+def test_touched_receipt_range():
+    """测试只有仓单指标触发重算"""
+    assert touched_receipt_range({
+        "fact_futures_basis": [
+            {"trade_date": date(2024, 3, 5), "indicator_code": "warehouse_receipt_德康农牧库"},
+            {"trade_date": date(2024, 3, 1), "indicator_code": "warehouse_receipt_total"},
+            {"trade_date": date(2023, 1, 1), "indicator_code": "basis_03"},
+        ],
+    }) == (date(2024, 3, 1), date(2024, 3, 5))
+    assert touched_receipt_range({"fact_futures_basis": [{"trade_date": date(2024, 1, 1), "indicator_code": "spread_03_05"}]}) is None
+
+
+def test_fetch_receipt_matrix_pivots_in_one_query():
+    """测试维度读取与「日期 × 仓库」透视：列顺序与维度一致，缺值为 None，只返回有值的日期"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE dim_receipt_warehouse (
+                id INTEGER PRIMARY KEY, indicator_code VARCHAR(64) NOT NULL UNIQUE,
+                warehouse_name VARCHAR(64) NOT NULL, display_name VARCHAR(64) NOT NULL, is_total INTEGER NOT NULL
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE fact_warehouse_receipt_daily (
+                trade_date DATE NOT NULL, warehouse_id INTEGER NOT NULL, value DECIMAL(18,4) NOT NULL,
+                PRIMARY KEY (trade_date, warehouse_id)
+            )
+        """))
+        conn.execute(text(
+            "INSERT INTO dim_receipt_warehouse VALUES "
+            "(1, 'warehouse_receipt_total', '', '总仓单量', 1), "
+            "(2, 'warehouse_receipt_德康农牧库', '德康农牧库', '德康', 0), "
+            "(3, 'warehouse_receipt_常熟德康库', '常熟德康库', '常熟德康库', 0)"
+        ))
+        conn.execute(text(
+            "INSERT INTO fact_warehouse_receipt_daily VALUES "
+            "('2024-03-01', 1, 300), ('2024-03-01', 2, 200), ('2024-03-01', 3, 100), "
+            "('2024-03-04', 1, 250), ('2024-03-04', 2, 250), ('2024-03-05', 1, 240)"
+        ))
+
+    with engine.connect() as conn:
+        warehouses = load_receipt_warehouses(conn)
+        assert [w.display_name for w in warehouses] == ["总仓单量", "德康", "常熟德康库"]
+        assert [w.is_total for w in warehouses] == [True, False, False]
+
+        matrix = fetch_receipt_matrix(conn, warehouses[1:], end=date(2024, 3, 5), descending=True)
+        assert [(str(d), vals) for d, vals in matrix] == [
+            ("2024-03-04", [250.0, None]),
+            ("2024-03-01", [200.0, 100.0]),
+        ]
+        assert fetch_receipt_matrix(conn, []) == []
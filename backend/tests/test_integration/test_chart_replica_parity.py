@@ -0,0 +1,105 @@
+"""图表只读副本一致性：当前库导出 Parquet 副本后，主要图表接口经 DuckDB 与经 MySQL 的返回完全一致（数值容差内）"""
+import asyncio
+import logging
+import math
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.api import futures, price_display, supply_demand  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from import_tool.parquet_replica import export_replica  # noqa: E402
+
+USER = SimpleNamespace(id=1, username="parity")
+
+
+def _latest_contract(db):
+    return db.execute(text(
+        "SELECT contract_code FROM fact_futures_daily ORDER BY trade_date DESC, open_interest DESC LIMIT 1"
+    )).scalar() or "lh2505"
+
+
+CASES = {
+    "national-price": lambda db: price_display.get_national_price_seasonality(
+        start_year=None, end_year=None, db=db, current_user=USER),
+    "fat-std-spread": lambda db: price_display.get_fat_std_spread_seasonality(
+        start_year=None, end_year=None, region_code=None, db=db, current_user=USER),
+    "fat-std-spread-province": lambda db: price_display.get_fat_std_spread_province_seasonality(
+        province_name="广东", start_year=2020, end_year=None, db=db, current_user=USER),
+    "price-and-spread": lambda db: price_display.get_price_and_spread(
+        selected_years=None, db=db, current_user=USER),
+    "region-spread": lambda db: price_display.get_region_spread_seasonality(
+        region_pair="广东-广西", start_year=None, end_year=None, db=db, current_user=USER),
+    "province-indicators": lambda db: price_display.get_province_indicators_seasonality(
+        province_name="广东", start_year=None, end_year=None, db=db, current_user=USER),
+    "frozen-inventory": lambda db: price_display.get_frozen_inventory_province_seasonality(
+        province_name="广东", start_year=None, end_year=None, db=db, current_user=USER),
+    "industry-chain": lambda db: price_display.get_industry_chain_seasonality(
+        metric_name="出栏均重", start_year=None, end_year=None, db=db, current_user=USER),
+    "industry-chain-ratio": lambda db: price_display.get_industry_chain_seasonality(
+        metric_name="4#冻肉/白条", start_year=None, end_year=None, db=db, current_user=USER),
+    "supply-demand-curve": lambda db: supply_demand.get_supply_demand_curve(db=db),
+    "breeding-inventory-price": lambda db: supply_demand.get_breeding_inventory_price(db=db),
+    "piglet-price": lambda db: supply_demand.get_piglet_price(db=db),
+    "futures-daily": lambda db: futures.get_futures_daily(
+        contract=_latest_contract(db), from_date=None, to_date=None, current_user=USER, db=db),
+}
+
+
+@pytest.fixture(scope="module")
+def replica_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp("chart_replica")
+    export_replica(engine, root)
+    return root
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _call(case, db):
+    try:
+        return asyncio.run(CASES[case](db)).model_dump()
+    except HTTPException as e:
+        return {"status_code": e.status_code, "detail": e.detail}
+
+
+def _assert_close(actual, expected, path="$"):
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        # MySQL 对 DECIMAL 求均值与 DuckDB 的 DOUBLE 均值可能在末位不同，四位小数取整后允许 1 个单位误差
+        assert math.isclose(actual, expected, rel_tol=1e-6, abs_tol=2e-4), f"{path}: {actual} != {expected}"
+    elif isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for k in expected:
+            _assert_close(actual[k], expected[k], f"{path}.{k}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            _assert_close(a, e, f"{path}[{i}]")
+    else:
+        assert actual == expected, f"{path}: {actual!r} != {expected!r}"
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_replica_matches_mysql(case, db, replica_root, monkeypatch, caplog):
+    """测试同一接口在副本关闭 / 开启时返回一致，且开启时未回退 MySQL"""
+    monkeypatch.setattr(settings, "CHART_REPLICA_DIR", None)
+    expected = _call(case, db)
+
+    monkeypatch.setattr(settings, "CHART_REPLICA_DIR", str(replica_root))
+    with caplog.at_level(logging.WARNING, logger="app.services.chart_repository"):
+        actual = _call(case, db)
+    assert not [r for r in caplog.records if "fallback" in r.getMessage()]
+    _assert_close(actual, expected)
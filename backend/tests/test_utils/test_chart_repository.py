@@ -0,0 +1,42 @@
+"""图表查询仓储测试：MySQL 实现的 SQL 形态（SQLite 内存库）与副本不可用时回退"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services.chart_repository import MySQLChartRepository, ParquetChartRepository
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE fact_spread_daily (trade_date DATE, spread_type VARCHAR(64), region_code VARCHAR(32), value NUMERIC)"
+        ))
+        conn.execute(text(
+            "INSERT INTO fact_spread_daily VALUES "
+            "('2023-12-29', 'fat_std_spread', 'NATION', 0.5), ('2024-01-02', 'fat_std_spread', 'NATION', 0.6), "
+            "('2024-01-03', 'fat_std_spread', 'HENAN', 0.7), ('2025-01-02', 'fat_std_spread', 'NATION', NULL)"
+        ))
+    return Session(engine)
+
+
+def test_series_filters_by_equality_and_date_range():
+    """测试等值条件 + 日期范围过滤、按日期升序，非法列名直接拒绝"""
+    repo = MySQLChartRepository(_session())
+    filters = {"spread_type": "fat_std_spread", "region_code": "NATION"}
+    rows = repo.series("fact_spread_daily", filters, start=date(2024, 1, 1), end=date(2025, 12, 31))
+    assert [(str(d), v) for d, v in rows] == [("2024-01-02", 0.6), ("2025-01-02", None)]
+    assert len(repo.series("fact_spread_daily", filters)) == 3
+
+    with pytest.raises(ValueError):
+        repo.series("fact_spread_daily", {"region_code = 'x' OR 1": 1})
+
+
+def test_replica_falls_back_to_mysql(tmp_path):
+    """测试副本目录中缺少该表（或未安装 duckdb）时回退 MySQL，结果一致"""
+    mysql = MySQLChartRepository(_session())
+    replica = ParquetChartRepository(tmp_path, mysql)
+    filters = {"spread_type": "fat_std_spread", "region_code": "NATION"}
+    assert replica.series("fact_spread_daily", filters) == mysql.series("fact_spread_daily", filters)
@@ -0,0 +1,104 @@
+"""observation_upserter.DimensionCache 测试（SQLite 内存库）"""
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.services.ingestors.observation_upserter import DimensionCache
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE dim_metric (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                metric_group VARCHAR(32) NOT NULL, metric_name VARCHAR(64) NOT NULL, unit VARCHAR(32),
+                freq VARCHAR(16) NOT NULL, raw_header VARCHAR(500) NOT NULL, sheet_name VARCHAR(64),
+                source_updated_at VARCHAR(64), parse_json JSON, value_type VARCHAR(16),
+                preferred_agg VARCHAR(16), suggested_axis VARCHAR(8), display_precision VARCHAR(8),
+                seasonality_supported VARCHAR(8),
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (raw_header, sheet_name)
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE dim_geo (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, province VARCHAR(32) NOT NULL UNIQUE, region VARCHAR(32),
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text(
+            "INSERT INTO dim_metric (metric_group, metric_name, freq, raw_header, sheet_name, parse_json) VALUES "
+            "('province', '出栏价', 'D', '出栏价', 's1', '{\"metric_key\": \"HOG_PRICE\"}')"
+        ))
+        conn.execute(text("INSERT INTO dim_geo (province) VALUES ('广东'), ('四川')"))
+    return engine, Session(engine)
+
+
+def _obs(metric_name, metric_key, geo_code=None):
+    return {"metric_name": metric_name, "metric_key": metric_key, "period_type": "day", "geo_code": geo_code}
+
+
+def test_dimension_cache_preloads_and_batch_creates():
+    """测试维度预加载后内存命中，缺失 metric 一条语句批量创建，并按 metric_key 复用"""
+    engine, db = _session()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    cache = DimensionCache(db)
+    observations = [
+        _obs("出栏价", "HOG_PRICE", "广东"),
+        _obs("出栏价（别名）", "HOG_PRICE", "四川"),  # raw_header 不同但 metric_key 相同 → 复用已有
+        _obs("价差A", "SPREAD_A", "NATION"),
+        _obs("价差B", "SPREAD_B", "西藏"),
+        _obs("价差A", "SPREAD_A"),
+    ]
+    cache.resolve_metrics("s1", observations)
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert len(inserts) == 1
+
+    existing = cache.metric_id("s1", "出栏价")
+    assert cache.metric_id("s1", "出栏价（别名）") == existing
+    assert cache.metric_id("s1", "价差A") not in (None, existing)
+    assert cache.metric_id("s1", "价差B") not in (None, existing, cache.metric_id("s1", "价差A"))
+    assert db.execute(text("SELECT metric_group FROM dim_metric WHERE raw_header = '价差A'")).scalar() == "spread"
+
+    geo_ids = [cache.geo_id(o["geo_code"]) for o in observations]
+    assert geo_ids[0] and geo_ids[1] and geo_ids[2:] == [None, None, None]
+
+    selects = len([s for s in statements if s.startswith("SELECT")])
+    cache.resolve_metrics("s1", observations)  # 同一次导入再次解析：不再查询
+    assert len([s for s in statements if s.startswith("SELECT")]) == selects
+    assert dict(cache.stats) == {
+        "metric_hits": 8, "metric_misses": 2, "metric_created": 2, "geo_hits": 2, "geo_misses": 1,
+    }
+
+
+def test_resolve_metrics_leaves_commit_to_caller():
+    """测试批量创建只 flush 不提交调用方事务；调用方回滚后缓存失效，可重新解析"""
+    engine, db = _session()
+    db.execute(text("INSERT INTO dim_geo (province) VALUES ('湖南')"))  # 调用方尚未提交的改动
+
+    cache = DimensionCache(db)
+    cache.resolve_metrics("s1", [_obs("价差A", "SPREAD_A")])
+    assert cache.metric_id("s1", "价差A") is not None
+
+    db.rollback()
+    assert db.execute(text("SELECT COUNT(*) FROM dim_geo WHERE province = '湖南'")).scalar() == 0
+    assert db.execute(text("SELECT COUNT(*) FROM dim_metric WHERE raw_header = '价差A'")).scalar() == 0
+    assert not cache.is_resolved("s1", "价差A")
+
+    cache.resolve_metrics("s1", [_obs("价差A", "SPREAD_A")])
+    db.commit()
+    created = db.execute(text("SELECT id FROM dim_metric WHERE raw_header = '价差A'")).scalar()
+    assert created == cache.metric_id("s1", "价差A")
+
+
+def test_close_removes_rollback_listener():
+    """测试 close 注销会话上的回滚监听，同一会话反复使用缓存不会累积监听"""
+    engine, db = _session()
+    for _ in range(3):
+        with DimensionCache(db) as cache:
+            assert event.contains(db, "after_soft_rollback", cache._on_rollback)
+        assert not event.contains(db, "after_soft_rollback", cache._on_rollback)
+    assert not db.dispatch.after_soft_rollback
@@ -0,0 +1,68 @@
+"""流式导出（透视/周期聚合）测试"""
+import os
+from datetime import date
+
+import openpyxl
+from sqlalchemy import create_engine, event, text
+
+from app.core.metric_catalog import METRIC_CATALOG
+from app.services.export_service import ExportPlan, iter_csv, iter_pivot_rows, write_xlsx
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (d DATE, m INTEGER, r TEXT, s TEXT, v REAL)"))
+        conn.execute(text("INSERT INTO t VALUES (:d, :m, :r, :s, :v)"), [
+            {"d": "2026-01-05", "m": 1, "r": "NATION", "s": "YONGYI", "v": 10.0},
+            {"d": "2026-01-05", "m": 2, "r": "HENAN", "s": "", "v": 1.0},
+            {"d": "2026-01-06", "m": 1, "r": "NATION", "s": "YONGYI", "v": 14.0},
+            {"d": "2026-01-12", "m": 2, "r": "HENAN", "s": "", "v": 3.0},
+        ])
+    return engine
+
+
+def _plan(time_dimension="daily"):
+    return ExportPlan(
+        sql="SELECT d, m, r, s, v FROM t ORDER BY d",
+        params={},
+        time_dimension=time_dimension,
+        region_names={"NATION": "全国", "HENAN": "河南"},
+    )
+
+
+def test_pivot_daily_rows():
+    """测试按日期透视，缺失值为 None"""
+    rows = list(iter_pivot_rows(_engine(), _plan()))
+    assert rows == [
+        (date(2026, 1, 5), [10.0, 1.0]),
+        (date(2026, 1, 6), [14.0, None]),
+        (date(2026, 1, 12), [None, 3.0]),
+    ]
+
+
+def test_pivot_weekly_mean_and_csv():
+    """测试周度聚合取均值，CSV 输出表头与数据行"""
+    engine = _engine()
+    rows = list(iter_pivot_rows(engine, _plan("weekly")))
+    assert rows == [(date(2026, 1, 5), [12.0, 1.0]), (date(2026, 1, 12), [None, 3.0])]
+
+    content = b"".join(iter_csv(engine, _plan("weekly"))).decode("utf-8-sig").splitlines()
+    names = [m["metric_name"] for m in METRIC_CATALOG[:2]]
+    assert content[0] == f"日期,{names[0]}-全国-YONGYI,{names[1]}-河南"
+    assert content[2] == "2026-01-12,,3.0"
+
+
+def test_single_scan_and_detail_flag():
+    """测试导出查询只执行一次；include_detail=False 时不生成明细表与图表"""
+    engine = _engine()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    plan = _plan()
+    path = write_xlsx(engine, plan, include_detail=False)
+    try:
+        assert [sql for sql in statements if "FROM t" in sql] == [plan.sql]
+        assert openpyxl.load_workbook(path).sheetnames == ["封面", "汇总数据"]
+    finally:
+        os.remove(path)
@@ -0,0 +1,38 @@
+"""API 启动导入耗时回归测试（python -X importtime）"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# 只应在首次请求时加载的重型依赖
+DEFERRED_MODULES = ("pandas", "numpy", "openpyxl", "xlsxwriter", "lunar_python", "app.services.ingestors")
+
+# main:app 导入总耗时预算（毫秒），慢机器可用环境变量放宽
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "3000"))
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """子进程导入 module，返回 {模块名: 累计耗时(us)}"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+def test_main_import_defers_heavy_modules_and_fits_budget():
+    """测试导入 main 不加载重型依赖，且总耗时在预算内"""
+    cumulative = _importtime("main")
+    loaded = sorted(m for m in cumulative if any(m == d or m.startswith(d + ".") for d in DEFERRED_MODULES))
+    assert loaded == [], f"启动时加载了应延迟导入的模块: {loaded[:10]}"
+    assert cumulative["main"] / 1000 < IMPORT_TIME_BUDGET_MS, f"main 导入耗时 {cumulative['main'] / 1000:.0f}ms"
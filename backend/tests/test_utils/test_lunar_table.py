@@ -0,0 +1,18 @@
+"""农历查找表测试"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("lunar_python")
+
+from app.services import lunar_alignment_service as lunar  # noqa: E402
+
+
+def test_lunar_table_matches_per_day_conversion(monkeypatch):
+    """测试查找表与逐日调用 lunar-python 结果一致（含闰月、正月初九、腊月）"""
+    days = [date(2023, 1, 22), date(2023, 1, 30), date(2023, 3, 25), date(2024, 2, 8), date(2020, 5, 23)]
+    table_results = [lunar.solar_to_lunar(d) for d in days]
+    monkeypatch.setattr(lunar, "get_lunar_table", lambda: None)
+    assert table_results == [lunar.solar_to_lunar(d) for d in days]
+    assert table_results[1]["lunar_day_index"] == 1
+    assert table_results[2]["is_leap_month"] and table_results[2]["lunar_day_index"] is None
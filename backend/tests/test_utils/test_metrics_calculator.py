@@ -0,0 +1,80 @@
+"""指标预计算（向量化）测试"""
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.services.metrics_calculator import compute_metrics_frame
+
+
+def _daily_frame(start: date, values: list, indicator="hog_price", region="NATION"):
+    return pd.DataFrame({
+        "indicator_code": indicator,
+        "region_code": region,
+        "date_key": [start + timedelta(days=i) for i in range(len(values))],
+        "value": values,
+    })
+
+
+def test_daily_changes_use_calendar_offsets():
+    """测试日频变化量按日历偏移精确匹配，缺失日期不补值"""
+    df = _daily_frame(date(2026, 1, 1), [float(i) for i in range(40)])
+    df = df[df["date_key"] != date(2026, 1, 30)]  # 挖掉一天
+    out = compute_metrics_frame(df, "D").set_index("date_key")
+
+    row = out.loc[date(2026, 2, 5)]  # value = 35
+    assert row["chg_1"] == pytest.approx(1.0)
+    assert row["chg_5"] == pytest.approx(5.0)
+    assert row["chg_30"] == pytest.approx(30.0)
+    assert pd.isna(out.loc[date(2026, 1, 31), "chg_1"])  # 前一天缺失
+    # 环比：1/5 与 2/5 对比
+    assert row["mom"] == pytest.approx((35 - 4) / 4 * 100)
+
+
+def test_groups_are_independent_and_yoy():
+    """测试多指标/多区域一次计算互不串值，同比取去年同日"""
+    a = _daily_frame(date(2025, 3, 1), [10.0, 11.0], region="HENAN")
+    b = _daily_frame(date(2026, 3, 1), [12.0, 22.0], region="HENAN")
+    c = _daily_frame(date(2026, 3, 1), [100.0, 100.0], region="SHANDONG")
+    out = compute_metrics_frame(pd.concat([a, b, c]), "D")
+
+    henan = out[(out["region_code"] == "HENAN") & (out["date_key"] == date(2026, 3, 2))].iloc[0]
+    assert henan["chg_1"] == pytest.approx(10.0)
+    assert henan["yoy"] == pytest.approx((22 - 11) / 11 * 100)
+    shandong = out[(out["region_code"] == "SHANDONG") & (out["date_key"] == date(2026, 3, 2))].iloc[0]
+    assert shandong["chg_1"] == pytest.approx(0.0)
+    assert pd.isna(shandong["yoy"])
+
+
+def test_weekly_yoy_matches_nearest_week():
+    """测试周频同比匹配去年同期附近的一周"""
+    df = pd.DataFrame({
+        "indicator_code": "piglet_price",
+        "region_code": "NATION",
+        "date_key": [date(2025, 1, 10), date(2026, 1, 8)],
+        "value": [20.0, 30.0],
+    })
+    out = compute_metrics_frame(df, "W").set_index("date_key")
+    assert out.loc[date(2026, 1, 8), "yoy"] == pytest.approx(50.0)
+
+
+def test_bulk_upsert_refreshes_update_time():
+    """测试重算命中已有行时同时刷新 update_time"""
+    from sqlalchemy.dialects import mysql
+
+    from app.services.metrics_calculator import _bulk_upsert_metrics
+
+    class _Recorder:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, stmt):
+            self.statements.append(str(stmt.compile(dialect=mysql.dialect())))
+
+        def commit(self):
+            pass
+
+    df = _daily_frame(date(2026, 1, 1), [1.0, 2.0])
+    db = _Recorder()
+    assert _bulk_upsert_metrics(db, compute_metrics_frame(df, "D"), "D") == 2
+    assert "update_time = now()" in db.statements[0]
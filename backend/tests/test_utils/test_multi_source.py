@@ -0,0 +1,26 @@
+"""多渠道汇总（月份 × 字段矩阵）测试"""
+import pandas as pd
+import pytest
+
+from app.api.multi_source import _build_month_field_matrix
+
+_COLS = ["month", "indicator_code", "source", "sub_category", "region_code", "value_type", "value"]
+
+
+def test_mom_rows_take_precedence_over_abs_derived():
+    """测试 mom 行直接映射（含 sub_category 回退），abs 行按上一有值月份计算环比并只补空"""
+    df = pd.DataFrame([
+        ("2025-01", "breeding_sow_feed", "YONGYI", "other", "NATION", "mom", 1.234),
+        ("2025-01", "cull_slaughter", "YONGYI", "", "NATION", "abs", 100.0),
+        ("2025-03", "cull_slaughter", "YONGYI", "", "NATION", "abs", 110.0),
+        ("2025-04", "cull_slaughter", "YONGYI", "", "NATION", "abs", 99.0),
+        ("2025-04", "cull_slaughter", "YONGYI", "", "NATION", "mom_pct", -5.0),
+        ("2025-04", "unmapped", "YONGYI", "", "NATION", "mom", 9.0),
+    ], columns=_COLS)
+    m = _build_month_field_matrix(df)
+
+    assert list(m.index) == ["2025-01", "2025-03", "2025-04"]
+    assert m.loc["2025-01", "breeding_feed_yongyi"] == pytest.approx(1.23)
+    assert pd.isna(m.loc["2025-01", "cull_slaughter_yongyi"])  # 首月无环比
+    assert m.loc["2025-03", "cull_slaughter_yongyi"] == pytest.approx(10.0)  # 跳过缺失的 2 月
+    assert m.loc["2025-04", "cull_slaughter_yongyi"] == pytest.approx(-5.0)  # mom_pct 优先
@@ -0,0 +1,54 @@
+"""期权分析服务测试：批量 IV 求解、greeks 与 ATM/25Δ skew"""
+import numpy as np
+import pandas as pd
+
+from app.services import options_analytics_service as oa
+
+
+def test_implied_vol_recovers_sigma_and_rejects_arbitrage():
+    """测试批量 IV 对实值/虚值 call/put 都能还原波动率，违反无套利边界的价格为 NaN"""
+    F = 15000.0
+    K = np.array([12000, 14000, 15000, 16000, 18000] * 2, dtype=float)
+    is_call = np.array([True] * 5 + [False] * 5)
+    sigma = np.array([0.45, 0.35, 0.3, 0.28, 0.32] * 2)
+    T, r = 0.4, 0.015
+    price = oa.black76_price(F, K, T, r, sigma, is_call)
+
+    iv = oa.implied_vol(price, F, K, T, r, is_call)
+    assert np.allclose(iv, sigma, atol=1e-6)
+
+    bad = oa.implied_vol(np.array([100.0, 10.0]), F, np.array([12000.0, 15000.0]), np.array([T, 0.0]), r,
+                         np.array([True, True]))
+    assert np.isnan(bad).all()  # 低于内在价值 / 已到期
+
+
+def test_surface_skew_on_synthetic_smile():
+    """测试曲面计算：到期日按交割月前一月第 12 个工作日，put 侧波动率更高时 skew 为正"""
+    F = 15000.0
+    strikes = np.arange(11000, 19001, 250, dtype=float)
+    trade_date = pd.Timestamp("2025-10-10")
+    expiry = oa.expiry_dates(np.array(["lh2603"]))[0]
+    assert str(expiry) == "2026-02-17"
+    T = (expiry - np.datetime64("2025-10-10")).astype(float) / 365.0
+
+    rows = []
+    for option_type in ("C", "P"):
+        m = np.log(strikes / F)
+        sigma = 0.30 - 0.15 * m + 0.3 * m * m
+        price = oa.black76_price(F, strikes, T, 0.015, sigma, option_type == "C")
+        for k, p in zip(strikes, price):
+            rows.append({
+                "trade_date": trade_date, "underlying_contract": "lh2603", "option_type": option_type,
+                "strike": k, "price": p, "underlying_price": F,
+            })
+    surface = oa.compute_surface(pd.DataFrame(rows), rate=0.015)
+    assert surface["iv"].notna().all()
+    calls = surface[surface["option_type"] == "C"]
+    assert ((calls["delta"] > 0) & (calls["delta"] < 1)).all() and (surface["gamma"] > 0).all()
+
+    skew = oa.skew_table(surface)
+    assert len(skew) == 1
+    row = skew.iloc[0]
+    assert abs(row["atm_iv"] - 30.0) < 0.1
+    assert row["iv_put_25d"] > row["atm_iv"] > row["iv_call_25d"]
+    assert row["skew_25d"] > 0
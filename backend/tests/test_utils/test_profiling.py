@@ -0,0 +1,34 @@
+"""采样剖析测试"""
+import threading
+import time
+
+from app.core.profiling import StackSampler, collapsed_text, hot_functions
+
+
+def _busy_leaf(deadline):
+    x = 0
+    while time.perf_counter() < deadline:
+        x += 1
+    return x
+
+
+def _fake_endpoint(deadline):
+    return _busy_leaf(deadline)
+
+
+def test_sampler_collects_stacks_only_under_anchor():
+    """测试只记录经过锚点函数的栈，且从锚点开始折叠"""
+    sampler = StackSampler(0.001, {_fake_endpoint.__code__: "/api/fake"})
+    worker = threading.Thread(target=_fake_endpoint, args=(time.perf_counter() + 0.3,))
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    stacks = sampler.stacks()
+    assert set(stacks) == {"/api/fake"}
+    top_stack = stacks["/api/fake"].most_common(1)[0][0]
+    assert top_stack.startswith("_fake_endpoint (") and "_busy_leaf" in top_stack
+    assert "threading" not in collapsed_text(stacks["/api/fake"])
+    hot = hot_functions(stacks["/api/fake"])
+    assert hot[0]["function"].startswith("_busy_leaf") and hot[0]["self_pct"] > 50
@@ -0,0 +1,45 @@
+"""导入进度总线测试：跨线程发布即时唤醒 SSE 订阅方，无变化时产出心跳"""
+import asyncio
+import threading
+import time
+
+from app.services.ingest_task_progress import ProgressBus
+
+
+def test_subscribe_wakes_on_publish_from_worker_thread():
+    """测试后台线程 publish 后订阅方立即收到最新快照，空闲时产出 None 心跳，完成后结束"""
+    bus = ProgressBus()
+    bus.publish("t1", {"status": "processing", "message": "准备中..."})
+
+    def _worker():
+        time.sleep(0.05)
+        bus.publish("t1", {"status": "processing", "message": "已解析 sheet1"})
+        time.sleep(0.3)
+        bus.publish("t1", {"status": "done", "success": True, "message": "全部导入完成"})
+
+    async def _collect():
+        events = []
+        t0 = time.perf_counter()
+        async for p in bus.subscribe("t1", heartbeat_sec=0.2):
+            events.append((p and p["message"], time.perf_counter() - t0))
+        return events
+
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    events = asyncio.run(_collect())
+    thread.join()
+
+    messages = [m for m, _ in events]
+    assert messages == ["准备中...", "已解析 sheet1", None, "全部导入完成"]
+    assert events[1][1] < 0.2  # 不等心跳即送达
+    assert bus.get("t1")["status"] == "done"  # 已完成任务保留一段时间，供新连接读取最终状态
+
+    async def _late():
+        return [p async for p in bus.subscribe("t1", heartbeat_sec=0.2)]
+
+    assert [p["message"] for p in asyncio.run(_late())] == ["全部导入完成"]
+
+    async def _missing():
+        return [p async for p in ProgressBus().subscribe("missing", heartbeat_sec=0.2)]
+
+    assert asyncio.run(_missing()) == []
@@ -0,0 +1,34 @@
+"""报告产物缓存测试"""
+import os
+
+from app.services.report_job_service import LocalArtifactStore, report_cache_key
+
+
+def test_cache_key_ignores_param_order_and_tracks_data_version():
+    """测试缓存键与参数顺序无关，数据版本或参数变化时失效"""
+    config = {"sheets": [{"name": "封面", "type": "cover"}]}
+    key = report_cache_key(1, config, {"years": [2024, 2025], "region": "NATION"}, "42")
+    assert key == report_cache_key(1, config, {"region": "NATION", "years": [2024, 2025]}, "42")
+    assert key != report_cache_key(1, config, {"region": "NATION", "years": [2024, 2025]}, "43")
+    assert key != report_cache_key(1, config, {"region": "GD", "years": [2024, 2025]}, "42")
+
+
+def test_local_artifact_store_put_get_and_prune(tmp_path):
+    """测试产物原子落盘、按键读取与按最近使用时间清理"""
+    store = LocalArtifactStore(str(tmp_path))
+    key = "ab" + "0" * 62
+    assert store.get(key) is None
+
+    tmp = store.temp_path(key)
+    with open(tmp, "wb") as f:
+        f.write(b"xlsx")
+    path = store.put(key, tmp)
+    assert store.get(key) == path and not os.path.exists(tmp)
+    assert os.path.dirname(path).endswith("ab")
+
+    os.utime(path, (0, 0))
+    assert store.get(key) == path  # 命中刷新 mtime，仍在使用的产物不被清理
+    assert store.prune(max_age_days=1) == 0
+
+    os.utime(path, (0, 0))
+    assert store.prune(max_age_days=1) == 1 and store.get(key) is None
@@ -0,0 +1,60 @@
+"""SheetTableImporter 批量写入测试（模拟会话：按唯一键 d 执行 INSERT IGNORE）"""
+from contextlib import nullcontext
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy.types import Date, Numeric, String
+
+from app.services.sheet_table_importer import SheetTableImporter
+
+
+class _FakeSession:
+    def __init__(self):
+        self.rows = {}
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, stmt, params):
+        batch = params if isinstance(params, list) else [params]
+        self.statements.append((str(stmt), len(batch)))
+        inserted = 0
+        for row in batch:
+            if row["d"] not in self.rows:
+                self.rows[row["d"]] = row
+                inserted += 1
+        return SimpleNamespace(rowcount=inserted)
+
+    def begin_nested(self):
+        return nullcontext()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_import_to_table_counts_match_row_by_row_semantics():
+    """测试多行写入的插入/忽略/错误计数与逐行 INSERT IGNORE 一致，并按列类型转换"""
+    db = _FakeSession()
+    importer = SheetTableImporter(db, chunk_size=4)
+    importer._schemas["t"] = {"d": Date(), "v": Numeric(10, 2), "note": String(20)}
+    records = [
+        {"d": "2024-01-02", "v": "15.5"},
+        {"d": date(2024, 1, 3), "v": np.int64(16)},
+        {"d": "2024-01-02", "v": 99},            # 同块内重复：先到先得
+        {"d": date(2024, 1, 4), "v": None, "note": "x"},
+        {"unknown": 1},                          # 无可写列
+        {"d": date(2024, 1, 3), "v": "-"},       # 跨块重复；无法解析的数值原样交给数据库
+    ]
+
+    result = importer.import_to_table("t", records, unique_key=["d"])
+
+    assert result == {"inserted": 3, "ignored": 2, "updated": 0, "errors": 1}
+    assert db.rows[date(2024, 1, 2)]["v"] == 15.5
+    assert type(db.rows[date(2024, 1, 3)]["v"]) is float
+    assert db.rows[date(2024, 1, 4)] == {"d": date(2024, 1, 4), "v": None, "note": "x"}
+    # 列集合不同的连续记录分别成句；每块提交一次
+    assert [n for _, n in db.statements] == [3, 1, 1]
+    assert db.commits == 2
@@ -0,0 +1,52 @@
+"""请求级 SQL 埋点测试（SQLite 内存库）"""
+from sqlalchemy import create_engine, text
+
+from app.core import sql_instrumentation as si
+from app.core.config import settings
+
+
+def test_request_stats_and_slow_query_capture(monkeypatch):
+    """测试请求内统计语句数/行数，且超过阈值的 SELECT 带参数与 EXPLAIN 进入环形缓冲"""
+    engine = create_engine("sqlite://")
+    si.instrument_engine(engine)
+    si.instrument_engine(engine)  # 重复注册不应重复计数
+    log = si.SlowQueryLog(maxlen=2)
+    monkeypatch.setattr(si, "slow_query_log", log)
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 1e9)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER, v REAL)"))
+        conn.execute(text("INSERT INTO t VALUES (:id, :v)"), [{"id": i, "v": i * 1.5} for i in range(5)])
+        stats, token = si.begin_request("/api/test")
+        try:
+            conn.execute(text("SELECT * FROM t")).fetchall()
+            monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0.000001)
+            conn.execute(text("SELECT v FROM t WHERE id = :id"), {"id": 3}).fetchall()
+        finally:
+            si.end_request(token)
+        conn.execute(text("SELECT 1"))  # 请求外：不计入 stats，仍进入慢查询缓冲
+
+    assert stats.statements == 2
+    assert 'db;dur=' in stats.server_timing() and "2 queries" in stats.server_timing()
+    items = log.snapshot()
+    assert len(items) == 2 and items[0]["path"] is None
+    assert items[1]["path"] == "/api/test" and "3" in items[1]["parameters"]
+    assert items[1]["explain"]
+
+
+def test_unbuffered_cursor_rowcount_not_counted(monkeypatch):
+    """测试服务端游标的未知 rowcount（2**64 - 1）与 stream_results 查询不计入行数"""
+    import time
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+    stats, token = si.begin_request("/api/export")
+    try:
+        for rowcount, options in ((2 ** 64 - 1, {}), (7, {"stream_results": True}), (3, {})):
+            conn = SimpleNamespace(info={"query_start": [time.perf_counter()]})
+            cursor = SimpleNamespace(description=[("d",)], rowcount=rowcount)
+            context = SimpleNamespace(execution_options=options)
+            si._after_cursor_execute(conn, cursor, "SELECT d FROM t", {}, context, False)
+    finally:
+        si.end_request(token)
+    assert stats.statements == 3 and stats.rows == 3
@@ -0,0 +1,43 @@
+"""模板 block 并发执行测试"""
+import threading
+import time
+
+from app.services import template_executor
+
+
+class _FakeDb:
+    def get_bind(self):
+        return None
+
+
+def test_independent_blocks_run_concurrently_and_keep_order(monkeypatch):
+    """测试独立 block 并发执行（耗时约等于最慢 block）、summary 等前面 block 完成后执行、结果保持原始顺序"""
+    finished = []
+    sessions = []
+    lock = threading.Lock()
+
+    def fake_block(db, block, resolved_params):
+        time.sleep(block["sleep"])
+        with lock:
+            sessions.append(db)
+            finished.append(block["block_id"])
+        return {"type": block["type"], "data": {"id": block["block_id"]}}
+
+    monkeypatch.setattr(template_executor, "resolve_template_params", lambda t, p, db: p)
+    monkeypatch.setattr(template_executor, "_execute_block", fake_block)
+    template = {"template_id": "T", "name": "t", "blocks": [
+        {"block_id": "a", "type": "timeseries", "sleep": 0.3},
+        {"block_id": "b", "type": "seasonality", "sleep": 0.1},
+        {"block_id": "c", "type": "timeseries", "sleep": 0.2},
+        {"block_id": "s", "type": "summary", "sleep": 0.0},
+    ]}
+
+    caller_db = _FakeDb()
+    start = time.perf_counter()
+    result = template_executor.execute_template(caller_db, template, {}, max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert list(result["blocks"]) == ["a", "b", "c", "s"]
+    assert finished[:3] == ["b", "c", "a"] and finished[-1] == "s"
+    assert len({id(db) for db in sessions}) == 4 and caller_db not in sessions
+    assert elapsed < 0.5
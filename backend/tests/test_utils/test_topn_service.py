@@ -0,0 +1,51 @@
+"""TopN 截面排名测试"""
+import numpy as np
+
+from app.services.topn_service import _streaks, _top_k
+
+
+def test_top_k_skips_nan_and_orders():
+    """测试 argpartition 取前 k：NaN 不参与，结果有序"""
+    scores = np.array([1.0, np.nan, 5.0, -2.0, 3.0])
+    assert _top_k(scores, 2, ascending=False).tolist() == [2, 4]
+    assert _top_k(scores, 2, ascending=True).tolist() == [3, 0]
+    assert _top_k(scores, 10, ascending=False).tolist() == [2, 4, 0, 3]
+
+
+def test_streaks_stop_on_reversal_or_gap():
+    """测试连续涨跌天数：反向、持平或缺失即停止"""
+    block = np.array([
+        [1.0, 5.0, 1.0],
+        [2.0, 4.0, np.nan],
+        [3.0, 4.5, 2.0],
+        [4.0, 4.0, 3.0],
+    ])
+    streak, direction = _streaks(block)
+    assert streak.tolist() == [3, 1, 1]
+    assert direction.tolist() == [1, -1, 1]
+
+
+def test_build_index_uses_single_source():
+    """测试未指定数据源时只取省份数据最多的一个源，不同源的值不做平均"""
+    from sqlalchemy import create_engine, text
+
+    from app.core.metric_catalog import METRIC_CATALOG
+    from app.services.topn_service import _build_index
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE fact_price_daily (trade_date DATE, region_code TEXT, source TEXT, price_type TEXT, value REAL)"
+        ))
+        conn.execute(text("INSERT INTO fact_price_daily VALUES (:d, :r, :s, '标猪均价', :v)"), [
+            {"d": "2026-01-01", "r": "HENAN", "s": "GANGLIAN", "v": 10.0},
+            {"d": "2026-01-01", "r": "SHANDONG", "s": "GANGLIAN", "v": 11.0},
+            {"d": "2026-01-01", "r": "HENAN", "s": "YONGYI", "v": 20.0},
+        ])
+    metric_id = next(i for i, m in enumerate(METRIC_CATALOG, 1) if m["code"] == "标猪均价")
+
+    index = _build_index(engine, metric_id, None)
+    assert index.source == "GANGLIAN"
+    assert index.regions == ["HENAN", "SHANDONG"]
+    assert index.values.tolist() == [[10.0, 11.0]]
+    assert _build_index(engine, metric_id, "YONGYI").values.tolist() == [[20.0]]
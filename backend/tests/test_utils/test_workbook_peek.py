@@ -0,0 +1,45 @@
+"""工作簿首行窥视 / 模板识别测试"""
+from io import BytesIO
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from app.services import ingest_template_detector  # noqa: E402
+from app.services.ingest_preview_service import preview_excel  # noqa: E402
+from app.services.ingest_template_detector import detect_template  # noqa: E402
+from app.utils.workbook_peek import WorkbookPeek  # noqa: E402
+
+
+def _workbook_bytes() -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "指标"
+    ws.append(["钢联数据", None, None])
+    for i in range(50):
+        ws.append([f"2024-01-{i % 28 + 1:02d}", i, None])
+    daily = wb.create_sheet("价格+宰量")
+    daily.append(["日期", "全国均价", None, "全国均价"])
+    for i in range(30):
+        daily.append([f"2024-02-{i % 28 + 1:02d}", 15 + i / 10, None, 1])
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_peek_reads_bounded_rows_and_detects_template(monkeypatch):
+    """测试只读取前 max_rows 行、去掉全空尾列，且识别与预览共用同一份结果"""
+    monkeypatch.setattr(ingest_template_detector, "_debug_log", lambda *a, **k: None)
+    content = _workbook_bytes()
+    with WorkbookPeek(content, max_rows=5) as peek:
+        assert peek.sheet_names == ["指标", "价格+宰量"]
+        head = peek.head("指标")
+        assert len(head) == 5 and all(len(r) == 2 for r in head)
+        assert peek.dimensions("价格+宰量") == (31, 4)
+        assert detect_template(content, "upload.xlsx", peek=peek) == "GANGLIAN_DAILY"
+
+    preview = preview_excel(content, None, "upload.xlsx")
+    sheet = preview["sheets"][1]
+    assert preview["template_type"] == "GANGLIAN_DAILY"
+    assert sheet["columns"] == ["日期", "全国均价", "Unnamed: 2", "全国均价.1"]
+    assert sheet["rows"] == 10 and sheet["total_rows"] == 31
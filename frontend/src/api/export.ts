@@ -12,6 +12,7 @@ export interface ExportRequest {
   tags_filter?: Record<string, any>
   group_by?: string[]
   time_dimension?: 'daily' | 'weekly' | 'monthly' | 'quarterly' | 'yearly'
+  format?: 'xlsx' | 'csv'
   include_detail?: boolean
   include_summary?: boolean
   include_chart?: boolean
@@ -26,7 +27,7 @@ export const exportApi = {
       const url = window.URL.createObjectURL(blob)
       const link = document.createElement('a')
       link.href = url
-      link.download = `hogprice_export_${new Date().getTime()}.xlsx`
+      link.download = `hogprice_export_${new Date().getTime()}.${params.format || 'xlsx'}`
       link.click()
       window.URL.revokeObjectURL(url)
     })
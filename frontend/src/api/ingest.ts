@@ -7,6 +7,9 @@ export interface PreviewResponse {
     rows: number
     columns: string[]
     sample_data?: any[]
+    /** sheet 声明的总行列数（含表头），预览只读取前几行 */
+    total_rows?: number | null
+    total_columns?: number | null
     error?: string
   }>
   date_range: {
@@ -41,6 +44,21 @@ export interface BatchDetail extends BatchInfo {
     message: string
   }>
   mapping: any
+  duration_ms?: number | null
+  /** 分段计时：sheet 解析（kind=sheet）、单表写入（kind=write，含临时表加载/upsert 耗时）、派生数据维护（kind=derived） */
+  stages?: ImportStage[]
+}
+
+export interface ImportStage {
+  kind: 'sheet' | 'write' | 'derived'
+  name: string
+  table_name: string | null
+  row_count: number
+  duration_ms: number | null
+  load_ms: number | null
+  upsert_ms: number | null
+  status: string
+  error_msg: string | null
 }
 
 /** 获取 API 基础 URL（用于 EventSource 等） */
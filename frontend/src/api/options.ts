@@ -14,6 +14,42 @@ export interface OptionsDailyResponse {
   }>
 }
 
+export interface OptionsSurfacePoint {
+  trade_date: string
+  underlying_contract: string
+  option_code: string
+  option_type: string
+  strike: number
+  expiry: string | null
+  T: number | null
+  price: number | null
+  underlying_price: number | null
+  iv: number | null
+  iv_exchange: number | null
+  delta: number | null
+  gamma: number | null
+  vega: number | null
+  volume: number | null
+  open_interest: number | null
+}
+
+export interface OptionsSkewRow {
+  trade_date: string
+  underlying_contract: string
+  expiry: string | null
+  underlying_price: number | null
+  atm_iv: number | null
+  iv_call_25d: number | null
+  iv_put_25d: number | null
+  skew_25d: number | null
+}
+
+export interface OptionsSurfaceResponse {
+  trade_dates: string[]
+  points: OptionsSurfacePoint[]
+  skew: OptionsSkewRow[]
+}
+
 export const optionsApi = {
   getOptionsDaily: (params: {
     underlying: string
@@ -23,5 +59,13 @@ export const optionsApi = {
     to_date?: string
   }): Promise<OptionsDailyResponse> => {
     return request.get('/options/daily', { params })
+  },
+  getOptionsSurface: (params: {
+    underlying?: string
+    from_date?: string
+    to_date?: string
+    rate?: number
+  }): Promise<OptionsSurfaceResponse> => {
+    return request.get('/options/surface', { params })
   }
 }
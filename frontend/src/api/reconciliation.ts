@@ -1,10 +1,26 @@
 import request from './request'
 
-export interface MissingDatesResponse {
-  indicator_code: string
+export interface FindingsQuery {
+  indicator_code: string | null
   region_code: string | null
-  freq: string
-  missing_dates: string[]
+  freq: string | null
+  source: string | null
+  start_date: string | null
+  end_date: string | null
+}
+
+export interface MissingDatesResponse {
+  query: FindingsQuery
+  gaps: Array<{
+    table_name: string
+    indicator_code: string
+    region_code: string
+    source: string
+    start_date: string
+    end_date: string
+    missing_periods: number
+  }>
+  total: number
   total_missing: number
 }
 
@@ -19,26 +35,33 @@ export interface DuplicatesResponse {
 }
 
 export interface AnomaliesResponse {
-  indicator_code: string
+  query: FindingsQuery
   anomalies: Array<{
+    table_name: string
     indicator_code: string
     region_code: string
+    source: string
     date: string
     value: number
-    mean: number
-    std: number
-    deviation: number
+    change: number | null
+    mean: number | null
+    std: number | null
+    deviation: number | null  // 仅因超出 min_value / max_value 返回时为空
   }>
+  total: number
   threshold_config: any
 }
 
 export const reconciliationApi = {
   getMissingDates: (params: {
-    indicator_code: string
+    indicator_code?: string
     region_code?: string
     freq?: string
+    source?: string
     start_date?: string
     end_date?: string
+    limit?: number
+    offset?: number
   }): Promise<MissingDatesResponse> => {
     return request.get('/reconciliation/missing', { params })
   },
@@ -54,11 +77,17 @@ export const reconciliationApi = {
   },
 
   getAnomalies: (params: {
-    indicator_code: string
+    indicator_code?: string
     region_code?: string
+    freq?: string
+    source?: string
+    start_date?: string
+    end_date?: string
     min_value?: number
     max_value?: number
     std_multiplier?: number
+    limit?: number
+    offset?: number
   }): Promise<AnomaliesResponse> => {
     return request.get('/reconciliation/anomalies', { params })
   }
@@ -1,7 +1,8 @@
 import request from './request'
 
 export interface TopNItem {
-  dimension_id: number
+  dimension_id: number | null
+  dimension_code?: string
   dimension_name: string
   latest_value: number | null
   baseline_value: number | null
@@ -9,6 +10,7 @@ export interface TopNItem {
   pct_change?: number | null
   streak_days?: number
   streak_direction?: 'up' | 'down'
+  seasonal_percentile?: number | null
   rank: number
 }
 
@@ -18,6 +20,8 @@ export interface TopNResponse {
   dimension: string
   rank_by: string
   window_days: number
+  latest_date?: string
+  baseline_date?: string | null
   items: TopNItem[]
 }
 
@@ -26,7 +30,13 @@ export interface TopNRequest {
   dimension: 'geo' | 'company' | 'warehouse'
   window_days?: number
   rank_by?: 'delta' | 'pct_change' | 'seasonal_percentile' | 'streak'
-  filters?: Record<string, any>
+  filters?: {
+    source?: string
+    end_date?: string
+    order?: 'desc' | 'asc'
+    region_codes?: string[]
+    [key: string]: any
+  }
   topk?: number
 }
 
@@ -7,6 +7,11 @@ export interface TimeSeriesResponse {
   series: Array<{
     date: string
     value: number | null
+    /** 日度指标按 freq=W/M 查询时返回的周期汇总 */
+    min?: number
+    max?: number
+    last?: number
+    count?: number
   }>
   update_time: string | null
   metrics?: {
@@ -26,6 +31,7 @@ export const tsApi = {
     from_date?: string
     to_date?: string
     include_metrics?: boolean
+    agg?: 'avg' | 'min' | 'max' | 'last'
   }): Promise<TimeSeriesResponse> => {
     return request.get('/ts', { params })
   }
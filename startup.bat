@@ -27,7 +27,7 @@ if not exist "%FRONTEND%\node_modules" (
 )
 
 echo [1/2] Starting backend (http://localhost:8000)...
-start "HogPrice Backend" /min cmd /k "cd /d "%BACKEND%" && call env\Scripts\activate && python -m uvicorn main:app --host 0.0.0.0 --port 8000"
+start "HogPrice Backend" /min cmd /k "cd /d "%BACKEND%" && call env\Scripts\activate && python serve.py"
 
 timeout /t 3 /nobreak >nul
 